@@ -0,0 +1,439 @@
+"""
+端到端爬取吞吐量測試：在本機啟動 benchmarks/mock_server.py，把五個平台的分類爬取入口
+(crawl_and_store_category_urls、CategoryCrawler.run、task_start_cakeresume_crawl_chain、
+task_start_yes123_crawl_chain、crawl_and_store_yourator_category_urls) 指向它，寫入 SQLite
+(預設，每個平台一個暫存檔) 或 --db-url 指定的 MySQL，量測：
+
+- 吞吐量：HTTP 頁數/秒、解析出的職缺數/秒、資料庫寫入的影響列數/秒
+- 各階段 (HTTP、解析函式、各個 repository 寫入函式、單一 SQL 語句) 的 p50 / p99 延遲
+- 峰值 RSS 與 SQL 語句數 (依 SELECT / INSERT / UPDATE / DELETE 分類)
+
+每個平台在獨立的子行程中執行，峰值 RSS 與模組層級的狀態 (快取、限流器) 互不影響。
+結果以 JSON 輸出；指定 --baseline 時與先前的結果比較，任一指標退化超過 --tolerance 時
+以狀態碼 1 結束，供 CI 標記效能退化。
+
+    python -m benchmarks.bench_crawl_e2e --pages 5 --categories 2 --output bench_crawl.json
+    python -m benchmarks.bench_crawl_e2e --db-url "mysql+pymysql://root:pw@127.0.0.1:3306/{db_name}" --baseline bench_crawl.json
+"""
+import argparse
+import importlib
+import json
+import math
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# 子行程以 spawn 啟動，crawler 的模組只能在套用設定之後才匯入，這裡不可匯入任何 crawler 模組
+
+
+@dataclass(frozen=True)
+class PlatformBenchmark:
+    """一個平台的爬取入口與要計時的函式 (皆為 task 模組中的名稱，依模組全域變數替換)。"""
+    task_module: str
+    source_platform: str
+    # 產生測試類別 ID 的格式，{} 代入序號
+    category_id_format: str
+    run: Callable[[Any, Dict[str, Any], str], Any]
+    # 解析函式，第一個是產出 JobPydantic 的主要解析器 (用來計算職缺數)
+    parse_functions: Tuple[str, ...]
+
+
+def _run_104(module, category: Dict[str, Any], db_name: str) -> None:
+    module.crawl_and_store_category_urls(category, db_name_override=db_name)
+
+
+def _run_1111(module, category: Dict[str, Any], db_name: str) -> None:
+    module.crawl_and_store_1111_category_urls(category, db_name_override=db_name)
+
+
+def _run_cakeresume(module, category: Dict[str, Any], db_name: str) -> None:
+    module.task_start_cakeresume_crawl_chain(category, db_name=db_name)
+
+
+def _run_yes123(module, category: Dict[str, Any], db_name: str) -> None:
+    module.task_start_yes123_crawl_chain(category, db_name=db_name)
+
+
+def _run_yourator(module, category: Dict[str, Any], db_name: str) -> None:
+    module.crawl_and_store_yourator_category_urls(category, db_name_override=db_name)
+
+
+PLATFORMS: Dict[str, PlatformBenchmark] = {
+    "104": PlatformBenchmark(
+        "crawler.project_104.task_urls_104", "platform_104", "2007001{:03d}", _run_104,
+        ("parse_job_item_to_pydantic",),
+    ),
+    "1111": PlatformBenchmark(
+        "crawler.project_1111.task_urls_1111", "platform_1111", "1401{:02d}", _run_1111,
+        ("parse_job_list_json_to_pydantic", "parse_job_detail_html_to_pydantic"),
+    ),
+    "cakeresume": PlatformBenchmark(
+        "crawler.project_cakeresume.task_urls_cakeresume", "platform_cakeresume", "bench_category_{}", _run_cakeresume,
+        ("parse_job_details_to_pydantic", "extract_job_details_from_html", "_parse_job_urls"),
+    ),
+    "yes123": PlatformBenchmark(
+        "crawler.project_yes123.task_urls_yes123", "platform_yes123", "2_1011_{:04d}_0000", _run_yes123,
+        ("parse_job_details_to_pydantic", "scrape_yes123_job_html"),
+    ),
+    "yourator": PlatformBenchmark(
+        "crawler.project_yourator.task_urls_yourator", "platform_yourator", "{}", _run_yourator,
+        ("parse_job_list_to_pydantic",),
+    ),
+}
+
+# 各 task 模組匯入的 repository 寫入函式，存在才計時
+DB_FUNCTIONS = ("upsert_jobs", "upsert_urls", "upsert_url_categories", "insert_job_observations", "update_urls_status")
+
+# 結束後計算列數的資料表
+COUNTED_TABLES = ("tb_jobs", "tb_urls", "tb_job_observations", "tb_job_category_tags", "tb_companies", "tb_locations")
+
+# 與 baseline 比較的指標：(路徑, 數值越大越好)
+REGRESSION_METRICS = (
+    (("pages_per_sec",), True),
+    (("jobs_parsed_per_sec",), True),
+    (("db_rows_per_sec",), True),
+    (("sql", "statements"), False),
+    (("peak_rss_mb",), False),
+)
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """最近秩 (nearest-rank) 百分位數，sorted_values 需已排序。"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class StageRecorder:
+    """收集各階段每次呼叫的耗時；1111 的爬蟲在多個執行緒中呼叫，因此以鎖保護。"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.durations: Dict[str, List[float]] = defaultdict(list)
+        self.counters: Counter = Counter()
+
+    def record(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.durations[stage].append(seconds)
+
+    def count(self, key: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[key] += amount
+
+    def wrap(self, module, name: str, stage: str, count_key: Optional[str] = None) -> None:
+        """以計時版本替換 module.name；count_key 不為空時，另計算回傳值不為 None 的次數。"""
+        original = getattr(module, name)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = original(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - start)
+            if count_key and result is not None:
+                self.count(count_key)
+            return result
+
+        timed.__wrapped__ = original
+        setattr(module, name, timed)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        stages = {}
+        for stage, values in sorted(self.durations.items()):
+            values = sorted(values)
+            stages[stage] = {
+                "count": len(values),
+                "total_s": round(sum(values), 4),
+                "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+                "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+            }
+        return stages
+
+
+def _apply_config(overrides: Dict[str, str]) -> None:
+    """
+    寫入 local.ini 的設定區塊，讓之後才匯入的平台設定模組讀到；crawler.config 已經讀出的常數
+    (例如 URL_CRAWLER_SLEEP_*) 依原本的型別一併覆寫。
+    """
+    import crawler.config as crawler_config
+
+    for key, value in overrides.items():
+        crawler_config.config_section[key] = value
+        current = getattr(crawler_config, key, None)
+        if current is not None:
+            setattr(crawler_config, key, type(current)(value))
+
+
+def _instrument_http(recorder: StageRecorder) -> None:
+    import requests
+
+    original_send = requests.Session.send
+
+    def timed_send(self, request, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = original_send(self, request, **kwargs)
+        except Exception:
+            recorder.count("http_errors")
+            raise
+        finally:
+            recorder.record("http", time.perf_counter() - start)
+        recorder.count(f"http_{response.status_code}")
+        return response
+
+    requests.Session.send = timed_send
+
+
+def _instrument_sql(engine, recorder: StageRecorder) -> None:
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("bench_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        recorder.record("sql", time.perf_counter() - conn.info["bench_query_start"].pop())
+        verb = statement.lstrip().split(None, 1)[0].upper()
+        recorder.count(f"sql_{verb}")
+        if verb in ("INSERT", "UPDATE", "DELETE", "REPLACE") and cursor.rowcount and cursor.rowcount > 0:
+            recorder.count("db_rows_written", cursor.rowcount)
+
+
+def _prepare_database(db_name: str, platform: str, category_ids: List[str]):
+    """建立乾淨的資料表並寫入測試類別，回傳 engine。"""
+    from crawler.database.connection import get_engine, initialize_database, metadata
+    from crawler.database.repository import sync_source_categories
+    from crawler.database.schemas import SourcePlatform
+
+    initialize_database(db_name)
+    engine = get_engine(db_name)
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    sync_source_categories(
+        SourcePlatform(platform),
+        [
+            {
+                "source_platform": SourcePlatform(platform),
+                "source_category_id": category_id,
+                "source_category_name": f"bench {category_id}",
+                "parent_source_id": None,
+            }
+            for category_id in category_ids
+        ],
+        db_name=db_name,
+    )
+    return engine
+
+
+def _count_rows(engine) -> Dict[str, int]:
+    from sqlalchemy import text
+
+    with engine.connect() as connection:
+        return {table: connection.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar_one() for table in COUNTED_TABLES}
+
+
+def _measure_platform(name: str, base_url: str, db_url: str, category_count: int, log_level: str) -> Dict[str, Any]:
+    from benchmarks.mock_server import mock_config
+
+    _apply_config({
+        **mock_config(base_url),
+        "CRAWLER_DB_URL": db_url,
+        "LOG_LEVEL": log_level,
+        "RAW_ARCHIVE_DIR": "",
+        "HTTP_RECORD_MODE": "off",
+    })
+    spec = PLATFORMS[name]
+    module = importlib.import_module(spec.task_module)
+
+    db_name = f"bench_{name}"
+    category_ids = [spec.category_id_format.format(i) for i in range(1, category_count + 1)]
+    engine = _prepare_database(db_name, spec.source_platform, category_ids)
+
+    recorder = StageRecorder()
+    for index, function_name in enumerate(spec.parse_functions):
+        recorder.wrap(module, function_name, f"parse.{function_name}", count_key="jobs_parsed" if index == 0 else None)
+    for function_name in DB_FUNCTIONS:
+        if hasattr(module, function_name):
+            recorder.wrap(module, function_name, f"db.{function_name}")
+    _instrument_http(recorder)
+    _instrument_sql(engine, recorder)
+
+    error = None
+    start = time.perf_counter()
+    for category_id in category_ids:
+        category = {
+            "source_platform": spec.source_platform,
+            "source_category_id": category_id,
+            "source_category_name": f"bench {category_id}",
+            "parent_source_id": None,
+        }
+        try:
+            spec.run(module, category, db_name)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            break
+    wall = time.perf_counter() - start
+
+    counters = recorder.counters
+    pages = sum(count for key, count in counters.items() if key.startswith("http_") and key != "http_errors")
+    sql_by_verb = {key[4:]: count for key, count in sorted(counters.items()) if key.startswith("sql_")}
+    result = {
+        "wall_seconds": round(wall, 4),
+        "categories": category_count,
+        "pages": pages,
+        "http_status": {key[5:]: count for key, count in sorted(counters.items()) if key.startswith("http_")},
+        "jobs_parsed": counters["jobs_parsed"],
+        "db_rows_written": counters["db_rows_written"],
+        "pages_per_sec": round(pages / wall, 2) if wall else 0.0,
+        "jobs_parsed_per_sec": round(counters["jobs_parsed"] / wall, 2) if wall else 0.0,
+        "db_rows_per_sec": round(counters["db_rows_written"] / wall, 2) if wall else 0.0,
+        "stages": recorder.summary(),
+        "sql": {"statements": sum(sql_by_verb.values()), "by_verb": sql_by_verb},
+        "table_rows": _count_rows(engine),
+        # Linux 的 ru_maxrss 單位為 KB
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+    if error:
+        result["error"] = error
+    return result
+
+
+def _platform_worker(name: str, base_url: str, db_url: str, category_count: int, log_level: str, queue) -> None:
+    # 爬蟲的日誌改寫到 stderr，stdout 只留給 JSON 報告
+    sys.stdout = sys.stderr
+    try:
+        queue.put((name, _measure_platform(name, base_url, db_url, category_count, log_level)))
+    except Exception as e:
+        queue.put((name, {"error": f"{type(e).__name__}: {e}"}))
+
+
+def run_benchmark(
+    platforms: List[str],
+    settings,
+    db_url: Optional[str] = None,
+    category_count: int = 2,
+    log_level: str = "WARNING",
+    timeout: float = 600.0,
+) -> Dict[str, Any]:
+    """依序在子行程中量測各平台；db_url 為 None 時每個平台寫入暫存目錄中的 SQLite 檔。"""
+    from benchmarks.mock_server import start_mock_server
+
+    server = start_mock_server(settings)
+    context = multiprocessing.get_context("spawn")
+    results: Dict[str, Any] = {}
+    with tempfile.TemporaryDirectory(prefix="bench_crawl_") as tmp_dir:
+        platform_db_url = db_url or f"sqlite:///{os.path.join(tmp_dir, '{db_name}.db')}"
+        try:
+            for name in platforms:
+                server.reset_stats()
+                queue = context.Queue()
+                process = context.Process(
+                    target=_platform_worker,
+                    args=(name, server.base_url, platform_db_url, category_count, log_level, queue),
+                )
+                process.start()
+                try:
+                    _, results[name] = queue.get(timeout=timeout)
+                except Exception:
+                    results[name] = {"error": f"no result within {timeout}s (exit code {process.exitcode})"}
+                process.join(timeout=10)
+                if process.is_alive():
+                    process.terminate()
+                results[name]["mock_server_requests"] = sum(server.stats.values())
+        finally:
+            server.shutdown()
+            server.server_close()
+    return {
+        "settings": asdict(settings),
+        "database": "sqlite" if db_url is None else db_url.split(":", 1)[0],
+        "platforms": results,
+    }
+
+
+def compare_with_baseline(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """回傳退化超過 tolerance (比例) 的指標說明；平台在 baseline 成功但這次失敗也視為退化。"""
+    if baseline.get("settings") != current["settings"] or baseline.get("database") != current["database"]:
+        return ["baseline was produced with different mock settings or database; results are not comparable"]
+    regressions = []
+    for name, base in baseline.get("platforms", {}).items():
+        result = current["platforms"].get(name)
+        if result is None or "error" in base:
+            continue
+        if "error" in result:
+            regressions.append(f"{name}: failed ({result['error']})")
+            continue
+        for path, higher_is_better in REGRESSION_METRICS:
+            old, new = base, result
+            for key in path:
+                old, new = old.get(key), new.get(key)
+                if old is None or new is None:
+                    break
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+                regressions.append(f"{name}: {'.'.join(path)} {old} -> {new} ({change:+.0%})")
+    return regressions
+
+
+def main() -> None:
+    from benchmarks.mock_server import MockSettings
+
+    parser = argparse.ArgumentParser(description="End-to-end crawl throughput benchmark against the local mock server.")
+    parser.add_argument("--platform", action="append", dest="platforms", choices=sorted(PLATFORMS), default=None,
+                        help="Platform to run (repeatable, defaults to all).")
+    parser.add_argument("--categories", type=int, default=2, help="Categories crawled per platform.")
+    parser.add_argument("--pages", type=int, default=5, help="List pages per category.")
+    parser.add_argument("--jobs-per-page", type=int, default=20)
+    parser.add_argument("--shared-ratio", type=float, default=0.2, help="Fraction of each page shared across categories.")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of an injected 500.")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Probability of an injected 429.")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--db-url", default=None,
+                        help="SQLAlchemy URL with a {db_name} placeholder (defaults to a temporary SQLite file per platform).")
+    parser.add_argument("--log-level", default="WARNING", help="Crawler log level during the run.")
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file.")
+    parser.add_argument("--baseline", default=None, help="Previous JSON report to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression before failing.")
+    args = parser.parse_args()
+
+    settings = MockSettings(
+        pages=args.pages,
+        jobs_per_page=args.jobs_per_page,
+        shared_ratio=args.shared_ratio,
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        seed=args.seed,
+    )
+    report = run_benchmark(args.platforms or list(PLATFORMS), settings, args.db_url, args.categories, args.log_level.upper())
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare_with_baseline(report, json.load(f), args.tolerance)
+        report["regressions"] = regressions
+        exit_code = 1 if regressions else 0
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+"""
+repository 寫入路徑的效能測試：以合成的 JobPydantic 批次 (預設 30 / 300 / 3000 筆) 依爬蟲的呼叫順序
+(見 project_104 的 _upsert_batch_data) 寫入 upsert_jobs、upsert_urls、upsert_url_categories、
+insert_job_observations，並以 SQLAlchemy 事件計算每個函式的：
+
+- statements：邏輯 SQL 語句數 (before_execute；ORM flush 與 executemany 各算一次)
+- round_trips：與資料庫的往返次數 (每次 cursor 執行 + COMMIT / ROLLBACK + 連線歸還連線池時的 reset)
+- rows_per_sec：輸入列數 / 函式耗時
+
+duplicate ratio 是批次中已存在於資料庫的職缺比例 (重新爬到的職缺)，在量測前先寫入，不列入統計。
+語句數隨批次大小線性成長 (scaling 接近 1) 代表逐筆查詢 (N+1)，報告的 n_plus_one 會列出這些函式；
+指定 --baseline 時，語句數或往返次數增加、或 rows_per_sec 退化超過 --tolerance 會以狀態碼 1 結束。
+
+預設使用記憶體中的 SQLite；--db-url 可指向可拋棄的本機 MySQL (資料表會被清空重建)：
+
+    python -m benchmarks.bench_repository --output bench_repository.json
+    python -m benchmarks.bench_repository --db-url "mysql+pymysql://root:pw@127.0.0.1:3306/{db_name}" --baseline bench_repository.json
+"""
+import argparse
+import json
+import math
+import random
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.bench_crawl_e2e import _apply_config
+
+# crawler 的模組在 _apply_config 設定 CRAWLER_DB_URL 之後才匯入 (連線設定在匯入時讀取)
+
+DB_NAME = "bench_repository"
+OPERATIONS = ("upsert_jobs", "upsert_urls", "upsert_url_categories", "insert_job_observations")
+BENCH_PLATFORM = "platform_104"
+CATEGORY_COUNT = 20
+COMPANY_COUNT = 500
+REGIONS = ("台北市", "新北市", "桃園市", "台中市", "台南市", "高雄市")
+# 語句數對批次大小的成長指數超過此值，視為逐筆查詢
+N_PLUS_ONE_SCALING = 0.5
+
+
+class SqlCounter:
+    """以 engine 事件累計語句、往返次數與寫入列數；以 snapshot 相減取得單一函式的用量。"""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.counters: Counter = Counter()
+
+        @event.listens_for(engine, "before_execute")
+        def _before_execute(conn, clauseelement, multiparams, params, execution_options):
+            self.counters["statements"] += 1
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            self.counters["round_trips"] += 1
+            self.counters[f"sql_{statement.lstrip().split(None, 1)[0].upper()}"] += 1
+            if executemany:
+                self.counters["executemany_rows"] += len(parameters)
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if cursor.rowcount and cursor.rowcount > 0 and not statement.lstrip().upper().startswith("SELECT"):
+                self.counters["rows_affected"] += cursor.rowcount
+
+        @event.listens_for(engine, "commit")
+        def _commit(conn):
+            self.counters["round_trips"] += 1
+
+        @event.listens_for(engine, "rollback")
+        def _rollback(conn):
+            self.counters["round_trips"] += 1
+
+        @event.listens_for(engine, "reset")
+        def _reset(dbapi_connection, connection_record, reset_state):
+            # 連線歸還連線池時的 rollback；交易已由 COMMIT 結束時 SQLAlchemy 不會再送出
+            if not reset_state.terminate_only and not reset_state.transaction_was_reset:
+                self.counters["round_trips"] += 1
+
+    def snapshot(self) -> Counter:
+        return Counter(self.counters)
+
+
+def make_jobs(count: int, start: int, seed: int, skills_per_job: int) -> List[Any]:
+    """
+    產生 count 筆職缺，source_job_id 依序為 bench{start} 起；同一序號每次產生的內容相同。
+    公司、地點與技能取自固定的集合，與真實資料一樣有大量重複。
+    """
+    from crawler.database.schemas import (
+        CompanyPydantic,
+        JobPydantic,
+        JobType,
+        LocationPydantic,
+        SalaryType,
+        SkillPydantic,
+        SourcePlatform,
+    )
+
+    platform = SourcePlatform(BENCH_PLATFORM)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    jobs = []
+    for number in range(start, start + count):
+        rng = random.Random(seed * 1_000_003 + number)
+        company_number = rng.randrange(COMPANY_COUNT)
+        region = rng.choice(REGIONS)
+        salary_min = rng.randrange(30, 80) * 1000
+        jobs.append(JobPydantic(
+            source_platform=platform,
+            source_job_id=f"bench{number}",
+            url=f"https://www.104.com.tw/job/bench{number}",
+            title=f"Backend Engineer {number}",
+            description=f"Job {number}: build and operate crawler pipelines. " * rng.randrange(5, 40),
+            job_type=JobType.FULL_TIME,
+            posted_at=now - timedelta(days=rng.randrange(30)),
+            salary_text=f"月薪 {salary_min:,}~{salary_min + 20000:,} 元",
+            salary_min=salary_min,
+            salary_max=salary_min + 20000,
+            salary_type=SalaryType.MONTHLY,
+            experience_required_text=f"{rng.randrange(6)}年以上",
+            education_required_text="大學",
+            company=CompanyPydantic(
+                source_platform=platform,
+                source_company_id=f"benchco{company_number}",
+                name=f"Bench Company {company_number}",
+                url=f"https://www.104.com.tw/company/benchco{company_number}",
+            ),
+            locations=[LocationPydantic(
+                region=region,
+                district=f"第{rng.randrange(1, 8)}區",
+                address_detail=f"{region}第{rng.randrange(1, 8)}區",
+            )],
+            skills=[SkillPydantic(name=f"skill{rng.randrange(200)}") for _ in range(skills_per_job)],
+            category_tags=[],
+        ))
+    return jobs
+
+
+def _category_id(index: int) -> str:
+    return f"2007001{index:03d}"
+
+
+def _category_tags(jobs: List[Any], seed: int) -> List[Dict[str, str]]:
+    """每筆職缺 1~2 個類別 (同一職缺出現在多個類別的列表中)。"""
+    tags = []
+    for job in jobs:
+        rng = random.Random(f"{seed}:{job.source_job_id}")
+        for index in rng.sample(range(1, CATEGORY_COUNT + 1), rng.choice((1, 1, 1, 2))):
+            tags.append({"job_id": job.source_job_id, "category_source_id": _category_id(index)})
+    return tags
+
+
+def _job_observations(jobs: List[Any]) -> List[Any]:
+    from crawler.database.schemas import JobObservationPydantic
+
+    return [
+        JobObservationPydantic(
+            source_job_id=job.source_job_id,
+            source_platform=job.source_platform,
+            url=job.url,
+            title=job.title,
+            description=job.description,
+            job_type=job.job_type,
+            posted_at=job.posted_at,
+            status=job.status,
+            salary_text=job.salary_text,
+            salary_min=job.salary_min,
+            salary_max=job.salary_max,
+            salary_type=job.salary_type,
+            experience_required_text=job.experience_required_text,
+            education_required_text=job.education_required_text,
+            company_id=job.company.source_company_id,
+            company_name=job.company.name,
+            company_url=job.company.url,
+            location_text=job.locations[0].address_detail,
+            region=job.locations[0].region,
+            district=job.locations[0].district,
+            skills=", ".join(skill.name for skill in job.skills) or None,
+        )
+        for job in jobs
+    ]
+
+
+def build_batch(size: int, duplicate_ratio: float, seed: int, skills_per_job: int) -> Tuple[List[Any], List[Any]]:
+    """
+    回傳 (預先寫入的職缺, 要量測的批次)。批次中前 duplicate_ratio 比例的職缺與預先寫入的相同
+    (內容相同、posted_at 較新)，其餘是新職缺。
+    """
+    duplicates = round(size * duplicate_ratio)
+    existing = make_jobs(duplicates, 0, seed, skills_per_job)
+    for job in existing:
+        job.posted_at -= timedelta(days=1)
+    return existing, make_jobs(size, 0, seed, skills_per_job)
+
+
+def _write(jobs: List[Any], seed: int) -> Dict[str, Tuple[Any, tuple, int]]:
+    """各寫入函式的 (函式, 引數, 輸入列數)，順序與爬蟲相同。"""
+    from crawler.database import repository
+    from crawler.database.schemas import SourcePlatform, UrlPydantic
+
+    platform = SourcePlatform(BENCH_PLATFORM)
+    urls = [UrlPydantic(source_url=job.url, source=platform) for job in jobs]
+    tags = _category_tags(jobs, seed)
+    observations = _job_observations(jobs)
+    return {
+        "upsert_jobs": (repository.upsert_jobs, (jobs,), len(jobs)),
+        "upsert_urls": (repository.upsert_urls, (platform, urls), len(urls)),
+        "upsert_url_categories": (repository.upsert_url_categories, (tags,), len(tags)),
+        "insert_job_observations": (repository.insert_job_observations, (observations,), len(observations)),
+    }
+
+
+def _reset_database(engine) -> None:
+    from crawler.database.connection import metadata
+    from crawler.database.repository import sync_source_categories
+    from crawler.database.schemas import SourcePlatform
+
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    platform = SourcePlatform(BENCH_PLATFORM)
+    sync_source_categories(
+        platform,
+        [
+            {
+                "source_platform": platform,
+                "source_category_id": _category_id(index),
+                "source_category_name": f"bench {index}",
+                "parent_source_id": None,
+            }
+            for index in range(1, CATEGORY_COUNT + 1)
+        ],
+        db_name=DB_NAME,
+    )
+
+
+def measure_batch(engine, counter: SqlCounter, size: int, duplicate_ratio: float, seed: int, skills_per_job: int) -> Dict[str, Any]:
+    """在乾淨的資料表上量測一個批次，回傳各寫入函式的統計。"""
+    existing, jobs = build_batch(size, duplicate_ratio, seed, skills_per_job)
+    _reset_database(engine)
+    for function, args, _ in _write(existing, seed).values():
+        function(*args, db_name=DB_NAME)
+
+    operations = {}
+    for name, (function, args, rows) in _write(jobs, seed).items():
+        before = counter.snapshot()
+        start = time.perf_counter()
+        function(*args, db_name=DB_NAME)
+        elapsed = time.perf_counter() - start
+        used = counter.snapshot()
+        used.subtract(before)
+        operations[name] = {
+            "rows": rows,
+            "seconds": round(elapsed, 5),
+            "rows_per_sec": round(rows / elapsed, 1) if elapsed else 0.0,
+            "statements": used["statements"],
+            "round_trips": used["round_trips"],
+            "statements_per_row": round(used["statements"] / rows, 3) if rows else 0.0,
+            "rows_affected": used["rows_affected"],
+            "executemany_rows": used["executemany_rows"],
+            "by_verb": {key[4:]: count for key, count in sorted(used.items()) if key.startswith("sql_") and count},
+        }
+    return operations
+
+
+def find_n_plus_one(results: Dict[str, Dict[str, Any]], batch_sizes: List[int]) -> Dict[str, Dict[str, float]]:
+    """
+    以最小與最大批次的語句數估計成長指數 log(S_max / S_min) / log(N_max / N_min)：
+    批次寫入接近 0，逐筆查詢接近 1。回傳超過 N_PLUS_ONE_SCALING 的 {duplicate ratio: {函式: 指數}}。
+    """
+    smallest, largest = min(batch_sizes), max(batch_sizes)
+    if smallest == largest:
+        return {}
+    suspects = {}
+    for ratio, by_size in results.items():
+        for name in OPERATIONS:
+            low = by_size[str(smallest)][name]["statements"]
+            high = by_size[str(largest)][name]["statements"]
+            if not low or not high:
+                continue
+            scaling = math.log(high / low) / math.log(largest / smallest)
+            if scaling > N_PLUS_ONE_SCALING:
+                suspects.setdefault(ratio, {})[name] = round(scaling, 2)
+    return suspects
+
+
+def run_benchmark(batch_sizes: List[int], duplicate_ratios: List[float], db_url: str, seed: int = 1,
+                  skills_per_job: int = 0, log_level: str = "WARNING") -> Dict[str, Any]:
+    _apply_config({"CRAWLER_DB_URL": db_url, "LOG_LEVEL": log_level, "SKILL_EXTRACTION_MODE": "batch"})
+    from crawler.database.connection import get_engine, initialize_database
+    from crawler.logging_config import configure_logging
+
+    # 日誌寫到 stderr，stdout 只留給 JSON 報告 (configure_logging 的 handler 綁定當下的 sys.stdout)
+    sys.stdout = sys.stderr
+    configure_logging()
+    initialize_database(DB_NAME)
+    engine = get_engine(DB_NAME)
+    counter = SqlCounter(engine)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for ratio in duplicate_ratios:
+        for size in batch_sizes:
+            results.setdefault(str(ratio), {})[str(size)] = measure_batch(engine, counter, size, ratio, seed, skills_per_job)
+    return {
+        "settings": {
+            "batch_sizes": batch_sizes,
+            "duplicate_ratios": duplicate_ratios,
+            "seed": seed,
+            "skills_per_job": skills_per_job,
+        },
+        "database": engine.url.get_backend_name(),
+        "results": results,
+        "n_plus_one": find_n_plus_one(results, batch_sizes),
+    }
+
+
+def compare_with_baseline(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    語句數與往返次數由輸入決定，任何增加都視為退化；rows_per_sec 受機器負載影響，退化超過
+    tolerance 才列出。
+    """
+    if baseline.get("settings") != current["settings"] or baseline.get("database") != current["database"]:
+        return ["baseline was produced with different settings or database; results are not comparable"]
+    regressions = []
+    for ratio, by_size in baseline.get("results", {}).items():
+        for size, operations in by_size.items():
+            for name, old in operations.items():
+                new = current["results"].get(ratio, {}).get(size, {}).get(name)
+                if new is None:
+                    continue
+                label = f"dup={ratio} n={size} {name}"
+                for metric in ("statements", "round_trips"):
+                    if new[metric] > old[metric]:
+                        regressions.append(f"{label}: {metric} {old[metric]} -> {new[metric]}")
+                if old["rows_per_sec"] and (new["rows_per_sec"] - old["rows_per_sec"]) / old["rows_per_sec"] < -tolerance:
+                    change = (new["rows_per_sec"] - old["rows_per_sec"]) / old["rows_per_sec"]
+                    regressions.append(f"{label}: rows_per_sec {old['rows_per_sec']} -> {new['rows_per_sec']} ({change:+.0%})")
+    return regressions
+
+
+def _float_list(value: str) -> List[float]:
+    return [float(item) for item in value.split(",") if item.strip()]
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the repository write path and count SQL statements per call.")
+    parser.add_argument("--batch-sizes", type=_int_list, default=[30, 300, 3000], help="Comma-separated batch sizes.")
+    parser.add_argument("--duplicate-ratios", type=_float_list, default=[0.0, 0.3, 0.8],
+                        help="Comma-separated fractions of each batch already stored in the database.")
+    parser.add_argument("--skills-per-job", type=int, default=0,
+                        help="Skills attached to each job (0 matches SKILL_EXTRACTION_MODE=batch crawls).")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--db-url", default="sqlite://",
+                        help="SQLAlchemy URL with an optional {db_name} placeholder; tables are dropped and recreated.")
+    parser.add_argument("--log-level", default="WARNING", help="Crawler log level during the run.")
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file.")
+    parser.add_argument("--baseline", default=None, help="Previous JSON report to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative rows/sec regression before failing.")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.batch_sizes, args.duplicate_ratios, args.db_url, args.seed, args.skills_per_job, args.log_level.upper())
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare_with_baseline(report, json.load(f), args.tolerance)
+        report["regressions"] = regressions
+        exit_code = 1 if regressions else 0
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text, file=sys.__stdout__)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+比較 extract_skills_precise 的逐技能 regex 迴圈與 SkillMatcher (Aho-Corasick) 的速度，
+並確認兩者對每一筆描述的輸出完全相同。
+
+描述取自 repo 內保存的真實 API 回應 (crawler/project_104/page_api_data_104.txt、
+crawler/project_1111/page_api_data_1111.txt)。技能庫優先使用 skill_master.json，
+尚未產生時改由 104_skill_category.csv 的 hardSkillList/hardToolList 建立。
+
+    python -m benchmarks.bench_skill_matcher [--repeat 20]
+"""
+import argparse
+import ast
+import json
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from crawler.utils.run_skill_extraction import (
+    build_skill_matcher,
+    extract_skills_precise,
+    preprocess_skills_for_extraction,
+)
+from crawler.utils.skill_matcher import CompiledSkillMatcher, ahocorasick
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SKILL_DATA_DIR = os.path.join(ROOT, "crawler", "utils", "skill_data")
+SAMPLE_FILES = {
+    "104": (os.path.join(ROOT, "crawler", "project_104", "page_api_data_104.txt"), "data"),
+    "1111": (os.path.join(ROOT, "crawler", "project_1111", "page_api_data_1111.txt"), "hits"),
+}
+
+
+def load_descriptions():
+    descriptions = []
+    for path, list_key in SAMPLE_FILES.values():
+        with open(path, "r", encoding="utf-8") as f:
+            raw = f.read()
+        # 104 的範例檔前面附有 Request URL 等說明文字，JSON 從第一個 "{" 開始
+        payload = json.loads(raw[raw.index("{"):])
+        descriptions.extend(item.get("description", "") for item in payload.get(list_key, []))
+    return [d for d in descriptions if d]
+
+
+def load_skill_master_df():
+    skill_master_path = os.path.join(SKILL_DATA_DIR, "generated_data", "skill_master.json")
+    if os.path.exists(skill_master_path):
+        return pd.read_json(skill_master_path)
+
+    csv_path = os.path.join(SKILL_DATA_DIR, "source_data", "104_skill_category.csv")
+    df = pd.read_csv(csv_path)
+    names = []
+    for column in ("hardSkillList", "hardToolList"):
+        for value in df[column].dropna():
+            try:
+                items = ast.literal_eval(value)
+            except (ValueError, SyntaxError):
+                continue
+            names.extend(item["name"].strip().lower() for item in items if item.get("name", "").strip())
+    return pd.DataFrame({"Skill_Name": list(dict.fromkeys(names))})
+
+
+def _time(fn, descriptions, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in descriptions:
+            fn(text)
+    return (time.perf_counter() - start) / (repeat * len(descriptions))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    descriptions = load_descriptions()
+    skill_master_df = load_skill_master_df()
+
+    build_start = time.perf_counter()
+    patterns = preprocess_skills_for_extraction(skill_master_df.copy())
+    regex_build = time.perf_counter() - build_start
+
+    matchers = {}
+    for backend, use_c in (("python", False), ("pyahocorasick", True)):
+        if use_c and ahocorasick is None:
+            continue
+        build_start = time.perf_counter()
+        matcher = build_skill_matcher(skill_master_df.copy(), use_c_extension=use_c)
+        matchers[backend] = (matcher, time.perf_counter() - build_start)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        artifact_path = os.path.join(tmp_dir, "skill_matcher.bin")
+        matchers["python"][0].save(artifact_path)
+        build_start = time.perf_counter()
+        compiled = CompiledSkillMatcher(artifact_path)
+        matchers["compiled"] = (compiled, time.perf_counter() - build_start)
+        results = _run(args, descriptions, patterns, regex_build, matchers)
+    print(json.dumps(results, indent=2))
+
+
+def _run(args, descriptions, patterns, regex_build, matchers):
+    mismatches = 0
+    for text in descriptions:
+        expected = extract_skills_precise(text, patterns)
+        for matcher, _ in matchers.values():
+            if matcher.extract(text) != expected:
+                mismatches += 1
+
+    results = {
+        "skills": len(patterns),
+        "descriptions": len(descriptions),
+        "avg_description_chars": round(sum(map(len, descriptions)) / len(descriptions)),
+        "mismatches": mismatches,
+        "regex": {
+            "build_seconds": round(regex_build, 4),
+            "ms_per_description": round(_time(lambda t: extract_skills_precise(t, patterns), descriptions, max(1, args.repeat // 10)) * 1000, 4),
+        },
+    }
+    for backend, (matcher, build_seconds) in matchers.items():
+        results[backend] = {
+            "build_seconds": round(build_seconds, 4),
+            "ms_per_description": round(_time(matcher.extract, descriptions, args.repeat) * 1000, 4),
+        }
+        results[backend]["speedup"] = round(results["regex"]["ms_per_description"] / results[backend]["ms_per_description"], 1)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+產生 benchmarks/pytest_parsers.py 使用的詳細頁 HTML 範例 (1111、CakeResume、yes123)。
+
+repo 內只保存了列表 API 的真實回應 (page_api_data_104.txt、page_api_data_1111.txt、apidata_urator.txt)，
+詳細頁沒有範例，因此從 benchmarks/mock_server.py 取得；指定 --fixtures 時 mock server 會優先重播
+crawler/utils/http_record.py 錄下的正式頁面，可藉此把範例換成真實資料。重新產生後需以
+UPDATE_GOLDEN=1 重跑 pytest_parsers.py 更新預期輸出。
+
+    python -m benchmarks.capture_parser_fixtures [--count 20] [--fixtures benchmarks/fixtures/http]
+"""
+import argparse
+import json
+import os
+from typing import Any, Dict, List
+from urllib.parse import urljoin
+
+import requests
+from bs4 import BeautifulSoup
+
+from benchmarks.mock_server import UPSTREAM_BASE_URLS, MockSettings, start_mock_server
+
+PARSER_FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "parsers")
+
+CATEGORY_1111 = "140100"
+CATEGORY_CAKE = "it_software"
+CATEGORY_YES123 = "2_1011_0001_0000"
+
+
+def _get(session: requests.Session, url: str, **kwargs) -> requests.Response:
+    response = session.get(url, timeout=10, **kwargs)
+    response.raise_for_status()
+    return response
+
+
+def capture_1111(session: requests.Session, base_url: str, count: int) -> List[Dict[str, Any]]:
+    hits = _get(session, f"{base_url}/1111/api/v1/search/jobs/", params={"jobPositions": CATEGORY_1111, "page": 1}).json()["result"]["hits"]
+    return [
+        {"list_item": hit, "html": _get(session, f"{base_url}/1111/job/{hit['jobId']}").text}
+        for hit in hits[:count]
+    ]
+
+
+def capture_cakeresume(session: requests.Session, base_url: str, count: int) -> List[Dict[str, Any]]:
+    soup = BeautifulSoup(_get(session, f"{base_url}/cake/jobs/categories/{CATEGORY_CAKE}", params={"page": 1}).text, "html.parser")
+    next_data = json.loads(soup.find("script", id="__NEXT_DATA__").string)
+    hits = next_data["props"]["pageProps"]["serverState"]["initialResults"]["Job"]["results"][0]["hits"]
+    samples = []
+    for hit in hits[:count]:
+        path = f"/companies/{hit['page']['path']}/jobs/{hit['path']}"
+        samples.append({
+            "url": f"{UPSTREAM_BASE_URLS['cake']}{path}",
+            "category": CATEGORY_CAKE,
+            "html": _get(session, f"{base_url}/cake{path}").text,
+        })
+    return samples
+
+
+def capture_yes123(session: requests.Session, base_url: str, count: int) -> List[Dict[str, Any]]:
+    list_url = f"{base_url}/yes123/wk_index/joblist.asp"
+    soup = BeautifulSoup(_get(session, list_url, params={"find_work_mode1": CATEGORY_YES123, "strrec": 0}).text, "html.parser")
+    samples = []
+    for tag in soup.select("a.Job_opening_block")[:count]:
+        href = tag["href"]
+        samples.append({
+            "url": urljoin(f"{UPSTREAM_BASE_URLS['yes123']}/wk_index/", href),
+            "category": CATEGORY_YES123,
+            "html": _get(session, urljoin(list_url, href)).content.decode("utf-8"),
+        })
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Capture detail-page samples for the parser benchmark suite.")
+    parser.add_argument("--count", type=int, default=20, help="Detail pages per platform.")
+    parser.add_argument("--fixtures", default=None, help="Let the mock server replay recorded responses from this directory.")
+    args = parser.parse_args()
+
+    server = start_mock_server(MockSettings(pages=1, jobs_per_page=args.count, shared_ratio=0.0, fixtures_dir=args.fixtures, seed=1))
+    os.makedirs(PARSER_FIXTURES_DIR, exist_ok=True)
+    try:
+        with requests.Session() as session:
+            for name, capture in (("1111_detail", capture_1111), ("cakeresume_detail", capture_cakeresume), ("yes123_detail", capture_yes123)):
+                samples = capture(session, server.base_url, args.count)
+                path = os.path.join(PARSER_FIXTURES_DIR, f"{name}.json")
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(samples, f, ensure_ascii=False, indent=1)
+                    f.write("\n")
+                print(f"{path}: {len(samples)} samples")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
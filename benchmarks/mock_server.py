@@ -0,0 +1,454 @@
+"""
+本機 mock server：在單一 ThreadingHTTPServer 上模擬 104、1111、yes123、CakeResume、Yourator
+的列表與詳細頁端點，讓爬蟲不連線正式站台也能完整跑完分類爬取，用來量測吞吐量。
+
+每個平台以路徑前綴區分 (/104、/1111、/yes123、/cake、/yourator)，路徑其餘部分與正式站台相同。
+回應依序取自：
+1. --fixtures 指定的錄製檔 (crawler/utils/http_record.py 以 record 模式錄下的正式回應)；
+2. 以 repo 內的範例回應 (page_api_data_104.txt、single_url_api_data_104.txt、page_api_data_1111.txt、
+   apidata_urator.txt) 為樣板產生的合成資料，職缺 ID 依 (類別, 頁碼, 序號) 決定，重跑結果一致；
+   沒有範例的頁面 (1111 / yes123 / CakeResume 詳細頁等) 則輸出只含解析器所需結構的精簡 HTML。
+另可注入延遲、5xx 錯誤與 429 (附 Retry-After)。
+
+    python -m benchmarks.mock_server --port 8765 --pages 5 --latency-ms 50 --error-rate 0.01 --print-config
+
+--print-config 會印出指向本機的站台網址設定，加入 local.ini 中 APP_ENV 所選的區塊 (例如複製 [DEV]
+為 [MOCK] 再加上這些設定，以 APP_ENV=MOCK 執行) 後，爬蟲即會改打 mock server。
+"""
+import argparse
+import ast
+import copy
+import html
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from crawler.utils.http_record import load_fixture
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+UPSTREAM_BASE_URLS = {
+    "104": "https://www.104.com.tw",
+    "1111": "https://www.1111.com.tw",
+    "yes123": "https://www.yes123.com.tw",
+    "cake": "https://www.cake.me",
+    "yourator": "https://www.yourator.co",
+}
+
+# yes123 列表頁以 strrec 位移分頁，爬蟲固定以 30 筆換算頁碼
+YES123_PAGE_STRIDE = 30
+
+_ADDRESSES = [
+    ("台北市信義區", "市府路1號"),
+    ("新北市板橋區", "中山路一段161號"),
+    ("台中市西屯區", "台灣大道三段99號"),
+    ("高雄市前鎮區", "成功二路39號"),
+    ("新竹市東區", "光復路二段101號"),
+]
+
+Response = Tuple[int, str, bytes]
+
+
+@dataclass
+class MockSettings:
+    """合成資料的規模與故障注入設定。"""
+    pages: int = 5
+    jobs_per_page: int = 20
+    # 每頁前段這個比例的職缺在所有類別共用同一組 ID，模擬跨類別重複出現的職缺
+    shared_ratio: float = 0.2
+    latency_ms: float = 0.0
+    latency_jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after_seconds: int = 1
+    fixtures_dir: Optional[str] = None
+    seed: Optional[int] = None
+
+
+def mock_config(base_url: str) -> Dict[str, str]:
+    """把各平台的站台網址指向 mock server 所需的 local.ini 設定。"""
+    return {
+        "URL_CRAWLER_BASE_URL_104": f"{base_url}/104/jobs/search/api/jobs",
+        "JOB_API_BASE_URL_104": f"{base_url}/104/job/ajax/content/",
+        "JOB_API_BASE_URL_1111": f"{base_url}/1111/api/v1/search/jobs/",
+        "JOB_DETAIL_BASE_URL_1111": f"{base_url}/1111/job/",
+        "JOB_LISTING_BASE_URL_YES123": f"{base_url}/yes123/wk_index/joblist.asp",
+        "JOB_DETAIL_BASE_URL_YES123": f"{base_url}/yes123/wk_index/job_refer_list.asp",
+        "JOB_LISTING_BASE_URL_CAKERESUME": f"{base_url}/cake/jobs",
+        "JOB_DETAIL_BASE_URL_CAKERESUME": f"{base_url}/cake",
+        "JOB_API_BASE_URL_YOURATOR": f"{base_url}/yourator/api/v4/jobs",
+        # 量測吞吐量時不需要爬蟲自己的禮貌性延遲
+        "URL_CRAWLER_SLEEP_MIN_SECONDS": "0",
+        "URL_CRAWLER_SLEEP_MAX_SECONDS": "0",
+    }
+
+
+def _base36(number: int) -> str:
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    text = ""
+    while True:
+        number, remainder = divmod(number, 36)
+        text = digits[remainder] + text
+        if not number:
+            return text
+
+
+class _Samples:
+    """repo 內的範例回應，每個 server 只載入一次。"""
+
+    def __init__(self):
+        with open(os.path.join(ROOT, "crawler", "project_104", "page_api_data_104.txt"), encoding="utf-8") as f:
+            raw = f.read()
+        # 範例檔前面附有 Request URL 等說明文字，JSON 從第一個 "{" 開始
+        self.list_104: List[Dict[str, Any]] = json.loads(raw[raw.index("{"):])["data"]
+        with open(os.path.join(ROOT, "crawler", "project_104", "single_url_api_data_104.txt"), encoding="utf-8") as f:
+            self.detail_104: Dict[str, Any] = ast.literal_eval(f.read())
+        with open(os.path.join(ROOT, "crawler", "project_1111", "page_api_data_1111.txt"), encoding="utf-8") as f:
+            self.hits_1111: List[Dict[str, Any]] = json.load(f)["hits"]
+        with open(os.path.join(ROOT, "crawler", "project_yourator", "apidata_urator.txt"), encoding="utf-8") as f:
+            self.jobs_yourator: List[Dict[str, Any]] = json.load(f)["payload"]["jobs"]
+
+    def description(self, number: int) -> Tuple[str, str]:
+        """回傳 (職稱, 描述)，取自 104 範例，讓技能提取的工作量接近真實資料。"""
+        item = self.list_104[number % len(self.list_104)]
+        return item.get("jobName") or "", item.get("description") or ""
+
+
+class MockCrawlServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, server_address: Tuple[str, int], settings: Optional[MockSettings] = None):
+        super().__init__(server_address, MockRequestHandler)
+        self.settings = settings or MockSettings()
+        self.samples = _Samples()
+        self._rng = random.Random(self.settings.seed)
+        self._lock = threading.Lock()
+        self.stats: Counter = Counter()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def random(self) -> float:
+        with self._lock:
+            return self._rng.random()
+
+    def count(self, platform: str, status: int) -> None:
+        with self._lock:
+            self.stats[(platform, status)] += 1
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.stats.clear()
+
+    def job_number(self, category: str, page: int, index: int) -> int:
+        shared = index < int(self.settings.jobs_per_page * self.settings.shared_ratio)
+        scope = 0 if shared else zlib.crc32(category.encode("utf-8")) % 100000 + 1
+        return scope * 10**7 + page * 10**4 + index
+
+    def page_numbers(self, category: str, page: int) -> List[int]:
+        if page < 1 or page > self.settings.pages:
+            return []
+        return [self.job_number(category, page, index) for index in range(self.settings.jobs_per_page)]
+
+
+def _json(payload: Any) -> Response:
+    return 200, "application/json; charset=utf-8", json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+
+def _html(body: str) -> Response:
+    return 200, "text/html; charset=utf-8", f"<!DOCTYPE html><html><body>{body}</body></html>".encode("utf-8")
+
+
+def _first(query: Dict[str, List[str]], key: str, default: str = "") -> str:
+    return (query.get(key) or [default])[0]
+
+
+def _render_104(server: MockCrawlServer, path: str, query: Dict[str, List[str]]) -> Optional[Response]:
+    if path.rstrip("/") == "/jobs/search/api/jobs":
+        page = int(_first(query, "page", "1"))
+        category = _first(query, "jobcat")
+        items = []
+        for number in server.page_numbers(category, page):
+            item = copy.deepcopy(server.samples.list_104[number % len(server.samples.list_104)])
+            job_id = _base36(number)
+            item["jobNo"] = str(number)
+            item.setdefault("link", {})["job"] = f"https://www.104.com.tw/job/{job_id}"
+            items.append(item)
+        pagination = {
+            "count": len(items),
+            "currentPage": page,
+            "lastPage": server.settings.pages,
+            "total": server.settings.pages * server.settings.jobs_per_page,
+        }
+        return _json({"data": items, "metadata": {"pagination": pagination}})
+    if path.startswith("/job/ajax/content/"):
+        job_id = path.rsplit("/", 1)[-1]
+        detail = copy.deepcopy(server.samples.detail_104)
+        detail["data"]["header"]["analysisUrl"] = f"//www.104.com.tw/jobs/apply/analysis/{job_id}"
+        detail["data"]["link"] = {"job": f"https://www.104.com.tw/job/{job_id}"}
+        return _json(detail)
+    return None
+
+
+def _render_1111(server: MockCrawlServer, path: str, query: Dict[str, List[str]]) -> Optional[Response]:
+    if path.rstrip("/") == "/api/v1/search/jobs":
+        page = int(_first(query, "page", "1"))
+        category = _first(query, "jobPositions")
+        hits = []
+        for number in server.page_numbers(category, page):
+            hit = copy.deepcopy(server.samples.hits_1111[number % len(server.samples.hits_1111)])
+            hit["jobId"] = number
+            hits.append(hit)
+        pagination = {
+            "page": page,
+            "limit": server.settings.jobs_per_page,
+            "totalCount": server.settings.pages * server.settings.jobs_per_page,
+            "totalPage": server.settings.pages,
+        }
+        return _json({"result": {"pagination": pagination, "hits": hits, "fromOffset": 0}})
+    if path.startswith("/job/"):
+        number = int(path.rsplit("/", 1)[-1])
+        hit = server.samples.hits_1111[number % len(server.samples.hits_1111)]
+        district, street = _ADDRESSES[number % len(_ADDRESSES)]
+        return _html(
+            '<section data-v-e57f1019><div class="container"><div class="text-gray-600">'
+            f'<h1>{html.escape(hit.get("title") or "")}</h1>'
+            f'<h2 class="inline"><a href="https://www.1111.com.tw/corp/{hit.get("companyId")}">'
+            f'{html.escape(hit.get("companyName") or "")}</a></h2></div></div></section>'
+            f'<h3>職缺描述</h3><div>{html.escape(hit.get("description") or "")}</div>'
+            f'<h3>工作地點</h3><div><p>{district}{street}</p>'
+            '<iframe src="https://maps.google.com/maps?q=25.0330,121.5654"></iframe></div>'
+        )
+    return None
+
+
+def _render_yes123(server: MockCrawlServer, path: str, query: Dict[str, List[str]]) -> Optional[Response]:
+    if path == "/wk_index/joblist.asp":
+        page = int(_first(query, "strrec", "0")) // YES123_PAGE_STRIDE + 1
+        category = _first(query, "find_work_mode1")
+        options = "".join(f'<option value="{n}">{n}</option>' for n in range(1, server.settings.pages + 1))
+        links = "".join(
+            f'<div id="job_{number}" class="Job_opening box_detail_list">'
+            f'<a class="Job_opening_block" href="job_refer_list.asp?p_id=c{number % 997}&job_id={number}">{number}</a></div>'
+            for number in server.page_numbers(category, page)
+        )
+        return _html(f'<select id="inputState">{options}</select>{links}')
+    if path == "/wk_index/job_refer_list.asp":
+        number = int(_first(query, "job_id", "0"))
+        title, description = server.samples.description(number)
+        district, street = _ADDRESSES[number % len(_ADDRESSES)]
+        # 使用絕對日期 (不用「今天」)，錄下的頁面重新解析時結果不隨執行日期改變
+        posted_on = (datetime.now(timezone.utc) - timedelta(days=number % 30)).strftime("%Y.%m.%d")
+        details = {
+            "薪資待遇": "月薪 40,000~60,000元",
+            "工作性質": "全職",
+            "工作地點": f"{district}{street}",
+            "學歷要求": "大學",
+            "工作經驗": "1年以上",
+        }
+        items = "".join(
+            f'<li><span class="left_title">{key}：</span><span class="right_main">{value}</span></li>'
+            for key, value in details.items()
+        )
+        return _html(
+            f'<div class="box_job_header_center"><h1>{html.escape(title)}</h1>'
+            f'<a class="link_text_black" href="comp_info.asp?p_id=c{number % 997}">公司 {number % 997}</a></div>'
+            f"<span>職缺更新：{posted_on}</span>"
+            f"<div><h3>徵才說明</h3><div>{html.escape(description)}</div></div>"
+            f'<div class="job_explain"><ul>{items}</ul></div>'
+        )
+    return None
+
+
+def _render_cake(server: MockCrawlServer, path: str, query: Dict[str, List[str]]) -> Optional[Response]:
+    if path.startswith("/jobs"):
+        page = int(_first(query, "page", "1"))
+        category = path.rsplit("/", 1)[-1] if path.startswith("/jobs/categories/") else ""
+        hits = [
+            {"path": f"job-{number}", "page": {"path": f"company-{number % 997}"}}
+            for number in server.page_numbers(category, page)
+        ]
+        next_data = {"props": {"pageProps": {"serverState": {"initialResults": {"Job": {"results": [{"hits": hits}]}}}}}}
+        return _html(f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(next_data, ensure_ascii=False)}</script>')
+    parts = path.strip("/").split("/")
+    if len(parts) == 4 and parts[0] == "companies" and parts[2] == "jobs":
+        company_path, job_path = parts[1], parts[3]
+        number = int(job_path.rsplit("-", 1)[-1])
+        title, description = server.samples.description(number)
+        district, _ = _ADDRESSES[number % len(_ADDRESSES)]
+        job = {
+            "path": job_path,
+            "title": title,
+            "description": html.escape(description).replace("\n", "<br>"),
+            "company": {"name": f"Company {company_path}", "path": company_path},
+            "salary_min": 40000,
+            "salary_max": 60000,
+            "salary_type": "per_month",
+            "salary_currency": "TWD",
+            "job_type": "full_time",
+            "min_work_exp_year": 1,
+            "requirements_plain_text": "大學以上",
+            "content_updated_at": (datetime.now(timezone.utc) - timedelta(days=number % 30)).isoformat(),
+        }
+        next_data = {"props": {"pageProps": {"job": job}}}
+        return _html(
+            f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(next_data, ensure_ascii=False)}</script>'
+            f'<div class="JobDescriptionRightColumn_locationsWrapper__N_fz_"><a>{district}</a></div>'
+        )
+    return None
+
+
+def _render_yourator(server: MockCrawlServer, path: str, query: Dict[str, List[str]]) -> Optional[Response]:
+    if path.rstrip("/") == "/api/v4/jobs":
+        page = int(_first(query, "page", "1"))
+        category = _first(query, "category[]")
+        jobs = []
+        for number in server.page_numbers(category, page):
+            job = copy.deepcopy(server.samples.jobs_yourator[number % len(server.samples.jobs_yourator)])
+            job["id"] = number
+            job["path"] = f"/companies/{job.get('company', {}).get('path', '').rsplit('/', 1)[-1]}/jobs/{number}"
+            jobs.append(job)
+        has_more = page < server.settings.pages
+        return _json({"payload": {"hasMore": has_more, "currentPage": page, "nextPage": page + 1 if has_more else None, "jobs": jobs}})
+    if path.startswith("/api/v4/jobs/"):
+        number = int(path.rsplit("/", 1)[-1])
+        job = copy.deepcopy(server.samples.jobs_yourator[number % len(server.samples.jobs_yourator)])
+        job["id"] = number
+        return _json({"payload": {"job": job}})
+    return None
+
+
+RENDERERS = {
+    "104": _render_104,
+    "1111": _render_1111,
+    "yes123": _render_yes123,
+    "cake": _render_cake,
+    "yourator": _render_yourator,
+}
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # 支援 keep-alive，讓 requests.Session 的連線重用與正式環境一致
+    server: MockCrawlServer
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _send(self, status: int, content_type: str, body: bytes, headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        settings = self.server.settings
+        parts = urlsplit(self.path)
+        platform, _, rest = parts.path.lstrip("/").partition("/")
+        rest = "/" + rest
+
+        if settings.latency_ms or settings.latency_jitter_ms:
+            jitter = self.server.random() * settings.latency_jitter_ms
+            time.sleep((settings.latency_ms + jitter) / 1000)
+
+        if platform not in RENDERERS:
+            self.server.count(platform, 404)
+            self._send(404, "text/plain", b"unknown platform")
+            return
+        if settings.rate_limit_rate and self.server.random() < settings.rate_limit_rate:
+            self.server.count(platform, 429)
+            self._send(429, "text/plain", b"Too Many Requests", {"Retry-After": str(settings.retry_after_seconds)})
+            return
+        if settings.error_rate and self.server.random() < settings.error_rate:
+            self.server.count(platform, 500)
+            self._send(500, "text/plain", b"Injected error")
+            return
+
+        if settings.fixtures_dir:
+            upstream_url = f"{UPSTREAM_BASE_URLS[platform]}{rest}" + (f"?{parts.query}" if parts.query else "")
+            record = load_fixture(settings.fixtures_dir, "GET", upstream_url)
+            if record is not None:
+                self.server.count(platform, record["status"])
+                content_type = {k.lower(): v for k, v in record["headers"].items()}.get("content-type", "application/octet-stream")
+                self._send(record["status"], content_type, record["content"])
+                return
+
+        try:
+            response = RENDERERS[platform](self.server, rest, parse_qs(parts.query))
+        except (ValueError, KeyError, IndexError):
+            response = None
+        if response is None:
+            self.server.count(platform, 404)
+            self._send(404, "text/plain", b"Not Found")
+            return
+        status, content_type, body = response
+        self.server.count(platform, status)
+        self._send(status, content_type, body)
+
+
+def start_mock_server(settings: Optional[MockSettings] = None, host: str = "127.0.0.1", port: int = 0) -> MockCrawlServer:
+    """在背景執行緒啟動 mock server (port=0 代表自動選擇)；結束時呼叫 server.shutdown()。"""
+    server = MockCrawlServer((host, port), settings)
+    threading.Thread(target=server.serve_forever, name="mock-crawl-server", daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline mock server for the 104 / 1111 / yes123 / CakeResume / Yourator crawlers.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pages", type=int, default=5, help="List pages per category.")
+    parser.add_argument("--jobs-per-page", type=int, default=20)
+    parser.add_argument("--shared-ratio", type=float, default=0.2, help="Fraction of each page shared across categories.")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of an injected 500.")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Probability of an injected 429.")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429s.")
+    parser.add_argument("--fixtures", default=None, help="Serve recorded fixtures from this directory when available.")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--print-config", action="store_true", help="Print the local.ini settings that point the crawlers here.")
+    args = parser.parse_args()
+
+    settings = MockSettings(
+        pages=args.pages,
+        jobs_per_page=args.jobs_per_page,
+        shared_ratio=args.shared_ratio,
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after_seconds=args.retry_after,
+        fixtures_dir=args.fixtures,
+        seed=args.seed,
+    )
+    server = MockCrawlServer((args.host, args.port), settings)
+    if args.print_config:
+        print("; add to the local.ini section selected by APP_ENV")
+        for key, value in mock_config(server.base_url).items():
+            print(f"{key} = {value}")
+        print()
+    print(f"Mock server listening on {server.base_url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import os
 import configparser
+import tempfile
 import structlog
 
 logger = structlog.get_logger(__name__)
@@ -36,8 +37,19 @@ MYSQL_ACCOUNT = config_section.get("MYSQL_ACCOUNT", "root")
 MYSQL_ROOT_PASSWORD = config_section.get("MYSQL_ROOT_PASSWORD", "root_password")
 MYSQL_PASSWORD = config_section.get("MYSQL_PASSWORD", "root_password")
 MYSQL_DATABASE = os.environ.get('CRAWLER_DB_NAME') or config_section.get("MYSQL_DATABASE", "crawler_db")
+# 覆寫資料庫連線字串 (SQLAlchemy URL，可用 {db_name} 代入資料庫名稱)，例如效能測試用的
+# sqlite:////tmp/bench/{db_name}.db；留空則依上面的 MYSQL_* 設定連線
+CRAWLER_DB_URL = os.environ.get('CRAWLER_DB_URL') or config_section.get("CRAWLER_DB_URL", "")
 LOG_LEVEL = config_section.get("LOG_LEVEL", "DEBUG").upper()
 LOG_FORMATTER = config_section.get("LOG_FORMATTER", "console").lower()
+# 日誌設定檔 (crawler/logging_config.py)：dev = 依 LOG_FORMATTER 同步輸出；
+# production = JSON、呼叫時先判斷等級、重複訊息取樣、由背景執行緒經佇列寫出
+LOG_PROFILE = config_section.get("LOG_PROFILE", "dev").lower()
+# production：同一事件每 LOG_SAMPLE_INTERVAL_SECONDS 秒最多輸出 LOG_SAMPLE_BURST 筆 DEBUG/INFO (0 代表不取樣)
+LOG_SAMPLE_BURST = int(config_section.get("LOG_SAMPLE_BURST", "20"))
+LOG_SAMPLE_INTERVAL_SECONDS = float(config_section.get("LOG_SAMPLE_INTERVAL_SECONDS", "10"))
+# production：寫出佇列的上限；佇列滿時丟棄 DEBUG/INFO，WARNING 以上等待寫入
+LOG_QUEUE_SIZE = int(config_section.get("LOG_QUEUE_SIZE", "10000"))
 
 PRODUCER_BATCH_SIZE = int(config_section.get("PRODUCER_BATCH_SIZE", "100"))
 PRODUCER_DISPATCH_INTERVAL_SECONDS = float(
@@ -63,6 +75,99 @@ URL_CRAWLER_API_BACKOFF_FACTOR = float(
     config_section.get("URL_CRAWLER_API_BACKOFF_FACTOR", "0.5")
 )
 
+# AIMD 自適應併發控制 (crawler/utils/adaptive_concurrency.py)
+ADAPTIVE_CONCURRENCY_INITIAL = int(config_section.get("ADAPTIVE_CONCURRENCY_INITIAL", "4"))
+ADAPTIVE_CONCURRENCY_MIN = int(config_section.get("ADAPTIVE_CONCURRENCY_MIN", "1"))
+ADAPTIVE_CONCURRENCY_MAX = int(config_section.get("ADAPTIVE_CONCURRENCY_MAX", "20"))
+ADAPTIVE_CONCURRENCY_DECREASE_FACTOR = float(
+    config_section.get("ADAPTIVE_CONCURRENCY_DECREASE_FACTOR", "0.5")
+)
+ADAPTIVE_CONCURRENCY_LATENCY_TOLERANCE = float(
+    config_section.get("ADAPTIVE_CONCURRENCY_LATENCY_TOLERANCE", "2.0")
+)
+# 爬蟲共用執行器 (crawler/utils/crawl_executor.py)：排隊 + 執行中的任務上限，以及列表頁預抓頁數
+CRAWLER_EXECUTOR_MAX_PENDING = int(config_section.get("CRAWLER_EXECUTOR_MAX_PENDING", "200"))
+CRAWLER_LIST_PAGE_PREFETCH = int(config_section.get("CRAWLER_LIST_PAGE_PREFETCH", "2"))
+# 對沖請求 (crawler/utils/hedging.py)：以逗號分隔的端點類型，例如 "104_job_urls,1111_job_urls"；預設不啟用。
+# 對沖請求不經過 URL_CRAWLER_SLEEP 的隨機延遲；1111 的對沖請求另外取得 AIMD 限流名額，
+# 104 沒有限流器，額外流量只受 HEDGE_MAX_RATIO (對沖數 / 請求數) 限制。
+HEDGED_ENDPOINTS = {
+    endpoint.strip()
+    for endpoint in config_section.get("HEDGED_ENDPOINTS", "").split(",")
+    if endpoint.strip()
+}
+HEDGE_LATENCY_PERCENTILE = float(config_section.get("HEDGE_LATENCY_PERCENTILE", "0.95"))
+HEDGE_MIN_SAMPLES = int(config_section.get("HEDGE_MIN_SAMPLES", "20"))
+HEDGE_MAX_RATIO = float(config_section.get("HEDGE_MAX_RATIO", "0.1"))
+HEDGE_MAX_WORKERS = int(config_section.get("HEDGE_MAX_WORKERS", "40"))
+# 請求合併 + 短期回應快取 (crawler/utils/singleflight.py)；詳細頁 HTML 較大，快取筆數另外設定
+HTTP_RESPONSE_CACHE_TTL_SECONDS = float(config_section.get("HTTP_RESPONSE_CACHE_TTL_SECONDS", "300"))
+HTTP_RESPONSE_CACHE_MAX_ENTRIES = int(config_section.get("HTTP_RESPONSE_CACHE_MAX_ENTRIES", "256"))
+HTTP_DETAIL_CACHE_MAX_ENTRIES = int(config_section.get("HTTP_DETAIL_CACHE_MAX_ENTRIES", "32"))
+# 公司地址快取 (tb_companies.location_text + 行程內 LRU)：超過刷新天數才重新抓取公司頁面
+COMPANY_LOCATION_REFRESH_DAYS = int(config_section.get("COMPANY_LOCATION_REFRESH_DAYS", "30"))
+COMPANY_PROFILE_CACHE_MAX_ENTRIES = int(config_section.get("COMPANY_PROFILE_CACHE_MAX_ENTRIES", "5000"))
+# 技能提取 (crawler/utils/skill_extraction_stage.py)：
+# batch = 爬蟲只寫入職缺，由批次階段 (crawler/utils/skill_pipeline.py 定期執行) 補上 tb_job_skills 與
+# tb_job_observations.skills；inline = 爬取時直接提取 (舊行為)
+SKILL_EXTRACTION_MODE = config_section.get("SKILL_EXTRACTION_MODE", "batch").lower()
+SKILL_EXTRACTION_BATCH_SIZE = int(config_section.get("SKILL_EXTRACTION_BATCH_SIZE", "5000"))
+SKILL_EXTRACTION_CHUNK_SIZE = int(config_section.get("SKILL_EXTRACTION_CHUNK_SIZE", "500"))
+# 0 代表使用 CPU 核心數
+SKILL_EXTRACTION_WORKERS = int(config_section.get("SKILL_EXTRACTION_WORKERS", "0")) or os.cpu_count() or 1
+# 技能共現與每週趨勢分析表 (crawler/utils/skill_analytics.py) 每批處理的職缺數
+SKILL_ANALYTICS_BATCH_SIZE = int(config_section.get("SKILL_ANALYTICS_BATCH_SIZE", "1000"))
+# 技能提取 + 分析表更新的常駐執行器 (crawler/utils/skill_pipeline.py) 每幾分鐘執行一次
+SKILL_PIPELINE_INTERVAL_MINUTES = float(config_section.get("SKILL_PIPELINE_INTERVAL_MINUTES", "60"))
+# 原始回應封存 (crawler/utils/raw_archive.py)：留空代表停用；每個 segment 檔超過上限 MB 後輪替
+RAW_ARCHIVE_DIR = config_section.get("RAW_ARCHIVE_DIR", "")
+RAW_ARCHIVE_SEGMENT_MAX_MB = int(config_section.get("RAW_ARCHIVE_SEGMENT_MAX_MB", "256"))
+# zstd 壓縮等級 (未安裝 zstandard 時改用 zlib)
+RAW_ARCHIVE_COMPRESSION_LEVEL = int(config_section.get("RAW_ARCHIVE_COMPRESSION_LEVEL", "6"))
+# HTTP 錄製 / 重播 (crawler/utils/http_record.py)：off / record / replay
+HTTP_RECORD_MODE = config_section.get("HTTP_RECORD_MODE", "off").lower()
+HTTP_FIXTURES_DIR = config_section.get(
+    "HTTP_FIXTURES_DIR", os.path.join(os.path.dirname(__file__), "..", "benchmarks", "fixtures", "http")
+)
+# 執行期指標 (crawler/utils/metrics.py)：off / http (METRICS_HOST:METRICS_PORT/metrics) / textfile (寫入 METRICS_TEXTFILE_PATH)
+METRICS_EXPORTER = config_section.get("METRICS_EXPORTER", "off").lower()
+# 容器內需要讓 Prometheus 從外部抓取時改為 0.0.0.0
+METRICS_HOST = config_section.get("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(config_section.get("METRICS_PORT", "9808"))
+METRICS_TEXTFILE_PATH = config_section.get(
+    "METRICS_TEXTFILE_PATH", "/var/lib/node_exporter/textfile_collector/crawler_worker.prom"
+)
+# prefork 子行程的快照目錄，同一台機器上的每個 worker 需各自設定不同目錄
+METRICS_DIR = config_section.get("METRICS_DIR", os.path.join(tempfile.gettempdir(), "crawler_metrics"))
+METRICS_FLUSH_INTERVAL_SECONDS = float(config_section.get("METRICS_FLUSH_INTERVAL_SECONDS", "15"))
+# 任務取樣分析 (crawler/utils/task_profiler.py)：sample = 統計取樣 (所有執行緒，輸出 flamegraph 格式)；cprofile = 只分析執行任務的執行緒
+TASK_PROFILE_MODE = config_section.get("TASK_PROFILE_MODE", "sample").lower()
+TASK_PROFILE_DIR = config_section.get("TASK_PROFILE_DIR", os.path.join(tempfile.gettempdir(), "crawler_profiles"))
+# 行程啟動後分析接下來的 N 個任務；0 代表不分析
+TASK_PROFILE_NEXT_N = int(config_section.get("TASK_PROFILE_NEXT_N", "0"))
+# 一律分析這些平台的任務 (task 名稱中 crawler.project_<平台> 的部分，例如 1111,yes123)
+TASK_PROFILE_PLATFORMS = {
+    platform.strip().lower()
+    for platform in config_section.get("TASK_PROFILE_PLATFORMS", "").split(",")
+    if platform.strip()
+}
+# 對 worker 行程送出此訊號 (例如 pkill -USR2 -f "celery worker") 後分析接下來的 TASK_PROFILE_SIGNAL_COUNT 個任務；留空代表不安裝
+TASK_PROFILE_SIGNAL = config_section.get("TASK_PROFILE_SIGNAL", "SIGUSR2")
+TASK_PROFILE_SIGNAL_COUNT = int(config_section.get("TASK_PROFILE_SIGNAL_COUNT", "5"))
+TASK_PROFILE_INTERVAL_MS = float(config_section.get("TASK_PROFILE_INTERVAL_MS", "5"))
+# 摘要列出的函式數量
+TASK_PROFILE_TOP_N = int(config_section.get("TASK_PROFILE_TOP_N", "30"))
+# 爬取中已收集職缺 ID 的集合 (crawler/utils/id_set.py)：exact = 排序整數陣列，不會誤判；
+# bloom = 固定記憶體的 Bloom filter，約有 JOB_ID_SET_BLOOM_ERROR_RATE 比例的新職缺被誤判為已收集而略過
+JOB_ID_SET_MODE = config_section.get("JOB_ID_SET_MODE", "exact").lower()
+JOB_ID_SET_BLOOM_CAPACITY = int(config_section.get("JOB_ID_SET_BLOOM_CAPACITY", "2000000"))
+JOB_ID_SET_BLOOM_ERROR_RATE = float(config_section.get("JOB_ID_SET_BLOOM_ERROR_RATE", "0.001"))
+# 跨任務職缺去重 (crawler/utils/crawl_dedup.py)：同一爬取週期中已被其他類別任務處理過的職缺直接略過
+# db = tb_crawl_seen_jobs (跨 worker)；local = 只在行程內去重；off = 停用
+CRAWL_DEDUP_BACKEND = config_section.get("CRAWL_DEDUP_BACKEND", "db").lower()
+# 保留幾天內的週期記錄，producer 開始新週期時刪除更舊的記錄
+CRAWL_DEDUP_RETENTION_DAYS = int(config_section.get("CRAWL_DEDUP_RETENTION_DAYS", "3"))
+
 GEOCODING_RETRY_FAILED_DURATION_HOURS = int(config_section.get("GEOCODING_RETRY_FAILED_DURATION_HOURS", "2"))
 
 def get_db_name_for_platform(platform_enum_value: str) -> str:
@@ -3,8 +3,10 @@ import structlog
 from contextlib import contextmanager
 
 from tenacity import retry, stop_after_attempt, wait_exponential, before_log, RetryError
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 from crawler.config import (
     MYSQL_HOST,
@@ -12,8 +14,10 @@ from crawler.config import (
     MYSQL_ACCOUNT,
     MYSQL_PASSWORD,
     MYSQL_DATABASE as DEFAULT_DB_NAME,
+    CRAWLER_DB_URL,
 )
 from crawler.database.models import Base
+from crawler.database import sqlite_compat  # noqa: F401  註冊 MySQL 語法在 SQLite 上的編譯方式
 
 logger = structlog.get_logger(__name__)
 metadata = Base.metadata
@@ -69,28 +73,64 @@ def get_engine(db_name: str = None):
     return _engines[db_name]
 
 
-@retry(
-    stop=stop_after_attempt(8),
-    wait=wait_exponential(multiplier=1, min=2, max=20),
-    before=before_log(logger, logging.INFO),
-    reraise=True,
-)
-def _connect_with_retry(db_name: str) -> create_engine:
-    logger.info(f"Attempting to connect to database: {db_name}@{MYSQL_HOST}:{MYSQL_PORT}")
-
-    db_url = (
+def get_database_url(db_name: str):
+    """
+    資料庫的 SQLAlchemy URL：設定了 CRAWLER_DB_URL 時以它為準 ({db_name} 代入資料庫名稱)，
+    否則依 MYSQL_* 設定連線 MySQL。
+    """
+    if CRAWLER_DB_URL:
+        return make_url(CRAWLER_DB_URL.replace("{db_name}", db_name))
+    return make_url(
         f"mysql+pymysql://{MYSQL_ACCOUNT}:{MYSQL_PASSWORD}@"
         f"{MYSQL_HOST}:{MYSQL_PORT}/{db_name}?charset=utf8mb4"
     )
 
+
+def _create_sqlite_engine(db_url):
+    """
+    SQLite 代替 MySQL (效能測試用)：爬蟲會在多個執行緒寫入，因此關閉 check_same_thread 並開啟 WAL；
+    記憶體資料庫只能共用同一條連線，否則每條連線各自是一個空資料庫。
+    """
+    in_memory = db_url.database in (None, "", ":memory:")
     engine = create_engine(
         db_url,
-        pool_recycle=3600,
         echo=False,
-        connect_args={"connect_timeout": 10},
-        isolation_level="READ COMMITTED",
+        connect_args={"check_same_thread": False, "timeout": 30},
+        poolclass=StaticPool if in_memory else None,
     )
 
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if not in_memory:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+    return engine
+
+
+@retry(
+    stop=stop_after_attempt(8),
+    wait=wait_exponential(multiplier=1, min=2, max=20),
+    before=before_log(logger, logging.INFO),
+    reraise=True,
+)
+def _connect_with_retry(db_name: str) -> create_engine:
+    db_url = get_database_url(db_name)
+    logger.info(f"Attempting to connect to database: {db_url.render_as_string(hide_password=True)}")
+
+    if db_url.get_backend_name() == "sqlite":
+        engine = _create_sqlite_engine(db_url)
+    else:
+        engine = create_engine(
+            db_url,
+            pool_recycle=3600,
+            echo=False,
+            connect_args={"connect_timeout": 10},
+            isolation_level="READ COMMITTED",
+        )
+
     # Test the connection; this will trigger tenacity's retry if it fails
     with engine.connect() as conn:
         conn.execute(text("SELECT 1"))
@@ -110,12 +150,15 @@ def initialize_database(db_name: str = None):
 
     logger.info(f"Initializing database: {db_name}")
 
+    db_url = get_database_url(db_name)
+    if db_url.get_backend_name() == "sqlite":
+        # SQLite 的資料庫檔案在第一次連線時建立，沒有 CREATE DATABASE / FOREIGN_KEY_CHECKS
+        metadata.create_all(get_engine(db_name))
+        logger.info(f"Database tables for '{db_name}' initialized successfully.")
+        return
+
     # Ensure the database exists before creating tables.
-    server_db_url = (
-        f"mysql+pymysql://{MYSQL_ACCOUNT}:{MYSQL_PASSWORD}@"
-        f"{MYSQL_HOST}:{MYSQL_PORT}/?charset=utf8mb4"
-    )
-    server_engine = create_engine(server_db_url)
+    server_engine = create_engine(db_url.set(database=""))
     try:
         with server_engine.connect() as connection:
             connection.execute(text(f"CREATE DATABASE IF NOT EXISTS {db_name};"))
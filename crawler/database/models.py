@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, BigInteger, Float, String, Text, Date, DateTime, Enum, ForeignKey, UniqueConstraint
+from sqlalchemy.dialects.mysql import MEDIUMTEXT
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
@@ -54,6 +55,9 @@ class Company(Base):
     source_platform = Column(Enum(SourcePlatform), nullable=False)
     name = Column(String(255), nullable=False)
     url = Column(String(512), nullable=True)
+    # 公司頁面上的地址，供職缺缺少地點時回補；location_updated_at 為最後一次從公司頁面抓取的時間
+    location_text = Column(String(512), nullable=True)
+    location_updated_at = Column(DateTime, nullable=True)
     
     created_at = Column(
         DateTime, default=lambda: datetime.now(timezone.utc), nullable=False
@@ -106,6 +110,10 @@ class Job(Base):
     experience_required_text = Column(String(255), nullable=True)
     education_required_text = Column(String(255), nullable=True)
     company_id = Column(String(255), ForeignKey("tb_companies.source_company_id"), nullable=False)
+    # 批次技能提取：description 的 SHA-256，以及最後一次提取時的描述雜湊與技能庫版本
+    description_hash = Column(String(64), nullable=True)
+    skills_extracted_hash = Column(String(64), nullable=True)
+    skills_kb_version = Column(String(64), nullable=True)
     created_at = Column(
         DateTime, default=lambda: datetime.now(timezone.utc), nullable=False
     )
@@ -140,6 +148,24 @@ class JobSkill(Base):
     skill = relationship("Skill", back_populates="job_associations")
 
 
+class JobDescriptionToken(Base):
+    """職缺描述的倒排索引 (英文單字 / 中文 bigram)，技能庫新增技能時用來找出需要重掃的職缺。"""
+    __tablename__ = "tb_job_description_tokens"
+    token = Column(String(64), primary_key=True)
+    job_id = Column(String(255), ForeignKey("tb_jobs.source_job_id"), primary_key=True, index=True)
+
+
+class SkillKbVersion(Base):
+    """已套用到 tb_job_skills 的技能庫版本；skills 為 [[技能名稱, 比對模式], ...] 的 JSON 快照。"""
+    __tablename__ = "tb_skill_kb_versions"
+    version = Column(String(64), primary_key=True)
+    skills = Column(Text().with_variant(MEDIUMTEXT(), "mysql"), nullable=False)
+    skill_count = Column(Integer, nullable=False)
+    applied_at = Column(
+        DateTime, default=lambda: datetime.now(timezone.utc), nullable=False
+    )
+
+
 class JobCategoryTag(Base):
     __tablename__ = "tb_job_category_tags"
     job_id = Column(String(255), ForeignKey("tb_jobs.source_job_id"), primary_key=True)
@@ -149,6 +175,46 @@ class JobCategoryTag(Base):
     category = relationship("CategorySource", back_populates="job_associations")
 
 
+class SkillCooccurrence(Base):
+    """稀疏技能共現矩陣：某月份、某職務類別 ("*" 代表全部) 中同時要求兩個技能的職缺數；兩個方向各存一列，查詢以主鍵前綴查找。"""
+    __tablename__ = "tb_skill_cooccurrence"
+    skill_id = Column(String(255), primary_key=True)
+    category_source_id = Column(String(255), primary_key=True)
+    month_start = Column(Date, primary_key=True)
+    other_skill_id = Column(String(255), primary_key=True)
+    job_count = Column(Integer, nullable=False, default=0)
+
+
+class SkillWeeklyCount(Base):
+    """每個技能在各職務類別 ("*" 代表全部)、各平台每週 (週一起算) 被觀察到的職缺數。"""
+    __tablename__ = "tb_skill_weekly_counts"
+    skill_id = Column(String(255), primary_key=True)
+    category_source_id = Column(String(255), primary_key=True)
+    source_platform = Column(Enum(SourcePlatform), primary_key=True)
+    week_start = Column(Date, primary_key=True)
+    job_count = Column(Integer, nullable=False, default=0)
+
+
+class SkillAnalyticsSnapshot(Base):
+    """每個職缺上次計入技能分析表的內容 (JSON)，增量更新時用來扣除舊的貢獻。"""
+    __tablename__ = "tb_skill_analytics_snapshots"
+    job_id = Column(String(255), primary_key=True)
+    contribution = Column(Text, nullable=False)
+    updated_at = Column(
+        DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+
+class SkillAnalyticsDirtyJob(Base):
+    """技能、類別或觀察記錄有變動、待重新計入技能分析表的職缺；mark_count 每次標記遞增，避免處理期間的新變動被誤刪。"""
+    __tablename__ = "tb_skill_analytics_dirty_jobs"
+    job_id = Column(String(255), primary_key=True)
+    mark_count = Column(Integer, nullable=False, default=1)
+
+
 class JobObservation(Base):
     __tablename__ = "tb_job_observations"
     id = Column(Integer, primary_key=True, autoincrement=True)
@@ -176,3 +242,71 @@ class JobObservation(Base):
     longitude = Column(String(255), nullable=True)
     skills = Column(Text, nullable=True)
     observed_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+
+
+class CrawlRun(Base):
+    """每次呼叫 task_urls_* 入口的執行記錄；統計欄位為所有類別的合計，network_seconds / db_seconds 為各執行緒累計的時間。"""
+    __tablename__ = "tb_crawl_runs"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    source_platform = Column(Enum(SourcePlatform), nullable=False, index=True)
+    task_name = Column(String(255), nullable=False)
+    celery_task_id = Column(String(255), nullable=True)
+    hostname = Column(String(255), nullable=True)
+    pid = Column(Integer, nullable=True)
+    status = Column(String(20), nullable=False, index=True)
+    stop_reason = Column(String(64), nullable=True)
+    error = Column(Text, nullable=True)
+    started_at = Column(DateTime, nullable=False, index=True)
+    finished_at = Column(DateTime, nullable=True)
+    pages_fetched = Column(Integer, nullable=False, default=0)
+    jobs_parsed = Column(Integer, nullable=False, default=0)
+    jobs_new = Column(Integer, nullable=False, default=0)
+    jobs_changed = Column(Integer, nullable=False, default=0)
+    http_errors = Column(Integer, nullable=False, default=0)
+    retries = Column(Integer, nullable=False, default=0)
+    bytes_downloaded = Column(BigInteger, nullable=False, default=0)
+    network_seconds = Column(Float, nullable=False, default=0.0)
+    db_seconds = Column(Float, nullable=False, default=0.0)
+
+
+class CrawlSeenJob(Base):
+    """同一爬取週期 (epoch) 中已被某個類別任務認領處理的職缺；claimed_by 用來分辨 INSERT IGNORE 後哪些列是自己寫入的。"""
+    __tablename__ = "tb_crawl_seen_jobs"
+    epoch = Column(String(32), primary_key=True)
+    source_platform = Column(Enum(SourcePlatform), primary_key=True)
+    source_job_id = Column(String(255), primary_key=True)
+    claimed_by = Column(String(32), nullable=False)
+    seen_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False, index=True)
+
+
+class CrawlPendingCategoryTag(Base):
+    """
+    被略過的重複職缺在目前類別的標籤：認領的任務可能還沒寫入 tb_jobs，tb_job_category_tags 的外鍵無法先寫，
+    因此先存在這裡 (沒有外鍵)，等職缺寫入後再搬到 tb_job_category_tags。
+    """
+    __tablename__ = "tb_crawl_pending_category_tags"
+    epoch = Column(String(32), primary_key=True)
+    source_platform = Column(Enum(SourcePlatform), primary_key=True)
+    job_id = Column(String(255), primary_key=True)
+    category_source_id = Column(String(255), primary_key=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False, index=True)
+
+
+class CrawlRunCategory(Base):
+    """單次執行中各職務類別的統計與停止原因。"""
+    __tablename__ = "tb_crawl_run_categories"
+    run_id = Column(Integer, ForeignKey("tb_crawl_runs.id"), primary_key=True)
+    source_category_id = Column(String(255), primary_key=True)
+    stop_reason = Column(String(64), nullable=True)
+    error = Column(Text, nullable=True)
+    started_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+    pages_fetched = Column(Integer, nullable=False, default=0)
+    jobs_parsed = Column(Integer, nullable=False, default=0)
+    jobs_new = Column(Integer, nullable=False, default=0)
+    jobs_changed = Column(Integer, nullable=False, default=0)
+    http_errors = Column(Integer, nullable=False, default=0)
+    retries = Column(Integer, nullable=False, default=0)
+    bytes_downloaded = Column(BigInteger, nullable=False, default=0)
+    network_seconds = Column(Float, nullable=False, default=0.0)
+    db_seconds = Column(Float, nullable=False, default=0.0)
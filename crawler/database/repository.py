@@ -1,13 +1,17 @@
+import hashlib
+import json
 import structlog
-from typing import List, Dict, Any, Optional, Set
-from datetime import datetime, timezone, timedelta
+from typing import List, Dict, Any, Optional, Sequence, Set, Tuple
+from datetime import date, datetime, timezone, timedelta
 import pandas as pd
 
-from sqlalchemy import select, update, delete
+from sqlalchemy import select, update, delete, or_, bindparam, func, literal
 from sqlalchemy.dialects.mysql import insert
 from sqlalchemy.orm import DeclarativeBase
 
 from crawler.database.connection import get_session
+from crawler.utils import crawl_runs
+from crawler.utils.metrics import timed_db_write
 
 from crawler.database.models import (
     CategorySource,
@@ -20,6 +24,16 @@ from crawler.database.models import (
     JobSkill,
     JobCategoryTag,
     JobObservation,
+    JobDescriptionToken,
+    SkillKbVersion,
+    SkillCooccurrence,
+    SkillWeeklyCount,
+    SkillAnalyticsSnapshot,
+    SkillAnalyticsDirtyJob,
+    CrawlRun,
+    CrawlRunCategory,
+    CrawlSeenJob,
+    CrawlPendingCategoryTag,
 )
 from crawler.database.schemas import (
     SourcePlatform,
@@ -37,6 +51,7 @@ from crawler.database.schemas import (
 logger = structlog.get_logger(__name__)
 
 
+@timed_db_write("insert_job_observations", rows_arg="job_observations")
 def insert_job_observations(job_observations: List[JobObservationPydantic], db_name: str = None) -> None:
     """
     將職缺觀察記錄插入到 tb_job_observations 表格中。
@@ -47,9 +62,47 @@ def insert_job_observations(job_observations: List[JobObservationPydantic], db_n
 
     with get_session(db_name=db_name) as session:
         data_to_insert = [obs.model_dump() for obs in job_observations]
+        _fill_observation_skills_from_extraction(session, data_to_insert)
         session.bulk_insert_mappings(JobObservation, data_to_insert)
+        mark_jobs_for_skill_analytics(session, [obs.source_job_id for obs in job_observations])
         session.commit()
         logger.info(f"Successfully inserted {len(job_observations)} job observations.")
+    crawl_runs.record(jobs_parsed=len(job_observations))
+
+
+def _format_observation_skills(skill_names: Sequence[str]) -> Optional[str]:
+    """tb_job_observations.skills 的格式：逗號分隔的技能名稱，沒有技能時為 None。"""
+    return ", ".join(skill_names) if skill_names else None
+
+
+def _fill_observation_skills_from_extraction(session, observations: List[Dict[str, Any]]) -> None:
+    """
+    SKILL_EXTRACTION_MODE=batch 時爬蟲不提取技能，觀察記錄的 skills 為 None；
+    描述與職缺上次批次提取時相同 (skills_extracted_hash) 的觀察記錄直接沿用 tb_job_skills 的結果。
+    描述有變更的職缺由批次階段提取後再補上 (replace_job_skills_bulk)。
+    """
+    hashes = {
+        obs["source_job_id"]: compute_description_hash(obs.get("description"))
+        for obs in observations
+        if obs.get("skills") is None and obs.get("description")
+    }
+    if not hashes:
+        return
+    extracted_hashes = session.execute(
+        select(Job.source_job_id, Job.skills_extracted_hash).where(Job.source_job_id.in_(list(hashes)))
+    ).all()
+    job_ids = [job_id for job_id, extracted_hash in extracted_hashes if extracted_hash and extracted_hash == hashes[job_id]]
+    if not job_ids:
+        return
+    skills_by_job: Dict[str, List[str]] = {}
+    for job_id, skill_name in session.execute(
+        select(JobSkill.job_id, JobSkill.skill_id).where(JobSkill.job_id.in_(job_ids)).order_by(JobSkill.job_id, JobSkill.skill_id)
+    ):
+        skills_by_job.setdefault(job_id, []).append(skill_name)
+    for obs in observations:
+        if obs.get("skills") is None and obs["source_job_id"] in skills_by_job:
+            if compute_description_hash(obs.get("description")) == hashes[obs["source_job_id"]]:
+                obs["skills"] = _format_observation_skills(skills_by_job[obs["source_job_id"]])
 
 
 def _generic_upsert(
@@ -92,6 +145,10 @@ def upsert_companies(session, companies: List[CompanyPydantic]) -> Dict[str, str
         if existing_company:
             existing_company.name = company.name
             existing_company.url = company.url
+            # 地址由公司頁面快取維護，職缺資料沒帶地址時不可覆蓋成 None
+            if company.location_text is not None:
+                existing_company.location_text = company.location_text
+                existing_company.location_updated_at = company.location_updated_at or datetime.now(timezone.utc)
             
             existing_company.updated_at = datetime.now(timezone.utc)
             session.add(existing_company)
@@ -104,6 +161,49 @@ def upsert_companies(session, companies: List[CompanyPydantic]) -> Dict[str, str
             
     return company_map
 
+def get_company_profile(
+    platform: SourcePlatform, source_company_id: str, db_name: str = None
+) -> Optional[CompanyPydantic]:
+    """
+    取得指定平台的公司資料 (含快取的公司地址)，不存在時回傳 None。
+    """
+    with get_session(db_name=db_name) as session:
+        statement = select(Company).where(
+            Company.source_platform == platform,
+            Company.source_company_id == source_company_id,
+        )
+        company = session.scalars(statement).first()
+        if company:
+            return CompanyPydantic.model_validate(company)
+        return None
+
+
+def update_company_location(company: CompanyPydantic, db_name: str = None) -> None:
+    """
+    寫入公司頁面解析出的地址 (location_text 可為空字串，代表公司頁面上沒有地址)。
+    公司尚不存在時一併建立。
+    """
+    now = datetime.now(timezone.utc)
+    with get_session(db_name=db_name) as session:
+        stmt = insert(Company).values(
+            source_company_id=company.source_company_id,
+            source_platform=company.source_platform,
+            name=company.name,
+            url=company.url,
+            location_text=company.location_text,
+            location_updated_at=company.location_updated_at or now,
+            created_at=now,
+            updated_at=now,
+        )
+        stmt = stmt.on_duplicate_key_update(
+            location_text=stmt.inserted.location_text,
+            location_updated_at=stmt.inserted.location_updated_at,
+            updated_at=stmt.inserted.updated_at,
+        )
+        session.execute(stmt)
+        session.commit()
+
+
 def upsert_locations(session, locations: List[LocationPydantic]) -> Dict[str, int]:
     if not locations:
         return {}
@@ -173,6 +273,35 @@ def upsert_job_location_association(
             location_id=location_id
         )
 
+def compute_description_hash(description: Optional[str]) -> Optional[str]:
+    """職缺描述的 SHA-256 (hex)，與 MySQL 的 SHA2(description, 256) 相同；沒有描述時回傳 None。"""
+    if not description:
+        return None
+    return hashlib.sha256(description.encode("utf-8")).hexdigest()
+
+# 這些欄位有任何不同時，執行記錄把職缺算作「已變更」(tb_crawl_runs.jobs_changed)
+JOB_CHANGE_FIELDS = (
+    "title",
+    "description_hash",
+    "status",
+    "job_type",
+    "salary_text",
+    "salary_min",
+    "salary_max",
+    "salary_type",
+    "experience_required_text",
+    "education_required_text",
+)
+
+
+def _job_changed(existing_job: Job, job_data: Dict[str, Any]) -> bool:
+    return any(
+        getattr(getattr(existing_job, key), "value", getattr(existing_job, key)) != getattr(job_data[key], "value", job_data[key])
+        for key in JOB_CHANGE_FIELDS
+    )
+
+
+@timed_db_write("upsert_jobs", rows_arg="jobs")
 def upsert_jobs(jobs: List[JobPydantic], db_name: str = None) -> None:
     if not jobs:
         logger.info("No jobs to upsert.", count=0)
@@ -186,6 +315,9 @@ def upsert_jobs(jobs: List[JobPydantic], db_name: str = None) -> None:
         company_id_map = upsert_companies(session, all_companies)
         location_id_map = upsert_locations(session, all_locations)
         skill_id_map = upsert_skills(session, all_skills)
+        jobs_new = jobs_changed = 0
+        # 新職缺與技能 / 類別標籤有變動的職缺才需要重新計入技能分析表
+        analytics_dirty_job_ids: List[str] = []
 
         for job in jobs:
             # Use source_company_id as company_id
@@ -195,6 +327,7 @@ def upsert_jobs(jobs: List[JobPydantic], db_name: str = None) -> None:
             job_data = job.model_dump(exclude={'company', 'locations', 'skills', 'category_tags', 'source_job_id'})
             job_data['company_id'] = company_id
             job_data['source_job_id'] = job.source_job_id # Add source_job_id back for insert/update
+            job_data['description_hash'] = compute_description_hash(job.description)
 
             # Use source_job_id as primary key for querying
             existing_job = session.query(Job).filter_by(
@@ -217,6 +350,7 @@ def upsert_jobs(jobs: List[JobPydantic], db_name: str = None) -> None:
                         should_update_job_data = False
                 
                 if should_update_job_data:
+                    jobs_changed += _job_changed(existing_job, job_data)
                     for key, value in job_data.items():
                         setattr(existing_job, key, value)
                     session.add(existing_job)
@@ -228,6 +362,8 @@ def upsert_jobs(jobs: List[JobPydantic], db_name: str = None) -> None:
             else:
                 new_job = Job(**job_data) # source_job_id is part of job_data
                 session.add(new_job)
+                jobs_new += 1
+                analytics_dirty_job_ids.append(job.source_job_id)
                 session.flush()
                 # job.id = new_job.source_job_id # No longer 'id', but source_job_id
 
@@ -245,15 +381,22 @@ def upsert_jobs(jobs: List[JobPydantic], db_name: str = None) -> None:
             
             # Handle JobSkill associations
             if job.skills:
+                skill_names = {skill_id_map.get(skill.name) for skill in job.skills} - {None}
+                if existing_job:
+                    old_skill_names = {row[0] for row in session.query(JobSkill.skill_id).filter_by(job_id=job.source_job_id)}
+                    if old_skill_names != skill_names:
+                        analytics_dirty_job_ids.append(job.source_job_id)
                 # Delete existing associations for this job
                 session.query(JobSkill).filter_by(job_id=job.source_job_id).delete()
-                for skill in job.skills:
-                    skill_name = skill_id_map.get(skill.name) # Get the actual skill name (which is the PK)
-                    if skill_name:
-                        session.add(JobSkill(job_id=job.source_job_id, skill_id=skill_name))
+                for skill_name in skill_names:
+                    session.add(JobSkill(job_id=job.source_job_id, skill_id=skill_name))
 
             # Handle JobCategoryTag associations
             if job.category_tags:
+                old_category_ids = (
+                    {row[0] for row in session.query(JobCategoryTag.category_source_id).filter_by(job_id=job.source_job_id)}
+                    if existing_job else None
+                )
                 # Delete existing associations for this job
                 session.query(JobCategoryTag).filter_by(job_id=job.source_job_id).delete()
                 
@@ -267,6 +410,8 @@ def upsert_jobs(jobs: List[JobPydantic], db_name: str = None) -> None:
                             "category_source_id": category_source.source_category_id
                         })
                 
+                if old_category_ids is not None and old_category_ids != {row["category_source_id"] for row in category_data_to_insert}:
+                    analytics_dirty_job_ids.append(job.source_job_id)
                 if category_data_to_insert:
                     try:
                         stmt = insert(JobCategoryTag).values(category_data_to_insert)
@@ -275,8 +420,445 @@ def upsert_jobs(jobs: List[JobPydantic], db_name: str = None) -> None:
                     except Exception as e:
                         logger.error("Error upserting JobCategoryTag batch within upsert_jobs.", error=str(e), exc_info=True)
 
+        mark_jobs_for_skill_analytics(session, analytics_dirty_job_ids)
         session.commit()
         logger.info(f"Successfully upserted {len(jobs)} jobs and their relations.")
+    crawl_runs.record(jobs_new=jobs_new, jobs_changed=jobs_changed)
+
+
+def get_jobs_pending_skill_extraction(
+    kb_version: str, limit: int, after_job_id: Optional[str] = None, db_name: str = None
+) -> List[Tuple[str, str, str, Optional[str]]]:
+    """
+    取得描述有變更 (或技能庫版本不同) 而需要重新提取技能的職缺，
+    回傳 (source_job_id, description, description_hash, skills_extracted_hash)。
+    以主鍵做 keyset 分頁：傳入上一批最後一筆的 source_job_id 取得下一批，
+    大表上不需 OFFSET，也不會因某筆寫回失敗而重複取到同一批。
+    """
+    with get_session(db_name=db_name) as session:
+        statement = (
+            select(Job.source_job_id, Job.description, Job.description_hash, Job.skills_extracted_hash)
+            .where(
+                Job.description_hash.is_not(None),
+                or_(
+                    Job.skills_extracted_hash.is_(None),
+                    Job.skills_extracted_hash != Job.description_hash,
+                    Job.skills_kb_version.is_(None),
+                    Job.skills_kb_version != kb_version,
+                ),
+            )
+            .order_by(Job.source_job_id)
+            .limit(limit)
+        )
+        if after_job_id is not None:
+            statement = statement.where(Job.source_job_id > after_job_id)
+        return [tuple(row) for row in session.execute(statement).all()]
+
+
+def get_jobs_for_skill_extraction(job_ids: List[str], db_name: str = None) -> List[Tuple[str, str, str, Optional[str]]]:
+    """依職缺 ID 取得 (source_job_id, description, description_hash, skills_extracted_hash)，用於技能庫更新後的重掃。"""
+    if not job_ids:
+        return []
+    with get_session(db_name=db_name) as session:
+        statement = select(
+            Job.source_job_id, Job.description, Job.description_hash, Job.skills_extracted_hash
+        ).where(Job.source_job_id.in_(job_ids), Job.description_hash.is_not(None))
+        return [tuple(row) for row in session.execute(statement).all()]
+
+
+def get_job_ids_by_description_tokens(tokens: Set[str], db_name: str = None) -> Set[str]:
+    """回傳描述同時含有所有 tokens 的職缺 ID (倒排索引交集)。"""
+    if not tokens:
+        return set()
+    with get_session(db_name=db_name) as session:
+        statement = (
+            select(JobDescriptionToken.job_id)
+            .where(JobDescriptionToken.token.in_(list(tokens)))
+            .group_by(JobDescriptionToken.job_id)
+            .having(func.count(func.distinct(JobDescriptionToken.token)) >= len(tokens))
+        )
+        return set(session.scalars(statement).all())
+
+
+def delete_job_skills_for_skills(skill_names: List[str], db_name: str = None) -> int:
+    """以單一 DELETE 移除所有職缺與指定技能的關聯，回傳刪除筆數。"""
+    if not skill_names:
+        return 0
+    with get_session(db_name=db_name) as session:
+        affected_jobs = select(JobSkill.job_id).where(JobSkill.skill_id.in_(skill_names)).distinct()
+        _mark_job_query_for_skill_analytics(session, affected_jobs)
+        result = session.execute(delete(JobSkill).where(JobSkill.skill_id.in_(skill_names)))
+        session.commit()
+        return result.rowcount
+
+
+def promote_skill_kb_version(old_version: str, new_version: str, db_name: str = None) -> int:
+    """
+    將以 old_version 提取且描述未變更的職缺直接標記為 new_version (技能庫差異已另外套用)，回傳更新筆數。
+    """
+    with get_session(db_name=db_name) as session:
+        jobs = Job.__table__
+        result = session.execute(
+            update(jobs)
+            .where(jobs.c.skills_kb_version == old_version, jobs.c.skills_extracted_hash == jobs.c.description_hash)
+            .values(skills_kb_version=new_version, updated_at=jobs.c.updated_at)
+        )
+        session.commit()
+        return result.rowcount
+
+
+def reset_skill_extraction_state(db_name: str = None) -> int:
+    """清除所有職缺的技能提取標記，下一次批次提取會重新提取技能並重建倒排索引。"""
+    with get_session(db_name=db_name) as session:
+        jobs = Job.__table__
+        result = session.execute(
+            update(jobs)
+            .where(jobs.c.skills_extracted_hash.is_not(None))
+            .values(skills_extracted_hash=None, updated_at=jobs.c.updated_at)
+        )
+        session.commit()
+        return result.rowcount
+
+
+def get_latest_skill_kb_version(db_name: str = None) -> Optional[Tuple[str, List[Tuple[str, int]]]]:
+    """回傳最後一次套用的技能庫版本與其技能快照 [(技能名稱, 比對模式)]；尚未套用過時回傳 None。"""
+    with get_session(db_name=db_name) as session:
+        statement = select(SkillKbVersion).order_by(SkillKbVersion.applied_at.desc()).limit(1)
+        row = session.scalars(statement).first()
+        if row is None:
+            return None
+        return row.version, [tuple(entry) for entry in json.loads(row.skills)]
+
+
+def record_skill_kb_version(version: str, skills: List[Tuple[str, int]], db_name: str = None) -> None:
+    with get_session(db_name=db_name) as session:
+        stmt = insert(SkillKbVersion).values(
+            version=version,
+            skills=json.dumps(skills, ensure_ascii=False),
+            skill_count=len(skills),
+            applied_at=datetime.now(timezone.utc),
+        )
+        session.execute(stmt.on_duplicate_key_update(applied_at=stmt.inserted.applied_at))
+        session.commit()
+
+
+def _backfill_observation_skills(session, job_skills: Dict[str, Sequence[str]], description_hashes: Dict[str, str]) -> None:
+    """補上 batch 模式寫入、skills 仍為 None 的觀察記錄；只更新描述與這次提取相同的觀察記錄。"""
+    job_ids = [job_id for job_id, names in job_skills.items() if names]
+    if not job_ids:
+        return
+    pending = session.execute(
+        select(JobObservation.id, JobObservation.source_job_id, JobObservation.description).where(
+            JobObservation.source_job_id.in_(job_ids), JobObservation.skills.is_(None)
+        )
+    ).all()
+    updates = [
+        {"b_id": observation_id, "b_skills": _format_observation_skills(sorted(set(job_skills[job_id])))}
+        for observation_id, job_id, description in pending
+        if compute_description_hash(description) == description_hashes[job_id]
+    ]
+    if updates:
+        table = JobObservation.__table__
+        session.connection().execute(
+            update(table).where(table.c.id == bindparam("b_id")).values(skills=bindparam("b_skills")),
+            updates,
+        )
+
+
+def replace_job_skills_bulk(
+    job_skills: Dict[str, Sequence[str]],
+    description_hashes: Dict[str, str],
+    kb_version: str,
+    db_name: str = None,
+    job_tokens: Optional[Dict[str, Set[str]]] = None,
+    batch_size: int = 10000,
+) -> None:
+    """
+    以整批 SQL 取代多筆職缺的 tb_job_skills，並標記其已用 kb_version 提取過。
+    只有 description_hash 仍與讀取時相同的職缺才會被標記；提取期間描述又被更新的職缺會留待下一輪。
+    job_tokens 有提供時 (描述有變更的職缺)，一併重建這些職缺在 tb_job_description_tokens 的索引。
+    """
+    if not job_skills:
+        return
+
+    with get_session(db_name=db_name) as session:
+        skill_names = sorted({name for names in job_skills.values() for name in names})
+        if skill_names:
+            stmt = insert(Skill).values([{"name": name} for name in skill_names])
+            session.execute(stmt.on_duplicate_key_update(name=stmt.inserted.name))
+
+        job_ids = list(job_skills)
+        session.execute(delete(JobSkill).where(JobSkill.job_id.in_(job_ids)))
+
+        pairs = [
+            {"job_id": job_id, "skill_id": name}
+            for job_id, names in job_skills.items()
+            for name in dict.fromkeys(names)
+        ]
+        if pairs:
+            session.execute(insert(JobSkill.__table__), pairs)
+
+        if job_tokens:
+            session.execute(delete(JobDescriptionToken).where(JobDescriptionToken.job_id.in_(list(job_tokens))))
+            token_rows = [
+                {"token": token, "job_id": job_id}
+                for job_id, tokens in job_tokens.items()
+                for token in tokens
+            ]
+            # IGNORE：欄位定序不分大小寫/重音，不同寫法的 token 可能被視為同一主鍵
+            token_insert = insert(JobDescriptionToken.__table__).prefix_with("IGNORE")
+            for i in range(0, len(token_rows), batch_size):
+                session.execute(token_insert, token_rows[i:i + batch_size])
+
+        mark_stmt = (
+            update(Job.__table__)
+            .where(
+                Job.__table__.c.source_job_id == bindparam("b_job_id"),
+                Job.__table__.c.description_hash == bindparam("b_hash"),
+            )
+            # 技能提取不算職缺內容更新，保留原本的 updated_at
+            .values(
+                skills_extracted_hash=bindparam("b_hash"),
+                skills_kb_version=kb_version,
+                updated_at=Job.__table__.c.updated_at,
+            )
+        )
+        session.connection().execute(
+            mark_stmt,
+            [{"b_job_id": job_id, "b_hash": description_hashes[job_id]} for job_id in job_ids],
+        )
+        _backfill_observation_skills(session, job_skills, description_hashes)
+        mark_jobs_for_skill_analytics(session, job_ids)
+        session.commit()
+    logger.info("Bulk replaced job skills.", jobs=len(job_ids), job_skills=len(pairs), kb_version=kb_version[:12])
+
+
+SKILL_ANALYTICS_ALL_CATEGORIES = "*"
+
+
+def mark_jobs_for_skill_analytics(session, job_ids: List[str]) -> None:
+    """在呼叫端的交易中把職缺標記為待重新計入技能分析表 (tb_skill_cooccurrence / tb_skill_weekly_counts)。"""
+    job_ids = sorted(set(job_ids))
+    if not job_ids:
+        return
+    stmt = insert(SkillAnalyticsDirtyJob).values([{"job_id": job_id, "mark_count": 1} for job_id in job_ids])
+    session.execute(stmt.on_duplicate_key_update(mark_count=SkillAnalyticsDirtyJob.mark_count + 1))
+
+
+def _mark_job_query_for_skill_analytics(session, job_id_query) -> None:
+    stmt = insert(SkillAnalyticsDirtyJob).from_select(["job_id", "mark_count"], job_id_query.add_columns(literal(1)))
+    session.execute(stmt.on_duplicate_key_update(mark_count=SkillAnalyticsDirtyJob.mark_count + 1))
+
+
+def get_skill_analytics_dirty_jobs(limit: int, after_job_id: Optional[str] = None, db_name: str = None) -> List[Tuple[str, int]]:
+    """依主鍵 keyset 分頁取得待處理的 (job_id, mark_count)。"""
+    with get_session(db_name=db_name) as session:
+        statement = (
+            select(SkillAnalyticsDirtyJob.job_id, SkillAnalyticsDirtyJob.mark_count)
+            .order_by(SkillAnalyticsDirtyJob.job_id)
+            .limit(limit)
+        )
+        if after_job_id is not None:
+            statement = statement.where(SkillAnalyticsDirtyJob.job_id > after_job_id)
+        return [tuple(row) for row in session.execute(statement).all()]
+
+
+def _as_date(value: Any) -> date:
+    # DATE() 在 MySQL 回傳 date，在 SQLite 回傳字串
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def get_skill_analytics_inputs(job_ids: List[str], db_name: str = None) -> Dict[str, Dict[str, Any]]:
+    """
+    取得計算技能分析所需的職缺現況：{job_id: {"platform", "skills", "categories", "dates"}}。
+    dates 為職缺被觀察到的日期 (tb_job_observations)；沒有觀察記錄時以職缺建立日期代替。
+    已不存在於 tb_jobs 的職缺不會出現在結果中。
+    """
+    if not job_ids:
+        return {}
+    with get_session(db_name=db_name) as session:
+        inputs: Dict[str, Dict[str, Any]] = {}
+        for job_id, platform, created_at in session.execute(
+            select(Job.source_job_id, Job.source_platform, Job.created_at).where(Job.source_job_id.in_(job_ids))
+        ):
+            inputs[job_id] = {
+                "platform": platform,
+                "skills": set(),
+                "categories": set(),
+                "dates": set(),
+                "created_at": created_at,
+            }
+        for job_id, skill_id in session.execute(
+            select(JobSkill.job_id, JobSkill.skill_id).where(JobSkill.job_id.in_(job_ids))
+        ):
+            if job_id in inputs:
+                inputs[job_id]["skills"].add(skill_id)
+        for job_id, category_id in session.execute(
+            select(JobCategoryTag.job_id, JobCategoryTag.category_source_id).where(JobCategoryTag.job_id.in_(job_ids))
+        ):
+            if job_id in inputs:
+                inputs[job_id]["categories"].add(category_id)
+        observed_on = func.date(JobObservation.observed_at)
+        for job_id, observed_date in session.execute(
+            select(JobObservation.source_job_id, observed_on)
+            .where(JobObservation.source_job_id.in_(job_ids))
+            .group_by(JobObservation.source_job_id, observed_on)
+        ):
+            if job_id in inputs and observed_date is not None:
+                inputs[job_id]["dates"].add(_as_date(observed_date))
+
+    for job_input in inputs.values():
+        created_at = job_input.pop("created_at")
+        if not job_input["dates"] and created_at is not None:
+            job_input["dates"].add(_as_date(created_at))
+    return inputs
+
+
+def get_skill_analytics_snapshots(job_ids: List[str], db_name: str = None) -> Dict[str, Dict[str, Any]]:
+    """回傳職缺上次計入技能分析表的內容。"""
+    if not job_ids:
+        return {}
+    with get_session(db_name=db_name) as session:
+        rows = session.execute(
+            select(SkillAnalyticsSnapshot.job_id, SkillAnalyticsSnapshot.contribution).where(
+                SkillAnalyticsSnapshot.job_id.in_(job_ids)
+            )
+        ).all()
+        return {job_id: json.loads(contribution) for job_id, contribution in rows}
+
+
+def apply_skill_analytics_deltas(
+    cooccurrence_deltas: Dict[Tuple[str, str, date, str], int],
+    weekly_deltas: Dict[Tuple[str, str, str, date], int],
+    snapshots: Dict[str, Optional[Dict[str, Any]]],
+    processed: List[Tuple[str, int]],
+    db_name: str = None,
+    batch_size: int = 10000,
+) -> None:
+    """
+    在同一個交易中：把計數增減量累加進兩張分析表、更新職缺快照 (None 表示刪除)，
+    並移除已處理的待處理標記；處理期間又被標記 (mark_count 已改變) 的職缺保留到下一輪。
+    """
+    with get_session(db_name=db_name) as session:
+        cooccurrence_rows = [
+            {"skill_id": skill, "category_source_id": category, "month_start": month, "other_skill_id": other, "job_count": delta}
+            for (skill, category, month, other), delta in cooccurrence_deltas.items()
+            if delta
+        ]
+        cooccurrence_insert = insert(SkillCooccurrence)
+        cooccurrence_upsert = cooccurrence_insert.on_duplicate_key_update(
+            job_count=SkillCooccurrence.job_count + cooccurrence_insert.inserted.job_count
+        )
+        for i in range(0, len(cooccurrence_rows), batch_size):
+            session.execute(cooccurrence_upsert, cooccurrence_rows[i:i + batch_size])
+
+        weekly_rows = [
+            {
+                "skill_id": skill,
+                "category_source_id": category,
+                "source_platform": SourcePlatform(platform),
+                "week_start": week,
+                "job_count": delta,
+            }
+            for (skill, category, platform, week), delta in weekly_deltas.items()
+            if delta
+        ]
+        weekly_insert = insert(SkillWeeklyCount)
+        weekly_upsert = weekly_insert.on_duplicate_key_update(
+            job_count=SkillWeeklyCount.job_count + weekly_insert.inserted.job_count
+        )
+        for i in range(0, len(weekly_rows), batch_size):
+            session.execute(weekly_upsert, weekly_rows[i:i + batch_size])
+
+        removed = [job_id for job_id, snapshot in snapshots.items() if snapshot is None]
+        if removed:
+            session.execute(delete(SkillAnalyticsSnapshot).where(SkillAnalyticsSnapshot.job_id.in_(removed)))
+        snapshot_rows = [
+            {"job_id": job_id, "contribution": json.dumps(snapshot, ensure_ascii=False)}
+            for job_id, snapshot in snapshots.items()
+            if snapshot is not None
+        ]
+        if snapshot_rows:
+            snapshot_insert = insert(SkillAnalyticsSnapshot).values(snapshot_rows)
+            session.execute(snapshot_insert.on_duplicate_key_update(contribution=snapshot_insert.inserted.contribution))
+
+        dirty = SkillAnalyticsDirtyJob.__table__
+        session.connection().execute(
+            delete(dirty).where(dirty.c.job_id == bindparam("b_job_id"), dirty.c.mark_count == bindparam("b_mark_count")),
+            [{"b_job_id": job_id, "b_mark_count": mark_count} for job_id, mark_count in processed],
+        )
+        session.commit()
+
+
+def prune_skill_analytics(db_name: str = None) -> int:
+    """刪除計數已歸零的列，讓分析表保持稀疏，回傳刪除筆數。"""
+    with get_session(db_name=db_name) as session:
+        deleted = session.execute(delete(SkillCooccurrence).where(SkillCooccurrence.job_count <= 0)).rowcount
+        deleted += session.execute(delete(SkillWeeklyCount).where(SkillWeeklyCount.job_count <= 0)).rowcount
+        session.commit()
+        return deleted
+
+
+def reset_skill_analytics(db_name: str = None) -> None:
+    """清空技能分析表與快照，並把所有職缺標記為待處理；下一次增量更新即為全量重建。"""
+    with get_session(db_name=db_name) as session:
+        session.execute(delete(SkillCooccurrence))
+        session.execute(delete(SkillWeeklyCount))
+        session.execute(delete(SkillAnalyticsSnapshot))
+        _mark_job_query_for_skill_analytics(session, select(Job.source_job_id))
+        session.commit()
+
+
+def get_cooccurring_skills(
+    skill_name: str,
+    month_start: date,
+    category_source_id: str = SKILL_ANALYTICS_ALL_CATEGORIES,
+    limit: int = 20,
+    db_name: str = None,
+) -> List[Tuple[str, int]]:
+    """某月份、某職務類別中最常與 skill_name 一起出現的技能 (other_skill_id, 職缺數)。"""
+    with get_session(db_name=db_name) as session:
+        statement = (
+            select(SkillCooccurrence.other_skill_id, SkillCooccurrence.job_count)
+            .where(
+                SkillCooccurrence.skill_id == skill_name,
+                SkillCooccurrence.category_source_id == category_source_id,
+                SkillCooccurrence.month_start == month_start,
+                SkillCooccurrence.job_count > 0,
+            )
+            .order_by(SkillCooccurrence.job_count.desc())
+            .limit(limit)
+        )
+        return [tuple(row) for row in session.execute(statement).all()]
+
+
+def get_skill_weekly_counts(
+    skill_name: str,
+    category_source_id: str = SKILL_ANALYTICS_ALL_CATEGORIES,
+    platform: Optional[SourcePlatform] = None,
+    since: Optional[date] = None,
+    db_name: str = None,
+) -> List[Tuple[date, int]]:
+    """技能每週職缺數趨勢 (week_start, 職缺數)；未指定平台時加總所有平台。"""
+    with get_session(db_name=db_name) as session:
+        statement = (
+            select(SkillWeeklyCount.week_start, func.sum(SkillWeeklyCount.job_count))
+            .where(
+                SkillWeeklyCount.skill_id == skill_name,
+                SkillWeeklyCount.category_source_id == category_source_id,
+            )
+            .group_by(SkillWeeklyCount.week_start)
+            .order_by(SkillWeeklyCount.week_start)
+        )
+        if platform is not None:
+            statement = statement.where(SkillWeeklyCount.source_platform == platform)
+        if since is not None:
+            statement = statement.where(SkillWeeklyCount.week_start >= since)
+        return [(week_start, int(count)) for week_start, count in session.execute(statement).all()]
 
 
 def get_url_by_url_string(url: str, db_name: str = None) -> Optional[UrlPydantic]:
@@ -312,6 +894,7 @@ def get_urls_to_process(
         )
         return urls
 
+@timed_db_write("update_urls_status", rows_arg="urls")
 def update_urls_status(urls: List[str], status: CrawlStatus, db_name: str = None) -> None:
     """
     批量更新一組 URL 的爬取狀態。
@@ -418,6 +1001,7 @@ def get_all_categories_for_platform(
         return categories
 
 
+@timed_db_write("upsert_urls", rows_arg="urls")
 def upsert_urls(platform: SourcePlatform, urls: List[UrlPydantic], db_name: str = None) -> None:
     """
     Synchronizes a list of URLs for a given platform with the database。
@@ -450,6 +1034,7 @@ def upsert_urls(platform: SourcePlatform, urls: List[UrlPydantic], db_name: str
     logger.info("URLs upserted successfully.", platform=platform.value, count=len(urls), affected_rows=affected_rows)
 
 
+@timed_db_write("upsert_url_categories", rows_arg="url_category_tags")
 def upsert_url_categories(url_category_tags: List[Dict[str, str]], db_name: str = None) -> None:
     """
     Upserts job category tags into the tb_job_category_tags table.
@@ -620,3 +1205,162 @@ def sync_job_observations_geocoding(db_name: str = None, batch_size: int = 1000)
 
     logger.info(f"tb_job_observations 地理編碼同步完成。總共更新了 {total_synced_count} 筆記錄。")
 
+
+
+def insert_crawl_run(
+    platform: SourcePlatform,
+    task_name: str,
+    started_at: datetime,
+    celery_task_id: Optional[str] = None,
+    hostname: Optional[str] = None,
+    pid: Optional[int] = None,
+    db_name: str = None,
+) -> int:
+    """新增一筆 status=running 的爬取執行記錄，回傳其 id。"""
+    with get_session(db_name=db_name) as session:
+        run = CrawlRun(
+            source_platform=platform,
+            task_name=task_name,
+            celery_task_id=celery_task_id,
+            hostname=hostname,
+            pid=pid,
+            status=crawl_runs.RUN_STATUS_RUNNING,
+            started_at=started_at,
+        )
+        session.add(run)
+        session.flush()
+        return run.id
+
+
+def finish_crawl_run(run_id: int, values: Dict[str, Any], categories: List[Dict[str, Any]], db_name: str = None) -> None:
+    """更新執行記錄的結果與統計，並寫入各類別的統計。"""
+    with get_session(db_name=db_name) as session:
+        session.execute(update(CrawlRun).where(CrawlRun.id == run_id).values(**values))
+        if categories:
+            session.execute(insert(CrawlRunCategory), [{"run_id": run_id, **category} for category in categories])
+
+
+@timed_db_write("claim_seen_jobs", rows_arg="job_ids")
+def claim_seen_jobs(
+    platform: SourcePlatform,
+    epoch: str,
+    job_ids: List[str],
+    claimed_by: str,
+    db_name: str = None,
+) -> Set[str]:
+    """
+    以 INSERT IGNORE 把職缺 ID 寫入本週期的 tb_crawl_seen_jobs，回傳由這次呼叫寫入 (先前沒有任務處理過) 的 ID。
+    影響列數等於筆數時全部是新的、為 0 時全部已存在，只有部分重複時才再以 claimed_by 查出自己寫入的列。
+    job_ids 不可重複。
+    """
+    if not job_ids:
+        return set()
+    rows = [
+        {"epoch": epoch, "source_platform": platform, "source_job_id": job_id, "claimed_by": claimed_by}
+        for job_id in job_ids
+    ]
+    with get_session(db_name=db_name) as session:
+        result = session.execute(insert(CrawlSeenJob).prefix_with("IGNORE").values(rows))
+        if result.rowcount == len(rows):
+            return set(job_ids)
+        if result.rowcount == 0:
+            return set()
+        claimed = session.execute(
+            select(CrawlSeenJob.source_job_id).where(
+                CrawlSeenJob.epoch == epoch,
+                CrawlSeenJob.source_platform == platform,
+                CrawlSeenJob.claimed_by == claimed_by,
+                CrawlSeenJob.source_job_id.in_(job_ids),
+            )
+        ).scalars()
+        return set(claimed)
+
+
+@timed_db_write("release_seen_jobs", rows_arg="job_ids")
+def release_seen_jobs(
+    platform: SourcePlatform,
+    epoch: str,
+    job_ids: List[str],
+    claimed_by: str,
+    db_name: str = None,
+) -> int:
+    """刪除 claimed_by 認領、但最後沒有寫入資料庫的職缺，讓同一週期的其他類別任務可以重新認領；回傳刪除筆數。"""
+    if not job_ids:
+        return 0
+    with get_session(db_name=db_name) as session:
+        result = session.execute(
+            delete(CrawlSeenJob).where(
+                CrawlSeenJob.epoch == epoch,
+                CrawlSeenJob.source_platform == platform,
+                CrawlSeenJob.claimed_by == claimed_by,
+                CrawlSeenJob.source_job_id.in_(job_ids),
+            )
+        )
+        return result.rowcount
+
+
+@timed_db_write("add_pending_category_tags", rows_arg="url_category_tags")
+def add_pending_category_tags(
+    platform: SourcePlatform,
+    epoch: str,
+    url_category_tags: List[Dict[str, str]],
+    db_name: str = None,
+) -> None:
+    """記錄被略過的重複職缺在目前類別的標籤 (job_id, category_source_id)，等職缺寫入 tb_jobs 後由 flush_pending_category_tags 搬移。"""
+    if not url_category_tags:
+        return
+    rows = [
+        {"epoch": epoch, "source_platform": platform, "job_id": tag["job_id"], "category_source_id": tag["category_source_id"]}
+        for tag in url_category_tags
+    ]
+    with get_session(db_name=db_name) as session:
+        session.execute(insert(CrawlPendingCategoryTag).prefix_with("IGNORE").values(rows))
+
+
+@timed_db_write("flush_pending_category_tags", rows_arg="job_ids")
+def flush_pending_category_tags(
+    platform: SourcePlatform,
+    epoch: str,
+    job_ids: List[str],
+    db_name: str = None,
+) -> int:
+    """
+    把 job_ids 中已存在於 tb_jobs 的待寫入標籤寫入 tb_job_category_tags 並刪除，回傳寫入的標籤數。
+    認領的任務寫入職缺後、略過的任務結束時各呼叫一次，兩者之中較晚的一方一定看得到職缺與標籤。
+    """
+    if not job_ids:
+        return 0
+    with get_session(db_name=db_name) as session:
+        pending = session.execute(
+            select(CrawlPendingCategoryTag.job_id, CrawlPendingCategoryTag.category_source_id)
+            .join(Job, Job.source_job_id == CrawlPendingCategoryTag.job_id)
+            .where(
+                CrawlPendingCategoryTag.epoch == epoch,
+                CrawlPendingCategoryTag.source_platform == platform,
+                CrawlPendingCategoryTag.job_id.in_(job_ids),
+            )
+        ).all()
+        if not pending:
+            return 0
+        _generic_upsert(session, JobCategoryTag, [{"job_id": job_id, "category_source_id": category_id} for job_id, category_id in pending], ['job_id'])
+        job_ids_by_category: Dict[str, List[str]] = {}
+        for job_id, category_id in pending:
+            job_ids_by_category.setdefault(category_id, []).append(job_id)
+        for category_id, flushed_job_ids in job_ids_by_category.items():
+            session.execute(
+                delete(CrawlPendingCategoryTag).where(
+                    CrawlPendingCategoryTag.epoch == epoch,
+                    CrawlPendingCategoryTag.source_platform == platform,
+                    CrawlPendingCategoryTag.category_source_id == category_id,
+                    CrawlPendingCategoryTag.job_id.in_(flushed_job_ids),
+                )
+            )
+        return len(pending)
+
+
+def purge_seen_jobs(older_than: datetime, db_name: str = None) -> int:
+    """刪除 seen_at 早於 older_than 的週期記錄 (以及沒有等到職缺寫入的待寫入標籤)，回傳刪除的認領記錄筆數。"""
+    with get_session(db_name=db_name) as session:
+        result = session.execute(delete(CrawlSeenJob).where(CrawlSeenJob.seen_at < older_than))
+        session.execute(delete(CrawlPendingCategoryTag).where(CrawlPendingCategoryTag.created_at < older_than))
+        return result.rowcount
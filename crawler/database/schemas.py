@@ -96,6 +96,8 @@ class CompanyPydantic(BaseModel):
     source_company_id: str
     name: str
     url: Optional[str] = None
+    location_text: Optional[str] = None
+    location_updated_at: Optional[datetime] = None
     
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
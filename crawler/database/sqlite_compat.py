@@ -0,0 +1,55 @@
+"""
+讓 repository.py 的 MySQL 專用 INSERT 語法也能在 SQLite 上執行 (CRAWLER_DB_URL 指向 sqlite 時)，
+供效能測試以本機 SQLite 檔案或記憶體資料庫代替 MySQL：
+
+- INSERT ... ON DUPLICATE KEY UPDATE -> INSERT ... ON CONFLICT DO UPDATE SET (不指定衝突目標，
+  與 MySQL 相同，對主鍵與任一唯一索引衝突都生效；需要 SQLite 3.35 以上)，stmt.inserted.<欄位> 改為 excluded.<欄位>
+- INSERT IGNORE -> INSERT OR IGNORE
+
+只在以 sqlite 方言編譯時生效，MySQL 的編譯結果不變。
+"""
+from sqlalchemy import literal_column, true
+from sqlalchemy.dialects.mysql.dml import Insert as MySQLInsert, OnDuplicateClause
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql import elements, visitors
+
+
+@compiles(MySQLInsert, "sqlite")
+def _compile_mysql_insert_for_sqlite(insert_stmt, compiler, **kw):
+    prefixes = insert_stmt._prefixes
+    if any(str(prefix).strip().upper() == "IGNORE" for prefix, _ in prefixes) or (
+        insert_stmt.select is not None and insert_stmt._post_values_clause is not None
+    ):
+        insert_stmt = insert_stmt._generate()
+        insert_stmt._prefixes = tuple(
+            (literal_column("OR IGNORE") if str(prefix).strip().upper() == "IGNORE" else prefix, dialect)
+            for prefix, dialect in prefixes
+        )
+        if insert_stmt.select is not None and insert_stmt._post_values_clause is not None:
+            # SQLite 規定 INSERT ... SELECT ... ON CONFLICT 的 SELECT 必須有 WHERE，否則無法判斷 ON 屬於哪個子句
+            insert_stmt.select = insert_stmt.select.where(true())
+    return compiler.visit_insert(insert_stmt, **kw)
+
+
+@compiles(OnDuplicateClause, "sqlite")
+def _compile_on_duplicate_for_sqlite(on_duplicate, compiler, **kw):
+    table = compiler.current_executable.table
+    clauses = []
+    for column in table.c:
+        if column.key not in on_duplicate.update:
+            continue
+        value = on_duplicate.update[column.key]
+
+        def replace(element, column=column, **_):
+            if isinstance(element, elements.BindParameter) and element.type._isnull:
+                return element._with_binary_element_type(column.type)
+            if isinstance(element, elements.ColumnClause) and element.table is on_duplicate.inserted_alias:
+                return literal_column(f"excluded.{compiler.preparer.quote(element.name)}")
+            return None
+
+        if not isinstance(value, elements.ClauseElement):
+            value = elements.BindParameter(None, value, type_=column.type)
+        value = visitors.replacement_traverse(value, {}, replace)
+        value_text = compiler.process(value.self_group(), use_schema=False)
+        clauses.append(f"{compiler.preparer.quote(column.name)} = {value_text}")
+    return "ON CONFLICT DO UPDATE SET " + ", ".join(clauses)
@@ -1,17 +1,128 @@
+import atexit
 import logging
+import logging.handlers
+import os
+import queue
 import structlog
 import sys
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
 
 # 從集中的設定模組導入日誌級別和格式化工具
-from crawler.config import LOG_LEVEL, LOG_FORMATTER
+from crawler.config import (
+    LOG_LEVEL,
+    LOG_FORMATTER,
+    LOG_PROFILE,
+    LOG_QUEUE_SIZE,
+    LOG_SAMPLE_BURST,
+    LOG_SAMPLE_INTERVAL_SECONDS,
+)
 
+LOG_PROFILES = ("dev", "production")
 
-def configure_logging():
+# 事件種類超過此數量時清空取樣視窗 (以 f-string 組成的訊息每筆都不同，避免記憶體無限成長)
+_MAX_SAMPLED_EVENTS = 10000
+
+
+class EventSampler:
+    """
+    structlog processor：同一個 logger 的同一個事件在每個 interval 秒內最多輸出 burst 筆 DEBUG/INFO，
+    其餘丟棄；視窗結束後的第一筆會附上 sampled_out (被丟棄的筆數)。WARNING 以上一律輸出。
+    """
+
+    def __init__(self, burst: int, interval_seconds: float):
+        self.burst = burst
+        self.interval_seconds = interval_seconds
+        self._windows: Dict[Tuple[Any, Any], list] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, logger, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+        if method_name not in ("debug", "info"):
+            return event_dict
+        key = (event_dict.get("logger"), event_dict.get("event"))
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None:
+                if len(self._windows) >= _MAX_SAMPLED_EVENTS:
+                    self._windows.clear()
+                window = self._windows[key] = [now, 0, 0]  # 視窗開始時間、已輸出、已丟棄
+            elif now - window[0] >= self.interval_seconds:
+                window[0], window[1] = now, 0
+            if window[1] >= self.burst:
+                window[2] += 1
+                raise structlog.DropEvent
+            window[1] += 1
+            dropped, window[2] = window[2], 0
+        if dropped:
+            event_dict["sampled_out"] = dropped
+        return event_dict
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
     """
-    配置應用程式的日誌系統，整合 structlog 和標準 logging。
-    日誌級別和格式化工具從 crawler.config 獲取。
+    只把 LogRecord 放進佇列，格式化與寫出都交給 QueueListener 的背景執行緒；
+    佇列滿時丟棄 INFO 以下的記錄 (dropped 計數)，WARNING 以上等待寫入。
     """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 預設的 prepare 會在呼叫端執行緒先格式化；structlog 的 event dict 留給背景執行緒的 formatter 渲染
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if record.levelno >= logging.WARNING:
+                self.queue.put(record)
+            else:
+                self.dropped += 1
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _start_listener(queue_handler: NonBlockingQueueHandler, handler: logging.Handler) -> None:
+    global _listener
+    queue_handler.queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    _listener = logging.handlers.QueueListener(queue_handler.queue, handler, respect_handler_level=True)
+    _listener.start()
+
+
+def _stop_listener() -> None:
+    # 結束前把佇列中剩餘的記錄寫完
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
+def _build_renderer(profile: str):
+    # 根據 LOG_FORMATTER 選擇渲染器 (production 一律 JSON)
+    #    - console: 美觀、適合開發但效能較差
+    #    - key_value: 結構化、易讀且效能好
+    #    - json: 機器可讀、效能最佳，適合生產環境
+    if profile == "production":
+        return structlog.processors.JSONRenderer(ensure_ascii=False)
+    if LOG_FORMATTER == "console":
+        return structlog.dev.ConsoleRenderer()
+    if LOG_FORMATTER == "key_value":
+        return structlog.processors.KeyValueRenderer(key_order=['timestamp', 'level', 'event'])
+    return structlog.processors.JSONRenderer()
+
+
+def configure_logging(profile: str = LOG_PROFILE):
+    """
+    配置應用程式的日誌系統，整合 structlog 和標準 logging；CLI、producer 與 Celery worker 共用。
+    日誌級別和格式化工具從 crawler.config 獲取，profile 見 LOG_PROFILE。
+    """
+    if profile not in LOG_PROFILES:
+        raise ValueError(f"LOG_PROFILE must be one of {LOG_PROFILES}, got {profile!r}.")
     numeric_log_level = getattr(logging, LOG_LEVEL, logging.INFO)
+    production = profile == "production"
 
     root_logger = logging.getLogger()
     # 確保 root logger 的級別總是正確設定
@@ -20,36 +131,32 @@ def configure_logging():
     # 檢查是否已經配置過，避免重複添加 handler
     if not root_logger.handlers:
         # 1. 配置 structlog 的處理器鏈
-        #    - TimeStamper: 添加時間戳
         #    - add_logger_name, add_log_level: 添加日誌器名稱和級別
+        #    - EventSampler (production): 重複訊息取樣，放在時間戳之前，被丟棄的事件不做多餘的工作
+        #    - TimeStamper: 添加時間戳
+        #    - format_exc_info (production): exc_info 必須在呼叫端執行緒轉成文字，之後才交給背景執行緒
         #    - wrap_for_formatter: 為標準庫的 formatter 準備
         processors = [
             structlog.stdlib.add_logger_name,
             structlog.stdlib.add_log_level,
-            structlog.processors.TimeStamper(fmt="iso"),
-            structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
         ]
+        if production and LOG_SAMPLE_BURST > 0:
+            processors.append(EventSampler(LOG_SAMPLE_BURST, LOG_SAMPLE_INTERVAL_SECONDS))
+        processors.append(structlog.processors.TimeStamper(fmt="iso"))
+        if production:
+            processors.append(structlog.processors.format_exc_info)
+        processors.append(structlog.stdlib.ProcessorFormatter.wrap_for_formatter)
         structlog.configure(
             processors=processors,
             logger_factory=structlog.stdlib.LoggerFactory(),
-            wrapper_class=structlog.stdlib.BoundLogger,
+            # production：低於 LOG_LEVEL 的呼叫直接返回，不經過任何 processor
+            wrapper_class=structlog.make_filtering_bound_logger(numeric_log_level) if production else structlog.stdlib.BoundLogger,
             cache_logger_on_first_use=True,
         )
 
-        # 2. 根據 LOG_FORMATTER 選擇渲染器
-        #    - console: 美觀、適合開發但效能較差
-        #    - key_value: 結構化、易讀且效能好
-        #    - json: 機器可讀、效能最佳，適合生產環境
-        if LOG_FORMATTER == "console":
-            renderer = structlog.dev.ConsoleRenderer()
-        elif LOG_FORMATTER == "key_value":
-            renderer = structlog.processors.KeyValueRenderer(key_order=['timestamp', 'level', 'event'])
-        else:
-            renderer = structlog.processors.JSONRenderer()
-
-        # 3. 配置標準 logging 的 formatter 和 handler
+        # 2. 配置標準 logging 的 formatter 和 handler
         formatter = structlog.stdlib.ProcessorFormatter(
-            processor=renderer,
+            processor=_build_renderer(profile),
             foreign_pre_chain=[
                 structlog.stdlib.add_logger_name,
                 structlog.stdlib.add_log_level,
@@ -60,14 +167,23 @@ def configure_logging():
         handler = logging.StreamHandler(sys.stdout)
         handler.setFormatter(formatter)
         handler.setLevel(numeric_log_level) # Explicitly set handler level
-        # 移除 CustomLogFilter
 
-        # 4. 配置 root logger
-        root_logger.addHandler(handler)
+        # 3. 配置 root logger；production 由背景執行緒寫出，呼叫端不會因 stdout 阻塞
+        if production:
+            queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+            queue_handler.setLevel(numeric_log_level)
+            _start_listener(queue_handler, handler)
+            atexit.register(_stop_listener)
+            # prefork 的子行程不會繼承背景執行緒，fork 後重新建立佇列與寫出執行緒
+            os.register_at_fork(after_in_child=lambda: _start_listener(queue_handler, handler))
+            root_logger.addHandler(queue_handler)
+        else:
+            root_logger.addHandler(handler)
 
         logger = structlog.get_logger(__name__)
         logger.info(
             "日誌系統配置完成",
             configured_level=LOG_LEVEL,
-            formatter=LOG_FORMATTER,
-        )
\ No newline at end of file
+            formatter="json" if production else LOG_FORMATTER,
+            profile=profile,
+        )
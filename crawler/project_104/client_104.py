@@ -1,7 +1,8 @@
+import contextlib
 import json
 import random
 import time
-from typing import Any, Dict, Optional
+from typing import Any, Callable, ContextManager, Dict, Optional
 
 import requests
 import structlog
@@ -12,8 +13,14 @@ from crawler.config import (
     URL_CRAWLER_REQUEST_TIMEOUT_SECONDS,
     URL_CRAWLER_SLEEP_MAX_SECONDS,
     URL_CRAWLER_SLEEP_MIN_SECONDS,
+    HTTP_DETAIL_CACHE_MAX_ENTRIES,
 )
 from crawler.logging_config import configure_logging
+from crawler.utils.hedging import hedged_call
+from crawler.database.schemas import SourcePlatform
+from crawler.utils import crawl_runs
+from crawler.utils.metrics import RATE_LIMIT_WAIT, observe_http_request
+from crawler.utils.singleflight import coalesced
 from crawler.project_104.config_104 import (
     HEADERS_104_JOB_API,
     JOB_API_BASE_URL_104,
@@ -27,13 +34,7 @@ configure_logging()
 logger = structlog.get_logger(__name__)
 
 
-@retry(
-    stop=stop_after_attempt(5),
-    wait=wait_exponential(multiplier=1, min=4, max=10),
-    retry=retry_if_exception_type(requests.exceptions.RequestException),
-    reraise=True,
-)
-def _make_api_request(
+def _send_api_request(
     method: str,
     url: str,
     headers: Optional[Dict[str, str]] = None,
@@ -41,31 +42,26 @@ def _make_api_request(
     timeout: int = 10,
     verify: bool = True,
     log_context: Optional[Dict[str, Any]] = None,
-    session: Optional[requests.Session] = None, # Add session parameter
+    session: Optional[requests.Session] = None,
 ) -> Optional[Dict[str, Any]]:
     """
-    通用的 API 請求函式，處理隨機延遲、請求發送、JSON 解析和錯誤處理。
+    送出單次 API 請求並解析 JSON；網路錯誤往外拋，由呼叫端重試。
     """
     if log_context is None:
         log_context = {}
 
-    # Add random delay before making API request
-    sleep_time = random.uniform(
-        URL_CRAWLER_SLEEP_MIN_SECONDS, URL_CRAWLER_SLEEP_MAX_SECONDS
-    )
-    logger.debug("Sleeping before API request.", duration=sleep_time, **log_context)
-    time.sleep(sleep_time)
-
     try:
         requester = session if session else requests # Use session if provided
-        response = requester.request(
-            method,
-            url,
-            headers=headers,
-            params=params,
-            timeout=timeout,
-            verify=verify,
-        )
+        with observe_http_request(SourcePlatform.PLATFORM_104.value, log_context.get("api_type")) as request_metrics:
+            response = requester.request(
+                method,
+                url,
+                headers=headers,
+                params=params,
+                timeout=timeout,
+                verify=verify,
+            )
+            request_metrics.status = response.status_code
         response.raise_for_status()  # Raises HTTPError for bad responses (4xx or 5xx)
         data = response.json()
         return data
@@ -97,6 +93,52 @@ def _make_api_request(
         return None
 
 
+@retry(
+    stop=stop_after_attempt(5),
+    wait=wait_exponential(multiplier=1, min=4, max=10),
+    retry=retry_if_exception_type(requests.exceptions.RequestException),
+    before_sleep=crawl_runs.record_retry,
+    reraise=True,
+)
+def _make_api_request(
+    method: str,
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    params: Optional[Dict[str, Any]] = None,
+    timeout: int = 10,
+    verify: bool = True,
+    log_context: Optional[Dict[str, Any]] = None,
+    session: Optional[requests.Session] = None, # Add session parameter
+    hedge_endpoint: Optional[str] = None,
+    acquire: Optional[Callable[[], ContextManager]] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    通用的 API 請求函式，處理隨機延遲、請求發送、JSON 解析和錯誤處理。
+    hedge_endpoint 有指定時，只對單次 HTTP 請求對沖 (隨機延遲與重試不計入對沖的延遲統計)；
+    acquire 為每次請求 (包含對沖請求) 各自取得的限流名額。
+    """
+    # Add random delay before making API request
+    sleep_time = random.uniform(
+        URL_CRAWLER_SLEEP_MIN_SECONDS, URL_CRAWLER_SLEEP_MAX_SECONDS
+    )
+    RATE_LIMIT_WAIT.observe(sleep_time, platform=SourcePlatform.PLATFORM_104.value, limiter="sleep")
+    time.sleep(sleep_time)
+
+    request_kwargs = dict(
+        headers=headers,
+        params=params,
+        session=session,
+        timeout=timeout,
+        verify=verify,
+        log_context=log_context,
+    )
+    if hedge_endpoint:
+        return hedged_call(hedge_endpoint, _send_api_request, method, url, acquire=acquire, **request_kwargs)
+    with acquire() if acquire else contextlib.nullcontext():
+        return _send_api_request(method, url, **request_kwargs)
+
+
+@coalesced(max_entries=HTTP_DETAIL_CACHE_MAX_ENTRIES)
 def fetch_job_data_from_104_api(job_id: str, session: Optional[requests.Session] = None) -> Optional[Dict[str, Any]]:
     """
     從 104 API 獲取單一職缺的原始數據。
@@ -137,6 +179,7 @@ def fetch_job_urls_from_104_api(
 ) -> Optional[Dict[str, Any]]:
     """
     從 104 API 獲取職缺 URL 列表的原始數據。
+    列表頁的尾端延遲決定整個類別的完成時間，因此允許對沖請求 (見 crawler.utils.hedging)。
     """
     return _make_api_request(
         "GET",
@@ -147,4 +190,5 @@ def fetch_job_urls_from_104_api(
         verify=verify,
         log_context={"api_type": "job_urls"},
         session=session, # Pass session
+        hedge_endpoint="104_job_urls",
     )
\ No newline at end of file
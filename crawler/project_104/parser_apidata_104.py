@@ -2,8 +2,6 @@ import re
 from datetime import datetime
 from typing import Optional
 import structlog
-import pandas as pd
-import os
 from crawler.database.scripts.clean_address_detail import clean_address
 
 from crawler.database.schemas import (
@@ -16,30 +14,11 @@ from crawler.database.schemas import (
     SalaryType,
     SkillPydantic,
 )
-from crawler.utils.run_skill_extraction import extract_skills_precise
+from crawler.utils.skill_extraction_stage import extract_skills_for_crawl
+from crawler.utils.metrics import timed_parse
 
 logger = structlog.get_logger(__name__)
 
-SKILL_MASTER_PATH = os.path.join(
-    os.path.dirname(os.path.abspath(__file__)),
-    '..',
-    'utils',
-    'skill_data',
-    'generated_data',
-    'skill_master.json'
-)
-
-try:
-    SKILL_MASTER_DF = pd.read_json(SKILL_MASTER_PATH)
-    logger.info(f"已載入技能主檔: {SKILL_MASTER_PATH}")
-except FileNotFoundError:
-    logger.error(f"錯誤：找不到技能主檔。請先執行 `python3 -m skill_tool.run_skill_extraction --generate-kb` 來生成 {SKILL_MASTER_PATH}")
-    SKILL_MASTER_DF = pd.DataFrame() # Provide an empty DataFrame to avoid errors later
-except Exception as e:
-    logger.error(f"載入技能主檔失敗: {e}")
-    SKILL_MASTER_DF = pd.DataFrame() # Provide an empty DataFrame to avoid errors later
-
-
 # 104 API 的 jobType 到我們內部 JobType Enum 的映射
 JOB_TYPE_MAPPING = {
     0: JobType.FULL_TIME, # 0 也代表全職
@@ -142,6 +121,7 @@ def parse_salary(
     return salary_min, salary_max, salary_type
 
 
+@timed_parse(SourcePlatform.PLATFORM_104.value)
 def parse_job_item_to_pydantic(job_item: dict) -> Optional[JobPydantic]:
     """
     從 104 API 的單一職缺項目(dict)解析並轉換為 JobPydantic 物件。
@@ -275,8 +255,8 @@ def parse_job_item_to_pydantic(job_item: dict) -> Optional[JobPydantic]:
 
         # Extract skills from description
         extracted_skills = []
-        if description and SKILL_MASTER_DF is not None and not SKILL_MASTER_DF.empty:
-            extracted_skills = extract_skills_precise(description, SKILL_MASTER_DF)
+        if description:
+            extracted_skills = extract_skills_for_crawl(description)
 
         job_pydantic = JobPydantic(
             source_platform=SourcePlatform.PLATFORM_104,
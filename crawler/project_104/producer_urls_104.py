@@ -1,6 +1,7 @@
 from crawler.database.repository import get_all_categories_for_platform, get_all_crawled_category_ids_pandas, get_stale_crawled_category_ids_pandas
 from crawler.project_104.task_urls_104 import crawl_and_store_category_urls
 from crawler.database.models import SourcePlatform, CategorySourcePydantic
+from crawler.utils.crawl_dedup import start_crawl_epoch
 import structlog
 from typing import Optional, Set, List
 
@@ -57,10 +58,12 @@ def dispatch_urls_for_all_categories(sort_key: Optional[str] = None, limit: int
                 actual_count=len(categories_to_dispatch),
             )
 
+        # 這一輪的所有類別共用同一個爬取週期，出現在多個類別的職缺只處理一次
+        crawl_epoch = start_crawl_epoch()
         for category_info in categories_to_dispatch:
             category_id: str = category_info.source_category_id
             logger.info("分發 URL 抓取任務", category_id=category_id, url_limit=url_limit)
             # 在直接執行模式下，我們直接調用函數
-            crawl_and_store_category_urls(category_info.model_dump(), url_limit=url_limit)
+            crawl_and_store_category_urls(category_info.model_dump(), url_limit=url_limit, crawl_epoch=crawl_epoch)
     else:
         logger.info("No categories found to dispatch for URL crawling.")
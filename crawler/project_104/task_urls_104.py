@@ -8,7 +8,7 @@ import os
 
 import structlog
 import time
-from typing import Optional, List, Dict, Any, Set, Tuple
+from typing import Optional, List, Dict, Any, Tuple
 import requests
 import functools
 from collections import defaultdict
@@ -20,6 +20,11 @@ from crawler.database.repository import upsert_jobs, upsert_urls, upsert_url_cat
 from crawler.project_104.client_104 import fetch_job_urls_from_104_api
 from crawler.project_104.parser_apidata_104 import parse_job_item_to_pydantic
 from crawler.database.connection import initialize_database
+from crawler.utils import crawl_runs
+from crawler.utils.crawl_dedup import CrawlDedup, start_crawl_epoch
+from crawler.utils.hedging import get_hedge_stats
+from crawler.utils.id_set import IdSet, make_id_set
+from crawler.utils.raw_archive import RAW_KIND_LIST_ITEM, archive_raw_payload
 from crawler.config import get_db_name_for_platform, URL_CRAWLER_UPLOAD_BATCH_SIZE, URL_CRAWLER_REQUEST_TIMEOUT_SECONDS, MYSQL_DATABASE, URL_CRAWLER_API_RETRIES, URL_CRAWLER_API_BACKOFF_FACTOR
 from crawler.project_104.config_104 import URL_CRAWLER_BASE_URL_104, URL_CRAWLER_PAGE_SIZE_104, HEADERS_104_URL_CRAWLER, URL_CRAWLER_ORDER_BY_104
 
@@ -52,6 +57,8 @@ def _fetch_job_list_page(session: requests.Session, base_params: Dict[str, Any],
                 error=str(e),
                 page=page_num
             )
+            if attempt < retries - 1:
+                crawl_runs.record(retries=1)
             time.sleep(backoff_factor * (2 ** attempt))
     logger.error("API request failed after multiple retries.", page=page_num)
     return None
@@ -117,47 +124,63 @@ def _get_db_name(db_name_override: Optional[str]) -> str:
         return get_db_name_for_platform(SourcePlatform.PLATFORM_104.value)
 
 
-def _process_job_items(api_job_urls: List[Dict[str, Any]], job_url_set_local: set, global_job_url_set: set) -> Tuple[List[JobPydantic], List[JobPydantic], List[Dict[str, str]]]:
+def _process_job_items(api_job_urls: List[Dict[str, Any]], job_ids_local: IdSet, global_job_ids: IdSet, dedup: CrawlDedup) -> Tuple[List[JobPydantic], List[JobPydantic], List[Dict[str, str]]]:
     """
     Processes a list of raw job items, parses them, and prepares them for upsertion and observation.
+    Jobs already handled by another category task in the same crawl epoch are skipped (see crawl_dedup).
     Returns (jobs_for_upsert, jobs_for_observations, job_category_tags_to_upsert).
     """
     jobs_for_upsert: List[JobPydantic] = []
     jobs_for_observations: List[JobPydantic] = []
     job_category_tags_to_upsert: List[Dict[str, str]] = []
+    parsed_jobs: List[JobPydantic] = []
 
     for job_item_raw in api_job_urls:
         job_pydantic = parse_job_item_to_pydantic(job_item_raw)
+        archive_raw_payload(
+            SourcePlatform.PLATFORM_104,
+            job_pydantic.source_job_id if job_pydantic else job_item_raw.get("jobNo"),
+            RAW_KIND_LIST_ITEM,
+            job_item_raw,
+            url=job_pydantic.url if job_pydantic else None,
+        )
         if job_pydantic:
-            # Always add to observations list
-            jobs_for_observations.append(job_pydantic)
-
-            # Add to upsert list only if unique within this category crawl
-            if job_pydantic.source_job_id not in job_url_set_local:
-                job_url_set_local.add(job_pydantic.source_job_id)
-                global_job_url_set.add(job_pydantic.source_job_id)
-                jobs_for_upsert.append(job_pydantic)
-            else:
-                logger.debug("Skipping duplicate job ID for upsert (already seen in this category crawl).", job_id=job_pydantic.source_job_id)
-
-            # Add category tags for all jobs (observations)
-            if job_pydantic.source_job_id and job_pydantic.category_tags:
-                for cat_id in job_pydantic.category_tags:
-                    job_category_tags_to_upsert.append(
-                        {
-                            "job_id": job_pydantic.source_job_id,
-                            "category_source_id": cat_id,
-                        }
-                    )
+            parsed_jobs.append(job_pydantic)
         else:
             logger.warning("Failed to parse job item to Pydantic model.", job_item_raw=job_item_raw)
 
+    new_job_ids = dedup.filter_new(job.source_job_id for job in parsed_jobs)
+    for job_pydantic in parsed_jobs:
+        if job_pydantic.source_job_id not in new_job_ids:
+            continue  # Already handled in this crawl epoch
+
+        # Always add to observations list
+        jobs_for_observations.append(job_pydantic)
+
+        # Add to upsert list only if unique within this category crawl
+        if job_ids_local.add(job_pydantic.source_job_id):
+            global_job_ids.add(job_pydantic.source_job_id)
+            jobs_for_upsert.append(job_pydantic)
+        else:
+            logger.debug("Skipping duplicate job ID for upsert (already seen in this category crawl).", job_id=job_pydantic.source_job_id)
+
+        # Add category tags for all jobs (observations)
+        if job_pydantic.source_job_id and job_pydantic.category_tags:
+            for cat_id in job_pydantic.category_tags:
+                job_category_tags_to_upsert.append(
+                    {
+                        "job_id": job_pydantic.source_job_id,
+                        "category_source_id": cat_id,
+                    }
+                )
+
     return jobs_for_upsert, jobs_for_observations, job_category_tags_to_upsert
 
 
-def _crawl_category_pages(job_category_code: str, url_limit: int, db_name: str, global_job_url_set: Set[str], verify_ssl: bool = True) -> Set[str]:
+def _crawl_category_pages(job_category_code: str, url_limit: int, db_name: str, global_job_ids: IdSet, dedup: CrawlDedup, verify_ssl: bool = True) -> int:
     """
     Core crawling logic for a single job category, iterating through pages.
+    Returns the number of unique job IDs collected for this category.
     """
     jobs_for_upsert: List[JobPydantic] = []
     jobs_for_observations: List[JobPydantic] = []
@@ -165,7 +188,7 @@ def _crawl_category_pages(job_category_code: str, url_limit: int, db_name: str,
 
     page = 1
     max_page = 1 # Initial value for max_page, will be updated from API
-    job_url_set_local = set() # Use a local set for this category's URLs
+    job_ids_local = make_id_set() # Use a local set for this category's job IDs
 
     base_params = {
         'jobsource': 'm_joblist_search',
@@ -203,9 +226,10 @@ def _crawl_category_pages(job_category_code: str, url_limit: int, db_name: str,
 
             if not api_job_urls and page >= max_page:
                 logger.info("No job items found on page, stopping crawling for this category.", page=page, category=job_category_code)
+                crawl_runs.set_stop_reason("no_more_jobs")
                 break
 
-            current_page_jobs_for_upsert, current_page_jobs_for_observations, current_page_job_category_tags = _process_job_items(api_job_urls, job_url_set_local, global_job_url_set)
+            current_page_jobs_for_upsert, current_page_jobs_for_observations, current_page_job_category_tags = _process_job_items(api_job_urls, job_ids_local, global_job_ids, dedup)
             jobs_for_upsert.extend(current_page_jobs_for_upsert)
             jobs_for_observations.extend(current_page_jobs_for_observations)
             job_category_tags_for_all_jobs.extend(current_page_job_category_tags)
@@ -215,6 +239,7 @@ def _crawl_category_pages(job_category_code: str, url_limit: int, db_name: str,
                 logger.info("Batch upload size reached. Starting data upload.", count=len(jobs_for_upsert), category=job_category_code)
                 # Pass jobs_for_upsert for upsert, and jobs_for_observations for observations
                 _upsert_batch_data(jobs_for_upsert, jobs_for_observations, job_category_tags_for_all_jobs, db_name) # urls are handled by upsert_jobs
+                dedup.mark_stored(job.source_job_id for job in jobs_for_observations)
                 
                 jobs_for_upsert.clear()
                 jobs_for_observations.clear()
@@ -223,21 +248,31 @@ def _crawl_category_pages(job_category_code: str, url_limit: int, db_name: str,
             page += 1
 
             # Apply url_limit if it's set and we've exceeded it
-            if url_limit > 0 and len(global_job_url_set) >= url_limit:
+            if url_limit > 0 and len(global_job_ids) >= url_limit:
                 logger.info("URL limit reached, stopping crawling.", url_limit=url_limit, category=job_category_code)
+                crawl_runs.set_stop_reason("url_limit")
                 break
+        else:
+            crawl_runs.set_stop_reason("max_page")
 
     # Store any remaining items in the batch
     _upsert_batch_data(jobs_for_upsert, jobs_for_observations, job_category_tags_for_all_jobs, db_name) # urls are handled by upsert_jobs
+    dedup.mark_stored(job.source_job_id for job in jobs_for_observations)
 
-    return global_job_url_set
+    return len(job_ids_local)
 
 
 @app.task()
-def crawl_and_store_category_urls(job_category: dict, url_limit: int = 0, db_name_override: Optional[str] = None, global_job_url_set: Set[str] = None, verify_ssl: bool = True) -> int:
+@crawl_runs.track_crawl_run(SourcePlatform.PLATFORM_104, db_arg="db_name_override", resolve_db_name=_get_db_name)
+def crawl_and_store_category_urls(job_category: dict, url_limit: int = 0, db_name_override: Optional[str] = None, global_job_ids: Optional[IdSet] = None, verify_ssl: bool = True, crawl_epoch: Optional[str] = None) -> int:
     """
     Celery task: Iterates through all pages of a specified 104 job category, fetches job details,
     and stores them in the database in batches using concurrent fetching.
+    Returns the number of unique jobs collected for the category (not the IDs themselves, which would
+    be serialized through the broker and result backend).
+    global_job_ids is only passed by the local runner to share a compact ID set across categories.
+    crawl_epoch comes from the producer (crawl_dedup.start_crawl_epoch); jobs already handled by another
+    category task in the same epoch are skipped; claims are confirmed only after the batch is stored.
     """
     job_category_pydantic = CategorySourcePydantic.model_validate(job_category)
     job_category_code = job_category_pydantic.source_category_id
@@ -250,10 +285,17 @@ def crawl_and_store_category_urls(job_category: dict, url_limit: int = 0, db_nam
         platform=SourcePlatform.PLATFORM_104,
     )
 
-    total_collected_job_ids = _crawl_category_pages(job_category_code, url_limit, db_name, global_job_url_set, verify_ssl)
+    if global_job_ids is None:
+        global_job_ids = make_id_set()
+    dedup = CrawlDedup(SourcePlatform.PLATFORM_104, crawl_epoch, db_name=db_name)
+    try:
+        total_collected = _crawl_category_pages(job_category_code, url_limit, db_name, global_job_ids, dedup, verify_ssl)
+    finally:
+        # Jobs claimed but not stored (e.g. a failed batch upsert) can be picked up by later category tasks
+        dedup.finish()
 
-    logger.info("Task execution finished.", job_category_code=job_category_code, total_collected=len(total_collected_job_ids))
-    return total_collected_job_ids
+    logger.info("Task execution finished.", job_category_code=job_category_code, total_collected=total_collected, hedge_stats=get_hedge_stats().get("104_job_urls"), **dedup.stats())
+    return total_collected
 
 
 if __name__ == "__main__":
@@ -267,8 +309,10 @@ if __name__ == "__main__":
 
     all_categories = get_all_categories_for_platform(SourcePlatform.PLATFORM_104, db_name=actual_db_name_for_local_test)
     
-    # Add a global set to track all unique job IDs collected across all categories
-    all_collected_job_ids = set()
+    # Add a global compact set to track all unique job IDs collected across all categories
+    all_collected_job_ids = make_id_set()
+    # One crawl epoch for the whole local run: jobs seen in an earlier category are skipped
+    crawl_epoch = start_crawl_epoch()
 
     if all_categories:
         # Identify all parent category IDs
@@ -311,11 +355,10 @@ if __name__ == "__main__":
         # Iterate through all categories for local testing
         for category in sorted_categories:
             logger.info("Dispatching crawl_and_store_category_urls task for local testing.", category=category.source_category_name)
-            collected_job_ids_for_category = crawl_and_store_category_urls(category.model_dump(), url_limit=0, db_name_override=actual_db_name_for_local_test, global_job_url_set=all_collected_job_ids, verify_ssl=False)
-            all_collected_job_ids.update(collected_job_ids_for_category)
-            logger.info("Finished crawling category.", category=category.source_category_name, collected_count=len(collected_job_ids_for_category), total_unique_so_far=len(all_collected_job_ids))
+            collected_count = crawl_and_store_category_urls(category.model_dump(), url_limit=0, db_name_override=actual_db_name_for_local_test, global_job_ids=all_collected_job_ids, verify_ssl=False, crawl_epoch=crawl_epoch)
+            logger.info("Finished crawling category.", category=category.source_category_name, collected_count=collected_count, total_unique_so_far=len(all_collected_job_ids))
             
-        logger.info("All categories processed. Total unique job IDs collected across all categories.", total_unique_jobs=len(all_collected_job_ids))
+        logger.info("All categories processed. Total unique job IDs collected across all categories.", total_unique_jobs=len(all_collected_job_ids), id_set_bytes=all_collected_job_ids.nbytes)
 
     else:
         logger.warning("No categories found in database for testing. Please run producer_category_104 first.")
@@ -12,7 +12,6 @@ from datetime import datetime, timezone
 from typing import Optional, Tuple
 
 import structlog
-import pandas as pd
 from bs4 import BeautifulSoup
 
 # 假設這些 Pydantic 模型和設定檔都存在於您的專案結構中
@@ -26,24 +25,15 @@ from crawler.database.schemas import (
     CompanyPydantic,
 )
 from crawler.project_1111.config_1111 import JOB_DETAIL_BASE_URL_1111
+from crawler.utils.metrics import timed_parse
 from crawler.utils.salary_parser import parse_salary_text
-from crawler.utils.run_skill_extraction import extract_skills_precise, preprocess_skills_for_extraction
+from crawler.utils.skill_extraction_stage import extract_skills_for_crawl
 
 # 日誌設定
 logger = structlog.get_logger(__name__)
 
 # --- 常數定義 (Constants) ---
 
-# 技能主檔路徑
-SKILL_MASTER_PATH = os.path.join(
-    os.path.dirname(os.path.abspath(__file__)),
-    '..',
-    'utils',
-    'skill_data',
-    'generated_data',
-    'skill_master.json'
-)
-
 # 1111 API 的資料映射
 JOB_TYPE_MAPPING_1111 = {
     "全職": JobType.FULL_TIME, "兼職": JobType.PART_TIME, "實習": JobType.INTERNSHIP,
@@ -62,24 +52,6 @@ class DetailPageSelectors:
 
 # --- 輔助函式 (Helper Functions) ---
 
-def _load_skill_master_data() -> pd.DataFrame:
-    """
-    載入技能主檔資料。如果檔案不存在或發生錯誤，則記錄錯誤並返回一個空的 DataFrame。
-    """
-    if not os.path.exists(SKILL_MASTER_PATH):
-        logger.error(
-            "技能主檔遺失，將跳過技能提取。請執行 `python3 -m skill_tool.run_skill_extraction --generate-kb` 來生成檔案。",
-            path=SKILL_MASTER_PATH
-        )
-        return pd.DataFrame()
-    try:
-        df = pd.read_json(SKILL_MASTER_PATH)
-        logger.info(f"已成功載入技能主檔: {SKILL_MASTER_PATH}")
-        return df
-    except Exception as e:
-        logger.error("載入技能主檔時發生未預期錯誤", error=e, path=SKILL_MASTER_PATH)
-        return pd.DataFrame()
-
 def _parse_full_address(full_address: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
     """
     從完整地址字串中解析出「縣市」和「鄉鎮市區」。
@@ -102,13 +74,9 @@ def _parse_full_address(full_address: Optional[str]) -> Tuple[Optional[str], Opt
 
     return full_address, full_address # 最後的備案
 
-# --- 全域變數初始化 ---
-SKILL_MASTER_DF = _load_skill_master_data()
-COMPILED_SKILL_PATTERNS = preprocess_skills_for_extraction(SKILL_MASTER_DF)
-
-
 # --- 主要解析函式 (Main Parsers) ---
 
+@timed_parse(SourcePlatform.PLATFORM_1111.value)
 def parse_job_list_json_to_pydantic(job_item: dict) -> Optional[JobPydantic]:
     """
     從 1111 職缺列表 API 的 JSON 資料解析並轉換為 JobPydantic 物件。
@@ -155,8 +123,8 @@ def parse_job_list_json_to_pydantic(job_item: dict) -> Optional[JobPydantic]:
         locations = [LocationPydantic(region=region, district=district, address_detail=location_text)]
 
         skills = []
-        if description and COMPILED_SKILL_PATTERNS:
-            extracted_skills = extract_skills_precise(description, COMPILED_SKILL_PATTERNS)
+        if description:
+            extracted_skills = extract_skills_for_crawl(description)
             skills = [SkillPydantic(name=skill_name) for skill_name in extracted_skills]
 
         return JobPydantic(
@@ -190,6 +158,7 @@ def parse_job_list_json_to_pydantic(job_item: dict) -> Optional[JobPydantic]:
         return None
 
 
+@timed_parse(SourcePlatform.PLATFORM_1111.value)
 def parse_job_detail_html_to_pydantic(
     html_content: str,
     url: str,
@@ -286,8 +255,8 @@ def parse_job_detail_html_to_pydantic(
                     job_data.description = desc_content_container.get_text(separator="\n", strip=True)
 
         # 基於更新後的描述，重新提取技能
-        if job_data.description and COMPILED_SKILL_PATTERNS:
-            extracted_skills = extract_skills_precise(job_data.description, COMPILED_SKILL_PATTERNS)
+        if job_data.description:
+            extracted_skills = extract_skills_for_crawl(job_data.description)
             job_data.skills = [SkillPydantic(name=skill_name) for skill_name in extracted_skills]
 
         return job_data
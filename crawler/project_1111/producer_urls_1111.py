@@ -1,6 +1,7 @@
 from crawler.database.repository import get_all_categories_for_platform
 from crawler.project_1111.task_urls_1111 import crawl_and_store_1111_category_urls
 from crawler.database.models import SourcePlatform
+from crawler.utils.crawl_dedup import start_crawl_epoch
 import structlog
 
 from crawler.logging_config import configure_logging
@@ -23,10 +24,12 @@ if all_1111_categories:
             "Found root categories for PLATFORM_1111.", count=len(root_categories)
         )
 
+        # 這一輪的所有類別共用同一個爬取週期，出現在多個類別的職缺只處理一次
+        crawl_epoch = start_crawl_epoch()
         for category_info in root_categories:
             category_id: str = category_info.source_category_id
             logger.info("分發 URL 抓取任務", category_id=category_id)
-            crawl_and_store_1111_category_urls.delay(category_info.model_dump())
+            crawl_and_store_1111_category_urls.delay(category_info.model_dump(), crawl_epoch=crawl_epoch)
     else:
         logger.info("No root categories found for PLATFORM_1111.")
 else:
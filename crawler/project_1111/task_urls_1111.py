@@ -11,7 +11,7 @@ import structlog
 import time
 import requests
 import concurrent.futures
-from typing import List, Optional, Dict, Any, Set
+from typing import List, Optional, Dict, Any
 
 from crawler.worker import app
 from crawler.database.connection import initialize_database
@@ -31,12 +31,22 @@ from crawler.database.repository import (
 )
 from crawler.project_1111.client_1111 import fetch_job_urls_from_1111_api, fetch_job_detail_html_from_1111
 from crawler.project_1111.parser_apidata_1111 import parse_job_list_json_to_pydantic, parse_job_detail_html_to_pydantic
+from crawler.utils.crawl_dedup import CrawlDedup, start_crawl_epoch
+from crawler.utils.id_set import IdSet, make_id_set
 from crawler.config import (
     URL_CRAWLER_UPLOAD_BATCH_SIZE,
     get_db_name_for_platform,
     URL_CRAWLER_API_RETRIES,
     URL_CRAWLER_API_BACKOFF_FACTOR,
+    ADAPTIVE_CONCURRENCY_MAX,
+    CRAWLER_EXECUTOR_MAX_PENDING,
+    CRAWLER_LIST_PAGE_PREFETCH,
 )
+from crawler.utils import crawl_runs
+from crawler.utils.adaptive_concurrency import get_concurrency_limiter
+from crawler.utils.crawl_executor import PriorityThreadPool, DETAIL_PRIORITY, LIST_PRIORITY
+from crawler.utils.hedging import get_hedge_stats
+from crawler.utils.raw_archive import RAW_KIND_DETAIL_HTML, RAW_KIND_LIST_ITEM, archive_raw_payload
 from crawler.project_1111.config_1111 import (
     URL_CRAWLER_ORDER_BY_1111,
 )
@@ -118,13 +128,19 @@ def _upsert_batch_to_db(
 class CategoryCrawler:
     """封裝單一職缺類別的完整爬取邏輯。"""
 
-    def __init__(self, category: CategorySourcePydantic, db_name: str, url_limit: int, global_url_set: Set[str]):
+    def __init__(self, category: CategorySourcePydantic, db_name: str, url_limit: int, global_url_set: IdSet, crawl_epoch: Optional[str] = None):
         self.category = category
         self.db_name = db_name
         self.url_limit = url_limit
         self.global_url_set = global_url_set
-        self.local_url_set: Set[str] = set()
+        # 同一爬取週期中已由其他類別任務處理的職缺不再抓詳細頁 (crawler/utils/crawl_dedup.py)
+        # 類別標籤來自目前爬取的類別，被略過的職缺也要補上這個類別的標籤
+        self.dedup = CrawlDedup(SourcePlatform.PLATFORM_1111, crawl_epoch, db_name=db_name, track_category_tags=True)
+        # 記錄職缺 ID 的緊湊集合 (crawler/utils/id_set.py)，全站爬取時記憶體不會隨字串數量膨脹
+        self.local_url_set: IdSet = make_id_set()
         self.session = requests.Session()  # 為所有請求重複使用同一個 Session
+        # 同一平台共用的 AIMD 限流器：實際同時發出的請求數由它決定，執行緒池大小只是上限
+        self.limiter = get_concurrency_limiter(SourcePlatform.PLATFORM_1111.value)
         self.jobs_for_upsert: List[JobPydantic] = []
         self.jobs_for_observations: List[JobObservationPydantic] = []
         self.job_category_tags_to_upsert: List[Dict[str, str]] = []
@@ -142,128 +158,180 @@ class CategoryCrawler:
         first_page_data = self._fetch_list_page(1)
         if not first_page_data:
             logger.error("抓取第一頁失敗，無法繼續爬取。", category=self.category.source_category_id)
+            crawl_runs.set_stop_reason("first_page_failed")
             return
 
         total_pages = first_page_data.get("result", {}).get("pagination", {}).get("totalPage", 1)
         logger.info("從 API 取得總頁數。", total_pages=total_pages, category=self.category.source_category_id)
 
-        # 2. 處理第一頁的結果
-        self._process_page_results(first_page_data)
-
-        # 3. 使用 ThreadPoolExecutor 平行處理剩餘頁面
-        pages_to_fetch = range(2, total_pages + 1)
-        if pages_to_fetch:
-            with concurrent.futures.ThreadPoolExecutor(max_workers=20) as executor:
-                future_to_page = {
-                    executor.submit(self._fetch_list_page, page_num): page_num
-                    for page_num in pages_to_fetch
-                }
-
-                for future in concurrent.futures.as_completed(future_to_page):
-                    if self.url_limit > 0 and len(self.global_url_set) >= self.url_limit:
-                        logger.info("已達到 URL 數量上限，停止提交新任務。")
-                        # 取消尚未完成的任務
-                        for f in future_to_page:
-                            if not f.done():
-                                f.cancel()
-                        break
-                    
-                    page_num = future_to_page[future]
-                    try:
-                        page_data = future.result()
-                        if page_data:
-                            self._process_page_results(page_data)
-                    except concurrent.futures.CancelledError:
-                        logger.warning("任務被取消。", page=page_num)
-                    except Exception as exc:
-                        logger.error("處理頁面時發生錯誤。", page=page_num, error=str(exc), exc_info=True)
-        
-        # 4. 提交最後剩餘的批次
-        self._commit_batch()
-        logger.info("類別爬取完成。", category=self.category.source_category_id)
+        # 2. 以單一、有界的優先權執行器處理第一頁的詳細頁與其餘列表頁
+        #    (實際併發量由 self.limiter 動態調整，執行緒數只是上限)
+        try:
+            with PriorityThreadPool(
+                max_workers=ADAPTIVE_CONCURRENCY_MAX,
+                max_pending=CRAWLER_EXECUTOR_MAX_PENDING,
+                name=f"1111-{self.category.source_category_id}",
+            ) as executor:
+                self._crawl_with_executor(executor, first_page_data, total_pages)
+
+            # 3. 提交最後剩餘的批次
+            self._commit_batch()
+        finally:
+            # 補寫被略過職缺的類別標籤；認領了卻沒有寫入的職缺 (解析失敗、url_limit 取消、寫入失敗) 交還給同一週期的其他類別任務
+            self.dedup.finish()
+        logger.info("類別爬取完成。", category=self.category.source_category_id, hedge_stats=get_hedge_stats().get("1111_job_urls"), **self.dedup.stats())
 
     def _fetch_list_page(self, page_num: int, retries: int = URL_CRAWLER_API_RETRIES, backoff_factor: float = URL_CRAWLER_API_BACKOFF_FACTOR) -> Optional[Dict[str, Any]]:
         """從 1111 API 抓取單一職缺列表頁面，並包含重試機制。"""
         for attempt in range(retries):
             try:
-                # 使用 self.session 進行請求
+                # 使用 self.session 進行請求；限流名額只包住單次 HTTP 請求 (含對沖請求)，不含請求前的延遲與重試退避
                 api_response = fetch_job_urls_from_1111_api(
                     KEYWORDS="",
                     CATEGORY=self.category.source_category_id,
                     ORDER=URL_CRAWLER_ORDER_BY_1111,
                     PAGE_NUM=page_num,
-                    session=self.session
+                    session=self.session,
+                    acquire=self.limiter.slot,
                 )
                 return api_response
             except Exception as e:
                 logger.warning("API 請求失敗，正在重試...", attempt=attempt + 1, error=str(e), page=page_num, category=self.category.source_category_id)
                 if attempt < retries - 1:
+                    crawl_runs.record(retries=1)
                     time.sleep(backoff_factor * (2 ** attempt))
         logger.error("API 請求在多次重試後仍然失敗。", page=page_num, category=self.category.source_category_id)
         return None
 
-    def _process_page_results(self, api_response: Dict[str, Any]):
-        """處理從 API 獲得的一頁職缺列表。"""
-        job_items_raw = api_response.get("result", {}).get("hits", [])
-        if not job_items_raw:
-            return
-
-        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as detail_executor:
-            future_to_job = {
-                detail_executor.submit(self._fetch_and_parse_detail, job_raw): job_raw
-                for job_raw in job_items_raw
-            }
-
-            for future in concurrent.futures.as_completed(future_to_job): # Corrected from future_to_page
+    def _crawl_with_executor(self, executor: PriorityThreadPool, first_page_data: Dict[str, Any], total_pages: int):
+        """
+        列表頁與詳細頁共用同一個執行器：詳細頁優先執行，列表頁最多只預抓
+        CRAWLER_LIST_PAGE_PREFETCH 頁，讓待處理的職缺數量維持在固定範圍內。
+        """
+        in_flight: Dict[concurrent.futures.Future, Optional[int]] = {}  # future -> 列表頁頁碼 (詳細頁為 None)
+        pages_to_fetch = iter(range(2, total_pages + 1))
+        list_pages_in_flight = 0
+
+        def submit_list_pages():
+            nonlocal list_pages_in_flight
+            while list_pages_in_flight < CRAWLER_LIST_PAGE_PREFETCH:
+                page_num = next(pages_to_fetch, None)
+                if page_num is None:
+                    return
+                in_flight[executor.submit(LIST_PRIORITY, self._fetch_list_page, page_num)] = page_num
+                list_pages_in_flight += 1
+
+        self._submit_detail_fetches(executor, first_page_data, in_flight)
+        submit_list_pages()
+
+        while in_flight:
+            done, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                page_num = in_flight.pop(future)
+                if page_num is not None:
+                    list_pages_in_flight -= 1
                 try:
-                    job_pydantic = future.result()
-                    if not job_pydantic:
-                        continue
-
-                    # 1. 無論如何都新增至觀測列表
-                    self.jobs_for_observations.append(_create_observation_from_job(job_pydantic))
-
-                    # Add category tags for all jobs (observations)
-                    # Prioritize job_pydantic.category_tags if available, otherwise use the category of the current crawl
-                    if job_pydantic.source_job_id:
-                        if job_pydantic.category_tags:
-                            for cat_id in job_pydantic.category_tags:
-                                self.job_category_tags_to_upsert.append({
-                                    "job_id": job_pydantic.source_job_id,
-                                    "category_source_id": cat_id,
-                                })
-                        elif self.category.source_category_id:
-                            self.job_category_tags_to_upsert.append({
-                                "job_id": job_pydantic.source_job_id,
-                                "category_source_id": self.category.source_category_id,
-                            })
-
-                    # Add to upsert list only if unique within this category crawl
-                    if job_pydantic.source_job_id not in self.local_url_set:
-                        self.local_url_set.add(job_pydantic.source_job_id)
-                        self.global_url_set.add(job_pydantic.source_job_id)
-                        self.jobs_for_upsert.append(job_pydantic)
-                        logger.debug("Added new job to upsert list.", url=job_pydantic.url, job_id=job_pydantic.source_job_id, category=self.category.source_category_id)
-                    else:
-                        logger.debug("Skipping duplicate job for upsert.", url=job_pydantic.url, job_id=job_pydantic.source_job_id, category=self.category.source_category_id)
-
-                    # 3. 檢查是否達到批次上傳的門檻 (以觀測數量為準)
-                    if len(self.jobs_for_observations) >= URL_CRAWLER_UPLOAD_BATCH_SIZE:
-                        self._commit_batch()
-
+                    result = future.result()
+                except concurrent.futures.CancelledError:
+                    logger.warning("任務被取消。", page=page_num)
+                    continue
                 except Exception as exc:
-                    logger.error("處理單一職缺時發生錯誤。", error=exc, exc_info=True, category=self.category.source_category_id)
+                    logger.error("處理任務時發生錯誤。", page=page_num, error=str(exc), exc_info=True, category=self.category.source_category_id)
+                    continue
+
+                if page_num is not None:
+                    if result:
+                        self._submit_detail_fetches(executor, result, in_flight)
+                elif result:
+                    self._handle_detail_result(result)
+
+            if self.url_limit > 0 and len(self.global_url_set) >= self.url_limit:
+                logger.info("已達到 URL 數量上限，停止提交新任務。")
+                crawl_runs.set_stop_reason("url_limit")
+                # 取消尚未開始的任務
+                for f in in_flight:
+                    f.cancel()
+                break
+
+            submit_list_pages()
+        else:
+            crawl_runs.set_stop_reason("max_page")
+
+    def _submit_detail_fetches(self, executor: PriorityThreadPool, api_response: Dict[str, Any], in_flight: Dict[concurrent.futures.Future, Optional[int]]):
+        """將一頁職缺列表中的每個職缺提交為詳細頁任務 (本週期已處理過的職缺除外)。"""
+        job_items_raw = api_response.get("result", {}).get("hits", [])
+        new_job_ids = self.dedup.filter_new(job_raw.get("jobId") for job_raw in job_items_raw)
+        duplicate_category_tags: List[Dict[str, str]] = []
+        for job_raw in job_items_raw:
+            if job_raw.get("jobId") and str(job_raw["jobId"]) not in new_job_ids:
+                duplicate_category_tags.append({
+                    "job_id": str(job_raw["jobId"]),
+                    "category_source_id": self.category.source_category_id,
+                })
+                continue
+            in_flight[executor.submit(DETAIL_PRIORITY, self._fetch_and_parse_detail, job_raw)] = None
+        # 認領的任務可能還沒寫入這些職缺，標籤先記在待寫入表
+        self.dedup.defer_category_tags(duplicate_category_tags)
+
+    def _handle_detail_result(self, job_pydantic: JobPydantic):
+        """將單一已解析的職缺加入批次，並在達到門檻時上傳。"""
+        try:
+            # 1. 無論如何都新增至觀測列表
+            self.jobs_for_observations.append(_create_observation_from_job(job_pydantic))
+
+            # Add category tags for all jobs (observations)
+            # Prioritize job_pydantic.category_tags if available, otherwise use the category of the current crawl
+            if job_pydantic.source_job_id:
+                if job_pydantic.category_tags:
+                    for cat_id in job_pydantic.category_tags:
+                        self.job_category_tags_to_upsert.append({
+                            "job_id": job_pydantic.source_job_id,
+                            "category_source_id": cat_id,
+                        })
+                elif self.category.source_category_id:
+                    self.job_category_tags_to_upsert.append({
+                        "job_id": job_pydantic.source_job_id,
+                        "category_source_id": self.category.source_category_id,
+                    })
+
+            # Add to upsert list only if unique within this category crawl
+            if self.local_url_set.add(job_pydantic.source_job_id):
+                self.global_url_set.add(job_pydantic.source_job_id)
+                self.jobs_for_upsert.append(job_pydantic)
+                logger.debug("Added new job to upsert list.", url=job_pydantic.url, job_id=job_pydantic.source_job_id, category=self.category.source_category_id)
+            else:
+                logger.debug("Skipping duplicate job for upsert.", url=job_pydantic.url, job_id=job_pydantic.source_job_id, category=self.category.source_category_id)
+
+            # 3. 檢查是否達到批次上傳的門檻 (以觀測數量為準)
+            if len(self.jobs_for_observations) >= URL_CRAWLER_UPLOAD_BATCH_SIZE:
+                self._commit_batch()
+
+        except Exception as exc:
+            logger.error("處理單一職缺時發生錯誤。", error=exc, exc_info=True, category=self.category.source_category_id)
 
     def _fetch_and_parse_detail(self, job_item_raw: Dict[str, Any]) -> Optional[JobPydantic]:
         """抓取並解析單一職缺的詳細頁面。"""
         # 先從列表 API 的資訊解析基礎 JobPydantic 物件
         job_pydantic = parse_job_list_json_to_pydantic(job_item_raw)
+        archive_raw_payload(
+            SourcePlatform.PLATFORM_1111,
+            job_pydantic.source_job_id if job_pydantic else job_item_raw.get("jobId"),
+            RAW_KIND_LIST_ITEM,
+            job_item_raw,
+            url=job_pydantic.url if job_pydantic else None,
+            source_category_id=self.category.source_category_id,
+        )
         if not job_pydantic:
             return None
         try:
             # 使用 self.session 抓取詳細頁面
-            detail_html = fetch_job_detail_html_from_1111(job_pydantic.url, session=self.session)
+            with self.limiter.slot():
+                detail_html = fetch_job_detail_html_from_1111(job_pydantic.url, session=self.session)
             if detail_html:
+                archive_raw_payload(
+                    SourcePlatform.PLATFORM_1111, job_pydantic.source_job_id, RAW_KIND_DETAIL_HTML, detail_html,
+                    url=job_pydantic.url, source_category_id=self.category.source_category_id,
+                )
                 # 使用詳細頁面的 HTML 更新 JobPydantic 物件
                 updated_job = parse_job_detail_html_to_pydantic(detail_html, job_pydantic.url, existing_job=job_pydantic)
                 return updated_job or job_pydantic # 如果解析失敗，回傳原始物件
@@ -286,6 +354,7 @@ class CategoryCrawler:
             url_category_tags=self.job_category_tags_to_upsert,
             db_name=self.db_name
         )
+        self.dedup.mark_stored(observation.source_job_id for observation in self.jobs_for_observations)
         
         # 清空批次
         self.jobs_for_upsert.clear()
@@ -294,24 +363,26 @@ class CategoryCrawler:
 
 
 @app.task
-def crawl_and_store_1111_category_urls(job_category: dict, url_limit: int = 0, db_name_override: Optional[str] = None) -> int:
+@crawl_runs.track_crawl_run(SourcePlatform.PLATFORM_1111, db_arg="db_name_override", resolve_db_name=_get_db_name)
+def crawl_and_store_1111_category_urls(job_category: dict, url_limit: int = 0, db_name_override: Optional[str] = None, crawl_epoch: Optional[str] = None) -> int:
     """
     Celery 任務：爬取指定的 1111 職缺類別，並將資料儲存到資料庫。
     返回此次任務收集到的新職缺數量。
+    crawl_epoch 由 producer 產生，同一週期中已由其他類別任務處理過的職缺會被略過。
     """
     job_category_pydantic = CategorySourcePydantic.model_validate(job_category)
     db_name = _get_db_name(db_name_override)
     
-    # 在 Celery 環境中，global_url_set 應為空集合，因為每個任務是獨立的。
-    # 如果需要在多個任務間共享狀態，需要使用 Redis 或類似的外部儲存。
-    # 為了與本地端執行邏輯保持一致，此處我們假設它是獨立的。
-    global_url_set = set()
+    # 在 Celery 環境中，global_url_set 只記錄本任務收集的職缺；
+    # 跨任務的去重由 crawl_epoch 對應的 tb_crawl_seen_jobs 負責 (crawler/utils/crawl_dedup.py)。
+    global_url_set = make_id_set()
 
     crawler = CategoryCrawler(
         category=job_category_pydantic,
         db_name=db_name,
         url_limit=url_limit,
-        global_url_set=global_url_set
+        global_url_set=global_url_set,
+        crawl_epoch=crawl_epoch,
     )
     crawler.run()
 
@@ -331,7 +402,8 @@ if __name__ == "__main__":
         logger.warning("資料庫中找不到 1111 平台的類別資料，請先執行 producer_category_1111。")
     else:
         # 建立一個全域集合，用於在所有類別的爬取過程中追蹤唯一的職缺 URL
-        all_collected_job_urls = set()
+        all_collected_job_urls = make_id_set()
+        crawl_epoch = start_crawl_epoch()
 
         # Identify all parent category IDs
         parent_category_ids = {cat.parent_source_id for cat in all_categories if cat.parent_source_id is not None}
@@ -378,7 +450,8 @@ if __name__ == "__main__":
                 category=category_pydantic,
                 db_name=db_name_for_local_run,
                 url_limit=0, # 本地測試不設上限
-                global_url_set=all_collected_job_urls # 傳入全域集合
+                global_url_set=all_collected_job_urls, # 傳入全域集合
+                crawl_epoch=crawl_epoch,
             )
             crawler.run()
             
@@ -392,5 +465,6 @@ if __name__ == "__main__":
         logger.info(
             "所有類別處理完畢。",
             total_unique_jobs=len(all_collected_job_urls),
+            id_set_bytes=all_collected_job_urls.nbytes,
             total_time=f"{end_time - start_time:.2f} 秒"
         )
\ No newline at end of file
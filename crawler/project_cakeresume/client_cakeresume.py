@@ -19,8 +19,13 @@ from crawler.config import (
     URL_CRAWLER_REQUEST_TIMEOUT_SECONDS,
     URL_CRAWLER_SLEEP_MAX_SECONDS,
     URL_CRAWLER_SLEEP_MIN_SECONDS,
+    HTTP_DETAIL_CACHE_MAX_ENTRIES,
 )
 from crawler.logging_config import configure_logging
+from crawler.database.schemas import SourcePlatform
+from crawler.utils import crawl_runs
+from crawler.utils.metrics import RATE_LIMIT_WAIT, observe_http_request
+from crawler.utils.singleflight import coalesced
 from crawler.project_cakeresume.config_cakeresume import (
     HEADERS_CAKERESUME,
     JOB_CAT_URL_CAKERESUME,
@@ -37,6 +42,7 @@ logger = structlog.get_logger(__name__)
 
 def log_before_retry(retry_state: "RetryCallState") -> None:
     """Log before retrying a request, showing attempt number and wait time."""
+    crawl_runs.record_retry(retry_state)
     logger.warning(
         "Request failed, retrying...",
         attempt=retry_state.attempt_number,
@@ -71,18 +77,20 @@ def _make_web_request(
     sleep_time = random.uniform(
         URL_CRAWLER_SLEEP_MIN_SECONDS, URL_CRAWLER_SLEEP_MAX_SECONDS
     )
-    logger.debug("Sleeping before web request.", duration=sleep_time, **log_context)
+    RATE_LIMIT_WAIT.observe(sleep_time, platform=SourcePlatform.PLATFORM_CAKERESUME.value, limiter="sleep")
     time.sleep(sleep_time)
 
     try:
-        response = requests.request(
-            method,
-            url,
-            headers=headers,
-            params=params,
-            timeout=timeout,
-            verify=verify,
-        )
+        with observe_http_request(SourcePlatform.PLATFORM_CAKERESUME.value, log_context.get("api_type")) as request_metrics:
+            response = requests.request(
+                method,
+                url,
+                headers=headers,
+                params=params,
+                timeout=timeout,
+                verify=verify,
+            )
+            request_metrics.status = response.status_code
         response.raise_for_status()  # Raises HTTPError for bad responses (4xx or 5xx)
         return response.text
     except requests.exceptions.RequestException as e:
@@ -214,6 +222,7 @@ def fetch_cakeresume_job_urls(
         },
     )
 
+@coalesced(max_entries=HTTP_DETAIL_CACHE_MAX_ENTRIES)
 def fetch_cakeresume_job_data(job_url: str) -> Optional[str]: # Returns HTML content of the job detail page
     """
     從 CakeResume 職缺頁面抓取單一 URL 的資料 (HTML 內容)。
@@ -231,6 +240,7 @@ def fetch_cakeresume_job_data(job_url: str) -> Optional[str]: # Returns HTML con
     )
 
 
+@coalesced()
 def fetch_cakeresume_company_page_html(company_url: str) -> Optional[str]:
     """
     Fetches the raw HTML content of a CakeResume company page.
@@ -2,8 +2,9 @@
 """
 Parsers for Cakeresume, handling data transformation from the __NEXT_DATA__ script tag.
 """
+import json
 import structlog
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any
 from urllib.parse import urljoin
 import re
@@ -11,12 +12,89 @@ from bs4 import BeautifulSoup
 
 from crawler.database.schemas import JobPydantic, SourcePlatform, JobStatus, SalaryType, JobType, LocationPydantic, SkillPydantic, CompanyPydantic
 from crawler.utils.clean_text import clean_text
-from crawler.utils.run_skill_extraction import extract_skills_precise, get_compiled_skill_patterns
+from crawler.utils.metrics import timed_parse
+from crawler.utils.skill_extraction_stage import extract_skills_for_crawl
+from crawler.utils.singleflight import TTLCache
 from crawler.project_cakeresume.client_cakeresume import fetch_cakeresume_company_page_html
+from crawler.database.repository import get_company_profile, update_company_location
+from crawler.config import COMPANY_LOCATION_REFRESH_DAYS, COMPANY_PROFILE_CACHE_MAX_ENTRIES
 
 logger = structlog.get_logger(__name__)
 
-COMPILED_SKILL_PATTERNS = get_compiled_skill_patterns()
+# 行程內的公司地址 LRU：company_path -> location_text ("" 代表公司頁面上沒有地址)
+_company_location_cache = TTLCache(
+    ttl_seconds=COMPANY_LOCATION_REFRESH_DAYS * 86400,
+    max_entries=COMPANY_PROFILE_CACHE_MAX_ENTRIES,
+)
+_MISSING = object()
+
+
+def _parse_company_page_location(company_html: str) -> Optional[str]:
+    company_soup = BeautifulSoup(company_html, 'html.parser')
+    location_link = company_soup.select_one('a.CompanySidebar_link__Xveph[href*="maps.google.com"]')
+    if location_link:
+        return clean_text(location_link.get_text())
+    return None
+
+
+def _resolve_company_location(
+    company_path: str,
+    company_name: Optional[str],
+    company_url: str,
+    db_name: Optional[str] = None,
+    allow_fetch: bool = True,
+) -> Optional[str]:
+    """
+    取得公司地址，依序查詢行程內 LRU、tb_companies.location_text，
+    兩者都沒有或已超過 COMPANY_LOCATION_REFRESH_DAYS 時才抓取並解析公司頁面，結果寫回兩層快取。
+    allow_fetch=False (離線重新解析) 時不連網，直接沿用已儲存的地址 (即使已過期)。
+    """
+    cached = _company_location_cache.get(company_path, _MISSING)
+    if cached is not _MISSING:
+        return cached or None
+
+    stored = None
+    try:
+        stored = get_company_profile(SourcePlatform.PLATFORM_CAKERESUME, company_path, db_name=db_name)
+    except Exception as e:
+        logger.warning("Failed to read company profile cache.", company_path=company_path, error=str(e))
+
+    if stored and stored.location_updated_at is not None:
+        updated_at = stored.location_updated_at
+        if updated_at.tzinfo is None:
+            updated_at = updated_at.replace(tzinfo=timezone.utc)
+        if datetime.now(timezone.utc) - updated_at < timedelta(days=COMPANY_LOCATION_REFRESH_DAYS):
+            _company_location_cache.set(company_path, stored.location_text or "")
+            return stored.location_text or None
+
+    if not allow_fetch:
+        return stored.location_text if stored and stored.location_text else None
+
+    logger.info("Location not found in job details, attempting to fetch from company page.", company_url=company_url)
+    company_html = fetch_cakeresume_company_page_html(company_url)
+    if not company_html:
+        # 抓取失敗時沿用過期的地址，且不寫入快取，下次仍會重試
+        return stored.location_text if stored and stored.location_text else None
+
+    location_text = _parse_company_page_location(company_html)
+    if location_text:
+        logger.info("Successfully extracted location from company page.", location_text=location_text)
+
+    _company_location_cache.set(company_path, location_text or "")
+    try:
+        update_company_location(
+            CompanyPydantic(
+                source_platform=SourcePlatform.PLATFORM_CAKERESUME,
+                source_company_id=company_path,
+                name=clean_text(company_name) if company_name else company_path,
+                url=company_url,
+                location_text=location_text or "",
+            ),
+            db_name=db_name,
+        )
+    except Exception as e:
+        logger.warning("Failed to store company location.", company_path=company_path, error=str(e))
+    return location_text
 
 def _parse_cakeresume_salary(
     job_details: Dict[str, Any]
@@ -76,10 +154,81 @@ def _parse_job_type(job_details: Dict[str, Any]) -> JobType:
     }
     return job_type_map.get(str(job_type_raw), JobType.OTHER)
 
-def parse_job_details_to_pydantic(job_details: Dict[str, Any], html_content: str, url: str, source_category_id: str) -> Optional[JobPydantic]:
+@timed_parse(SourcePlatform.PLATFORM_CAKERESUME.value)
+def extract_job_details_from_html(html_content: str) -> Optional[Dict[str, Any]]:
+    """Returns props.pageProps.job from the __NEXT_DATA__ script tag of a job page, or None."""
+    data_script = BeautifulSoup(html_content, "html.parser").find("script", id="__NEXT_DATA__")
+    if not data_script or not data_script.string:
+        return None
+    try:
+        page_props = json.loads(data_script.string).get("props", {}).get("pageProps", {})
+    except json.JSONDecodeError as e:
+        logger.warning("Could not decode __NEXT_DATA__ JSON.", error=str(e))
+        return None
+    return page_props.get("job") or None
+
+def _location_from_text(location_text: Optional[str]) -> LocationPydantic:
+    """Derives region and district from a CakeResume location string such as "東區, 新竹市, 台灣"."""
+    region = None
+    district = None
+    if location_text:
+        parts = [p.strip() for p in location_text.split(',')]
+        if len(parts) == 3:
+            district = parts[1] + parts[0]  # e.g., "新竹市東區"
+            region = parts[1]               # e.g., "新竹市"
+        elif len(parts) == 2:
+            district = parts[0]             # e.g., "新竹市"
+            region = parts[0]               # e.g., "新竹市"
+        elif len(parts) == 1:
+            district = parts[0]             # e.g., "新竹市"
+            region = parts[0]               # e.g., "新竹市"
+    return LocationPydantic(
+        region=region,
+        district=district,
+        address_detail=location_text,
+        latitude=None, # Cakeresume does not provide lat/lon
+        longitude=None, # Cakeresume does not provide lat/lon
+    )
+
+def parse_job_details_to_pydantic(
+    job_details: Dict[str, Any],
+    html_content: str,
+    url: str,
+    source_category_id: str,
+    db_name: Optional[str] = None,
+    fetch_company_page: bool = True,
+) -> Optional[JobPydantic]:
     """
     Parses the job data extracted from the __NEXT_DATA__ script tag into a JobPydantic object.
+    db_name is used for the company location cache when the job itself has no location;
+    fetch_company_page=False keeps parsing offline (e.g. when replaying archived pages).
     """
+    job = _parse_job_page(job_details, html_content, url, source_category_id)
+    if job is None or job.locations[0].address_detail:
+        return job
+
+    # 公司地址可能要查詢資料庫或抓取公司頁面，不計入解析時間
+    company = job.company
+    if company.url and company.source_company_id:
+        try:
+            location_text = _resolve_company_location(
+                company.source_company_id, company.name, company.url, db_name=db_name, allow_fetch=fetch_company_page
+            )
+        except Exception as e:
+            logger.warning("Failed to resolve company location.", company_url=company.url, error=str(e))
+            location_text = None
+        if location_text:
+            job.locations = [_location_from_text(location_text)]
+    return job
+
+@timed_parse(SourcePlatform.PLATFORM_CAKERESUME.value, parser="parse_job_details_to_pydantic")
+def _parse_job_page(
+    job_details: Dict[str, Any],
+    html_content: str,
+    url: str,
+    source_category_id: str,
+) -> Optional[JobPydantic]:
+    """Parses the job page only; the company page fallback for a missing location is left to the caller."""
     try:
         source_job_id = str(job_details.get("path"))
         if not source_job_id:
@@ -119,16 +268,6 @@ def parse_job_details_to_pydantic(job_details: Dict[str, Any], html_content: str
         location_tags = soup.select("div.JobDescriptionRightColumn_locationsWrapper__N_fz_ a")
         location_text = ", ".join([clean_text(tag.get_text()) for tag in location_tags]) if location_tags else None
 
-        if not location_text and company_url:
-            logger.info("Location not found in job details, attempting to fetch from company page.", company_url=company_url)
-            company_html = fetch_cakeresume_company_page_html(company_url)
-            if company_html:
-                company_soup = BeautifulSoup(company_html, 'html.parser')
-                location_link = company_soup.select_one('a.CompanySidebar_link__Xveph[href*="maps.google.com"]')
-                if location_link:
-                    location_text = clean_text(location_link.get_text())
-                    logger.info("Successfully extracted location from company page.", location_text=location_text)
-
         posted_at_raw = job_details.get("content_updated_at")
         posted_at = None
         if posted_at_raw:
@@ -159,25 +298,10 @@ def parse_job_details_to_pydantic(job_details: Dict[str, Any], html_content: str
         edu_match = re.search(r'(高中|專科|大學|碩士|博士)', requirements_text)
         education_required_text = edu_match.group(1) if edu_match else "不拘"
 
-        # Derive region and district from location_text
-        region = None
-        district = None
-        if location_text:
-            parts = [p.strip() for p in location_text.split(',')]
-            if len(parts) == 3:
-                district = parts[1] + parts[0]  # e.g., "新竹市東區"
-                region = parts[1]               # e.g., "新竹市"
-            elif len(parts) == 2:
-                district = parts[0]             # e.g., "新竹市"
-                region = parts[0]               # e.g., "新竹市"
-            elif len(parts) == 1:
-                district = parts[0]             # e.g., "新竹市"
-                region = parts[0]               # e.g., "新竹市"
-
         # Extract skills from description
         extracted_skills = []
-        if description and COMPILED_SKILL_PATTERNS:
-            extracted_skills = extract_skills_precise(description, COMPILED_SKILL_PATTERNS)
+        if description:
+            extracted_skills = extract_skills_for_crawl(description)
 
         return JobPydantic(
             source_platform=SourcePlatform.PLATFORM_CAKERESUME,
@@ -200,13 +324,7 @@ def parse_job_details_to_pydantic(job_details: Dict[str, Any], html_content: str
                 name=clean_text(company_name),
                 url=company_url,
             ),
-            locations=[LocationPydantic(
-                region=region,
-                district=district,
-                address_detail=location_text,
-                latitude=None, # Cakeresume does not provide lat/lon
-                longitude=None, # Cakeresume does not provide lat/lon
-            )],
+            locations=[_location_from_text(location_text)],
             skills=[SkillPydantic(name=skill_name) for skill_name in extracted_skills],
             category_tags=[source_category_id],
         )
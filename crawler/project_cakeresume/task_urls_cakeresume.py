@@ -12,7 +12,6 @@ import json
 from bs4 import BeautifulSoup
 from typing import Set, List, Optional
 import re
-import pandas as pd
 
 from crawler.worker import app
 from crawler.database.schemas import SourcePlatform, CategorySourcePydantic, CrawlStatus, JobObservationPydantic, UrlPydantic
@@ -26,7 +25,9 @@ from crawler.database.repository import (
     insert_job_observations,
 )
 from crawler.project_cakeresume.client_cakeresume import fetch_cakeresume_job_urls, fetch_cakeresume_job_data
-from crawler.project_cakeresume.parser_cakeresume import parse_job_details_to_pydantic
+from crawler.project_cakeresume.parser_cakeresume import extract_job_details_from_html, parse_job_details_to_pydantic
+from crawler.utils import crawl_runs
+from crawler.utils.raw_archive import RAW_KIND_DETAIL_HTML, archive_raw_payload
 from crawler.database.connection import initialize_database
 from crawler.config import (
     get_db_name_for_platform,
@@ -35,30 +36,9 @@ from crawler.project_cakeresume.config_cakeresume import (
     URL_CRAWLER_ORDER_BY_CAKERESUME,
     JOB_DETAIL_BASE_URL_CAKERESUME,
 )
-from crawler.utils.run_skill_extraction import preprocess_skills_for_extraction
 
 logger = structlog.get_logger(__name__)
 
-# --- Skill master data loading ---
-SKILL_MASTER_PATH = os.path.join(
-    os.path.dirname(os.path.abspath(__file__)),
-    '..',
-    'utils',
-    'skill_data',
-    'generated_data',
-    'skill_master.json'
-)
-
-COMPILED_SKILL_PATTERNS = []
-try:
-    skill_master_df = pd.read_json(SKILL_MASTER_PATH)
-    COMPILED_SKILL_PATTERNS = preprocess_skills_for_extraction(skill_master_df)
-    logger.info(f"已載入技能主檔並編譯技能模式: {SKILL_MASTER_PATH}")
-except FileNotFoundError:
-    logger.error(f"錯誤：找不到技能主檔。請先執行 `python3 -m crawler.utils.run_skill_extraction --generate-kb` 來生成 {SKILL_MASTER_PATH}")
-except Exception as e:
-    logger.error(f"載入技能主檔或編譯技能模式失敗: {e}")
-
 DEFAULT_TIMEOUT = 15
 
 def _parse_job_urls(soup: BeautifulSoup, current_page: int) -> List[str]:
@@ -121,24 +101,20 @@ def _process_single_job_url(url: str, job_category_code: str, db_name: str):
             update_urls_status([url], CrawlStatus.FAILED, db_name=db_name)
             return
 
-        soup = BeautifulSoup(html_content, 'html.parser')
-        data_script = soup.find('script', id='__NEXT_DATA__')
-
-        if not data_script:
-            logger.error("Could not find __NEXT_DATA__ script tag.", url=url, job_id=job_id)
-            update_urls_status([url], CrawlStatus.FAILED, db_name=db_name)
-            return
-
-        page_props = json.loads(data_script.string).get('props', {}).get('pageProps', {})
-        job_details = page_props.get('job')
+        archive_raw_payload(
+            SourcePlatform.PLATFORM_CAKERESUME, job_id, RAW_KIND_DETAIL_HTML, html_content,
+            url=url, source_category_id=job_category_code,
+        )
 
+        job_details = extract_job_details_from_html(html_content)
         if not job_details:
             logger.error("Could not find job details in __NEXT_DATA__.", url=url, job_id=job_id)
             update_urls_status([url], CrawlStatus.FAILED, db_name=db_name)
             return
-        
-        logger.debug("Raw job details from __NEXT_DATA__.", job_details=job_details, job_id=job_id)
-        job_pydantic_data = parse_job_details_to_pydantic(job_details, html_content, url, job_category_code)
+
+        # 只記錄欄位數；整份 job_details 的格式化與輸出成本遠高於解析本身
+        logger.debug("Raw job details from __NEXT_DATA__.", field_count=len(job_details), job_id=job_id)
+        job_pydantic_data = parse_job_details_to_pydantic(job_details, html_content, url, job_category_code, db_name=db_name)
 
         if not job_pydantic_data:
             logger.error("Failed to parse job data to Pydantic.", job_id=job_id, url=url)
@@ -193,6 +169,7 @@ def task_crawl_cakeresume_page_and_chain(job_category_code: str, page_num: int,
             current_page=page_num,
             max_page=max_page
         )
+        crawl_runs.set_stop_reason("max_page")
         return
 
     html_content = fetch_cakeresume_job_urls(
@@ -208,6 +185,7 @@ def task_crawl_cakeresume_page_and_chain(job_category_code: str, page_num: int,
             page=page_num,
             job_category_code=job_category_code,
         )
+        crawl_runs.set_stop_reason("no_content")
         return
     
     soup = BeautifulSoup(html_content, 'html.parser')
@@ -215,6 +193,7 @@ def task_crawl_cakeresume_page_and_chain(job_category_code: str, page_num: int,
     job_urls_on_page = _parse_job_urls(soup, page_num)
     if not job_urls_on_page:
         logger.info("No job URLs found on page, indicating end of pages.", page=page_num, job_category_code=job_category_code)
+        crawl_runs.set_stop_reason("no_more_jobs")
         return
 
     logger.info("page_found_urls", count=len(job_urls_on_page), page=page_num, category=job_category_code)
@@ -237,14 +216,17 @@ def task_crawl_cakeresume_page_and_chain(job_category_code: str, page_num: int,
         task_crawl_cakeresume_page_and_chain(job_category_code=job_category_code, page_num=next_page_num, max_page=max_page, db_name=db_name)
     else:
         logger.info("reached_max_page", page=page_num, max_page=max_page, category=job_category_code)
+        crawl_runs.set_stop_reason("max_page")
 
 @app.task
+@crawl_runs.track_crawl_run(SourcePlatform.PLATFORM_CAKERESUME, db_arg="db_name")
 def task_start_cakeresume_crawl_chain(job_category: dict, db_name: Optional[str] = None, max_page: Optional[int] = None):
     try:
         category = CategorySourcePydantic.model_validate(job_category)
         job_category_code = category.source_category_id
     except Exception as e:
         logger.error("invalid_job_category_data", data=job_category, error=str(e), exc_info=True)
+        crawl_runs.set_stop_reason("invalid_category")
         return
     logger.info("start_task_chain", job_category_code=job_category_code)
     task_crawl_cakeresume_page_and_chain(job_category_code=job_category_code, page_num=1, max_page=max_page, db_name=db_name)
@@ -10,12 +10,16 @@ from crawler.config import (
     URL_CRAWLER_REQUEST_TIMEOUT_SECONDS,
     URL_CRAWLER_SLEEP_MAX_SECONDS,
     URL_CRAWLER_SLEEP_MIN_SECONDS,
+    HTTP_DETAIL_CACHE_MAX_ENTRIES,
 )
 import traceback
 
 import structlog
 
 from crawler.logging_config import configure_logging
+from crawler.utils import crawl_runs
+from crawler.utils.metrics import RATE_LIMIT_WAIT, observe_http_request
+from crawler.utils.singleflight import coalesced
 from crawler.project_yes123.config_yes123 import (
     HEADERS_YES123,
     JOB_LISTING_BASE_URL_YES123,
@@ -43,6 +47,7 @@ logger = structlog.get_logger(__name__)
     stop=stop_after_attempt(5),
     wait=wait_exponential(multiplier=1, min=4, max=10),
     retry=retry_if_exception_type(requests.exceptions.RequestException),
+    before_sleep=crawl_runs.record_retry,
     reraise=True,
 )
 def _make_web_request(
@@ -57,37 +62,33 @@ def _make_web_request(
     """
     通用的網頁請求函式，處理隨機延遲、請求發送、和錯誤處理。
     """
-    if log_context is None:
-        log_context = {}
+    log_context = {"url": url, **(log_context or {})}
 
     # Add random delay before making API request
     sleep_time = random.uniform(
         URL_CRAWLER_SLEEP_MIN_SECONDS, URL_CRAWLER_SLEEP_MAX_SECONDS
     )
-    logger.debug(
-        "Sleeping before web request.",
-        duration=sleep_time,
-        **log_context,
-    )
+    RATE_LIMIT_WAIT.observe(sleep_time, platform=SourcePlatform.PLATFORM_YES123.value, limiter="sleep")
     time.sleep(sleep_time)
 
     try:
-        response = requests.request(
-            method,
-            url,
-            headers=headers,
-            params=params,
-            timeout=timeout,
-            verify=verify,
-        )
+        with observe_http_request(SourcePlatform.PLATFORM_YES123.value, log_context.get("api_type")) as request_metrics:
+            response = requests.request(
+                method,
+                url,
+                headers=headers,
+                params=params,
+                timeout=timeout,
+                verify=verify,
+            )
+            request_metrics.status = response.status_code
         response.raise_for_status()  # Raises HTTPError for bad responses (4xx or 5xx)
         return response.text
         
     except requests.exceptions.RequestException as e:
         logger.error(
             "Network error during web request.",
-            event="network_error_web_request",
-            url=url,
+            event_name="network_error_web_request",
             error=str(e),
             platform=SourcePlatform.PLATFORM_YES123,
             component="client",
@@ -99,8 +100,7 @@ def _make_web_request(
     except Exception as e:
         logger.error(
             "Unexpected error during web request.",
-            event="unexpected_web_request_error",
-            url=url,
+            event_name="unexpected_web_request_error",
             error=str(e),
             platform=SourcePlatform.PLATFORM_YES123,
             component="client",
@@ -151,6 +151,7 @@ def yes123_url(
 
 
 
+@coalesced(max_entries=HTTP_DETAIL_CACHE_MAX_ENTRIES)
 def fetch_yes123_job_data(job_url: str) -> Optional[str]: # Returns HTML content of the job detail page
     """
     從 yes123 職缺頁面抓取單一 URL 的資料 (HTML 內容)。
@@ -12,7 +12,7 @@ logger = structlog.get_logger(__name__)
 fetch_and_sync_yes123_categories.s(JOB_CAT_URL_YES123).apply_async(queue='producer_category_yes123')
 logger.info(
     "Sending task_category_yes123 URL.",
-    event="send_category_task",
+    event_name="send_category_task",
     url=JOB_CAT_URL_YES123,
     queue='producer_category_yes123',
     platform=SourcePlatform.PLATFORM_YES123,
@@ -15,7 +15,7 @@ logger = structlog.get_logger(__name__)
 
 logger.info(
     "Producer configuration loaded.",
-    event="producer_config_loaded",
+    event_name="producer_config_loaded",
     producer_batch_size=PRODUCER_BATCH_SIZE,
     platform=SourcePlatform.PLATFORM_YES123,
     component="producer",
@@ -28,7 +28,7 @@ def dispatch_yes123_job_urls():
     """
     logger.info(
         "Starting to read yes123 job URLs from database and dispatch tasks...",
-        event="start_dispatching_job_tasks",
+        event_name="start_dispatching_job_tasks",
         platform=SourcePlatform.PLATFORM_YES123,
         component="producer",
     )
@@ -45,7 +45,7 @@ def dispatch_yes123_job_urls():
         if not urls_to_process:
             logger.info(
                 "No eligible yes123 job URLs found to dispatch.",
-                event="no_eligible_urls_found",
+                event_name="no_eligible_urls_found",
                 platform=SourcePlatform.PLATFORM_YES123,
                 component="producer",
             )
@@ -53,7 +53,7 @@ def dispatch_yes123_job_urls():
 
         logger.info(
             "Fetched a batch of yes123 URLs from database.",
-            event="fetched_url_batch",
+            event_name="fetched_url_batch",
             count=len(urls_to_process),
             platform=SourcePlatform.PLATFORM_YES123,
             component="producer",
@@ -63,7 +63,7 @@ def dispatch_yes123_job_urls():
         mark_urls_as_queued(SourcePlatform.PLATFORM_YES123, urls_to_process)
         logger.info(
             "Updated yes123 URL status to QUEUED.",
-            event="urls_status_queued",
+            event_name="urls_status_queued",
             count=len(urls_to_process),
             platform=SourcePlatform.PLATFORM_YES123,
             component="producer",
@@ -75,7 +75,7 @@ def dispatch_yes123_job_urls():
 
         logger.info(
             "Successfully dispatched a batch of yes123 job URL tasks.",
-            event="job_tasks_dispatched",
+            event_name="job_tasks_dispatched",
             count=len(urls_to_process),
             queue="producer_jobs_yes123",
             platform=SourcePlatform.PLATFORM_YES123,
@@ -84,7 +84,7 @@ def dispatch_yes123_job_urls():
 
     except SQLAlchemyError as e:
         logger.error("Database operation failed.",
-            event="database_operation_failed",
+            event_name="database_operation_failed",
             error=str(e),
             platform=SourcePlatform.PLATFORM_YES123,
             component="producer",
@@ -92,7 +92,7 @@ def dispatch_yes123_job_urls():
         )
     except Exception as e:
         logger.error("An unexpected error occurred while dispatching tasks.",
-            event="unexpected_dispatch_error",
+            event_name="unexpected_dispatch_error",
             error=str(e),
             platform=SourcePlatform.PLATFORM_YES123,
             component="producer",
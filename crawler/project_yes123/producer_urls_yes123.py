@@ -10,7 +10,7 @@ logger = structlog.get_logger(__name__)
 
 logger.info(
     "Starting URL task distribution for all yes123 categories.",
-    event="start_url_task_distribution",
+    event_name="start_url_task_distribution",
     platform=SourcePlatform.PLATFORM_YES123,
     component="producer",
 )
@@ -20,7 +20,7 @@ all_yes123_categories = get_all_categories_for_platform(SourcePlatform.PLATFORM_
 if all_yes123_categories:
     logger.info(
         "Found categories for PLATFORM_YES123.",
-        event="categories_found",
+        event_name="categories_found",
         count=len(all_yes123_categories),
         platform=SourcePlatform.PLATFORM_YES123,
         component="producer",
@@ -38,7 +38,7 @@ if all_yes123_categories:
             category_id: str = category_info.source_category_id
             logger.info(
             "Dispatching URL crawling task.",
-            event="dispatch_url_crawling_task",
+            event_name="dispatch_url_crawling_task",
             category_id=category_id,
             platform=SourcePlatform.PLATFORM_YES123,
             component="producer",
@@ -47,14 +47,14 @@ if all_yes123_categories:
     else:
         logger.info(
         "No root categories found for PLATFORM_YES123.",
-        event="no_root_categories_found",
+        event_name="no_root_categories_found",
         platform=SourcePlatform.PLATFORM_YES123,
         component="producer",
     )
 else:
     logger.info(
         "No categories found for PLATFORM_YES123.",
-        event="no_categories_found",
+        event_name="no_categories_found",
         platform=SourcePlatform.PLATFORM_YES123,
         component="producer",
     )
\ No newline at end of file
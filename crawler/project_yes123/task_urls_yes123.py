@@ -16,7 +16,6 @@ import urllib3
 from typing import Set, List, Optional, Dict
 from datetime import datetime, timezone, timedelta
 import re
-import pandas as pd
 
 from crawler.database.schemas import (
     SourcePlatform,
@@ -43,56 +42,58 @@ from crawler.database.repository import (
 )
 from crawler.database.connection import initialize_database
 from crawler.project_yes123.config_yes123 import HEADERS_YES123, JOB_LISTING_BASE_URL_YES123
+from crawler.utils import crawl_runs
+from crawler.utils.metrics import timed_parse
 from crawler.utils.salary_parser import parse_salary_text
-from crawler.utils.run_skill_extraction import extract_skills_precise, preprocess_skills_for_extraction
+from crawler.utils.skill_extraction_stage import extract_skills_for_crawl
+from crawler.utils.raw_archive import RAW_KIND_DETAIL_HTML, archive_raw_payload
+from crawler.utils.http_record import install_http_recorder
 
 logger = structlog.get_logger(__name__)
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
-# --- Skill master data loading ---
-SKILL_MASTER_PATH = os.path.join(
-    os.path.dirname(os.path.abspath(__file__)),
-    '..',
-    'utils',
-    'skill_data',
-    'generated_data',
-    'skill_master.json'
-)
-
-COMPILED_SKILL_PATTERNS = []
-try:
-    skill_master_df = pd.read_json(SKILL_MASTER_PATH)
-    COMPILED_SKILL_PATTERNS = preprocess_skills_for_extraction(skill_master_df)
-    logger.info(f"已載入技能主檔並編譯技能模式: {SKILL_MASTER_PATH}")
-except FileNotFoundError:
-    logger.error(f"錯誤：找不到技能主檔。請先執行 `python3 -m crawler.utils.run_skill_extraction --generate-kb` 來生成 {SKILL_MASTER_PATH}")
-except Exception as e:
-    logger.error(f"載入技能主檔或編譯技能模式失敗: {e}")
+# 此模組不經由 crawler.worker 載入，自行啟用 HTTP 錄製 / 重播
+install_http_recorder()
 
 # --- Constants ---
-BASE_URL = "https://www.yes123.com.tw/wk_index/"
+# 職缺與公司連結為相對路徑，以列表頁所在目錄為基準 (指向 mock server 時也一致)
+BASE_URL = urljoin(JOB_LISTING_BASE_URL_YES123, "./")
 JOB_LIST_URL_TEMPLATE = f"{JOB_LISTING_BASE_URL_YES123}?find_work_mode1={{job_category_code}}&order_by=m_date&order_ascend=desc&search_from=joblist"
-JOB_LINK_SELECTOR = "div[id^=\"\"][class*=\"Job_opening\"] a.Job_opening_block"
+JOB_LINK_SELECTOR = "div[id][class*=\"Job_opening\"] a.Job_opening_block"
 DEFAULT_TIMEOUT = 15
 
 # --- Job Detail Scraping and Parsing Functions (from task_jobs_yes123.py) ---
 
-def fetch_yes123_job_data(job_url: str, headers: dict, timeout: int = DEFAULT_TIMEOUT) -> Optional[dict]:
-    """ Fetches and scrapes detailed information from a given yes123 job URL. """
+def fetch_yes123_job_html(job_url: str, headers: dict, timeout: int = DEFAULT_TIMEOUT) -> Optional[str]:
+    """ Fetches the raw HTML of a yes123 job page. """
     logger.info("Fetching job data", url=job_url)
     try:
         response = requests.get(job_url, headers=headers, timeout=timeout, verify=False)
         response.raise_for_status() # This raises HTTPError for bad responses (4xx or 5xx)
         logger.info("Received response", url=job_url, status_code=response.status_code)
+        return response.text
+    except requests.exceptions.RequestException as e:
+        logger.error("Failed to fetch yes123 job data.", url=job_url, error=e)
+        return None
+
 
-        if "此工作機會已關閉" in response.text:
+def fetch_yes123_job_data(job_url: str, headers: dict, timeout: int = DEFAULT_TIMEOUT) -> Optional[dict]:
+    """ Fetches and scrapes detailed information from a given yes123 job URL. """
+    html_content = fetch_yes123_job_html(job_url, headers, timeout)
+    return scrape_yes123_job_html(html_content, job_url) if html_content else None
+
+
+@timed_parse(SourcePlatform.PLATFORM_YES123.value)
+def scrape_yes123_job_html(html_content: str, job_url: str) -> Optional[dict]:
+    """ Scrapes detailed information from the HTML of a yes123 job page (live or archived). """
+    try:
+        if "此工作機會已關閉" in html_content:
             logger.warning("Job is closed", url=job_url)
             return None
-        if "您要找的頁面不存在" in response.text:
+        if "您要找的頁面不存在" in html_content:
             logger.warning("Page not found", url=job_url)
             return None
 
-        soup = BeautifulSoup(response.text, "html.parser")
+        soup = BeautifulSoup(html_content, "html.parser")
         scraped_data = {"職缺網址": job_url}
 
         # Extract Title and Company Info
@@ -187,9 +188,6 @@ def fetch_yes123_job_data(job_url: str, headers: dict, timeout: int = DEFAULT_TI
                     scraped_data[key] += f"\n(補充) {value}" if scraped_data[key] else value
 
         return scraped_data
-    except requests.exceptions.RequestException as e:
-        logger.error("Failed to fetch yes123 job data.", url=job_url, error=e)
-        return None
     except Exception as e:
         logger.error("An unexpected error occurred during scraping.", url=job_url, error=e, exc_info=True)
         return None
@@ -207,6 +205,7 @@ def _parse_job_type(job_nature_text: Optional[str]) -> JobType:
         return JobType.INTERNSHIP
     return JobType.OTHER
 
+@timed_parse(SourcePlatform.PLATFORM_YES123.value)
 def parse_job_details_to_pydantic(job_data: Dict[str, any], url: str, source_category_id: str) -> Optional[JobPydantic]:
     """Parses the scraped job data dictionary and converts it into a JobPydantic object."""
     try:
@@ -238,8 +237,8 @@ def parse_job_details_to_pydantic(job_data: Dict[str, any], url: str, source_cat
             #     longitude = str(coordinates["longitude"])
         description = job_data.get("工作內容", "")
         extracted_skills = []
-        if description and COMPILED_SKILL_PATTERNS:
-            extracted_skills = extract_skills_precise(description, COMPILED_SKILL_PATTERNS)
+        if description:
+            extracted_skills = extract_skills_for_crawl(description)
         logger.debug("Parsing job details to Pydantic.", url=url, source_category_id=source_category_id)
         return JobPydantic(
             source_platform=SourcePlatform.PLATFORM_YES123,
@@ -328,7 +327,13 @@ def _process_single_url(url: str, job_category_code: str, db_name: str):
         url_pydantic = UrlPydantic(source_url=url, source=SourcePlatform.PLATFORM_YES123, source_category_id=job_category_code)
         upsert_urls(SourcePlatform.PLATFORM_YES123, [url_pydantic], db_name=db_name)
 
-        job_data = fetch_yes123_job_data(url, HEADERS_YES123)
+        html_content = fetch_yes123_job_html(url, HEADERS_YES123)
+        if html_content:
+            archive_raw_payload(
+                SourcePlatform.PLATFORM_YES123, job_id or url, RAW_KIND_DETAIL_HTML, html_content,
+                url=url, source_category_id=job_category_code,
+            )
+        job_data = scrape_yes123_job_html(html_content, url) if html_content else None
         if not job_data:
             logger.warning("fetch_job_data_failed", job_id=job_id, url=url, category=job_category_code)
             update_urls_status([url], CrawlStatus.FAILED, db_name=db_name)
@@ -397,9 +402,6 @@ def task_crawl_yes123_page_and_chain(job_category_code: str, page_num: int, max_
         response = session.get(page_url, timeout=DEFAULT_TIMEOUT)
         response.raise_for_status()
         response.encoding = 'utf-8-sig'
-        with open('/home/soldier/crawler_system_v0_local_test/crawler/yes123_response_debug.html', 'w', encoding='utf-8') as f:
-            f.write(response.text)
-        logger.info("Saved response HTML for debugging.", file='/home/soldier/crawler_system_v0_local_test/crawler/yes123_response_debug.html', category=job_category_code)
         soup = BeautifulSoup(response.text, "html.parser")
 
         if max_page is None:
@@ -430,16 +432,20 @@ def task_crawl_yes123_page_and_chain(job_category_code: str, page_num: int, max_
             task_crawl_yes123_page_and_chain(job_category_code=job_category_code, page_num=next_page_num, max_page=max_page, db_name=db_name)
         else:
             logger.info("reached_max_page", page=page_num, max_page=max_page, category=job_category_code)
+            crawl_runs.set_stop_reason("max_page")
 
     except Exception as e:
         logger.error("network_error_web_request", url=page_url, error=str(e), exc_info=True, category=job_category_code)
+        crawl_runs.set_stop_reason("page_error")
 
+@crawl_runs.track_crawl_run(SourcePlatform.PLATFORM_YES123, db_arg="db_name")
 def task_start_yes123_crawl_chain(job_category: dict, db_name: str = None):
     try:
         category = CategorySourcePydantic.model_validate(job_category)
         job_category_code = category.source_category_id
     except Exception as e:
         logger.error("invalid_job_category_data", data=job_category, error=str(e), exc_info=True)
+        crawl_runs.set_stop_reason("invalid_category")
         return
     logger.info("start_task_chain", job_category_code=job_category_code)
     task_crawl_yes123_page_and_chain(job_category_code=job_category_code, page_num=1, max_page=None, db_name=db_name)
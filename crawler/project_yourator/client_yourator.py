@@ -11,8 +11,12 @@ from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_excep
     URL_CRAWLER_REQUEST_TIMEOUT_SECONDS,
     URL_CRAWLER_SLEEP_MAX_SECONDS,
     URL_CRAWLER_SLEEP_MIN_SECONDS,
+    HTTP_DETAIL_CACHE_MAX_ENTRIES,
 )
 from crawler.logging_config import configure_logging
+from crawler.utils import crawl_runs
+from crawler.utils.metrics import RATE_LIMIT_WAIT, observe_http_request
+from crawler.utils.singleflight import coalesced
 from crawler.database.schemas import SourcePlatform
 from crawler.project_yourator.config_yourator import (
     HEADERS_YOURATOR,
@@ -32,6 +36,7 @@ logger = structlog.get_logger(__name__)
     stop=stop_after_attempt(5),
     wait=wait_exponential(multiplier=1, min=4, max=10),
     retry=retry_if_exception_type(requests.exceptions.RequestException),
+    before_sleep=crawl_runs.record_retry,
     reraise=True,
 )
 def _make_api_request(
@@ -46,43 +51,35 @@ def _make_api_request(
     """
     通用的 API 請求函式，處理隨機延遲、請求發送、JSON 解析和錯誤處理。
     """
-    if log_context is None:
-        log_context = {}
+    log_context = {"platform": SourcePlatform.PLATFORM_YOURATOR, "component": "client", **(log_context or {})}
 
     # Add random delay before making API request
     sleep_time = random.uniform(
         URL_CRAWLER_SLEEP_MIN_SECONDS, URL_CRAWLER_SLEEP_MAX_SECONDS
     )
-    logger.debug(
-        "Sleeping before API request.",
-        event="sleeping_before_api_request",
-        duration=sleep_time,
-        platform=SourcePlatform.PLATFORM_YOURATOR,
-        component="client",
-        **log_context
-    )
+    RATE_LIMIT_WAIT.observe(sleep_time, platform=SourcePlatform.PLATFORM_YOURATOR.value, limiter="sleep")
     time.sleep(sleep_time)
 
     try:
-        response = requests.request(
-            method,
-            url,
-            headers=headers,
-            params=params,
-            timeout=timeout,
-            verify=verify,
-        )
+        with observe_http_request(SourcePlatform.PLATFORM_YOURATOR.value, log_context.get("api_type")) as request_metrics:
+            response = requests.request(
+                method,
+                url,
+                headers=headers,
+                params=params,
+                timeout=timeout,
+                verify=verify,
+            )
+            request_metrics.status = response.status_code
         response.raise_for_status()  # Raises HTTPError for bad responses (4xx or 5xx)
         data = response.json()
         return data
     except requests.exceptions.RequestException as e:
         logger.error(
             "Network error during API request.",
-            event="network_error_api_request",
+            event_name="network_error_api_request",
             url=url,
             error=str(e),
-            platform=SourcePlatform.PLATFORM_YOURATOR,
-            component="client",
             exc_info=True,
             **log_context,
         )
@@ -90,10 +87,8 @@ def _make_api_request(
     except json.JSONDecodeError:
         logger.error(
             "Failed to parse JSON response from API.",
-            event="json_decode_error_api_response",
+            event_name="json_decode_error_api_response",
             url=url,
-            platform=SourcePlatform.PLATFORM_YOURATOR,
-            component="client",
             exc_info=True,
             **log_context,
         )
@@ -101,11 +96,9 @@ def _make_api_request(
     except Exception as e:
         logger.error(
             "Unexpected error during API request.",
-            event="unexpected_error_api_request",
+            event_name="unexpected_error_api_request",
             url=url,
             error=str(e),
-            platform=SourcePlatform.PLATFORM_YOURATOR,
-            component="client",
             exc_info=True,
             **log_context,
         )
@@ -155,6 +148,7 @@ def fetch_job_urls_from_yourator_api(
         },
     )
 
+@coalesced(max_entries=HTTP_DETAIL_CACHE_MAX_ENTRIES)
 def fetch_job_data_from_yourator_api(job_id: str) -> Optional[Dict[str, Any]]:
     """
     從 Yourator API 獲取單一職缺的原始數據。
@@ -0,0 +1,15 @@
+# crawler/project_yourator/config_yourator.py
+import structlog
+from crawler.config import config_section
+
+logger = structlog.get_logger(__name__)
+
+# Yourator 平台相關設定
+WEB_NAME_YOURATOR = config_section.get("WEB_NAME_YOURATOR", "Yourator")
+JOB_CAT_URL_YOURATOR = config_section.get("JOB_CAT_URL_YOURATOR", "https://www.yourator.co/api/v4/categories")
+JOB_API_BASE_URL_YOURATOR = config_section.get("JOB_API_BASE_URL_YOURATOR", "https://www.yourator.co/api/v4/jobs")
+
+HEADERS_YOURATOR = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36",
+    "Referer": "https://www.yourator.co/jobs",
+}
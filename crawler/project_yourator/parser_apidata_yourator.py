@@ -1,9 +1,7 @@
-import os
 from datetime import datetime
 from typing import Optional, Dict, Any
 
 import structlog
-import pandas as pd
 
 from crawler.database.schemas import (
     JobPydantic,
@@ -14,30 +12,12 @@ from crawler.database.schemas import (
     SkillPydantic,
     CompanyPydantic,
 )
+from crawler.utils.metrics import timed_parse
 from crawler.utils.salary_parser import parse_salary_text
-from crawler.utils.run_skill_extraction import extract_skills_precise
+from crawler.utils.skill_extraction_stage import extract_skills_for_crawl
 
 logger = structlog.get_logger(__name__)
 
-SKILL_MASTER_PATH = os.path.join(
-    os.path.dirname(os.path.abspath(__file__)),
-    '..',
-    'utils',
-    'skill_data',
-    'generated_data',
-    'skill_master.json'
-)
-
-try:
-    SKILL_MASTER_DF = pd.read_json(SKILL_MASTER_PATH)
-    logger.info(f"已載入技能主檔: {SKILL_MASTER_PATH}")
-except FileNotFoundError:
-    logger.error(f"錯誤：找不到技能主檔。請先執行 `python3 -m skill_tool.run_skill_extraction --generate-kb` 來生成 {SKILL_MASTER_PATH}")
-    SKILL_MASTER_DF = pd.DataFrame() # Provide an empty DataFrame to avoid errors later
-except Exception as e:
-    logger.error(f"載入技能主檔失敗: {e}")
-    SKILL_MASTER_DF = pd.DataFrame() # Provide an empty DataFrame to avoid errors later
-
 JOB_TYPE_MAPPING_YOURATOR = {
     "full_time": JobType.FULL_TIME,
     "part_time": JobType.PART_TIME,
@@ -46,6 +26,7 @@ JOB_TYPE_MAPPING_YOURATOR = {
 }
 
 
+@timed_parse(SourcePlatform.PLATFORM_YOURATOR.value)
 def parse_job_detail_to_pydantic(job_data: Dict[str, Any]) -> Optional[JobPydantic]:
     """
     從 Yourator 單一職缺 API 的 JSON 數據解析並轉換為 JobPydantic 物件。
@@ -70,7 +51,7 @@ def parse_job_detail_to_pydantic(job_data: Dict[str, Any]) -> Optional[JobPydant
             except ValueError:
                 logger.warning(
                     "Could not parse posted_at date format from detail API.",
-                    event="parse_date_format_error",
+                    event_name="parse_date_format_error",
                     created_at=created_at_str,
                     job_id=source_job_id,
                     platform=SourcePlatform.PLATFORM_YOURATOR,
@@ -96,8 +77,8 @@ def parse_job_detail_to_pydantic(job_data: Dict[str, Any]) -> Optional[JobPydant
 
         # Extract skills from description
         extracted_skills = []
-        if description and SKILL_MASTER_DF is not None and not SKILL_MASTER_DF.empty:
-            extracted_skills = extract_skills_precise(description, SKILL_MASTER_DF)
+        if description:
+            extracted_skills = extract_skills_for_crawl(description)
 
         return JobPydantic(
             source_platform=SourcePlatform.PLATFORM_YOURATOR,
@@ -133,7 +114,7 @@ def parse_job_detail_to_pydantic(job_data: Dict[str, Any]) -> Optional[JobPydant
     except Exception as e:
         logger.error(
             "Unexpected error when parsing Yourator job detail JSON.",
-            event="unexpected_error_parsing_job_detail",
+            event_name="unexpected_error_parsing_job_detail",
             error=str(e),
             job_data=job_data,
             platform=SourcePlatform.PLATFORM_YOURATOR,
@@ -142,6 +123,7 @@ def parse_job_detail_to_pydantic(job_data: Dict[str, Any]) -> Optional[JobPydant
         )
         return None
 
+@timed_parse(SourcePlatform.PLATFORM_YOURATOR.value)
 def parse_job_list_to_pydantic(job_item: Dict[str, Any]) -> Optional[JobPydantic]:
     """
     從 Yourator 列表頁 API 的 JSON 數據解析並轉換為 JobPydantic 物件。
@@ -166,7 +148,7 @@ def parse_job_list_to_pydantic(job_item: Dict[str, Any]) -> Optional[JobPydantic
             except ValueError:
                 logger.warning(
                     "Could not parse posted_at date format from list API.",
-                    event="parse_date_format_error",
+                    event_name="parse_date_format_error",
                     created_at=created_at_str,
                     job_id=source_job_id,
                     platform=SourcePlatform.PLATFORM_YOURATOR,
@@ -192,8 +174,8 @@ def parse_job_list_to_pydantic(job_item: Dict[str, Any]) -> Optional[JobPydantic
 
         # Extract skills from description
         extracted_skills = []
-        if description and SKILL_MASTER_DF is not None and not SKILL_MASTER_DF.empty:
-            extracted_skills = extract_skills_precise(description, SKILL_MASTER_DF)
+        if description:
+            extracted_skills = extract_skills_for_crawl(description)
 
         return JobPydantic(
             source_platform=SourcePlatform.PLATFORM_YOURATOR,
@@ -229,7 +211,7 @@ def parse_job_list_to_pydantic(job_item: Dict[str, Any]) -> Optional[JobPydantic
     except Exception as e:
         logger.error(
             "Unexpected error when parsing Yourator job list JSON.",
-            event="unexpected_error_parsing_job_list",
+            event_name="unexpected_error_parsing_job_list",
             error=str(e),
             job_item=job_item,
             platform=SourcePlatform.PLATFORM_YOURATOR,
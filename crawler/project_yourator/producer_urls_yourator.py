@@ -10,7 +10,7 @@ logger = structlog.get_logger(__name__)
 
 logger.info(
     "Starting URL task distribution for all Yourator categories.",
-    event="start_url_task_distribution",
+    event_name="start_url_task_distribution",
     platform=SourcePlatform.PLATFORM_YOURATOR,
     component="producer",
 )
@@ -20,7 +20,7 @@ all_yourator_categories = get_all_categories_for_platform(SourcePlatform.PLATFOR
 if all_yourator_categories:
     logger.info(
         "Found categories for PLATFORM_YOURATOR.",
-        event="categories_found",
+        event_name="categories_found",
         count=len(all_yourator_categories),
         platform=SourcePlatform.PLATFORM_YOURATOR,
         component="producer",
@@ -29,7 +29,7 @@ if all_yourator_categories:
         category_id: str = category_info.source_category_id
         logger.info(
             "Dispatching URL crawling task.",
-            event="dispatch_url_crawling_task",
+            event_name="dispatch_url_crawling_task",
             category_id=category_id,
             platform=SourcePlatform.PLATFORM_YOURATOR,
             component="producer",
@@ -38,7 +38,7 @@ if all_yourator_categories:
 else:
     logger.info(
         "No categories found for PLATFORM_YOURATOR.",
-        event="no_categories_found",
+        event_name="no_categories_found",
         platform=SourcePlatform.PLATFORM_YOURATOR,
         component="producer",
     )
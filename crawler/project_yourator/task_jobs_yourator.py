@@ -30,7 +30,7 @@ def fetch_url_data_yourator(url: str) -> Optional[dict]:
         if not job_id:
             logger.error(
                 "Failed to extract job_id from URL.",
-                event="job_id_extraction_failed",
+                event_name="job_id_extraction_failed",
                 url=url,
                 platform=SourcePlatform.PLATFORM_YOURATOR,
                 component="task",
@@ -42,7 +42,7 @@ def fetch_url_data_yourator(url: str) -> Optional[dict]:
         if data is None:
             logger.error(
                 "Failed to fetch job data from Yourator API.",
-                event="fetch_job_data_failed",
+                event_name="fetch_job_data_failed",
                 job_id=job_id,
                 url=url,
                 platform=SourcePlatform.PLATFORM_YOURATOR,
@@ -54,7 +54,7 @@ def fetch_url_data_yourator(url: str) -> Optional[dict]:
     except Exception as e:
         logger.error(
             "Unexpected error during API call or job ID extraction.",
-            event="unexpected_api_call_error",
+            event_name="unexpected_api_call_error",
             error=str(e),
             job_id=job_id,
             url=url,
@@ -70,7 +70,7 @@ def fetch_url_data_yourator(url: str) -> Optional[dict]:
     if not job_pydantic_data:
         logger.error(
             "Failed to parse job data.",
-            event="job_data_parsing_failed",
+            event_name="job_data_parsing_failed",
             job_id=job_id,
             url=url,
             platform=SourcePlatform.PLATFORM_YOURATOR,
@@ -113,7 +113,7 @@ def fetch_url_data_yourator(url: str) -> Optional[dict]:
 
         logger.info(
             "Job parsed and upserted successfully.",
-            event="job_upsert_success",
+            event_name="job_upsert_success",
             job_id=job_id,
             url=url,
             platform=SourcePlatform.PLATFORM_YOURATOR,
@@ -125,7 +125,7 @@ def fetch_url_data_yourator(url: str) -> Optional[dict]:
     except Exception as e:
         logger.error(
             "Unexpected error when upserting job data.",
-            event="job_upsert_error",
+            event_name="job_upsert_error",
             error=str(e),
             job_id=job_id,
             url=url,
@@ -147,7 +147,7 @@ if __name__ == "__main__":
 
     logger.info(
         "Fetching URLs to process for local testing.",
-        event="fetching_urls_for_local_test",
+        event_name="fetching_urls_for_local_test",
         statuses=statuses_to_fetch,
         limit=PRODUCER_BATCH_SIZE,
         platform=SourcePlatform.PLATFORM_YOURATOR,
@@ -163,7 +163,7 @@ if __name__ == "__main__":
     if urls_to_process:
         logger.info(
             "Found URLs to process.",
-            event="urls_found_for_processing",
+            event_name="urls_found_for_processing",
             count=len(urls_to_process),
             platform=SourcePlatform.PLATFORM_YOURATOR,
             component="task",
@@ -171,7 +171,7 @@ if __name__ == "__main__":
         for url in urls_to_process:
             logger.info(
                 "Processing URL.",
-                event="processing_url",
+                event_name="processing_url",
                 url=url,
                 platform=SourcePlatform.PLATFORM_YOURATOR,
                 component="task",
@@ -180,7 +180,7 @@ if __name__ == "__main__":
     else:
         logger.info(
             "No URLs found to process for testing.",
-            event="no_urls_found_for_testing",
+            event_name="no_urls_found_for_testing",
             platform=SourcePlatform.PLATFORM_YOURATOR,
             component="task",
         )
\ No newline at end of file
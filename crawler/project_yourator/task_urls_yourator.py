@@ -20,19 +20,28 @@ from crawler.database.schemas import (
 )
 from crawler.project_yourator.client_yourator import fetch_job_urls_from_yourator_api
 from crawler.project_yourator.parser_apidata_yourator import parse_job_list_to_pydantic
+from crawler.utils import crawl_runs
+from crawler.utils.id_set import make_id_set
+from crawler.utils.raw_archive import RAW_KIND_LIST_ITEM, archive_raw_payload
 from crawler.worker import app
 from crawler.config import get_db_name_for_platform, URL_CRAWLER_UPLOAD_BATCH_SIZE
 import structlog
 
 logger = structlog.get_logger(__name__)
 
+
+def _get_db_name(db_name_override: Optional[str]) -> str:
+    return db_name_override if db_name_override else get_db_name_for_platform(SourcePlatform.PLATFORM_YOURATOR.value)
+
+
 @app.task
+@crawl_runs.track_crawl_run(SourcePlatform.PLATFORM_YOURATOR, db_arg="db_name_override", resolve_db_name=_get_db_name)
 def crawl_and_store_yourator_category_urls(job_category: dict, url_limit: int = 0, db_name_override: Optional[str] = None):
     job_category = CategorySourcePydantic.model_validate(job_category)
     job_category_code = job_category.source_category_id
-    db_name = db_name_override if db_name_override else get_db_name_for_platform(SourcePlatform.PLATFORM_YOURATOR.value)
+    db_name = _get_db_name(db_name_override)
 
-    global_job_url_set = set()
+    global_job_url_set = make_id_set()
     current_batch_jobs = []
     current_batch_urls = []
     current_batch_url_categories = []
@@ -53,6 +62,7 @@ def crawl_and_store_yourator_category_urls(job_category: dict, url_limit: int =
                 url_limit=url_limit,
                 collected_urls=len(global_job_url_set),
             )
+            crawl_runs.set_stop_reason("url_limit")
             break
 
         if current_page % 5 == 1:
@@ -75,6 +85,7 @@ def crawl_and_store_yourator_category_urls(job_category: dict, url_limit: int =
                 platform=SourcePlatform.PLATFORM_YOURATOR,
                 component="task",
             )
+            crawl_runs.set_stop_reason("invalid_response")
             break
 
         payload = api_response["payload"]
@@ -88,13 +99,21 @@ def crawl_and_store_yourator_category_urls(job_category: dict, url_limit: int =
                 platform=SourcePlatform.PLATFORM_YOURATOR,
                 component="task",
             )
+            crawl_runs.set_stop_reason("no_more_jobs")
             break
 
         for job_item in jobs:
             job_pydantic = parse_job_list_to_pydantic(job_item)
+            archive_raw_payload(
+                SourcePlatform.PLATFORM_YOURATOR,
+                job_pydantic.source_job_id if job_pydantic else job_item.get("id"),
+                RAW_KIND_LIST_ITEM,
+                job_item,
+                url=job_pydantic.url if job_pydantic else None,
+                source_category_id=job_category_code,
+            )
             if job_pydantic and job_pydantic.url:
-                if job_pydantic.url not in global_job_url_set:
-                    global_job_url_set.add(job_pydantic.url)
+                if global_job_url_set.add(job_pydantic.url):
                     current_batch_jobs.append(job_pydantic)
                     current_batch_urls.append(job_pydantic.url)
 
@@ -157,6 +176,7 @@ def crawl_and_store_yourator_category_urls(job_category: dict, url_limit: int =
                 "No new data found for the last few pages. Ending task early.",
                 job_category_code=job_category_code,
             )
+            crawl_runs.set_stop_reason("no_new_jobs")
             break
 
         if not payload.get("hasMore", False):
@@ -167,6 +187,7 @@ def crawl_and_store_yourator_category_urls(job_category: dict, url_limit: int =
                 platform=SourcePlatform.PLATFORM_YOURATOR,
                 component="task",
             )
+            crawl_runs.set_stop_reason("no_more_pages")
             break
 
         current_page += 1
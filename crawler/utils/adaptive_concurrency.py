@@ -0,0 +1,173 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+import requests
+import structlog
+
+from crawler.config import (
+    ADAPTIVE_CONCURRENCY_INITIAL,
+    ADAPTIVE_CONCURRENCY_MIN,
+    ADAPTIVE_CONCURRENCY_MAX,
+    ADAPTIVE_CONCURRENCY_DECREASE_FACTOR,
+    ADAPTIVE_CONCURRENCY_LATENCY_TOLERANCE,
+)
+from crawler.utils.metrics import RATE_LIMIT_WAIT
+
+logger = structlog.get_logger(__name__)
+
+
+def is_congestion_error(exc: BaseException) -> bool:
+    """
+    判斷例外是否代表目標網站正在限流或過載 (429/5xx、逾時、連線被拒)。
+    """
+    if isinstance(exc, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+        return True
+    response = getattr(exc, "response", None)
+    status_code = getattr(response, "status_code", None)
+    # 其餘 4xx (例如 404) 代表請求本身的問題，不影響併發上限
+    return status_code is not None and (status_code == 429 or status_code >= 500)
+
+
+class AIMDConcurrencyLimiter:
+    """
+    以 AIMD (Additive Increase / Multiplicative Decrease) 動態調整同時進行中的請求數上限。
+
+    - 每連續成功「目前上限」次且延遲穩定時，上限加 1。
+    - 遇到 429/5xx、逾時，或延遲超過基準延遲的 latency_tolerance 倍時，上限乘以 decrease_factor。
+    - 同一波壅塞只會降一次 (冷卻時間約為一個基準延遲)，避免連續錯誤把上限直接打到最低。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int = ADAPTIVE_CONCURRENCY_INITIAL,
+        min_limit: int = ADAPTIVE_CONCURRENCY_MIN,
+        max_limit: int = ADAPTIVE_CONCURRENCY_MAX,
+        decrease_factor: float = ADAPTIVE_CONCURRENCY_DECREASE_FACTOR,
+        latency_tolerance: float = ADAPTIVE_CONCURRENCY_LATENCY_TOLERANCE,
+        latency_smoothing: float = 0.2,
+        min_latency_spike: float = 0.5,
+    ):
+        if not 0 < decrease_factor < 1:
+            raise ValueError("decrease_factor must be between 0 and 1.")
+        self.name = name
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.latency_smoothing = latency_smoothing
+        # 延遲至少要比基準多出這麼多秒才算尖峰，避免毫秒級的抖動被誤判為壅塞
+        self.min_latency_spike = min_latency_spike
+
+        self._cond = threading.Condition()
+        self._limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self._in_flight = 0
+        self._baseline_latency: Optional[float] = None
+        self._successes_since_change = 0
+        self._last_decrease_at = 0.0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def baseline_latency(self) -> Optional[float]:
+        return self._baseline_latency
+
+    def acquire(self) -> float:
+        """阻塞直到取得一個請求名額，回傳等待秒數。"""
+        start = time.monotonic()
+        with self._cond:
+            while self._in_flight >= int(self._limit):
+                self._cond.wait()
+            self._in_flight += 1
+        return time.monotonic() - start
+
+    def release(self, latency: float, success: bool = True, congested: bool = False) -> None:
+        """
+        歸還名額並依據本次請求的結果調整上限。
+        success=False 且 congested=False (例如 404、解析失敗) 時只歸還名額，不調整上限。
+        """
+        with self._cond:
+            self._in_flight = max(0, self._in_flight - 1)
+
+            if success and not congested:
+                baseline = self._baseline_latency
+                if (
+                    baseline is not None
+                    and latency > baseline * self.latency_tolerance
+                    and latency - baseline > self.min_latency_spike
+                ):
+                    congested = True
+                # 基準延遲以 EWMA 追蹤，網站整體變慢時會逐漸跟上，而不會永遠卡在最低上限
+                if baseline is None:
+                    self._baseline_latency = latency
+                else:
+                    self._baseline_latency = baseline + self.latency_smoothing * (latency - baseline)
+
+            if congested:
+                self._decrease()
+            elif success:
+                self._successes_since_change += 1
+                if self._successes_since_change >= int(self._limit) and self._limit < self.max_limit:
+                    self._limit = min(self.max_limit, self._limit + 1)
+                    self._successes_since_change = 0
+                    logger.debug("Concurrency limit increased.", limiter=self.name, limit=self.limit)
+
+            self._cond.notify_all()
+
+    def _decrease(self) -> None:
+        now = time.monotonic()
+        cooldown = max(1.0, self._baseline_latency or 0.0)
+        self._successes_since_change = 0
+        if now - self._last_decrease_at < cooldown:
+            return
+        old_limit = self.limit
+        self._limit = max(float(self.min_limit), self._limit * self.decrease_factor)
+        self._last_decrease_at = now
+        logger.info(
+            "Congestion detected, concurrency limit decreased.",
+            limiter=self.name,
+            old_limit=old_limit,
+            new_limit=self.limit,
+            baseline_latency=self._baseline_latency,
+        )
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """
+        以 context manager 包住一次請求：進入時取得名額，離開時依延遲與例外類型回報結果。
+        例外會原封不動地往外拋。
+        """
+        RATE_LIMIT_WAIT.observe(self.acquire(), platform=self.name, limiter="aimd")
+        start = time.monotonic()
+        try:
+            yield
+        except BaseException as exc:
+            self.release(time.monotonic() - start, success=False, congested=is_congestion_error(exc))
+            raise
+        else:
+            self.release(time.monotonic() - start, success=True)
+
+
+_limiters: Dict[str, AIMDConcurrencyLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_concurrency_limiter(name: str) -> AIMDConcurrencyLimiter:
+    """
+    取得 (或建立) 指定名稱的共用限流器。同一個 worker 行程內，
+    同一平台的所有爬蟲共用一個上限，才能反映該網站實際能承受的併發量。
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = AIMDConcurrencyLimiter(name)
+            _limiters[name] = limiter
+        return limiter
@@ -0,0 +1,225 @@
+"""
+跨任務的職缺去重：同一個職缺常出現在多個職務類別，而每個類別是獨立的 Celery 任務，彼此沒有共用狀態，
+同一個職缺會在每個類別各解析、抓詳細頁、寫入資料庫一次 (104 約 2-3 倍)。
+
+- producer 以 start_crawl_epoch() 開始一個爬取週期 (epoch)，並把 epoch 傳給這一輪的每個類別任務。
+- 任務以 CrawlDedup(platform, epoch, db_name).filter_new(job_ids) 認領，只處理本週期第一次出現的職缺。
+- 批次寫入資料庫成功後以 mark_stored(job_ids) 確認；任務結束時 (包含例外、url_limit 取消的詳細頁) 以 finish()
+  釋放認領了卻沒有寫入的職缺，同一週期之後的類別任務可以重新認領，不會因為一個任務失敗而整個週期漏掉。
+- CRAWL_DEDUP_BACKEND：
+    - db (預設)：以 INSERT IGNORE 在 tb_crawl_seen_jobs 認領，跨 worker、跨機器有效；行程內另有精確的 ID 集合
+      (CompactIdSet) 前置快取，已寫入資料庫的職缺不再查詢資料庫。
+    - local：只在行程內認領 (本地執行；prefork 的每個子行程各自去重)。
+    - off：不去重。
+- 沒有 epoch (直接呼叫任務、基準測試) 時不去重，行為與以前相同。
+- 資料庫認領失敗時視為新職缺：寧可重複處理，也不要漏掉。
+
+類別標籤：104 的標籤來自職缺本身的 jobCat，認領的任務會全部寫入。1111 的標籤是目前爬取的類別，
+以 track_category_tags=True 建立後，被略過的職缺以 defer_category_tags() 記在 tb_crawl_pending_category_tags
+(認領的任務可能還沒寫入 tb_jobs，tb_job_category_tags 的外鍵無法先寫)；認領的任務在 mark_stored() 時、
+略過的任務在 finish() 時各搬移一次已寫入職缺的標籤，較晚的一方一定看得到職缺與標籤。
+認領被釋放、之後也沒有任務處理的職缺，標籤留在待寫入表中直到 CRAWL_DEDUP_RETENTION_DAYS 後刪除。
+"""
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import structlog
+
+from crawler.config import (
+    CRAWL_DEDUP_BACKEND,
+    CRAWL_DEDUP_RETENTION_DAYS,
+)
+from crawler.database.schemas import SourcePlatform
+from crawler.utils.id_set import CompactIdSet
+from crawler.utils.metrics import CRAWL_DEDUP_JOBS
+
+logger = structlog.get_logger(__name__)
+
+DEDUP_BACKENDS = ("db", "local", "off")
+
+# 行程內最多保留幾個週期的前置快取 (依建立順序淘汰)
+_MAX_CACHED_EPOCHS = 4
+
+
+class _EpochState:
+    """行程內某個週期的狀態：stored 是已寫入資料庫的職缺 (精確集合，不會誤判)，claimed 是 local 後端已認領、尚未寫入的職缺。"""
+
+    def __init__(self):
+        self.stored = CompactIdSet()
+        self.claimed: Set[str] = set()
+        self.lock = threading.Lock()
+
+
+_caches: Dict[Tuple[Optional[str], str, str], _EpochState] = {}
+_caches_lock = threading.Lock()
+
+
+def new_crawl_epoch() -> str:
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+
+
+def start_crawl_epoch(backend: str = CRAWL_DEDUP_BACKEND) -> Optional[str]:
+    """producer 使用：開始新的爬取週期並回傳 epoch，傳給這一輪的所有類別任務；停用時回傳 None。"""
+    if backend not in DEDUP_BACKENDS:
+        raise ValueError(f"CRAWL_DEDUP_BACKEND must be one of {DEDUP_BACKENDS}, got {backend!r}.")
+    if backend == "off":
+        return None
+    return new_crawl_epoch()
+
+
+def _purge_expired(db_name: Optional[str]) -> None:
+    from crawler.database.repository import purge_seen_jobs
+
+    try:
+        deleted = purge_seen_jobs(datetime.now(timezone.utc) - timedelta(days=CRAWL_DEDUP_RETENTION_DAYS), db_name=db_name)
+        if deleted:
+            logger.info("Purged expired crawl dedup records.", deleted=deleted, retention_days=CRAWL_DEDUP_RETENTION_DAYS)
+    except Exception as e:
+        logger.warning("Failed to purge expired crawl dedup records.", error=str(e))
+
+
+def _front_cache(db_name: Optional[str], platform: SourcePlatform, epoch: str, backend: str) -> _EpochState:
+    key = (db_name, platform.value, epoch)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is not None:
+            return cache
+        while len(_caches) >= _MAX_CACHED_EPOCHS:
+            del _caches[next(iter(_caches))]
+        cache = _caches[key] = _EpochState()
+    # 每個行程遇到新的週期時順便清掉過期的認領記錄
+    if backend == "db":
+        _purge_expired(db_name)
+    return cache
+
+
+class CrawlDedup:
+    """一個類別任務在某個週期中的去重；epoch 為 None 或後端為 off 時不過濾。"""
+
+    def __init__(
+        self,
+        platform: SourcePlatform,
+        epoch: Optional[str],
+        db_name: Optional[str] = None,
+        backend: str = CRAWL_DEDUP_BACKEND,
+        track_category_tags: bool = False,
+    ):
+        if backend not in DEDUP_BACKENDS:
+            raise ValueError(f"CRAWL_DEDUP_BACKEND must be one of {DEDUP_BACKENDS}, got {backend!r}.")
+        self.platform = platform
+        self.epoch = epoch
+        self.db_name = db_name
+        self.backend = backend
+        self.enabled = bool(epoch) and backend != "off"
+        self.track_category_tags = track_category_tags
+        self.claimed_by = uuid.uuid4().hex
+        self.new_count = 0
+        self.duplicate_count = 0
+        self.released_count = 0
+        self._state = _front_cache(db_name, platform, epoch, backend) if self.enabled else None
+        # 這個任務認領、尚未寫入資料庫的職缺
+        self._unstored: Set[str] = set()
+        # 這個任務略過、類別標籤延後寫入的職缺
+        self._deferred_tag_job_ids: Set[str] = set()
+
+    def _claim(self, job_ids: list) -> Set[str]:
+        from crawler.database.repository import claim_seen_jobs
+
+        try:
+            return claim_seen_jobs(self.platform, self.epoch, job_ids, self.claimed_by, db_name=self.db_name)
+        except Exception as e:
+            logger.warning("Crawl dedup claim failed, processing jobs without dedup.", count=len(job_ids), error=str(e))
+            return set(job_ids)
+
+    def filter_new(self, job_ids: Iterable[str]) -> Set[str]:
+        """回傳這個任務應該處理的職缺 ID (本週期中第一次出現)；未啟用時回傳全部。"""
+        unique_ids = list(dict.fromkeys(str(job_id) for job_id in job_ids if job_id))
+        if not self.enabled or not unique_ids:
+            return set(unique_ids)
+
+        # 這個任務已認領、尚未寫入的職缺 (例如在前面的列表頁出現過) 不再認領，也不當成新職缺回傳
+        candidates = [
+            job_id for job_id in unique_ids if job_id not in self._unstored and job_id not in self._state.stored
+        ]
+        if self.backend == "local":
+            with self._state.lock:
+                new_ids = {job_id for job_id in candidates if job_id not in self._state.claimed}
+                self._state.claimed.update(new_ids)
+        else:
+            new_ids = self._claim(candidates) if candidates else set()
+        self._unstored.update(new_ids)
+
+        duplicates = len(unique_ids) - len(new_ids)
+        self.new_count += len(new_ids)
+        self.duplicate_count += duplicates
+        CRAWL_DEDUP_JOBS.inc(len(new_ids), platform=self.platform.value, result="new")
+        CRAWL_DEDUP_JOBS.inc(duplicates, platform=self.platform.value, result="duplicate")
+        return new_ids
+
+    def mark_stored(self, job_ids: Iterable[str]) -> None:
+        """批次寫入資料庫成功後呼叫：確認這些職缺已處理，之後由前置快取直接略過。"""
+        if not self.enabled:
+            return
+        stored = [str(job_id) for job_id in job_ids if job_id and str(job_id) in self._unstored]
+        for job_id in stored:
+            self._state.stored.add(job_id)
+        self._unstored.difference_update(stored)
+        if self.backend == "local":
+            with self._state.lock:
+                self._state.claimed.difference_update(stored)
+        if self.track_category_tags:
+            self._flush_pending_tags(stored)
+
+    def defer_category_tags(self, url_category_tags: List[Dict[str, str]]) -> None:
+        """記錄被略過的職缺在目前類別的標籤，等認領的任務寫入職缺後再寫入 tb_job_category_tags。"""
+        if not self.enabled or not url_category_tags:
+            return
+        from crawler.database.repository import add_pending_category_tags
+
+        try:
+            add_pending_category_tags(self.platform, self.epoch, url_category_tags, db_name=self.db_name)
+            self._deferred_tag_job_ids.update(tag["job_id"] for tag in url_category_tags)
+        except Exception as e:
+            logger.warning("Failed to record pending category tags.", count=len(url_category_tags), error=str(e))
+
+    def _flush_pending_tags(self, job_ids: List[str]) -> None:
+        from crawler.database.repository import flush_pending_category_tags
+
+        try:
+            flush_pending_category_tags(self.platform, self.epoch, job_ids, db_name=self.db_name)
+        except Exception as e:
+            # 標籤留在待寫入表中，由另一方 (認領或略過的任務) 的下一次搬移處理
+            logger.warning("Failed to flush pending category tags.", count=len(job_ids), error=str(e))
+
+    def finish(self) -> None:
+        """任務結束時呼叫 (放在 finally)：搬移延後的類別標籤，並釋放認領了卻沒有寫入的職缺 (解析失敗、被取消、寫入失敗)。"""
+        if not self.enabled:
+            return
+        if self._deferred_tag_job_ids:
+            self._flush_pending_tags(list(self._deferred_tag_job_ids))
+            self._deferred_tag_job_ids.clear()
+        if self._unstored:
+            self._release_unstored()
+
+    def _release_unstored(self) -> None:
+        job_ids = list(self._unstored)
+        self._unstored.clear()
+        self.released_count += len(job_ids)
+        if self.backend == "local":
+            with self._state.lock:
+                self._state.claimed.difference_update(job_ids)
+        else:
+            from crawler.database.repository import release_seen_jobs
+
+            try:
+                release_seen_jobs(self.platform, self.epoch, job_ids, self.claimed_by, db_name=self.db_name)
+            except Exception as e:
+                # 釋放失敗時這些職缺要到下一個週期才會處理
+                logger.warning("Failed to release crawl dedup claims.", count=len(job_ids), error=str(e))
+                return
+        logger.info("Released crawl dedup claims for jobs that were not stored.", count=len(job_ids))
+
+    def stats(self) -> Dict[str, int]:
+        return {"dedup_new": self.new_count, "dedup_duplicates": self.duplicate_count, "dedup_released": self.released_count}
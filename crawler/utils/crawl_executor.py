@@ -0,0 +1,94 @@
+import contextvars
+import functools
+import itertools
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+# 數字越小越先執行：詳細頁優先，列表頁只在 worker 有空檔時才往前推進，
+# 避免列表頁跑太快、把大量尚未處理的職缺堆在記憶體裡。
+DETAIL_PRIORITY = 0
+LIST_PRIORITY = 10
+
+_SHUTDOWN_PRIORITY = float("inf")
+
+
+class PriorityThreadPool:
+    """
+    固定數量 worker 執行緒 + 優先權佇列的執行器，供單一爬蟲的列表頁與詳細頁共用。
+
+    - 執行緒在建立時啟動、在 shutdown 時結束，不會隨每一頁重新建立。
+    - max_pending 限制「排隊中 + 執行中」的任務總數；超過時 submit 會阻塞，
+      讓提交端 (通常是爬蟲主執行緒) 自然地被背壓，記憶體用量因此有上限。
+    """
+
+    def __init__(self, max_workers: int, max_pending: int, name: str = "crawler"):
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1.")
+        self.name = name
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._slots = threading.BoundedSemaphore(max(max_pending, max_workers))
+        self._sequence = itertools.count()
+        self._shutdown = False
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"{name}-worker-{i}", daemon=True)
+            for i in range(max_workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, priority: int, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """提交任務；佇列已滿時阻塞直到有任務完成。任務在提交端 context 的複本中執行 (例如 crawl_runs 目前的執行)。"""
+        if self._shutdown:
+            raise RuntimeError("cannot submit to a PriorityThreadPool after shutdown.")
+        self._slots.acquire()
+        future: Future = Future()
+        self._queue.put((priority, next(self._sequence), future, functools.partial(contextvars.copy_context().run, fn), args, kwargs))
+        return future
+
+    def _worker(self) -> None:
+        while True:
+            _, _, future, fn, args, kwargs = self._queue.get()
+            if future is None:
+                break
+            try:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    result = fn(*args, **kwargs)
+                except BaseException as exc:
+                    future.set_exception(exc)
+                else:
+                    future.set_result(result)
+            finally:
+                self._slots.release()
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False) -> None:
+        if self._shutdown:
+            return
+        self._shutdown = True
+        if cancel_futures:
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                future = item[2]
+                if future is not None and future.cancel():
+                    self._slots.release()
+        for _ in self._threads:
+            self._queue.put((_SHUTDOWN_PRIORITY, next(self._sequence), None, None, (), {}))
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def __enter__(self) -> "PriorityThreadPool":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.shutdown(wait=True, cancel_futures=exc_type is not None)
@@ -0,0 +1,325 @@
+"""
+爬取執行記錄 (crawl run ledger)：每次呼叫 task_urls_* 入口都在 tb_crawl_runs 留下一筆記錄，
+並在 tb_crawl_run_categories 記錄各職務類別的統計，用來比較不同平台、類別、版本的吞吐量與停止原因。
+
+- 入口函式以 track_crawl_run 裝飾；執行中的記錄放在 contextvar，爬蟲程式碼不需要傳遞任何物件，
+  只在停止時呼叫 set_stop_reason("url_limit") 之類說明原因。
+- HTTP 統計 (頁數、錯誤、位元組、網路時間) 由替換後的 requests.Session.send 取得，所有平台的 client 都會經過。
+- 重試次數由重試的地方回報：client 的 tenacity 以 before_sleep=record_retry 記錄，任務中的重試迴圈呼叫
+  record(retries=1)。同一個 URL 的正常重複請求與對沖請求不算重試。
+- 解析筆數、新增 / 變更職缺數與資料庫寫入時間由 repository 與 metrics.timed_db_write 回報。
+- 工作執行緒 (PriorityThreadPool、對沖請求) 會複製提交端的 context，統計仍歸到同一次執行。
+
+記錄寫入失敗只會記錄 log，不影響爬取本身。
+"""
+import contextvars
+import functools
+import inspect
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+import requests
+import structlog
+
+from crawler.database.schemas import SourcePlatform
+
+logger = structlog.get_logger(__name__)
+
+RUN_STATUS_RUNNING = "running"
+RUN_STATUS_SUCCESS = "success"
+RUN_STATUS_FAILED = "failed"
+
+STOP_REASON_COMPLETED = "completed"
+STOP_REASON_ERROR = "error"
+
+
+@dataclass
+class CrawlStats:
+    pages_fetched: int = 0
+    jobs_parsed: int = 0
+    jobs_new: int = 0
+    jobs_changed: int = 0
+    http_errors: int = 0
+    retries: int = 0
+    bytes_downloaded: int = 0
+    network_seconds: float = 0.0
+    db_seconds: float = 0.0
+
+    def add(self, amounts: Dict[str, float]) -> None:
+        for name, amount in amounts.items():
+            setattr(self, name, getattr(self, name) + amount)
+
+
+class CategoryRecord:
+    def __init__(self, source_category_id: str):
+        self.source_category_id = source_category_id
+        self.stats = CrawlStats()
+        self.started_at = datetime.now(timezone.utc)
+        self.finished_at: Optional[datetime] = None
+        self.stop_reason: Optional[str] = None
+        self.error: Optional[str] = None
+
+    def to_row(self) -> Dict[str, Any]:
+        return {
+            "source_category_id": self.source_category_id,
+            "stop_reason": self.stop_reason,
+            "error": self.error,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            **asdict(self.stats),
+        }
+
+
+class CrawlRunRecord:
+    def __init__(self, platform: SourcePlatform, task_name: str, db_name: Optional[str], celery_task_id: Optional[str] = None):
+        self.id: Optional[int] = None
+        self.platform = platform
+        self.task_name = task_name
+        self.db_name = db_name
+        self.celery_task_id = celery_task_id
+        self.stats = CrawlStats()
+        self.categories: Dict[str, CategoryRecord] = {}
+        self.started_at = datetime.now(timezone.utc)
+        self.finished_at: Optional[datetime] = None
+        self.status = RUN_STATUS_RUNNING
+        self.stop_reason: Optional[str] = None
+        self.error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def add(self, category: Optional[CategoryRecord], amounts: Dict[str, float]) -> None:
+        with self._lock:
+            self.stats.add(amounts)
+            if category is not None:
+                category.stats.add(amounts)
+
+    def to_row(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "stop_reason": self.stop_reason,
+            "error": self.error,
+            "finished_at": self.finished_at,
+            **asdict(self.stats),
+        }
+
+
+_current: contextvars.ContextVar[Optional[Tuple[CrawlRunRecord, Optional[CategoryRecord]]]] = contextvars.ContextVar(
+    "crawl_run", default=None
+)
+
+
+def current_run() -> Optional[CrawlRunRecord]:
+    current = _current.get()
+    return current[0] if current else None
+
+
+def record(**amounts: float) -> None:
+    """把統計累加到目前的執行與類別；不在執行中時不做任何事。"""
+    current = _current.get()
+    if current is not None:
+        current[0].add(current[1], amounts)
+
+
+def record_retry(retry_state: Any = None) -> None:
+    """記錄一次重試；可直接當成 tenacity 的 before_sleep。"""
+    record(retries=1)
+
+
+def set_stop_reason(reason: str) -> None:
+    """記錄目前類別 (沒有類別時為整次執行) 停止爬取的原因；只保留第一次設定的原因。"""
+    current = _current.get()
+    if current is None:
+        return
+    run, category = current
+    target = category if category is not None else run
+    if target.stop_reason is None:
+        target.stop_reason = reason
+
+
+# --- HTTP 統計 ---
+
+_install_lock = threading.Lock()
+_accounting = threading.local()
+
+
+def _account_send(send: Callable[..., requests.Response], session: requests.Session, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:
+    current = _current.get()
+    # 其他程式 (例如基準測試) 在兩層統計之間又包了一層 send 時，只由最外層統計
+    if current is None or getattr(_accounting, "active", False):
+        return send(session, request, **kwargs)
+
+    run, category = current
+    start = time.perf_counter()
+    _accounting.active = True
+    try:
+        response = send(session, request, **kwargs)
+    except Exception:
+        run.add(category, {"http_errors": 1, "network_seconds": time.perf_counter() - start})
+        raise
+    finally:
+        _accounting.active = False
+    if kwargs.get("stream"):
+        size = int(response.headers.get("Content-Length") or 0)
+    else:
+        size = len(response.content or b"")
+    run.add(category, {
+        "pages_fetched": 1,
+        "http_errors": int(response.status_code >= 400),
+        "bytes_downloaded": size,
+        "network_seconds": time.perf_counter() - start,
+    })
+    return response
+
+
+def install_http_accounting() -> None:
+    """
+    在目前的 requests.Session.send 外面包上統計；可重複呼叫。
+    每次開始執行時都會檢查一次，因此 HTTP 錄製 / 重播或基準測試在之後替換 send 時會重新包上。
+    """
+    with _install_lock:
+        send = requests.Session.send
+        if getattr(send, "_crawl_run_accounting", False):
+            return
+
+        def accounted_send(self: requests.Session, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:
+            return _account_send(send, self, request, **kwargs)
+
+        accounted_send._crawl_run_accounting = True
+        requests.Session.send = accounted_send
+
+
+# --- 執行與類別 ---
+
+def _current_celery_task_id() -> Optional[str]:
+    from celery import current_task
+
+    return current_task.request.id if current_task else None
+
+
+def _start_run(run: CrawlRunRecord) -> None:
+    from crawler.database.repository import insert_crawl_run
+
+    try:
+        run.id = insert_crawl_run(
+            platform=run.platform,
+            task_name=run.task_name,
+            celery_task_id=run.celery_task_id,
+            hostname=socket.gethostname(),
+            pid=os.getpid(),
+            started_at=run.started_at,
+            db_name=run.db_name,
+        )
+    except Exception as e:
+        logger.warning("Failed to record crawl run start.", task_name=run.task_name, error=str(e))
+
+
+def _finish_run(run: CrawlRunRecord) -> None:
+    from crawler.database.repository import finish_crawl_run
+
+    if run.id is None:
+        return
+    try:
+        finish_crawl_run(run.id, run.to_row(), [category.to_row() for category in run.categories.values()], db_name=run.db_name)
+    except Exception as e:
+        logger.warning("Failed to record crawl run result.", run_id=run.id, task_name=run.task_name, error=str(e))
+
+
+@contextmanager
+def crawl_run(platform: SourcePlatform, task_name: str, db_name: Optional[str] = None) -> Iterator[CrawlRunRecord]:
+    """開始一次執行：進入時寫入 status=running 的記錄，離開時更新統計與結果。"""
+    install_http_accounting()
+    run = CrawlRunRecord(platform, task_name, db_name, celery_task_id=_current_celery_task_id())
+    _start_run(run)
+    token = _current.set((run, None))
+    try:
+        yield run
+    except BaseException as e:
+        run.status = RUN_STATUS_FAILED
+        run.stop_reason = run.stop_reason or STOP_REASON_ERROR
+        run.error = run.error or repr(e)
+        raise
+    else:
+        run.status = RUN_STATUS_SUCCESS
+        if run.stop_reason is None and len(run.categories) == 1:
+            run.stop_reason = next(iter(run.categories.values())).stop_reason
+        run.stop_reason = run.stop_reason or STOP_REASON_COMPLETED
+    finally:
+        _current.reset(token)
+        run.finished_at = datetime.now(timezone.utc)
+        _finish_run(run)
+        logger.info(
+            "Crawl run finished.",
+            run_id=run.id,
+            task_name=task_name,
+            status=run.status,
+            stop_reason=run.stop_reason,
+            categories=len(run.categories),
+            **asdict(run.stats),
+        )
+
+
+@contextmanager
+def crawl_category(source_category_id: str) -> Iterator[Optional[CategoryRecord]]:
+    """在目前的執行中爬取一個類別；不在執行中時不記錄。同一次執行重複爬取同一類別時統計會累加。"""
+    current = _current.get()
+    if current is None:
+        yield None
+        return
+    run = current[0]
+    with run._lock:
+        category = run.categories.get(source_category_id)
+        if category is None:
+            category = run.categories[source_category_id] = CategoryRecord(source_category_id)
+    token = _current.set((run, category))
+    try:
+        yield category
+    except BaseException as e:
+        category.stop_reason = category.stop_reason or STOP_REASON_ERROR
+        category.error = category.error or repr(e)
+        raise
+    else:
+        category.stop_reason = category.stop_reason or STOP_REASON_COMPLETED
+    finally:
+        _current.reset(token)
+        category.finished_at = datetime.now(timezone.utc)
+
+
+def _category_id(job_category: Any) -> str:
+    if isinstance(job_category, dict):
+        return str(job_category.get("source_category_id"))
+    return str(getattr(job_category, "source_category_id", job_category))
+
+
+def track_crawl_run(
+    platform: SourcePlatform,
+    db_arg: str,
+    resolve_db_name: Optional[Callable[[Optional[str]], Optional[str]]] = None,
+    category_arg: str = "job_category",
+) -> Callable:
+    """
+    裝飾 task_urls_* 入口：以 category_arg 引數的 source_category_id 為類別，記錄寫入 db_arg 指定
+    (或經 resolve_db_name 換算) 的資料庫。已經在執行中 (例如本地測試把多個類別包成一次執行) 時只新增類別。
+    """
+    def decorator(fn: Callable) -> Callable:
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind_partial(*args, **kwargs)
+            category_id = _category_id(bound.arguments.get(category_arg))
+            if current_run() is not None:
+                with crawl_category(category_id):
+                    return fn(*args, **kwargs)
+            db_name = bound.arguments.get(db_arg)
+            if resolve_db_name is not None:
+                db_name = resolve_db_name(db_name)
+            with crawl_run(platform, fn.__name__, db_name=db_name), crawl_category(category_id):
+                return fn(*args, **kwargs)
+
+        return wrapper
+    return decorator
@@ -7,7 +7,16 @@ from multiprocessing import Pool, cpu_count
 
 logger = structlog.get_logger(__name__)
 
-def _process_job(job, compiled_skill_patterns):
+# 每個 worker 行程在 initializer 中收到一次預編譯的技能 pattern，之後的任務只傳送職缺本身
+_worker_skill_patterns = []
+
+def _init_worker(compiled_skill_patterns):
+    global _worker_skill_patterns
+    _worker_skill_patterns = compiled_skill_patterns
+
+def _process_job(job, compiled_skill_patterns=None):
+    if compiled_skill_patterns is None:
+        compiled_skill_patterns = _worker_skill_patterns
     description_text = job.get('description', '')
     text_lower = description_text.lower()
 
@@ -102,12 +111,10 @@ def fetch_description_skill(input_json_path, output_json_path, skill_master_path
     num_processes = cpu_count() # 獲取 CPU 核心數
     logger.info(f"使用 {num_processes} 個進程進行平行處理...")
 
-    # 準備 _process_job 函式的參數
-    # 每個元素是一個元組 (job, compiled_skill_patterns)
-    job_args = [(job, compiled_skill_patterns) for job in job_descriptions]
-
-    with Pool(num_processes) as pool:
-        processed_jobs = pool.starmap(_process_job, job_args)
+    # pattern 只透過 initializer 傳給每個 worker 一次，不再隨每筆職缺重複序列化
+    chunksize = max(1, len(job_descriptions) // (num_processes * 4))
+    with Pool(num_processes, initializer=_init_worker, initargs=(compiled_skill_patterns,)) as pool:
+        processed_jobs = list(pool.imap(_process_job, job_descriptions, chunksize=chunksize))
 
     # 儲存處理後的資料到新的 JSON 檔案
     try:
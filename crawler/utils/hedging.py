@@ -0,0 +1,196 @@
+import contextlib
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, ContextManager, Dict, Optional
+
+import structlog
+
+from crawler.config import (
+    HEDGED_ENDPOINTS,
+    HEDGE_LATENCY_PERCENTILE,
+    HEDGE_MIN_SAMPLES,
+    HEDGE_MAX_RATIO,
+    HEDGE_MAX_WORKERS,
+)
+from crawler.utils.metrics import HEDGED_REQUESTS
+
+logger = structlog.get_logger(__name__)
+
+
+class LatencyTracker:
+    """保留最近 window 筆成功請求的延遲，用來估計某個端點的百分位延遲。"""
+
+    def __init__(self, window: int = 200):
+        self._samples: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float) -> None:
+        with self._lock:
+            self._samples.append(latency)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(q * len(ordered)))
+        return ordered[index]
+
+
+class HedgedRequester:
+    """
+    對單一端點類型發出「對沖請求」：若請求在觀察到的 p95 延遲內仍未完成，
+    便再送出一個相同的請求，取先成功回來的結果。
+
+    - 樣本數不足 min_samples 時不對沖，直接呼叫。
+    - 對沖請求數不得超過總請求數的 max_ratio，確保額外流量維持在速率預算之內。
+    - 輸掉的那個請求無法中途取消，會在背景完成後丟棄結果。
+    - fn 應該只是一次 HTTP 請求：請求前的隨機延遲與重試要放在對沖之外，否則 p95 量到的是延遲與退避時間。
+    - acquire 為每次嘗試各自取得的名額 (例如 AIMD 限流器的 slot)，對沖請求同樣受限流器約束；
+      記錄的延遲與對沖的計時都從主要請求取得名額 (以及對沖執行緒) 之後才開始，本地排隊不會觸發對沖。
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        executor: ThreadPoolExecutor,
+        percentile: float = HEDGE_LATENCY_PERCENTILE,
+        min_samples: int = HEDGE_MIN_SAMPLES,
+        max_ratio: float = HEDGE_MAX_RATIO,
+    ):
+        self.endpoint = endpoint
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.max_ratio = max_ratio
+        self.latencies = LatencyTracker()
+        self._executor = executor
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.budget_denied = 0
+
+    def _timed(
+        self,
+        acquire: Optional[Callable[[], ContextManager]],
+        started: Optional[threading.Event],
+        fn: Callable[..., Any],
+        *args: Any,
+        **kwargs: Any,
+    ) -> Any:
+        try:
+            with acquire() if acquire else contextlib.nullcontext():
+                if started is not None:
+                    started.set()
+                start = time.monotonic()
+                result = fn(*args, **kwargs)
+                self.latencies.record(time.monotonic() - start)
+            return result
+        finally:
+            # 取得名額失敗時也要讓 call() 停止等待
+            if started is not None:
+                started.set()
+
+    def _try_reserve_hedge(self) -> bool:
+        with self._lock:
+            if self.hedges + 1 > self.requests * self.max_ratio:
+                self.budget_denied += 1
+                HEDGED_REQUESTS.inc(endpoint=self.endpoint, result="budget_denied")
+                return False
+            self.hedges += 1
+            HEDGED_REQUESTS.inc(endpoint=self.endpoint, result="issued")
+            return True
+
+    def call(self, fn: Callable[..., Any], *args: Any, acquire: Optional[Callable[[], ContextManager]] = None, **kwargs: Any) -> Any:
+        with self._lock:
+            self.requests += 1
+
+        hedge_after = self.latencies.percentile(self.percentile) if len(self.latencies) >= self.min_samples else None
+        if hedge_after is None:
+            return self._timed(acquire, None, fn, *args, **kwargs)
+
+        # 複製呼叫端的 context，讓對沖執行緒上的請求仍計入 crawl_runs 目前的執行
+        started = threading.Event()
+        primary = self._executor.submit(contextvars.copy_context().run, self._timed, acquire, started, fn, *args, **kwargs)
+        # 等待限流名額與執行緒的時間不計入：主要請求真正送出後才開始對沖計時
+        started.wait()
+        try:
+            return primary.result(timeout=hedge_after)
+        except FutureTimeoutError:
+            pass
+
+        if not self._try_reserve_hedge():
+            return primary.result()
+
+        logger.debug("Issuing hedged request.", endpoint=self.endpoint, hedge_after=round(hedge_after, 3))
+        hedge = self._executor.submit(contextvars.copy_context().run, self._timed, acquire, None, fn, *args, **kwargs)
+        pending = {primary, hedge}
+        last_exc: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                exc = future.exception()
+                if exc is not None:
+                    last_exc = exc
+                    continue
+                if future is hedge:
+                    with self._lock:
+                        self.hedge_wins += 1
+                    HEDGED_REQUESTS.inc(endpoint=self.endpoint, result="won")
+                return future.result()
+        raise last_exc
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "budget_denied": self.budget_denied,
+                "hedge_rate": self.hedges / self.requests if self.requests else 0.0,
+                "p95_latency": self.latencies.percentile(self.percentile),
+            }
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_requesters: Dict[str, HedgedRequester] = {}
+_requesters_lock = threading.Lock()
+
+
+def _get_requester(endpoint: str) -> HedgedRequester:
+    global _executor
+    with _requesters_lock:
+        requester = _requesters.get(endpoint)
+        if requester is None:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=HEDGE_MAX_WORKERS, thread_name_prefix="hedge")
+            requester = HedgedRequester(endpoint, _executor)
+            _requesters[endpoint] = requester
+        return requester
+
+
+def hedged_call(
+    endpoint: str, fn: Callable[..., Any], *args: Any, acquire: Optional[Callable[[], ContextManager]] = None, **kwargs: Any
+) -> Any:
+    """
+    若 endpoint 列在設定 HEDGED_ENDPOINTS 中，以對沖方式呼叫 fn；否則直接呼叫。
+    fn 為單次 HTTP 嘗試；acquire 有提供時，每次嘗試 (包含對沖請求) 都在它取得的名額內執行。
+    """
+    if endpoint not in HEDGED_ENDPOINTS:
+        with acquire() if acquire else contextlib.nullcontext():
+            return fn(*args, **kwargs)
+    return _get_requester(endpoint).call(fn, *args, acquire=acquire, **kwargs)
+
+
+def get_hedge_stats() -> Dict[str, Dict[str, Any]]:
+    """回傳每個已啟用對沖的端點的統計 (請求數、對沖數、對沖勝出數、對沖率、p95)。"""
+    with _requesters_lock:
+        requesters = list(_requesters.values())
+    return {requester.endpoint: requester.stats() for requester in requesters}
@@ -0,0 +1,140 @@
+"""
+HTTP 錄製 / 重播：替換 requests.Session.send，讓所有爬蟲的請求 (包含 requests.get 等模組層級函式)
+都經過同一個攔截點，不需要修改各平台的 client。
+
+- record：照常發出請求，並把回應 (狀態碼、標頭、原始內容) 寫成 fixture 檔。
+- replay：完全不連網，只從 fixture 檔回應；找不到對應的錄製時拋出 ConnectionError，
+  讓爬蟲走原本的網路錯誤處理流程。
+
+fixture 以 <HTTP_FIXTURES_DIR>/<host>/<sha1>.json 儲存，sha1 由 method、正規化後的 URL
+(查詢參數排序) 與請求內容計算，benchmarks/mock_server.py 也用同一個 key 重播錄製內容。
+"""
+import base64
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+import structlog
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from crawler.config import HTTP_FIXTURES_DIR, HTTP_RECORD_MODE
+
+logger = structlog.get_logger(__name__)
+
+HTTP_RECORD_MODES = ("off", "record", "replay")
+
+# 只保留重播時有意義的回應標頭，避免把 Set-Cookie 等內容寫進 fixture
+_KEPT_HEADERS = ("content-type", "retry-after", "location")
+
+_original_send = requests.Session.send
+_install_lock = threading.Lock()
+_installed_mode: Optional[str] = None
+_fixtures_dir: Optional[str] = None
+
+
+def canonical_url(url: str) -> str:
+    """排序查詢參數並移除 fragment，讓參數順序不同的相同請求對應到同一個 fixture。"""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path, query, ""))
+
+
+def fixture_path(fixtures_dir: str, method: str, url: str, body: Optional[bytes] = None) -> str:
+    canonical = canonical_url(url)
+    digest = hashlib.sha1(f"{method.upper()} {canonical}".encode("utf-8"))
+    if body:
+        digest.update(b"\n" + body)
+    host = urlsplit(canonical).netloc.replace(":", "_") or "_"
+    return os.path.join(fixtures_dir, host, f"{digest.hexdigest()}.json")
+
+
+def _request_body(request: requests.PreparedRequest) -> Optional[bytes]:
+    body = request.body
+    if isinstance(body, str):
+        return body.encode("utf-8")
+    return body if isinstance(body, bytes) else None
+
+
+def save_fixture(fixtures_dir: str, request: requests.PreparedRequest, response: requests.Response) -> str:
+    path = fixture_path(fixtures_dir, request.method, request.url, _request_body(request))
+    record = {
+        "method": request.method,
+        "url": request.url,
+        "status": response.status_code,
+        "reason": response.reason,
+        "headers": {name: value for name, value in response.headers.items() if name.lower() in _KEPT_HEADERS},
+        # response.content 已經過 gzip 等解碼，重播時不再帶 Content-Encoding
+        "body_b64": base64.b64encode(response.content).decode("ascii"),
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(record, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_fixture(fixtures_dir: str, method: str, url: str, body: Optional[bytes] = None) -> Optional[Dict[str, Any]]:
+    """回傳錄製內容 (status、reason、headers、content bytes)，沒有錄製時回傳 None。"""
+    path = fixture_path(fixtures_dir, method, url, body)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            record = json.load(f)
+    except FileNotFoundError:
+        return None
+    record["content"] = base64.b64decode(record.pop("body_b64"))
+    return record
+
+
+def _build_response(request: requests.PreparedRequest, record: Dict[str, Any]) -> requests.Response:
+    response = requests.Response()
+    response.status_code = record["status"]
+    response.reason = record.get("reason") or ""
+    response.headers = CaseInsensitiveDict(record.get("headers") or {})
+    response._content = record["content"]
+    response.encoding = get_encoding_from_headers(response.headers)
+    response.url = request.url
+    response.request = request
+    return response
+
+
+def _recording_send(self: requests.Session, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:
+    if _installed_mode == "replay":
+        record = load_fixture(_fixtures_dir, request.method, request.url, _request_body(request))
+        if record is None:
+            raise requests.exceptions.ConnectionError(f"No recorded fixture for {request.method} {request.url}", request=request)
+        return _build_response(request, record)
+
+    response = _original_send(self, request, **kwargs)
+    if _installed_mode == "record":
+        try:
+            save_fixture(_fixtures_dir, request, response)
+        except Exception as e:
+            logger.warning("Failed to record HTTP fixture.", url=request.url, error=str(e))
+    return response
+
+
+def install_http_recorder(mode: str = HTTP_RECORD_MODE, fixtures_dir: str = HTTP_FIXTURES_DIR) -> None:
+    """依 mode 啟用錄製或重播 ("off" 時還原原本的 Session.send)；可重複呼叫。"""
+    global _installed_mode, _fixtures_dir
+    mode = (mode or "off").lower()
+    if mode not in HTTP_RECORD_MODES:
+        raise ValueError(f"HTTP_RECORD_MODE must be one of {HTTP_RECORD_MODES}, got {mode!r}.")
+    with _install_lock:
+        if mode == "off":
+            requests.Session.send = _original_send
+            _installed_mode = None
+            return
+        _fixtures_dir = fixtures_dir
+        _installed_mode = mode
+        requests.Session.send = _recording_send
+    logger.info("HTTP recorder installed.", mode=mode, fixtures_dir=fixtures_dir)
+
+
+def uninstall_http_recorder() -> None:
+    install_http_recorder("off")
@@ -0,0 +1,159 @@
+"""
+緊湊的職缺 ID 集合：取代爬取迴圈中以 Python set 保存的 job ID / URL。
+
+每個字串 set 元素約佔 80 bytes (str 物件 + 雜湊表空間)，URL 更多，全站爬取上百萬筆時會達到數百 MB；
+這裡把 ID 轉成 64 位元整數後：
+- CompactIdSet (exact)：存在排序的 array('Q') 中，每筆 8 bytes，不會誤判。
+- BloomIdSet (bloom)：固定大小的位元陣列，1% / 0.1% 誤判率下每筆約 1.2 / 1.8 bytes；
+  誤判代表新的職缺被當成已收集而略過，適合只需要粗略去重的全站爬取。
+
+ID 編碼 (encode_id)：104 的 job ID 是短的 base36 字串 (例如 "7xk2a")，前面加上 "1" 後以 base36 轉成整數，
+保留長度資訊 ("0a" 與 "a" 不會相同) 且可逆；其他 ID (數字以外的大小寫混合字串、URL 等) 取 blake2b 的 63 位元，
+最高位元設為 1 以免與 base36 編碼的值重疊。雜湊值在百萬筆內碰撞的機率約為 1e-7。
+
+集合只記錄「是否看過」，無法列出原本的字串；需要實際的 ID 清單時應查詢資料庫。
+"""
+import hashlib
+import math
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from itertools import chain
+from typing import Iterable, Optional, Set, Union
+
+from crawler.config import JOB_ID_SET_BLOOM_CAPACITY, JOB_ID_SET_BLOOM_ERROR_RATE, JOB_ID_SET_MODE
+
+ID_SET_MODES = ("exact", "bloom")
+
+# 加上前綴 "1" 後最多 12 位 base36 (36**12 < 2**63)，更長的 ID 改用雜湊
+_BASE36_PATTERN = re.compile(r"[0-9a-z]{1,11}")
+_HASHED_FLAG = 1 << 63
+
+# 未排序的新增 ID 超過此數量 (或已排序部分的 1/8) 才合併進排序陣列
+_MIN_PENDING = 4096
+
+
+def encode_id(job_id: Union[str, int]) -> int:
+    """把職缺 ID 轉成 64 位元無號整數；同一個 ID 在任何行程中都得到同樣的值。"""
+    text = str(job_id)
+    if _BASE36_PATTERN.fullmatch(text):
+        return int("1" + text, 36)
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") | _HASHED_FLAG
+
+
+class CompactIdSet:
+    """
+    精確的 ID 集合：已合併的部分是排序的 array('Q') (以二分搜尋查詢)，新加入的先放在小的 pending set，
+    累積到一定數量再一次合併，新增的平均成本為 O(log n)。執行緒安全。
+    """
+
+    mode = "exact"
+
+    def __init__(self, ids: Optional[Iterable[Union[str, int]]] = None):
+        self._sorted = array("Q")
+        self._pending: Set[int] = set()
+        self._lock = threading.Lock()
+        if ids is not None:
+            for job_id in ids:
+                self.add(job_id)
+
+    def _contains_encoded(self, value: int) -> bool:
+        if value in self._pending:
+            return True
+        index = bisect_left(self._sorted, value)
+        return index < len(self._sorted) and self._sorted[index] == value
+
+    def add(self, job_id: Union[str, int]) -> bool:
+        """加入 ID；回傳是否為新的 ID。"""
+        value = encode_id(job_id)
+        with self._lock:
+            if self._contains_encoded(value):
+                return False
+            self._pending.add(value)
+            if len(self._pending) >= max(_MIN_PENDING, len(self._sorted) // 8):
+                self._flush()
+            return True
+
+    def _flush(self) -> None:
+        # 已排序的部分是一整段遞增序列，timsort 只需要合併兩段
+        self._sorted = array("Q", sorted(chain(self._sorted, self._pending)))
+        self._pending.clear()
+
+    def __contains__(self, job_id: Union[str, int]) -> bool:
+        value = encode_id(job_id)
+        with self._lock:
+            return self._contains_encoded(value)
+
+    def __len__(self) -> int:
+        return len(self._sorted) + len(self._pending)
+
+    @property
+    def nbytes(self) -> int:
+        """大約使用的記憶體 (bytes)。"""
+        return self._sorted.itemsize * self._sorted.buffer_info()[1] + len(self._pending) * 64
+
+
+class BloomIdSet:
+    """
+    Bloom filter 模式：依 capacity 與 error_rate 配置位元陣列，記憶體固定不會成長。
+    超過 capacity 後誤判率會上升。len() 是判斷為新 ID 的次數，可能因誤判而略少於實際數量。執行緒安全。
+    """
+
+    mode = "bloom"
+
+    def __init__(self, capacity: int = JOB_ID_SET_BLOOM_CAPACITY, error_rate: float = JOB_ID_SET_BLOOM_ERROR_RATE):
+        if capacity <= 0 or not 0 < error_rate < 1:
+            raise ValueError(f"Invalid Bloom filter parameters: capacity={capacity}, error_rate={error_rate}.")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def _positions(self, job_id: Union[str, int]):
+        # 以一次 blake2b 的兩半做 double hashing
+        digest = hashlib.blake2b(str(job_id).encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "big")
+        second = int.from_bytes(digest[8:], "big") | 1
+        return [(first + i * second) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, job_id: Union[str, int]) -> bool:
+        """加入 ID；回傳是否判斷為新的 ID (已存在的 ID 一律回傳 False，新 ID 有 error_rate 的機率回傳 False)。"""
+        positions = self._positions(job_id)
+        with self._lock:
+            added = False
+            for position in positions:
+                byte_index, mask = position >> 3, 1 << (position & 7)
+                if not self._bits[byte_index] & mask:
+                    self._bits[byte_index] |= mask
+                    added = True
+            if added:
+                self._count += 1
+            return added
+
+    def __contains__(self, job_id: Union[str, int]) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(job_id))
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._bits)
+
+
+IdSet = Union[CompactIdSet, BloomIdSet]
+
+
+def make_id_set(mode: str = JOB_ID_SET_MODE) -> IdSet:
+    """依 JOB_ID_SET_MODE 建立集合。"""
+    if mode == "exact":
+        return CompactIdSet()
+    if mode == "bloom":
+        return BloomIdSet()
+    raise ValueError(f"JOB_ID_SET_MODE must be one of {ID_SET_MODES}, got {mode!r}.")
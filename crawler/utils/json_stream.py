@@ -0,0 +1,111 @@
+"""
+以固定大小的緩衝區增量解析大型 JSON 檔案。
+
+json.load 會把整個檔案與所有物件同時留在記憶體中；本模組逐段讀檔，
+以 json.JSONDecoder.raw_decode 逐一解碼陣列元素與物件成員，
+讓呼叫端可以一邊解析一邊處理，記憶體只與單一元素的大小有關。
+
+    with open(path, encoding="utf-8") as f:
+        reader = JsonStreamReader(f)
+        for _ in reader.iter_array():
+            record = reader.value()
+"""
+import json
+import re
+from typing import Any, Iterator, TextIO
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER_CHARS = frozenset("0123456789.eE+-")
+_decoder = json.JSONDecoder()
+
+
+class JsonStreamReader:
+    """
+    逐段讀取的 JSON 解析器。iter_array / iter_object 只負責走訪容器結構，
+    每次 yield 後由呼叫端以 value() 讀取整個元素，或再以 iter_array / iter_object 往下走訪。
+    單一值超過 max_value_chars 仍無法解碼時視為檔案損毀，避免把整個檔案讀進記憶體。
+    """
+
+    def __init__(self, fp: TextIO, chunk_chars: int = 1 << 20, max_value_chars: int = 64 << 20):
+        self._fp = fp
+        self._chunk_chars = chunk_chars
+        self._max_value_chars = max_value_chars
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _read_more(self) -> bool:
+        if self._eof:
+            return False
+        data = self._fp.read(self._chunk_chars)
+        if not data:
+            self._eof = True
+            return False
+        if self._pos:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        self._buffer += data
+        return True
+
+    def peek(self) -> str:
+        """回傳下一個非空白字元 (不消耗)，檔案結尾時回傳空字串。"""
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._read_more():
+                return ""
+
+    def _expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise json.JSONDecodeError(f"Expecting {char!r}, found {found!r}", self._buffer, self._pos)
+        self._pos += 1
+
+    def value(self) -> Any:
+        """解碼並回傳下一個完整的 JSON 值。"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if len(self._buffer) - self._pos > self._max_value_chars or not self._read_more():
+                    raise
+                continue
+            # 數字可能被緩衝區邊界截斷 (例如 "12.5" 只讀到 "12." 時會解碼成 12)，讀入更多後重新解碼
+            if (end == len(self._buffer) or self._buffer[end] in _NUMBER_CHARS) and self._read_more():
+                continue
+            self._pos = end
+            return value
+
+    def iter_array(self) -> Iterator[None]:
+        """走訪陣列：每個元素 yield 一次，呼叫端必須在下一次迭代前讀完該元素。"""
+        self._expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield
+            separator = self.peek()
+            self._pos += 1
+            if separator == "]":
+                return
+            if separator != ",":
+                raise json.JSONDecodeError(f"Expecting ',' or ']', found {separator!r}", self._buffer, self._pos - 1)
+
+    def iter_object(self) -> Iterator[str]:
+        """走訪物件：每個成員 yield 其鍵，呼叫端必須在下一次迭代前讀完該成員的值。"""
+        self._expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self.value()
+            self._expect(":")
+            yield key
+            separator = self.peek()
+            self._pos += 1
+            if separator == "}":
+                return
+            if separator != ",":
+                raise json.JSONDecodeError(f"Expecting ',' or '}}', found {separator!r}", self._buffer, self._pos - 1)
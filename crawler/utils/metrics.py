@@ -0,0 +1,429 @@
+"""
+執行期指標 (Prometheus 文字格式)：計數器與直方圖，記錄在爬蟲的熱點上：
+
+- crawler_http_requests_total / crawler_http_request_duration_seconds：各平台 client 的
+  _make_api_request / _make_web_request (platform、endpoint = log_context 的 api_type、status)
+- crawler_parse_duration_seconds：每筆職缺的解析時間 (platform、parser)
+- crawler_db_write_duration_seconds / crawler_db_write_rows_total：repository 批次寫入 (寫入時間也累計到
+  crawler/utils/crawl_runs.py 目前的執行記錄)
+- crawler_task_queue_wait_seconds / crawler_task_duration_seconds：Celery 任務在佇列中等待與執行的時間
+- crawler_rate_limit_wait_seconds：請求前的隨機延遲 (limiter="sleep") 與 AIMD 限流器的等待 (limiter="aimd")
+
+Celery prefork 的每個子行程各自累計，定期把快照寫到 METRICS_DIR/<pid>.json；worker 主行程
+依 METRICS_EXPORTER 把所有快照加總後，以 HTTP (METRICS_HOST:METRICS_PORT/metrics) 提供給
+Prometheus 抓取，或定期寫入 node_exporter textfile collector 的 .prom 檔 (METRICS_TEXTFILE_PATH)。
+只使用標準庫，不依賴 prometheus_client。
+"""
+import bisect
+import functools
+import glob
+import inspect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import structlog
+
+from crawler.config import (
+    METRICS_DIR,
+    METRICS_EXPORTER,
+    METRICS_FLUSH_INTERVAL_SECONDS,
+    METRICS_HOST,
+    METRICS_PORT,
+    METRICS_TEXTFILE_PATH,
+)
+from crawler.utils import crawl_runs
+
+logger = structlog.get_logger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 秒；涵蓋毫秒級的解析到數十秒的慢請求
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# 佇列等待可能長達數小時 (producer 一次派送整批任務)
+QUEUE_WAIT_BUCKETS = (0.01, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 1800.0, 3600.0, 7200.0, 21600.0)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: Optional["Registry"] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], Any] = {}
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}.")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """只增不減的計數器；名稱依慣例以 _total 結尾。"""
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0.0) + amount
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            series = [[list(key), value] for key, value in self._series.items()]
+        return {"kind": self.kind, "help": self.documentation, "labelnames": list(self.labelnames), "series": series}
+
+
+class Histogram(_Metric):
+    """固定分桶的直方圖 (各分桶內部存非累計的次數，輸出時才累加)。"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, registry: Optional["Registry"] = None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._series.get(key)
+            if state is None:
+                # 最後一格是 +Inf
+                state = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            series = [[list(key), {"counts": list(state[0]), "sum": state[1], "count": state[2]}]
+                      for key, state in self._series.items()]
+        return {
+            "kind": self.kind,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "buckets": list(self.buckets),
+            "series": series,
+        }
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered.")
+            self._metrics[metric.name] = metric
+
+    def reset(self) -> None:
+        """清空所有數值 (prefork 子行程開始時呼叫，避免重複計入 fork 前主行程的數值)。"""
+        for metric in list(self._metrics.values()):
+            metric.reset()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {name: metric.snapshot() for name, metric in list(self._metrics.items())}
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = Counter(
+    "crawler_http_requests_total", "HTTP requests sent by the platform clients.",
+    ("platform", "endpoint", "status"),
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "crawler_http_request_duration_seconds", "HTTP request latency in the platform clients, excluding the politeness delay.",
+    ("platform", "endpoint"),
+)
+PARSE_DURATION = Histogram(
+    "crawler_parse_duration_seconds", "Time spent parsing a single job.",
+    ("platform", "parser"),
+)
+DB_WRITE_DURATION = Histogram(
+    "crawler_db_write_duration_seconds", "Latency of a repository batch write.",
+    ("operation",),
+)
+DB_WRITE_ROWS = Counter(
+    "crawler_db_write_rows_total", "Input rows handed to repository batch writes.",
+    ("operation",),
+)
+TASK_QUEUE_WAIT = Histogram(
+    "crawler_task_queue_wait_seconds", "Time between publishing a Celery task and a worker starting it.",
+    ("task",), buckets=QUEUE_WAIT_BUCKETS,
+)
+TASK_DURATION = Histogram(
+    "crawler_task_duration_seconds", "Celery task run time.",
+    ("task", "state"), buckets=QUEUE_WAIT_BUCKETS,
+)
+CRAWL_DEDUP_JOBS = Counter(
+    "crawler_dedup_jobs_total", "Jobs checked against the crawl-epoch seen set, by result (new, duplicate).",
+    ("platform", "result"),
+)
+HEDGED_REQUESTS = Counter(
+    "crawler_hedged_requests_total", "Hedged requests by result (issued, won, budget_denied).",
+    ("endpoint", "result"),
+)
+RATE_LIMIT_WAIT = Histogram(
+    "crawler_rate_limit_wait_seconds", "Time spent waiting before a request: the random politeness delay or an AIMD limiter slot.",
+    ("platform", "limiter"),
+)
+
+
+class _RequestObservation:
+    __slots__ = ("status",)
+
+    def __init__(self):
+        self.status: Optional[Any] = None
+
+
+@contextmanager
+def observe_http_request(platform: str, endpoint: Optional[str]) -> Iterator[_RequestObservation]:
+    """
+    記錄一次 HTTP 請求的延遲與狀態。呼叫端收到回應後設定 observation.status = response.status_code；
+    請求本身拋出例外時，status 記為例外類別名稱 (例如 ReadTimeout、ConnectionError)。
+    """
+    observation = _RequestObservation()
+    endpoint = endpoint or "unknown"
+    start = time.perf_counter()
+    try:
+        yield observation
+    except BaseException as exc:
+        if observation.status is None:
+            observation.status = type(exc).__name__
+        raise
+    finally:
+        HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, platform=platform, endpoint=endpoint)
+        HTTP_REQUESTS.inc(platform=platform, endpoint=endpoint, status=observation.status if observation.status is not None else "unknown")
+
+
+def timed_parse(platform: str, parser: Optional[str] = None) -> Callable:
+    """裝飾解析單筆職缺的函式，以 parser (預設為函式名稱) 作為 parser 標籤。"""
+    def decorator(fn: Callable) -> Callable:
+        parser_label = parser or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                PARSE_DURATION.observe(time.perf_counter() - start, platform=platform, parser=parser_label)
+
+        return wrapper
+    return decorator
+
+
+def timed_db_write(operation: str, rows_arg: str) -> Callable:
+    """裝飾 repository 的批次寫入函式；輸入列數取自名為 rows_arg 的引數 (空的批次不記錄)。"""
+    def decorator(fn: Callable) -> Callable:
+        position = list(inspect.signature(fn).parameters).index(rows_arg)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            rows = kwargs.get(rows_arg) if rows_arg in kwargs else (args[position] if len(args) > position else None)
+            if not rows:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                DB_WRITE_DURATION.observe(elapsed, operation=operation)
+                DB_WRITE_ROWS.inc(len(rows), operation=operation)
+                crawl_runs.record(db_seconds=elapsed)
+
+        return wrapper
+    return decorator
+
+
+def merge_snapshots(snapshots: Iterable[Dict[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """加總多個行程的快照 (同名指標、同一組標籤的數值相加)。"""
+    merged: Dict[str, Dict[str, Any]] = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.setdefault(name, {**metric, "series": {}})
+            for labels, value in metric["series"]:
+                key = tuple(labels)
+                current = target["series"].get(key)
+                if metric["kind"] == "counter":
+                    target["series"][key] = (current or 0.0) + value
+                elif current is None:
+                    target["series"][key] = {"counts": list(value["counts"]), "sum": value["sum"], "count": value["count"]}
+                else:
+                    current["counts"] = [a + b for a, b in zip(current["counts"], value["counts"])]
+                    current["sum"] += value["sum"]
+                    current["count"] += value["count"]
+    for metric in merged.values():
+        metric["series"] = [[list(key), value] for key, value in metric["series"].items()]
+    return merged
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: Sequence[str], labels: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labels)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def render_text(snapshot: Dict[str, Dict[str, Any]]) -> str:
+    """輸出 Prometheus 文字格式 (0.0.4)。"""
+    lines: List[str] = []
+    for name in sorted(snapshot):
+        metric = snapshot[name]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['kind']}")
+        labelnames = metric["labelnames"]
+        for labels, value in sorted(metric["series"], key=lambda item: item[0]):
+            if metric["kind"] == "counter":
+                lines.append(f"{name}{_format_labels(labelnames, labels)} {_format_value(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(list(metric["buckets"]) + ["+Inf"], value["counts"]):
+                cumulative += count
+                le = bound if bound == "+Inf" else _format_value(bound)
+                lines.append(f"{name}_bucket{_format_labels(labelnames, labels, ('le', le))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labelnames, labels)} {_format_value(value['sum'])}")
+            lines.append(f"{name}_count{_format_labels(labelnames, labels)} {value['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def _write_atomic(path: str, text: str) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def write_process_snapshot(metrics_dir: str = METRICS_DIR) -> None:
+    """把本行程的數值寫到 metrics_dir/<pid>.json，供主行程加總。"""
+    os.makedirs(metrics_dir, exist_ok=True)
+    _write_atomic(os.path.join(metrics_dir, f"{os.getpid()}.json"), json.dumps(REGISTRY.snapshot()))
+
+
+def collect(metrics_dir: str = METRICS_DIR) -> Dict[str, Dict[str, Any]]:
+    """本行程的數值加上 metrics_dir 中其他行程的快照 (已結束的子行程也保留，計數器才不會倒退)。"""
+    snapshots = [REGISTRY.snapshot()]
+    own_path = os.path.join(metrics_dir, f"{os.getpid()}.json")
+    for path in glob.glob(os.path.join(metrics_dir, "*.json")):
+        if path == own_path:
+            continue
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            logger.warning("Skipping unreadable metrics snapshot.", path=path, exc_info=True)
+    return merge_snapshots(snapshots)
+
+
+def clear_process_snapshots(metrics_dir: str = METRICS_DIR) -> None:
+    """worker 啟動時清掉上一次執行留下的子行程快照。"""
+    for path in glob.glob(os.path.join(metrics_dir, "*.json")):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _start_periodic(name: str, fn: Callable[[], None], interval: float) -> threading.Thread:
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                fn()
+            except Exception:
+                logger.warning("Periodic metrics job failed.", job=name, exc_info=True)
+
+    thread = threading.Thread(target=loop, name=name, daemon=True)
+    thread.start()
+    return thread
+
+
+def start_snapshot_writer(interval: float = METRICS_FLUSH_INTERVAL_SECONDS, metrics_dir: str = METRICS_DIR) -> threading.Thread:
+    """prefork 子行程：定期寫出本行程的快照。"""
+    return _start_periodic("metrics-snapshot", lambda: write_process_snapshot(metrics_dir), interval)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    metrics_dir = METRICS_DIR
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = render_text(collect(self.metrics_dir)).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 每次抓取都寫一行存取紀錄太吵，改由 structlog 在 DEBUG 等級記錄
+        logger.debug("Metrics scraped.", client=self.client_address[0])
+
+
+def start_http_exporter(host: str = METRICS_HOST, port: int = METRICS_PORT, metrics_dir: str = METRICS_DIR) -> ThreadingHTTPServer:
+    handler = type("MetricsHandler", (_MetricsHandler,), {"metrics_dir": metrics_dir})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info("Metrics HTTP exporter started.", host=host, port=server.server_address[1])
+    return server
+
+
+def start_textfile_exporter(path: str = METRICS_TEXTFILE_PATH, interval: float = METRICS_FLUSH_INTERVAL_SECONDS,
+                            metrics_dir: str = METRICS_DIR) -> threading.Thread:
+    """定期把加總後的指標寫入 textfile collector 讀取的 .prom 檔 (先寫暫存檔再 rename，避免讀到一半)。"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    logger.info("Metrics textfile exporter started.", path=path, interval=interval)
+    return _start_periodic("metrics-textfile", lambda: _write_atomic(path, render_text(collect(metrics_dir))), interval)
+
+
+def start_exporter(mode: str = METRICS_EXPORTER) -> None:
+    """worker 主行程依 METRICS_EXPORTER (off / http / textfile) 啟動匯出；埠號被占用等錯誤只記錄，不讓 worker 無法啟動。"""
+    if mode == "off":
+        return
+    try:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        clear_process_snapshots()
+        if mode == "http":
+            start_http_exporter()
+        elif mode == "textfile":
+            start_textfile_exporter()
+        else:
+            logger.warning("Unknown METRICS_EXPORTER, metrics are not exported.", mode=mode)
+    except Exception:
+        logger.error("Failed to start the metrics exporter.", mode=mode, exc_info=True)
@@ -0,0 +1,320 @@
+"""
+原始回應封存：把每個抓到的原始內容 (104 / Yourator 列表 JSON、1111 / yes123 / CakeResume 詳細頁 HTML)
+以內容位址 (sha256) 去重後壓縮，附加寫入本機磁碟上的 segment 檔，
+並以 (platform, source_job_id, fetched_at) 建立索引，讓 crawler/utils/reparse.py
+可以在解析器修正後，不重新爬取就把封存內容重新解析並寫回資料庫。
+
+    <RAW_ARCHIVE_DIR>/index.sqlite                              # 索引 (WAL，多個行程共用)
+    <RAW_ARCHIVE_DIR>/segments/<platform>/<日期>-<pid>-<序號>.seg  # 每個行程各自附加寫入
+
+每筆 segment 紀錄為固定長度標頭 (magic、sha256、壓縮方式、原始長度、壓縮後長度) 加上壓縮內容；
+安裝 zstandard 時以 zstd 壓縮，否則退回標準庫的 zlib。RAW_ARCHIVE_DIR 留空時整個功能停用。
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import struct
+import threading
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from itertools import groupby
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import structlog
+
+from crawler.config import (
+    RAW_ARCHIVE_COMPRESSION_LEVEL,
+    RAW_ARCHIVE_DIR,
+    RAW_ARCHIVE_SEGMENT_MAX_MB,
+)
+
+try:
+    import zstandard
+except ImportError:  # zstandard 為選用套件
+    zstandard = None
+
+logger = structlog.get_logger(__name__)
+
+RAW_KIND_LIST_ITEM = "list_item"
+RAW_KIND_DETAIL_HTML = "detail_html"
+
+CODEC_NONE = 0
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+
+ENCODING_JSON = "json"
+ENCODING_TEXT = "text"
+ENCODING_BYTES = "bytes"
+
+_RECORD_MAGIC = b"RAW1"
+_RECORD_HEADER = struct.Struct(">4s32sBII")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY,
+    segment TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    stored_length INTEGER NOT NULL,
+    raw_length INTEGER NOT NULL,
+    codec INTEGER NOT NULL,
+    encoding TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    platform TEXT NOT NULL,
+    source_job_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    fetched_at TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    url TEXT,
+    source_category_id TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_entries_job ON entries (platform, source_job_id, fetched_at);
+CREATE INDEX IF NOT EXISTS ix_entries_fetched_at ON entries (fetched_at);
+"""
+
+
+@dataclass(frozen=True)
+class ArchiveEntry:
+    """索引中的一筆抓取紀錄；內容以 RawArchive.get(sha256) 讀取。"""
+    platform: str
+    source_job_id: str
+    kind: str
+    fetched_at: str
+    sha256: str
+    url: Optional[str]
+    source_category_id: Optional[str]
+
+
+def _encode_payload(payload: Any) -> Tuple[bytes, str]:
+    if isinstance(payload, bytes):
+        return payload, ENCODING_BYTES
+    if isinstance(payload, str):
+        return payload.encode("utf-8"), ENCODING_TEXT
+    # sort_keys 讓相同內容的 JSON 得到相同的雜湊值
+    return json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8"), ENCODING_JSON
+
+
+def _decode_payload(data: bytes, encoding: str) -> Any:
+    if encoding == ENCODING_JSON:
+        return json.loads(data)
+    if encoding == ENCODING_TEXT:
+        return data.decode("utf-8")
+    return data
+
+
+def _platform_value(platform: Any) -> str:
+    return getattr(platform, "value", platform)
+
+
+def _utc_iso(value: Optional[datetime] = None) -> str:
+    value = value or datetime.now(timezone.utc)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+
+class RawArchive:
+    """
+    單一封存目錄的讀寫介面。寫入端每個行程各自持有 segment 檔，索引則透過 SQLite WAL 共用；
+    同一行程內的多執行緒以鎖序列化寫入。fork 之後請在子行程重新建立物件。
+    """
+
+    def __init__(
+        self,
+        root: str,
+        segment_max_bytes: int = RAW_ARCHIVE_SEGMENT_MAX_MB << 20,
+        compression_level: int = RAW_ARCHIVE_COMPRESSION_LEVEL,
+    ):
+        self.root = root
+        self.segment_max_bytes = segment_max_bytes
+        self.compression_level = compression_level
+        self._lock = threading.Lock()
+        self._segment_files: Dict[str, Any] = {}
+        self._segment_seq = 0
+        self._read_handles: Dict[str, Any] = {}
+        os.makedirs(os.path.join(root, "segments"), exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(root, "index.sqlite"), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._compressor = zstandard.ZstdCompressor(level=compression_level) if zstandard else None
+        self._decompressor = zstandard.ZstdDecompressor() if zstandard else None
+
+    def close(self) -> None:
+        with self._lock:
+            for handle in list(self._segment_files.values()) + list(self._read_handles.values()):
+                handle.close()
+            self._segment_files.clear()
+            self._read_handles.clear()
+            self._conn.close()
+
+    def _compress(self, data: bytes) -> Tuple[int, bytes]:
+        if self._compressor is not None:
+            return CODEC_ZSTD, self._compressor.compress(data)
+        return CODEC_ZLIB, zlib.compress(data, min(max(self.compression_level, 0), 9))
+
+    def _decompress(self, codec: int, data: bytes) -> bytes:
+        if codec == CODEC_ZSTD:
+            if self._decompressor is None:
+                raise RuntimeError("Archived record is zstd-compressed but zstandard is not installed.")
+            return self._decompressor.decompress(data)
+        if codec == CODEC_ZLIB:
+            return zlib.decompress(data)
+        return data
+
+    def _segment_for(self, platform: str):
+        """回傳 (相對路徑, 檔案物件)，目前的 segment 超過上限時輪替成新檔案。"""
+        handle = self._segment_files.get(platform)
+        if handle is not None and handle.tell() < self.segment_max_bytes:
+            return os.path.relpath(handle.name, self.root), handle
+        if handle is not None:
+            handle.close()
+        directory = os.path.join(self.root, "segments", platform)
+        os.makedirs(directory, exist_ok=True)
+        while True:
+            self._segment_seq += 1
+            name = f"{datetime.now(timezone.utc):%Y%m%d}-{os.getpid()}-{self._segment_seq:05d}.seg"
+            path = os.path.join(directory, name)
+            if not os.path.exists(path):
+                break
+        handle = open(path, "ab")
+        self._segment_files[platform] = handle
+        return os.path.relpath(path, self.root), handle
+
+    def put(
+        self,
+        platform: Any,
+        source_job_id: str,
+        kind: str,
+        payload: Any,
+        url: Optional[str] = None,
+        source_category_id: Optional[str] = None,
+        fetched_at: Optional[datetime] = None,
+    ) -> str:
+        """封存一筆原始內容並回傳其 sha256；相同內容只會寫入 segment 一次。"""
+        platform = _platform_value(platform)
+        data, encoding = _encode_payload(payload)
+        digest = hashlib.sha256(data).digest()
+        sha256 = digest.hex()
+        with self._lock:
+            exists = self._conn.execute("SELECT 1 FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()
+            if not exists:
+                codec, stored = self._compress(data)
+                segment, handle = self._segment_for(platform)
+                handle.write(_RECORD_HEADER.pack(_RECORD_MAGIC, digest, codec, len(data), len(stored)))
+                offset = handle.tell()
+                handle.write(stored)
+                handle.flush()
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO blobs (sha256, segment, offset, stored_length, raw_length, codec, encoding) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (sha256, segment, offset, len(stored), len(data), codec, encoding),
+                )
+            self._conn.execute(
+                "INSERT INTO entries (platform, source_job_id, kind, fetched_at, sha256, url, source_category_id) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (platform, str(source_job_id), kind, _utc_iso(fetched_at), sha256, url, source_category_id),
+            )
+            self._conn.commit()
+        return sha256
+
+    def get(self, sha256: str) -> Any:
+        """依 sha256 讀回並解碼原始內容 (dict/list、str 或 bytes)。"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT segment, offset, stored_length, raw_length, codec, encoding FROM blobs WHERE sha256 = ?",
+                (sha256,),
+            ).fetchone()
+            if row is None:
+                raise KeyError(sha256)
+            segment, offset, stored_length, raw_length, codec, encoding = row
+            handle = self._read_handles.get(segment)
+            if handle is None:
+                handle = open(os.path.join(self.root, segment), "rb")
+                self._read_handles[segment] = handle
+            handle.seek(offset)
+            stored = handle.read(stored_length)
+        data = self._decompress(codec, stored)
+        if len(data) != raw_length or hashlib.sha256(data).hexdigest() != sha256:
+            raise ValueError(f"Archived record {sha256} in {segment} is corrupt.")
+        return _decode_payload(data, encoding)
+
+    def iter_latest(
+        self,
+        platform: Any = None,
+        since: Optional[datetime] = None,
+        source_job_ids: Optional[Sequence[str]] = None,
+    ) -> Iterator[Tuple[str, str, Dict[str, ArchiveEntry]]]:
+        """
+        依 (platform, source_job_id) 排序逐一產生 (platform, source_job_id, {kind: 最新一筆 ArchiveEntry})。
+        since 會挑出在該時間之後有抓取紀錄的職缺，但仍回傳各 kind 的最新內容 (可能早於 since)。
+        """
+        conditions: List[str] = []
+        params: List[Any] = []
+        if platform is not None:
+            conditions.append("platform = ?")
+            params.append(_platform_value(platform))
+        if source_job_ids:
+            conditions.append(f"source_job_id IN ({','.join('?' * len(source_job_ids))})")
+            params.extend(str(job_id) for job_id in source_job_ids)
+        if since is not None:
+            conditions.append(
+                "(platform, source_job_id) IN (SELECT platform, source_job_id FROM entries WHERE fetched_at >= ?)"
+            )
+            params.append(_utc_iso(since))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        # SQLite 的 MAX() 聚合會讓其他欄位取自最大值所在的那一列
+        query = (
+            "SELECT platform, source_job_id, kind, MAX(fetched_at), sha256, url, source_category_id "
+            f"FROM entries {where} GROUP BY platform, source_job_id, kind ORDER BY platform, source_job_id"
+        )
+        # 讀取用獨立連線，避免長時間的走訪阻塞同一物件上的寫入
+        conn = sqlite3.connect(os.path.join(self.root, "index.sqlite"), timeout=30)
+        try:
+            rows = (ArchiveEntry(*row) for row in conn.execute(query, params))
+            for (job_platform, source_job_id), group in groupby(rows, key=lambda e: (e.platform, e.source_job_id)):
+                yield job_platform, source_job_id, {entry.kind: entry for entry in group}
+        finally:
+            conn.close()
+
+
+_archive: Optional[RawArchive] = None
+_archive_pid: Optional[int] = None
+_archive_lock = threading.Lock()
+
+
+def get_raw_archive() -> Optional[RawArchive]:
+    """回傳本行程共用的 RawArchive；未設定 RAW_ARCHIVE_DIR 時回傳 None。"""
+    global _archive, _archive_pid
+    if not RAW_ARCHIVE_DIR:
+        return None
+    with _archive_lock:
+        if _archive is None or _archive_pid != os.getpid():
+            _archive = RawArchive(RAW_ARCHIVE_DIR)
+            _archive_pid = os.getpid()
+        return _archive
+
+
+def archive_raw_payload(
+    platform: Any,
+    source_job_id: Optional[str],
+    kind: str,
+    payload: Any,
+    url: Optional[str] = None,
+    source_category_id: Optional[str] = None,
+) -> Optional[str]:
+    """
+    爬蟲用的封存入口：停用或缺少職缺 ID 時直接略過；封存失敗只記錄警告，不影響爬取流程。
+    """
+    if not RAW_ARCHIVE_DIR or not source_job_id or payload is None:
+        return None
+    try:
+        return get_raw_archive().put(
+            platform, str(source_job_id), kind, payload, url=url, source_category_id=source_category_id
+        )
+    except Exception as e:
+        logger.warning("Failed to archive raw payload.", platform=_platform_value(platform), job_id=source_job_id, error=str(e))
+        return None
@@ -0,0 +1,217 @@
+"""
+把 crawler/utils/raw_archive.py 封存的原始內容，以目前版本的解析器重新解析並批次 upsert 回 tb_jobs，
+解析器修正後不必重新爬取。解析在行程池中進行 (每個 worker 自行讀取並解壓 segment)，
+寫入則由主行程依批次呼叫 upsert_jobs。重新解析不會新增 tb_job_observations。
+
+    python -m crawler.utils.reparse --platform platform_104 --since 2026-10-01
+"""
+import argparse
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import structlog
+
+from crawler.config import RAW_ARCHIVE_DIR
+from crawler.database.repository import upsert_jobs
+from crawler.database.schemas import JobPydantic, SourcePlatform
+from crawler.utils.raw_archive import (
+    RAW_KIND_DETAIL_HTML,
+    RAW_KIND_LIST_ITEM,
+    ArchiveEntry,
+    RawArchive,
+)
+
+logger = structlog.get_logger(__name__)
+
+_worker_archive: Optional[RawArchive] = None
+_worker_db_name: Optional[str] = None
+
+
+def _reparse_104(archive: RawArchive, entries: Dict[str, ArchiveEntry], db_name: Optional[str]) -> Optional[JobPydantic]:
+    from crawler.project_104.parser_apidata_104 import parse_job_item_to_pydantic
+
+    entry = entries.get(RAW_KIND_LIST_ITEM)
+    return parse_job_item_to_pydantic(archive.get(entry.sha256)) if entry else None
+
+
+def _reparse_1111(archive: RawArchive, entries: Dict[str, ArchiveEntry], db_name: Optional[str]) -> Optional[JobPydantic]:
+    from crawler.project_1111.parser_apidata_1111 import parse_job_detail_html_to_pydantic, parse_job_list_json_to_pydantic
+
+    entry = entries.get(RAW_KIND_LIST_ITEM)
+    if not entry:
+        return None
+    job = parse_job_list_json_to_pydantic(archive.get(entry.sha256))
+    detail = entries.get(RAW_KIND_DETAIL_HTML)
+    if job and detail:
+        return parse_job_detail_html_to_pydantic(archive.get(detail.sha256), job.url, existing_job=job) or job
+    return job
+
+
+def _reparse_cakeresume(archive: RawArchive, entries: Dict[str, ArchiveEntry], db_name: Optional[str]) -> Optional[JobPydantic]:
+    from crawler.project_cakeresume.parser_cakeresume import extract_job_details_from_html, parse_job_details_to_pydantic
+
+    entry = entries.get(RAW_KIND_DETAIL_HTML)
+    if not entry:
+        return None
+    html_content = archive.get(entry.sha256)
+    job_details = extract_job_details_from_html(html_content)
+    if not job_details:
+        return None
+    # 離線重新解析：公司地址只使用已儲存的資料，不抓取公司頁面
+    return parse_job_details_to_pydantic(
+        job_details, html_content, entry.url, entry.source_category_id, db_name=db_name, fetch_company_page=False
+    )
+
+
+def _reparse_yes123(archive: RawArchive, entries: Dict[str, ArchiveEntry], db_name: Optional[str]) -> Optional[JobPydantic]:
+    from crawler.project_yes123.task_urls_yes123 import parse_job_details_to_pydantic, scrape_yes123_job_html
+
+    entry = entries.get(RAW_KIND_DETAIL_HTML)
+    if not entry:
+        return None
+    job_data = scrape_yes123_job_html(archive.get(entry.sha256), entry.url)
+    return parse_job_details_to_pydantic(job_data, entry.url, entry.source_category_id) if job_data else None
+
+
+def _reparse_yourator(archive: RawArchive, entries: Dict[str, ArchiveEntry], db_name: Optional[str]) -> Optional[JobPydantic]:
+    from crawler.project_yourator.parser_apidata_yourator import parse_job_list_to_pydantic
+
+    entry = entries.get(RAW_KIND_LIST_ITEM)
+    return parse_job_list_to_pydantic(archive.get(entry.sha256)) if entry else None
+
+
+REPARSERS = {
+    SourcePlatform.PLATFORM_104.value: _reparse_104,
+    SourcePlatform.PLATFORM_1111.value: _reparse_1111,
+    SourcePlatform.PLATFORM_CAKERESUME.value: _reparse_cakeresume,
+    SourcePlatform.PLATFORM_YES123.value: _reparse_yes123,
+    SourcePlatform.PLATFORM_YOURATOR.value: _reparse_yourator,
+}
+
+
+def _init_reparse_worker(archive_dir: str, db_name: Optional[str]) -> None:
+    """行程池 initializer：丟棄從父行程繼承的連線池 (不關閉父行程的連線)，並開啟本行程自己的封存讀取器。"""
+    global _worker_archive, _worker_db_name
+    from crawler.database.connection import _engines
+
+    for engine in _engines.values():
+        engine.dispose(close=False)
+    _engines.clear()
+    _worker_archive = RawArchive(archive_dir)
+    _worker_db_name = db_name
+
+
+def _reparse_chunk(groups: Sequence[Tuple[str, str, Dict[str, ArchiveEntry]]]) -> Tuple[List[JobPydantic], int]:
+    """回傳 (解析成功的職缺, 失敗筆數)。"""
+    jobs: List[JobPydantic] = []
+    failed = 0
+    for platform, source_job_id, entries in groups:
+        try:
+            job = REPARSERS[platform](_worker_archive, entries, _worker_db_name)
+        except Exception as e:
+            logger.warning("Failed to reparse archived payload.", platform=platform, job_id=source_job_id, error=str(e))
+            job = None
+        if job:
+            jobs.append(job)
+        else:
+            failed += 1
+    return jobs, failed
+
+
+def _iter_chunks(groups: Iterator, chunk_size: int) -> Iterator[list]:
+    chunk = []
+    for group in groups:
+        if group[0] not in REPARSERS:
+            continue
+        chunk.append(group)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def reparse_archive(
+    platform: Optional[str] = None,
+    since: Optional[datetime] = None,
+    source_job_ids: Optional[Sequence[str]] = None,
+    workers: Optional[int] = None,
+    chunk_size: int = 200,
+    batch_size: int = 2000,
+    db_name: Optional[str] = None,
+    archive_dir: str = RAW_ARCHIVE_DIR,
+) -> Dict[str, int]:
+    """
+    以各 (platform, source_job_id) 最新的封存內容重新解析並 upsert，回傳 {"jobs": 職缺數, "upserted": 寫入數, "failed": 失敗數}。
+    db_name 為 None 時寫入 MYSQL_DATABASE。
+    """
+    if not archive_dir:
+        raise ValueError("RAW_ARCHIVE_DIR is not configured.")
+    workers = workers or os.cpu_count() or 1
+    archive = RawArchive(archive_dir)
+    stats = {"jobs": 0, "upserted": 0, "failed": 0}
+    pending_jobs: List[JobPydantic] = []
+
+    def flush() -> None:
+        if pending_jobs:
+            upsert_jobs(pending_jobs, db_name=db_name)
+            stats["upserted"] += len(pending_jobs)
+            pending_jobs.clear()
+
+    try:
+        groups = archive.iter_latest(platform=platform, since=since, source_job_ids=source_job_ids)
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_reparse_worker, initargs=(archive_dir, db_name)
+        ) as pool:
+            chunks = _iter_chunks(groups, chunk_size)
+            in_flight = deque()
+            for chunk in chunks:
+                stats["jobs"] += len(chunk)
+                in_flight.append(pool.submit(_reparse_chunk, chunk))
+                # 限制排隊中的區塊數，讓封存檔可以遠大於記憶體
+                if len(in_flight) >= workers * 2:
+                    jobs, failed = in_flight.popleft().result()
+                    pending_jobs.extend(jobs)
+                    stats["failed"] += failed
+                    if len(pending_jobs) >= batch_size:
+                        flush()
+            for future in in_flight:
+                jobs, failed = future.result()
+                pending_jobs.extend(jobs)
+                stats["failed"] += failed
+                if len(pending_jobs) >= batch_size:
+                    flush()
+            flush()
+    finally:
+        archive.close()
+
+    logger.info("Reparse from raw archive finished.", platform=platform, **stats)
+    return stats
+
+
+if __name__ == "__main__":
+    from crawler.logging_config import configure_logging
+
+    configure_logging()
+    parser = argparse.ArgumentParser(description="Re-run current parsers over archived raw payloads and upsert the results.")
+    parser.add_argument("--platform", choices=sorted(REPARSERS), default=None, help="Only reparse one platform.")
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None, help="Only jobs fetched at or after this time (ISO format, UTC if naive).")
+    parser.add_argument("--job-id", action="append", dest="job_ids", default=None, help="Only reparse this source_job_id (repeatable).")
+    parser.add_argument("--workers", type=int, default=None, help="Parser processes (defaults to CPU count).")
+    parser.add_argument("--chunk-size", type=int, default=200, help="Jobs per worker task.")
+    parser.add_argument("--batch-size", type=int, default=2000, help="Jobs per upsert batch.")
+    parser.add_argument("--db-name", type=str, default=None, help="Database name (defaults to MYSQL_DATABASE).")
+    args = parser.parse_args()
+
+    reparse_archive(
+        platform=args.platform,
+        since=args.since,
+        source_job_ids=args.job_ids,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        batch_size=args.batch_size,
+        db_name=args.db_name,
+    )
@@ -4,13 +4,54 @@ import re
 import os
 import structlog
 import argparse
+import threading
+
+from crawler.utils.skill_matcher import (
+    CompiledSkillMatcher,
+    SkillMatcher,
+    file_digest,
+    read_artifact_digest,
+)
 
 logger = structlog.get_logger(__name__)
 
 AMBIGUOUS_SKILLS = ["r"]
 
+SKILL_MASTER_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    'skill_data',
+    'generated_data',
+    'skill_master.json'
+)
+# --generate-kb 一併產生的二進位自動機檔，與 skill_master.json 放在同一目錄
+SKILL_MATCHER_ARTIFACT_NAME = 'skill_matcher.bin'
+
+# 行程內共用的 SkillMatcher，依 prefer_artifact 各保留一個；以技能主檔的 (路徑, mtime, size) 作為版本，
+# 檔案更新後下次呼叫會自動重建
+_skill_matchers = {}
+_skill_matcher_lock = threading.Lock()
+
 # ... (AMBIGUOUS_SKILLS_CONTEXT remains the same) ...
 
+def _parse_hard_skill_names(value):
+    """
+    Parses one hardSkillList cell (a Python-style list of {'id', 'name'} dicts) into normalized skill names.
+    Malformed cells yield no skills; a malformed entry ends the cell, keeping the names before it.
+    """
+    try:
+        skills = json.loads(value.replace("'", '"'))
+    except (json.JSONDecodeError, AttributeError):
+        return []
+    names = []
+    for skill in skills:
+        try:
+            skill_name = skill.get('name').strip().lower()
+        except (KeyError, AttributeError):
+            break
+        if skill_name:
+            names.append(skill_name)
+    return names
+
 def generate_knowledge_base_for_powerbi(topic_tree_path, csv_path, category_source_path, major_categories_path, output_dir):
     """
     Generates two files for Power BI: a master skill table and a skill-to-job mapping table.
@@ -42,35 +83,22 @@ def generate_knowledge_base_for_powerbi(topic_tree_path, csv_path, category_sour
     l1_id_to_name_map = df_major_cat.set_index('source_category_id')['source_category_name'].to_dict()
     l2_id_to_name_map = df_cat_source.set_index('source_category_id')['source_category_name'].to_dict()
 
-    all_skills_data = []
-    platform_104_skill_job_map = {} # To store skill to 104 job category IDs
-
-    for _, row in df_skill_cat.iterrows():
-        try:
-            skills = json.loads(row['hardSkillList'].replace("'", '"'))
-            job_code = row['jobCode']
-            job_name = row['jobName']
-            
-            l2_id = l2_to_l1_map.get(job_code)
-            l1_id = l2_to_l1_map.get(l2_id)
-            l1_name = l1_id_to_name_map.get(l1_id, "")
-            l2_name = l2_id_to_name_map.get(l2_id, "")
-
-            for skill in skills:
-                skill_name = skill.get('name').strip().lower()
-                if skill_name:
-                    all_skills_data.append({
-                        "Skill_Name": skill_name,
-                        "L1_Category": l1_name,
-                        "L2_Category": l2_name,
-                        "L3_Category": job_name,
-                        "Source": "PLATFORM_104"
-                    })
-                    if skill_name not in platform_104_skill_job_map:
-                        platform_104_skill_job_map[skill_name] = []
-                    platform_104_skill_job_map[skill_name].append(job_code)
-        except (json.JSONDecodeError, KeyError, AttributeError):
-            continue
+    # Parse every hardSkillList once, then one row per (job, skill)
+    df_104 = df_skill_cat[['jobCode', 'jobName']].assign(
+        Skill_Name=df_skill_cat['hardSkillList'].map(_parse_hard_skill_names)
+    ).explode('Skill_Name').dropna(subset=['Skill_Name'])
+
+    l2_ids = df_104['jobCode'].map(l2_to_l1_map)
+    l1_ids = l2_ids.map(l2_to_l1_map)
+    df_104_skills = pd.DataFrame({
+        "Skill_Name": df_104['Skill_Name'],
+        "L1_Category": l1_ids.map(l1_id_to_name_map).fillna(""),
+        "L2_Category": l2_ids.map(l2_id_to_name_map).fillna(""),
+        "L3_Category": df_104['jobName'],
+        "Source": "PLATFORM_104",
+    })
+    # To store skill to 104 job category IDs
+    platform_104_skill_job_map = df_104.groupby('Skill_Name', sort=False)['jobCode'].agg(list).to_dict()
 
     # --- 3. Process Topic Tree Data ---
     logger.info("  - 正在處理 topic_tree 資料...")
@@ -94,16 +122,19 @@ def generate_knowledge_base_for_powerbi(topic_tree_path, csv_path, category_sour
 
     topic_tree_skills = []
     parse_topic_tree_recursively(topic_data, [], topic_tree_skills)
-    all_skills_data.extend(topic_tree_skills)
 
     # --- 4. Create and Save Master Skill Table ---
     logger.info("  - 正在建立並儲存技能主檔...")
-    df_master = pd.DataFrame(all_skills_data)
+    df_master = pd.concat(
+        [df_104_skills, pd.DataFrame(topic_tree_skills, columns=df_104_skills.columns)], ignore_index=True
+    )
     # Prioritize topic_tree source
     df_master = df_master.sort_values('Source', ascending=False).drop_duplicates(subset=['Skill_Name'], keep='first')
     output_master_file = os.path.join(output_dir, "skill_master.json")
     df_master.to_json(output_master_file, orient='records', force_ascii=False, indent=2)
     logger.info(f"    -> 技能主檔已儲存至: {output_master_file}")
+    output_artifact_file = write_skill_matcher_artifact(output_master_file)
+    logger.info(f"    -> 技能比對器二進位檔已儲存至: {output_artifact_file}")
 
     # --- 5. Create and Save Skill-to-Job Mapping Table ---
     logger.info("  - 正在建立並儲存技能-職務關聯表...")
@@ -111,18 +142,13 @@ def generate_knowledge_base_for_powerbi(topic_tree_path, csv_path, category_sour
     # Get all unique skills from the master skill table
     all_unique_skills = df_master['Skill_Name'].unique()
 
-    skill_to_job_mapping_list = []
-    for skill_name in all_unique_skills:
-        mapping_entry = {
-            "Skill_Name": skill_name,
-            "PLATFORM_104": platform_104_skill_job_map.get(skill_name, []),
-            "PLATFORM_1111": [], # Placeholder for future data
-            "PLATFORM_YES123": [], # Placeholder for future data
-            "PLATFORM_CAKERESUME": [] # Placeholder for future data
-        }
-        skill_to_job_mapping_list.append(mapping_entry)
-
-    df_mapping = pd.DataFrame(skill_to_job_mapping_list)
+    df_mapping = pd.DataFrame({
+        "Skill_Name": all_unique_skills,
+        "PLATFORM_104": [platform_104_skill_job_map.get(skill_name, []) for skill_name in all_unique_skills],
+        "PLATFORM_1111": [[] for _ in all_unique_skills], # Placeholder for future data
+        "PLATFORM_YES123": [[] for _ in all_unique_skills], # Placeholder for future data
+        "PLATFORM_CAKERESUME": [[] for _ in all_unique_skills], # Placeholder for future data
+    })
     output_mapping_file = os.path.join(output_dir, "skill_to_job_mapping.json")
     df_mapping.to_json(output_mapping_file, orient='records', force_ascii=False, indent=2)
     logger.info(f"    -> 技能-職務關聯表已儲存至: {output_mapping_file}")
@@ -136,25 +162,44 @@ def create_enhanced_knowledge_base(topic_tree_path, csv_path, category_source_pa
     logger.info("Creating enhanced knowledge base (placeholder)...")
     pass
 
-def preprocess_skills_for_extraction(skill_master_df):
+def _sort_skills_for_matching(skill_master_df):
     """
-    Preprocesses the skill master DataFrame to create pre-compiled regex patterns for efficient skill extraction.
-    Returns a list of (compiled_regex, original_skill_name) tuples.
+    Returns the skill master DataFrame sorted by skill name length (descending),
+    or None if the DataFrame is empty or lacks a 'Skill_Name' column.
+    Both the regex patterns and SkillMatcher use this order, so their outputs are identical.
     """
     if skill_master_df.empty:
-        return []
+        return None
 
     # Ensure 'Skill_Name' column exists
     if 'Skill_Name' not in skill_master_df.columns:
         logger.error("skill_master_df must contain a 'Skill_Name' column.")
-        return []
+        return None
 
     skill_master_df['Skill_Name_Lower'] = skill_master_df['Skill_Name'].str.lower()
     # Sort skills by length in descending order to prioritize longer, more specific matches
-    sorted_skills_for_matching = skill_master_df.sort_values(
+    return skill_master_df.sort_values(
         by='Skill_Name_Lower', key=lambda x: x.str.len(), ascending=False
     )
 
+def build_skill_matcher(skill_master_df, use_c_extension=None):
+    """
+    Builds a SkillMatcher (single-pass Aho-Corasick) from the skill master DataFrame.
+    use_c_extension=None picks pyahocorasick when it is installed.
+    """
+    sorted_skills_for_matching = _sort_skills_for_matching(skill_master_df)
+    skill_names = sorted_skills_for_matching['Skill_Name'].tolist() if sorted_skills_for_matching is not None else []
+    return SkillMatcher(skill_names, AMBIGUOUS_SKILLS, use_c_extension=use_c_extension)
+
+def preprocess_skills_for_extraction(skill_master_df):
+    """
+    Preprocesses the skill master DataFrame to create pre-compiled regex patterns for efficient skill extraction.
+    Returns a list of (compiled_regex, original_skill_name) tuples.
+    """
+    sorted_skills_for_matching = _sort_skills_for_matching(skill_master_df)
+    if sorted_skills_for_matching is None:
+        return []
+
     compiled_skill_patterns = []
     for _, row in sorted_skills_for_matching.iterrows():
         skill_name_lower = row['Skill_Name_Lower']
@@ -181,12 +226,7 @@ def get_compiled_skill_patterns():
     """
     Loads the skill master JSON and preprocesses it to return compiled regex patterns.
     """
-    skill_master_path = os.path.join(
-        os.path.dirname(os.path.abspath(__file__)),
-        'skill_data',
-        'generated_data',
-        'skill_master.json'
-    )
+    skill_master_path = SKILL_MASTER_PATH
 
     if not os.path.exists(skill_master_path):
         logger.error(f"錯誤：找不到技能主檔。請先執行 `python3 -m skill_tool.run_skill_extraction --generate-kb` 來生成 {skill_master_path}")
@@ -200,10 +240,100 @@ def get_compiled_skill_patterns():
         logger.error(f"載入技能主檔或編譯技能模式失敗: {e}")
         return []
 
+def _skill_master_version(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return (path, None)
+    return (path, stat.st_mtime_ns, stat.st_size)
+
+def write_skill_matcher_artifact(skill_master_path):
+    """
+    Compiles skill_master.json into the mmap-able matcher artifact next to it and returns its path.
+    The artifact records the SHA-256 of skill_master.json so stale artifacts are detected on load.
+    """
+    artifact_path = os.path.join(os.path.dirname(skill_master_path), SKILL_MATCHER_ARTIFACT_NAME)
+    matcher = build_skill_matcher(pd.read_json(skill_master_path), use_c_extension=False)
+    matcher.save(artifact_path, source_digest=file_digest(skill_master_path))
+    return artifact_path
+
+def _load_skill_matcher_artifact(skill_master_path):
+    """
+    Memory-maps the compiled artifact if it matches the current skill_master.json, else returns None.
+    """
+    artifact_path = os.path.join(os.path.dirname(skill_master_path), SKILL_MATCHER_ARTIFACT_NAME)
+    artifact_digest = read_artifact_digest(artifact_path)
+    if artifact_digest is None:
+        return None
+    if artifact_digest != file_digest(skill_master_path):
+        logger.warning(f"技能比對器二進位檔已過期，改由技能主檔重建。請重新執行 --generate-kb: {artifact_path}")
+        return None
+    try:
+        return CompiledSkillMatcher(artifact_path)
+    except (OSError, ValueError) as e:
+        logger.warning(f"載入技能比對器二進位檔失敗，改由技能主檔重建: {e}")
+        return None
+
+def get_skill_matcher(skill_master_path=SKILL_MASTER_PATH, prefer_artifact=False):
+    """
+    Returns the process-wide SkillMatcher, building it on first use.
+    prefer_artifact=True memory-maps the compiled artifact written by --generate-kb: near-instant startup and
+    pages shared across prefork children, but each extract() is about 3x slower than the in-memory automaton.
+    Use it only where startup time matters (Celery worker preload and the inline crawl path);
+    extraction-heavy callers such as the batch skill extraction stage keep the default in-memory matcher.
+    Falls back to building from skill_master.json when the artifact is missing or stale.
+    Thread-safe; reloaded when skill_master.json's mtime/size changes.
+    If the file is missing or unreadable, returns an empty matcher (extracts nothing).
+    """
+    version = _skill_master_version(skill_master_path)
+    cached = _skill_matchers.get(prefer_artifact)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    with _skill_matcher_lock:
+        cached = _skill_matchers.get(prefer_artifact)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        if version[1] is None:
+            logger.error(f"錯誤：找不到技能主檔，將跳過技能提取。請先執行 `python3 -m crawler.utils.run_skill_extraction --generate-kb` 來生成 {skill_master_path}")
+            matcher = SkillMatcher([], AMBIGUOUS_SKILLS)
+        else:
+            try:
+                matcher = (prefer_artifact and _load_skill_matcher_artifact(skill_master_path)) or build_skill_matcher(pd.read_json(skill_master_path))
+                logger.info(f"已載入技能主檔: {skill_master_path}", skills=len(matcher), backend=matcher.backend)
+            except Exception as e:
+                logger.error(f"載入技能主檔或建立技能比對器失敗: {e}")
+                matcher = SkillMatcher([], AMBIGUOUS_SKILLS)
+
+        _skill_matchers[prefer_artifact] = (version, matcher)
+        return matcher
+
+_kb_version_cache = {}
+
+def get_skill_kb_version(skill_master_path=SKILL_MASTER_PATH):
+    """
+    Returns the knowledge-base version (SHA-256 hex of skill_master.json), or None if the file is missing.
+    Cached by the file's mtime/size, so it is only re-hashed after the KB changes.
+    """
+    version = _skill_master_version(skill_master_path)
+    if version[1] is None:
+        return None
+    digest = _kb_version_cache.get(version)
+    if digest is None:
+        digest = file_digest(skill_master_path).hex()
+        _kb_version_cache.clear()
+        _kb_version_cache[version] = digest
+    return digest
+
 def extract_skills_precise(text, compiled_skill_patterns):
     """
-    Extracts skills from a given text using pre-compiled regex patterns.
+    Extracts skills from a given text using pre-compiled regex patterns,
+    or a SkillMatcher (same results, one pass over the text).
     """
+    if isinstance(compiled_skill_patterns, (SkillMatcher, CompiledSkillMatcher)):
+        return compiled_skill_patterns.extract(text)
+
     extracted_skills = []
     if not isinstance(text, str) or not compiled_skill_patterns:
         return extracted_skills
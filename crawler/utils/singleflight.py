@@ -0,0 +1,134 @@
+import functools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import structlog
+
+from crawler.config import HTTP_RESPONSE_CACHE_TTL_SECONDS, HTTP_RESPONSE_CACHE_MAX_ENTRIES
+
+logger = structlog.get_logger(__name__)
+
+_MISSING = object()
+
+
+class _Call:
+    __slots__ = ("done", "result", "exc")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.exc: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    合併同一個 key 的並行呼叫：第一個呼叫者實際執行 fn，其餘同時到達的呼叫者
+    等待並共用同一份結果 (或同一個例外)。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Tuple[Any, bool]:
+        """回傳 (結果, 是否與其他呼叫共用)。"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.exc is not None:
+                raise call.exc
+            return call.result, True
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as exc:
+            call.exc = exc
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result, False
+
+
+class TTLCache:
+    """執行緒安全、有筆數上限的 LRU 快取，每筆資料在 ttl_seconds 後過期。"""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def coalesced(
+    ttl_seconds: float = HTTP_RESPONSE_CACHE_TTL_SECONDS,
+    max_entries: int = HTTP_RESPONSE_CACHE_MAX_ENTRIES,
+    key: Optional[Callable[..., Hashable]] = None,
+):
+    """
+    裝飾 HTTP 抓取函式：並行的相同請求只會發出一次 (singleflight)，
+    成功 (非 None) 的回應再以短 TTL 快取，讓緊接著的重複請求也不必再打網路。
+    key 預設為第一個位置參數 (通常是 URL)；失敗與 None 結果不會被快取。
+    """
+
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        flight = SingleFlight()
+        cache = TTLCache(ttl_seconds, max_entries)
+        make_key = key or (lambda *args, **kwargs: args[0])
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            cache_key = make_key(*args, **kwargs)
+            cached = cache.get(cache_key, _MISSING)
+            if cached is not _MISSING:
+                logger.debug("Response served from cache.", function=fn.__name__, key=cache_key)
+                return cached
+
+            result, shared = flight.do(cache_key, fn, *args, **kwargs)
+            if shared:
+                logger.debug("Response shared with in-flight request.", function=fn.__name__, key=cache_key)
+            elif result is not None and ttl_seconds > 0:
+                cache.set(cache_key, result)
+            return result
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
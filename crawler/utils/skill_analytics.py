@@ -0,0 +1,142 @@
+"""
+技能共現矩陣與每週趨勢的增量建置。
+
+tb_skill_cooccurrence：(技能, 職務類別, 月份, 另一技能) -> 同時要求兩個技能的職缺數
+tb_skill_weekly_counts：(技能, 職務類別, 平台, 週) -> 職缺數
+職務類別 "*" 為不分類別的總計。職缺計入其被觀察到 (tb_job_observations) 的每個月份與週。
+
+寫入技能、類別標籤或觀察記錄的 repository 函式會把職缺標記在 tb_skill_analytics_dirty_jobs；
+本模組只處理這些職缺：依 tb_skill_analytics_snapshots 中的上次內容算出增減量，再整批累加進分析表，
+因此儀表板查詢只需主鍵查找，不必對 tb_job_skills 做自我連接。
+
+    python -m crawler.utils.skill_analytics [--db-name NAME] [--batch-size N]
+    python -m crawler.utils.skill_analytics --rebuild     # 清空並由現有資料全量重建
+
+平常由 crawler/utils/skill_pipeline.py 在批次技能提取之後定期執行。
+"""
+import argparse
+from collections import Counter
+from datetime import date, timedelta
+from itertools import permutations
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+import structlog
+
+from crawler.config import SKILL_ANALYTICS_BATCH_SIZE
+from crawler.database.repository import (
+    SKILL_ANALYTICS_ALL_CATEGORIES,
+    apply_skill_analytics_deltas,
+    get_skill_analytics_dirty_jobs,
+    get_skill_analytics_inputs,
+    get_skill_analytics_snapshots,
+    prune_skill_analytics,
+    reset_skill_analytics,
+)
+
+logger = structlog.get_logger(__name__)
+
+
+def build_contribution(job_input: Dict[str, Any]) -> Dict[str, Any]:
+    """把職缺現況整理成可存成 JSON 的快照：平台、技能、類別 (含 "*")、週一日期、月初日期。"""
+    dates: Iterable[date] = job_input["dates"]
+    return {
+        "platform": job_input["platform"].value,
+        "skills": sorted(job_input["skills"]),
+        "categories": sorted(set(job_input["categories"]) | {SKILL_ANALYTICS_ALL_CATEGORIES}),
+        "weeks": sorted({(d - timedelta(days=d.weekday())).isoformat() for d in dates}),
+        "months": sorted({d.replace(day=1).isoformat() for d in dates}),
+    }
+
+
+def contribution_keys(
+    contribution: Optional[Dict[str, Any]],
+) -> Tuple[Set[Tuple[str, str, date, str]], Set[Tuple[str, str, str, date]]]:
+    """一個職缺對兩張分析表貢獻的鍵 (每個鍵計 1)。"""
+    if not contribution or not contribution["skills"]:
+        return set(), set()
+    skills = contribution["skills"]
+    categories = contribution["categories"]
+    platform = contribution["platform"]
+    months = [date.fromisoformat(m) for m in contribution["months"]]
+    weeks = [date.fromisoformat(w) for w in contribution["weeks"]]
+
+    pairs = list(permutations(skills, 2))
+    cooccurrence = {
+        (skill, category, month, other)
+        for category in categories
+        for month in months
+        for skill, other in pairs
+    }
+    weekly = {
+        (skill, category, platform, week)
+        for category in categories
+        for week in weeks
+        for skill in skills
+    }
+    return cooccurrence, weekly
+
+
+def _accumulate(deltas: Counter, old_keys: Set, new_keys: Set) -> None:
+    for key in new_keys - old_keys:
+        deltas[key] += 1
+    for key in old_keys - new_keys:
+        deltas[key] -= 1
+
+
+def run_skill_analytics_update(db_name: Optional[str] = None, batch_size: int = SKILL_ANALYTICS_BATCH_SIZE) -> int:
+    """處理所有待處理的職缺，回傳處理筆數。"""
+    processed = 0
+    after_job_id = None
+    while True:
+        dirty = get_skill_analytics_dirty_jobs(batch_size, after_job_id=after_job_id, db_name=db_name)
+        if not dirty:
+            break
+        after_job_id = dirty[-1][0]
+        job_ids = [job_id for job_id, _ in dirty]
+
+        inputs = get_skill_analytics_inputs(job_ids, db_name=db_name)
+        previous = get_skill_analytics_snapshots(job_ids, db_name=db_name)
+
+        cooccurrence_deltas: Counter = Counter()
+        weekly_deltas: Counter = Counter()
+        snapshots: Dict[str, Optional[Dict[str, Any]]] = {}
+        for job_id in job_ids:
+            contribution = build_contribution(inputs[job_id]) if job_id in inputs else None
+            if contribution == previous.get(job_id):
+                continue
+            old_cooccurrence, old_weekly = contribution_keys(previous.get(job_id))
+            new_cooccurrence, new_weekly = contribution_keys(contribution)
+            _accumulate(cooccurrence_deltas, old_cooccurrence, new_cooccurrence)
+            _accumulate(weekly_deltas, old_weekly, new_weekly)
+            snapshots[job_id] = contribution
+
+        apply_skill_analytics_deltas(cooccurrence_deltas, weekly_deltas, snapshots, dirty, db_name=db_name)
+        processed += len(dirty)
+        logger.info(
+            "Skill analytics batch applied.",
+            batch=len(dirty),
+            changed=len(snapshots),
+            cooccurrence_updates=len(cooccurrence_deltas),
+            weekly_updates=len(weekly_deltas),
+            processed=processed,
+        )
+
+    if processed:
+        pruned = prune_skill_analytics(db_name=db_name)
+        logger.info("Skill analytics update finished.", processed=processed, pruned=pruned)
+    return processed
+
+
+if __name__ == "__main__":
+    from crawler.logging_config import configure_logging
+
+    configure_logging()
+    parser = argparse.ArgumentParser(description="Incrementally update skill co-occurrence and weekly trend tables.")
+    parser.add_argument("--db-name", type=str, default=None, help="Database name (defaults to MYSQL_DATABASE).")
+    parser.add_argument("--batch-size", type=int, default=SKILL_ANALYTICS_BATCH_SIZE)
+    parser.add_argument("--rebuild", action="store_true", help="Clear the analytics tables and rebuild them from all jobs.")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        reset_skill_analytics(db_name=args.db_name)
+    run_skill_analytics_update(db_name=args.db_name, batch_size=args.batch_size)
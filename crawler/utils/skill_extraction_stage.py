@@ -0,0 +1,312 @@
+"""
+批次技能提取階段。
+
+爬蟲在 SKILL_EXTRACTION_MODE=batch 時只寫入職缺 (含 description_hash)，不在爬取路徑上做 CPU 密集的技能比對；
+本模組從 tb_jobs 取出描述有變更、或以舊版技能庫提取過的職缺，分塊交給行程池比對，再整批寫回 tb_job_skills，
+並補上同一描述、skills 仍為 NULL 的 tb_job_observations。描述沒有變更的職缺再次被爬到時，
+insert_job_observations 直接沿用 tb_job_skills 的結果。
+
+技能主檔更新時不必全量重掃：與 tb_skill_kb_versions 中最後套用的快照比較，移除的技能直接刪除關聯，
+新增的技能只重掃倒排索引 (tb_job_description_tokens) 找到的候選職缺。
+
+    python -m crawler.utils.skill_extraction_stage [--db-name NAME] [--workers N]
+    python -m crawler.utils.skill_extraction_stage --kb-diff      # 只列出技能庫差異
+    python -m crawler.utils.skill_extraction_stage --reindex      # 重建所有職缺的倒排索引與技能
+
+平常由 crawler/utils/skill_pipeline.py 定期執行。
+"""
+import argparse
+import json
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import structlog
+
+from crawler.config import (
+    SKILL_EXTRACTION_MODE,
+    SKILL_EXTRACTION_BATCH_SIZE,
+    SKILL_EXTRACTION_CHUNK_SIZE,
+    SKILL_EXTRACTION_WORKERS,
+)
+from crawler.database.repository import (
+    delete_job_skills_for_skills,
+    get_job_ids_by_description_tokens,
+    get_jobs_for_skill_extraction,
+    get_jobs_pending_skill_extraction,
+    get_latest_skill_kb_version,
+    promote_skill_kb_version,
+    record_skill_kb_version,
+    replace_job_skills_bulk,
+    reset_skill_extraction_state,
+)
+from crawler.utils.run_skill_extraction import (
+    AMBIGUOUS_SKILLS,
+    SKILL_MASTER_PATH,
+    extract_skills_precise,
+    get_skill_kb_version,
+    get_skill_matcher,
+)
+from crawler.utils.skill_matcher import description_index_tokens, skill_index_tokens, skill_mode
+
+logger = structlog.get_logger(__name__)
+
+
+def extract_skills_for_crawl(description: Optional[str]) -> List[str]:
+    """
+    爬蟲解析職缺時呼叫。batch 模式下不提取 (回傳空串列)，由批次階段寫入技能與觀察記錄的 skills；
+    inline 模式維持舊行為，直接以共用的 SkillMatcher 提取 (與 worker 預先載入的 mmap 二進位檔相同)。
+    """
+    if SKILL_EXTRACTION_MODE != "inline" or not description:
+        return []
+    return extract_skills_precise(description, get_skill_matcher(prefer_artifact=True))
+
+
+def current_kb_entries(matcher) -> List[Tuple[str, int]]:
+    """技能庫快照：依比對順序的 (技能名稱, 比對模式)；模式變更 (例如 AMBIGUOUS_SKILLS 調整) 也視為差異。"""
+    ambiguous = {skill.lower() for skill in AMBIGUOUS_SKILLS}
+    return [(name, skill_mode(name, ambiguous)) for name in matcher.skill_names]
+
+
+@dataclass
+class SkillKbDiff:
+    old_version: Optional[str]
+    new_version: str
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "old_version": self.old_version,
+            "new_version": self.new_version,
+            "added": self.added,
+            "removed": self.removed,
+        }
+
+
+def diff_skill_kb(
+    old_version: Optional[str], old_entries: List[Tuple[str, int]], new_version: str, new_entries: List[Tuple[str, int]]
+) -> SkillKbDiff:
+    """
+    比較兩個技能庫快照。比對模式改變的技能同時列在 removed 與 added：
+    先刪除其所有關聯，再以新模式重掃候選職缺。
+    """
+    old_set, new_set = set(old_entries), set(new_entries)
+    return SkillKbDiff(
+        old_version=old_version,
+        new_version=new_version,
+        added=sorted({name for name, mode in new_set - old_set}),
+        removed=sorted({name for name, mode in old_set - new_set}),
+    )
+
+
+_worker_matcher = None
+
+
+def _init_extraction_worker(skill_master_path: str) -> None:
+    """
+    行程池 initializer：每個 worker 行程只建立一次技能比對器，之後的任務不再傳送或重建。
+    批次階段以比對為主，使用記憶體中的自動機 (每筆描述比 mmap 二進位檔快約 3 倍)，不使用 --generate-kb 的二進位檔。
+    """
+    global _worker_matcher
+    _worker_matcher = get_skill_matcher(skill_master_path)
+
+
+def _extract_chunk(rows: Sequence[Tuple[str, str, bool]]) -> List[Tuple[str, Tuple[str, ...], Optional[Tuple[str, ...]]]]:
+    # rows 為 (source_job_id, description, 是否重建 token)；回傳精簡的 tuple 以降低跨行程序列化成本
+    matcher = _worker_matcher or get_skill_matcher()
+    return [
+        (job_id, tuple(matcher.extract(description)), tuple(description_index_tokens(description)) if index_tokens else None)
+        for job_id, description, index_tokens in rows
+    ]
+
+
+def _submit_extraction(
+    pool: Optional[ProcessPoolExecutor], rows: Sequence[Tuple[str, str, str, Optional[str]]], chunk_size: int
+) -> Tuple[Dict[str, str], List[Future]]:
+    """
+    rows 為 (source_job_id, description, description_hash, skills_extracted_hash)；分塊送進行程池後立即返回，
+    讓呼叫端在 worker 計算時去讀下一批。描述自上次提取後有變更的職缺，同時重建其倒排索引 token。
+    沒有行程池時直接在本行程計算。
+    """
+    description_hashes: Dict[str, str] = {}
+    items = []
+    for job_id, description, description_hash, extracted_hash in rows:
+        description_hashes[job_id] = description_hash
+        items.append((job_id, description, extracted_hash != description_hash))
+
+    futures: List[Future] = []
+    for i in range(0, len(items), chunk_size):
+        chunk = items[i:i + chunk_size]
+        if pool:
+            futures.append(pool.submit(_extract_chunk, chunk))
+        else:
+            future: Future = Future()
+            future.set_result(_extract_chunk(chunk))
+            futures.append(future)
+    return description_hashes, futures
+
+
+def _write_extraction(submitted: Tuple[Dict[str, str], List[Future]], kb_version: str, db_name: Optional[str]) -> None:
+    description_hashes, futures = submitted
+    job_skills: Dict[str, Tuple[str, ...]] = {}
+    job_tokens: Dict[str, Set[str]] = {}
+    for future in futures:
+        for job_id, skills, tokens in future.result():
+            job_skills[job_id] = skills
+            if tokens is not None:
+                job_tokens[job_id] = set(tokens)
+    replace_job_skills_bulk(job_skills, description_hashes, kb_version, db_name=db_name, job_tokens=job_tokens)
+
+
+def _extract_and_write(
+    pool: Optional[ProcessPoolExecutor],
+    rows: Sequence[Tuple[str, str, str, Optional[str]]],
+    kb_version: str,
+    chunk_size: int,
+    db_name: Optional[str],
+) -> None:
+    _write_extraction(_submit_extraction(pool, rows, chunk_size), kb_version, db_name)
+
+
+def apply_skill_kb_diff(
+    pool: Optional[ProcessPoolExecutor],
+    diff: SkillKbDiff,
+    new_entries: List[Tuple[str, int]],
+    batch_size: int,
+    chunk_size: int,
+    db_name: Optional[str] = None,
+) -> bool:
+    """
+    套用技能庫差異：
+    1. 移除的技能以單一 DELETE 從 tb_job_skills 刪除
+    2. 新增的技能透過倒排索引找出候選職缺，只重掃這些職缺
+    3. 其餘以舊版本提取、描述未變的職缺直接標記為新版本
+    新增技能中有無法以 token 表示者時回傳 False，由呼叫端改為全量重掃。
+    """
+    modes = dict(new_entries)
+    candidate_ids: Set[str] = set()
+    for skill_name in diff.added:
+        tokens = skill_index_tokens(skill_name, modes[skill_name])
+        if tokens is None:
+            logger.warning("Added skill cannot be looked up in the token index; falling back to a full rescan.", skill=skill_name)
+            return False
+        candidate_ids |= get_job_ids_by_description_tokens(tokens, db_name=db_name)
+
+    deleted = delete_job_skills_for_skills(diff.removed, db_name=db_name)
+    logger.info("Removed skills deleted from tb_job_skills.", removed=len(diff.removed), deleted_rows=deleted)
+
+    candidate_list = sorted(candidate_ids)
+    for i in range(0, len(candidate_list), batch_size):
+        rows = get_jobs_for_skill_extraction(candidate_list[i:i + batch_size], db_name=db_name)
+        _extract_and_write(pool, rows, diff.new_version, chunk_size, db_name)
+    logger.info("Candidate jobs rescanned for added skills.", added=len(diff.added), candidates=len(candidate_list))
+
+    promoted = promote_skill_kb_version(diff.old_version, diff.new_version, db_name=db_name)
+    logger.info("Unaffected jobs promoted to the new KB version.", promoted=promoted)
+    return True
+
+
+def run_skill_extraction_stage(
+    db_name: Optional[str] = None,
+    batch_size: int = SKILL_EXTRACTION_BATCH_SIZE,
+    chunk_size: int = SKILL_EXTRACTION_CHUNK_SIZE,
+    workers: int = SKILL_EXTRACTION_WORKERS,
+) -> int:
+    """
+    先套用技能庫版本差異 (若技能主檔有更新)，再處理所有描述有變更的職缺，回傳處理筆數。
+    技能主檔不存在時不做任何事。
+    """
+    kb_version = get_skill_kb_version()
+    if kb_version is None:
+        logger.error("Skill master not found; skipping skill extraction stage.")
+        return 0
+
+    logger.info("Skill extraction stage started.", kb_version=kb_version[:12], workers=workers, batch_size=batch_size)
+    new_entries = current_kb_entries(get_skill_matcher())
+    processed = 0
+    pool = None
+    if workers > 1:
+        pool = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_extraction_worker, initargs=(SKILL_MASTER_PATH,)
+        )
+    try:
+        previous = get_latest_skill_kb_version(db_name=db_name)
+        if previous is not None and previous[0] != kb_version:
+            diff = diff_skill_kb(previous[0], previous[1], kb_version, new_entries)
+            logger.info(
+                "Skill KB changed.",
+                old_version=diff.old_version[:12],
+                new_version=kb_version[:12],
+                added=len(diff.added),
+                removed=len(diff.removed),
+                added_sample=diff.added[:20],
+                removed_sample=diff.removed[:20],
+            )
+            if not apply_skill_kb_diff(pool, diff, new_entries, batch_size, chunk_size, db_name=db_name):
+                # 差異無法以倒排索引套用：清除所有職缺的提取標記，由下面的迴圈全量重掃
+                reset = reset_skill_extraction_state(db_name=db_name)
+                logger.warning("Incremental skill KB update not possible; forcing a full rescan.", jobs_reset=reset)
+        if previous is None or previous[0] != kb_version:
+            record_skill_kb_version(kb_version, new_entries, db_name=db_name)
+
+        # 描述有變更、尚未提取、或以其他 (更舊) 版本提取過的職缺；以主鍵 keyset 分頁串流，
+        # 行程池計算這一批時先讀下一批，記憶體中最多只有兩批
+        rows = get_jobs_pending_skill_extraction(kb_version, limit=batch_size, db_name=db_name)
+        while rows:
+            submitted = _submit_extraction(pool, rows, chunk_size)
+            next_rows = []
+            if len(rows) == batch_size:
+                next_rows = get_jobs_pending_skill_extraction(
+                    kb_version, limit=batch_size, after_job_id=rows[-1][0], db_name=db_name
+                )
+            _write_extraction(submitted, kb_version, db_name)
+            processed += len(rows)
+            logger.info("Skill extraction batch written.", batch=len(rows), processed=processed)
+            rows = next_rows
+    finally:
+        if pool:
+            pool.shutdown()
+
+    logger.info("Skill extraction stage finished.", processed=processed, kb_version=kb_version[:12])
+    return processed
+
+
+def report_skill_kb_diff(db_name: Optional[str] = None) -> Optional[SkillKbDiff]:
+    """回傳目前技能主檔與最後一次套用版本的差異 (不寫入資料庫)；技能主檔不存在時回傳 None。"""
+    kb_version = get_skill_kb_version()
+    if kb_version is None:
+        return None
+    new_entries = current_kb_entries(get_skill_matcher())
+    previous = get_latest_skill_kb_version(db_name=db_name)
+    if previous is None:
+        return diff_skill_kb(None, [], kb_version, new_entries)
+    return diff_skill_kb(previous[0], previous[1], kb_version, new_entries)
+
+
+if __name__ == "__main__":
+    from crawler.logging_config import configure_logging
+
+    configure_logging()
+    parser = argparse.ArgumentParser(description="Extract skills for new or changed job descriptions in tb_jobs.")
+    parser.add_argument("--db-name", type=str, default=None, help="Database name (defaults to MYSQL_DATABASE).")
+    parser.add_argument("--workers", type=int, default=SKILL_EXTRACTION_WORKERS)
+    parser.add_argument("--batch-size", type=int, default=SKILL_EXTRACTION_BATCH_SIZE)
+    parser.add_argument("--chunk-size", type=int, default=SKILL_EXTRACTION_CHUNK_SIZE)
+    parser.add_argument("--kb-diff", action="store_true", help="Only print the diff between skill_master.json and the last applied KB version.")
+    parser.add_argument("--reindex", action="store_true", help="Re-extract skills and rebuild the token index for every job.")
+    args = parser.parse_args()
+
+    if args.kb_diff:
+        diff = report_skill_kb_diff(db_name=args.db_name)
+        print(json.dumps(diff.as_dict() if diff else None, ensure_ascii=False, indent=2))
+        raise SystemExit(0)
+    if args.reindex:
+        reset_skill_extraction_state(db_name=args.db_name)
+
+    run_skill_extraction_stage(
+        db_name=args.db_name,
+        batch_size=args.batch_size,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+    )
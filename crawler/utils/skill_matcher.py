@@ -0,0 +1,404 @@
+r"""
+以 Aho-Corasick 自動機一次掃描描述文字，找出所有技能。
+
+語意與 run_skill_extraction.extract_skills_precise 的逐技能 regex 迴圈相同：
+- 英文技能：等同 r'\b' + skill + r'\b' (Python re 的 unicode 單字邊界)
+- 含中文的技能：單純子字串比對
+- AMBIGUOUS_SKILLS：前後不可緊鄰 ASCII 英數字 (?<![a-zA-Z0-9]) ... (?![a-zA-Z0-9])
+- 回傳順序依建立時傳入的技能順序 (長度由長到短)，並去除重複
+
+有安裝 pyahocorasick (`import ahocorasick`) 時使用其 C 實作，否則使用純 Python 自動機。
+
+SkillMatcher.save() 會把自動機寫成精簡的二進位檔 (CSR 陣列)，CompiledSkillMatcher 以 mmap
+直接在檔案上比對，啟動時不需重建；Celery prefork 的子行程也共用同一份 page cache。
+"""
+import hashlib
+import mmap
+import os
+import re
+import struct
+import sys
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+try:
+    import ahocorasick  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    ahocorasick = None
+
+# 比對模式
+MODE_WORD = 0       # \b...\b
+MODE_SUBSTRING = 1  # 中文技能
+MODE_ASCII = 2      # 模糊技能，ASCII 英數字邊界
+
+# 每個 pattern 對應的規則：(技能在排序中的位置, 比對模式)
+_Rule = Tuple[int, int]
+
+
+def is_cjk_skill(skill_name: str) -> bool:
+    return any('\u4e00' <= char <= '\u9fff' for char in skill_name)
+
+
+def skill_mode(skill_name: str, ambiguous: Set[str]) -> int:
+    """技能的比對模式；ambiguous 為小寫的 AMBIGUOUS_SKILLS。"""
+    if is_cjk_skill(skill_name):
+        return MODE_SUBSTRING
+    if skill_name.lower() in ambiguous:
+        return MODE_ASCII
+    return MODE_WORD
+
+
+# --- 描述的倒排索引 token (tb_job_description_tokens) ---
+# 目的：技能庫新增技能時，只重掃「可能」含有該技能的職缺。索引必須是超集合：
+# - MODE_WORD 技能受 \b 限制，其中每一段 \w+ 必定與描述中某一段完整的 \w+ 相同 (兩者皆不含中文字)
+# - MODE_SUBSTRING 技能的每個相鄰中文字 bigram 必定出現在描述的中文片段中
+# 無法以 token 表示的技能 (模糊技能、單一中文字、超長 token) 回傳 None，呼叫端改為全量重掃。
+INDEX_TOKEN_MAX_LENGTH = 64
+_WORD_RUN_RE = re.compile(r"\w+")
+_CJK_RUN_RE = re.compile("[\u4e00-\u9fff]+")
+
+
+def description_index_tokens(text: str) -> Set[str]:
+    text_lower = text.lower()
+    tokens = {
+        run for run in _WORD_RUN_RE.findall(text_lower)
+        if len(run) <= INDEX_TOKEN_MAX_LENGTH and not _CJK_RUN_RE.search(run)
+    }
+    for run in _CJK_RUN_RE.findall(text_lower):
+        tokens.update(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def skill_index_tokens(skill_name: str, mode: int) -> Optional[Set[str]]:
+    key = skill_name.lower()
+    if mode == MODE_WORD:
+        runs = set(_WORD_RUN_RE.findall(key))
+        if not runs or any(len(run) > INDEX_TOKEN_MAX_LENGTH for run in runs):
+            return None
+        return runs
+    if mode == MODE_SUBSTRING:
+        bigrams = {run[i:i + 2] for run in _CJK_RUN_RE.findall(key) for i in range(len(run) - 1)}
+        return bigrams or None
+    return None
+
+
+def _is_word_char(char: str) -> bool:
+    # 與 Python re 在 str 上的 \w 相同
+    return char.isalnum() or char == '_'
+
+
+def _is_ascii_alnum(char: str) -> bool:
+    return char.isascii() and char.isalnum()
+
+
+class _PyAutomaton:
+    """純 Python 的 Aho-Corasick 自動機，介面比照 ahocorasick.Automaton 的 add_word/make_automaton/iter。"""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[list] = [[]]
+
+    def add_word(self, key: str, value) -> None:
+        state = 0
+        for char in key:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[state][char] = next_state
+            state = next_state
+        self._out[state].append(value)
+
+    def make_automaton(self) -> None:
+        goto, fail, out = self._goto, self._fail, self._out
+        queue = list(goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                f = fail[state]
+                while f and char not in goto[f]:
+                    f = fail[f]
+                fail[next_state] = goto[f].get(char, 0)
+                # 合併後綴節點的輸出，掃描時不必再沿 fail 鏈收集
+                if out[fail[next_state]]:
+                    out[next_state] = out[next_state] + out[fail[next_state]]
+
+    def iter(self, text: str) -> Iterator[Tuple[int, object]]:
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                for value in out[state]:
+                    yield index, value
+
+
+def _collect_matches(text_lower: str, hits: Iterable[Tuple[int, int, Sequence[_Rule]]]) -> set:
+    """依各技能的比對模式檢查每個命中位置的邊界，回傳成立的技能順序編號。"""
+    text_len = len(text_lower)
+    found = set()
+    for end, length, rules in hits:
+        start = end - length + 1
+        prev_char = text_lower[start - 1] if start > 0 else ''
+        next_char = text_lower[end + 1] if end + 1 < text_len else ''
+        for order, mode in rules:
+            if order in found:
+                continue
+            if mode == MODE_WORD:
+                first_is_word = _is_word_char(text_lower[start])
+                last_is_word = _is_word_char(text_lower[end])
+                if (prev_char != '' and _is_word_char(prev_char)) == first_is_word:
+                    continue
+                if (next_char != '' and _is_word_char(next_char)) == last_is_word:
+                    continue
+            elif mode == MODE_ASCII:
+                if (prev_char and _is_ascii_alnum(prev_char)) or (next_char and _is_ascii_alnum(next_char)):
+                    continue
+            found.add(order)
+    return found
+
+
+class SkillMatcher:
+    """
+    以單次掃描找出文字中的所有技能。skill_names 的順序即為輸出順序，
+    呼叫端應先依長度由長到短排序 (見 run_skill_extraction.build_skill_matcher)。
+    """
+
+    def __init__(self, skill_names: Sequence[str], ambiguous_skills: Iterable[str] = (), use_c_extension: Optional[bool] = None):
+        ambiguous = {skill.lower() for skill in ambiguous_skills}
+        if use_c_extension is None:
+            use_c_extension = ahocorasick is not None
+        elif use_c_extension and ahocorasick is None:
+            raise ImportError("pyahocorasick is not installed.")
+
+        self.skill_names: List[str] = list(skill_names)
+        self.backend = "pyahocorasick" if use_c_extension else "python"
+
+        patterns: Dict[str, List[_Rule]] = {}
+        for order, skill_name in enumerate(self.skill_names):
+            key = skill_name.lower()
+            if not key:
+                continue
+            patterns.setdefault(key, []).append((order, skill_mode(skill_name, ambiguous)))
+        self._patterns = patterns
+
+        automaton = ahocorasick.Automaton() if use_c_extension else _PyAutomaton()
+        for key, rules in patterns.items():
+            automaton.add_word(key, (len(key), tuple(rules)))
+        if patterns:
+            automaton.make_automaton()
+        self._automaton = automaton if patterns else None
+
+    def __len__(self) -> int:
+        return len(self.skill_names)
+
+    def extract(self, text: str) -> List[str]:
+        if not isinstance(text, str) or self._automaton is None:
+            return []
+
+        text_lower = text.lower()
+        hits = ((end, length, rules) for end, (length, rules) in self._automaton.iter(text_lower))
+        found = _collect_matches(text_lower, hits)
+        names = self.skill_names
+        return list(dict.fromkeys(names[order] for order in sorted(found)))
+
+    def save(self, path: str, source_digest: bytes = b"") -> None:
+        """
+        將自動機寫成 CompiledSkillMatcher 可直接 mmap 的二進位檔。
+        source_digest 為技能主檔內容的 SHA-256，載入時用來判斷檔案是否過期。
+        先寫入暫存檔再 rename，讀取中的 worker 不會看到寫到一半的檔案。
+        """
+        automaton = _PyAutomaton()
+        pattern_keys = list(self._patterns)
+        for pattern_id, key in enumerate(pattern_keys):
+            automaton.add_word(key, pattern_id)
+        automaton.make_automaton()
+
+        edge_offsets, edge_chars, edge_targets = [0], [], []
+        for transitions in automaton._goto:
+            for char, target in sorted(transitions.items(), key=lambda item: ord(item[0])):
+                edge_chars.append(ord(char))
+                edge_targets.append(target)
+            edge_offsets.append(len(edge_chars))
+
+        out_offsets, out_patterns = [0], []
+        for outputs in automaton._out:
+            out_patterns.extend(outputs)
+            out_offsets.append(len(out_patterns))
+
+        pattern_lengths, rule_offsets, rule_orders, rule_modes = [], [0], [], []
+        for key in pattern_keys:
+            pattern_lengths.append(len(key))
+            for order, mode in self._patterns[key]:
+                rule_orders.append(order)
+                rule_modes.append(mode)
+            rule_offsets.append(len(rule_orders))
+
+        encoded_names = [name.encode("utf-8") for name in self.skill_names]
+        name_offsets = [0]
+        for encoded in encoded_names:
+            name_offsets.append(name_offsets[-1] + len(encoded))
+
+        sections = [
+            _u32(edge_offsets), _u32(edge_chars), _u32(edge_targets), _u32(automaton._fail),
+            _u32(out_offsets), _u32(out_patterns),
+            _u32(pattern_lengths), _u32(rule_offsets), _u32(rule_orders), _u32(rule_modes),
+            _u32(name_offsets), b"".join(encoded_names),
+        ]
+        header = _HEADER.pack(
+            _MAGIC, ARTIFACT_FORMAT_VERSION, 1 if sys.byteorder == "little" else 0,
+            len(sections), source_digest.ljust(32, b"\0")[:32],
+        )
+        offset = _aligned(_HEADER.size + _SECTION.size * len(sections))
+        table, body = [], []
+        for data in sections:
+            table.append(_SECTION.pack(offset, len(data)))
+            padded = data + b"\0" * (_aligned(len(data)) - len(data))
+            body.append(padded)
+            offset += len(padded)
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(header)
+            f.write(b"".join(table))
+            f.write(b"\0" * (_aligned(f.tell()) - f.tell()))
+            for padded in body:
+                f.write(padded)
+        os.replace(tmp_path, path)
+
+
+# --- 二進位自動機檔 ---
+# 版本號在格式變更時遞增；舊版本的檔案會被視為過期而改由 skill_master.json 重建。
+ARTIFACT_FORMAT_VERSION = 1
+_MAGIC = b"SKAC"
+# magic, 格式版本, 是否 little-endian, 區段數, 技能主檔 SHA-256
+_HEADER = struct.Struct("<4sHBB32s")
+# 每個區段: 起始位移, 長度 (bytes)
+_SECTION = struct.Struct("<QQ")
+_SECTION_COUNT = 12
+
+
+def _aligned(size: int) -> int:
+    return (size + 7) & ~7
+
+
+def _u32(values: Sequence[int]) -> bytes:
+    return struct.pack(f"={len(values)}I", *values)
+
+
+def file_digest(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).digest()
+
+
+def read_artifact_digest(path: str) -> Optional[bytes]:
+    """讀取二進位檔記錄的技能主檔 SHA-256；檔案不存在、格式或位元組順序不符時回傳 None。"""
+    try:
+        with open(path, "rb") as f:
+            header = f.read(_HEADER.size)
+    except OSError:
+        return None
+    if len(header) != _HEADER.size:
+        return None
+    magic, version, little_endian, section_count, digest = _HEADER.unpack(header)
+    if (
+        magic != _MAGIC
+        or version != ARTIFACT_FORMAT_VERSION
+        or bool(little_endian) != (sys.byteorder == "little")
+        or section_count != _SECTION_COUNT
+    ):
+        return None
+    return digest
+
+
+class CompiledSkillMatcher:
+    """
+    以 mmap 載入 SkillMatcher.save() 產生的二進位檔，輸出與 SkillMatcher 相同。
+    轉移表以 CSR 格式存放 (每個節點的邊依字元碼排序，以二分搜尋查找)，
+    只有根節點的轉移會在載入時展開成 dict。
+    """
+
+    backend = "compiled"
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buffer = memoryview(self._mmap)
+        magic, version, little_endian, section_count, self.source_digest = _HEADER.unpack_from(buffer, 0)
+        if magic != _MAGIC or version != ARTIFACT_FORMAT_VERSION or section_count != _SECTION_COUNT:
+            raise ValueError(f"{path} is not a skill matcher artifact (format version {ARTIFACT_FORMAT_VERSION}).")
+        if bool(little_endian) != (sys.byteorder == "little"):
+            raise ValueError(f"{path} was written on a machine with a different byte order.")
+
+        sections = []
+        for index in range(section_count):
+            offset, length = _SECTION.unpack_from(buffer, _HEADER.size + index * _SECTION.size)
+            sections.append(buffer[offset:offset + length])
+        (
+            self._edge_offsets, self._edge_chars, self._edge_targets, self._fail,
+            self._out_offsets, self._out_patterns,
+            self._pattern_lengths, self._rule_offsets, self._rule_orders, self._rule_modes,
+            self._name_offsets,
+        ) = (section.cast("I") for section in sections[:-1])
+        self._names_blob = sections[-1]
+
+        root_start, root_end = self._edge_offsets[0], self._edge_offsets[1]
+        self._root = {
+            self._edge_chars[i]: self._edge_targets[i] for i in range(root_start, root_end)
+        }
+
+    def __len__(self) -> int:
+        return len(self._name_offsets) - 1
+
+    @property
+    def skill_names(self) -> List[str]:
+        return [self._name(order) for order in range(len(self))]
+
+    def _name(self, order: int) -> str:
+        return str(self._names_blob[self._name_offsets[order]:self._name_offsets[order + 1]], "utf-8")
+
+    def _iter_hits(self, text_lower: str) -> Iterator[Tuple[int, int, List[_Rule]]]:
+        edge_offsets, edge_chars, edge_targets, fail = self._edge_offsets, self._edge_chars, self._edge_targets, self._fail
+        out_offsets, out_patterns = self._out_offsets, self._out_patterns
+        pattern_lengths, rule_offsets, rule_orders, rule_modes = (
+            self._pattern_lengths, self._rule_offsets, self._rule_orders, self._rule_modes
+        )
+        root = self._root
+        state = 0
+        for index, code in enumerate(map(ord, text_lower)):
+            while state:
+                lo, hi = edge_offsets[state], edge_offsets[state + 1]
+                if lo < hi:
+                    i = bisect_left(edge_chars, code, lo, hi)
+                    if i < hi and edge_chars[i] == code:
+                        state = edge_targets[i]
+                        break
+                state = fail[state]
+            else:
+                state = root.get(code, 0)
+            out_start = out_offsets[state]
+            out_end = out_offsets[state + 1]
+            if out_start == out_end:
+                continue
+            for i in range(out_start, out_end):
+                pattern_id = out_patterns[i]
+                rules = [
+                    (rule_orders[r], rule_modes[r])
+                    for r in range(rule_offsets[pattern_id], rule_offsets[pattern_id + 1])
+                ]
+                yield index, pattern_lengths[pattern_id], rules
+
+    def extract(self, text: str) -> List[str]:
+        if not isinstance(text, str) or len(self) == 0:
+            return []
+        text_lower = text.lower()
+        found = _collect_matches(text_lower, self._iter_hits(text_lower))
+        return list(dict.fromkeys(self._name(order) for order in sorted(found)))
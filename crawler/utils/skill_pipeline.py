@@ -0,0 +1,58 @@
+"""
+技能提取與技能分析表的常駐執行器：依序執行批次技能提取階段 (skill_extraction_stage) 與共現 / 趨勢分析表的
+增量更新 (skill_analytics)，分析表才會計入剛提取的技能；每 SKILL_PIPELINE_INTERVAL_MINUTES 分鐘執行一次。
+
+SKILL_EXTRACTION_MODE=batch (預設) 時爬蟲不提取技能，要有這個執行器才會寫入 tb_job_skills 與觀察記錄的 skills。
+以獨立行程執行 (不放在 Celery prefork 子行程內)，批次階段才能啟動自己的行程池；
+部署方式見 docker-compose-skill-pipeline-network.yml。
+
+    python -m crawler.utils.skill_pipeline [--db-name NAME] [--interval-minutes N]
+    python -m crawler.utils.skill_pipeline --once      # 只執行一次 (例如交給 cron)
+"""
+import argparse
+import time
+from typing import Dict, Optional
+
+import structlog
+
+from crawler.config import SKILL_EXTRACTION_WORKERS, SKILL_PIPELINE_INTERVAL_MINUTES
+from crawler.utils.skill_analytics import run_skill_analytics_update
+from crawler.utils.skill_extraction_stage import run_skill_extraction_stage
+
+logger = structlog.get_logger(__name__)
+
+
+def run_skill_pipeline(db_name: Optional[str] = None, workers: int = SKILL_EXTRACTION_WORKERS) -> Dict[str, int]:
+    """執行一次技能提取階段與分析表更新，回傳兩者的處理筆數。"""
+    extracted = run_skill_extraction_stage(db_name=db_name, workers=workers)
+    analyzed = run_skill_analytics_update(db_name=db_name)
+    return {"extracted": extracted, "analyzed": analyzed}
+
+
+def run_forever(db_name: Optional[str] = None, interval_minutes: float = SKILL_PIPELINE_INTERVAL_MINUTES, workers: int = SKILL_EXTRACTION_WORKERS) -> None:
+    """常駐執行：單次失敗只記錄錯誤，下一輪照常執行，不讓容器反覆重啟。"""
+    while True:
+        started = time.monotonic()
+        try:
+            result = run_skill_pipeline(db_name=db_name, workers=workers)
+            logger.info("Skill pipeline run finished.", duration_seconds=round(time.monotonic() - started, 1), **result)
+        except Exception as e:
+            logger.error("Skill pipeline run failed.", error=str(e), exc_info=True)
+        time.sleep(max(0.0, interval_minutes * 60 - (time.monotonic() - started)))
+
+
+if __name__ == "__main__":
+    from crawler.logging_config import configure_logging
+
+    configure_logging()
+    parser = argparse.ArgumentParser(description="Run the batch skill extraction stage and the skill analytics update on a schedule.")
+    parser.add_argument("--db-name", type=str, default=None, help="Database name (defaults to MYSQL_DATABASE).")
+    parser.add_argument("--workers", type=int, default=SKILL_EXTRACTION_WORKERS)
+    parser.add_argument("--interval-minutes", type=float, default=SKILL_PIPELINE_INTERVAL_MINUTES)
+    parser.add_argument("--once", action="store_true", help="Run once and exit.")
+    args = parser.parse_args()
+
+    if args.once:
+        run_skill_pipeline(db_name=args.db_name, workers=args.workers)
+    else:
+        run_forever(db_name=args.db_name, interval_minutes=args.interval_minutes, workers=args.workers)
@@ -0,0 +1,264 @@
+"""
+任務取樣分析 (profiling)：在 Docker 內的 worker 無法掛上外部 profiler 時，讓 Celery 任務自行分析並把結果寫到
+TASK_PROFILE_DIR。
+
+觸發方式 (可同時使用)：
+- TASK_PROFILE_PLATFORMS：一律分析這些平台的任務。
+- TASK_PROFILE_NEXT_N：行程啟動後分析接下來的 N 個任務。
+- 對 worker 送出 TASK_PROFILE_SIGNAL (預設 SIGUSR2)：分析接下來的 TASK_PROFILE_SIGNAL_COUNT 個任務，
+  例如 docker exec <容器> pkill -USR2 -f "celery worker"。prefork 子行程各自計數。
+- profiled 裝飾器：在 Celery 以外的入口 (本地測試、基準測試) 套用同樣的判斷。
+
+TASK_PROFILE_MODE：
+- sample：背景執行緒每 TASK_PROFILE_INTERVAL_MS 毫秒讀取所有執行緒的堆疊 (sys._current_frames)，
+  輸出 flamegraph.pl / speedscope 可讀的 folded stacks (<名稱>.folded) 與函式排行摘要 (<名稱>.txt)。
+  會涵蓋 1111 執行緒池等工作執行緒，等待中的執行緒也會出現在結果裡。
+- cprofile：以 cProfile 分析執行任務的執行緒，輸出 pstats 檔 (<名稱>.prof) 與摘要。
+
+未啟用時每個任務只多一次整數與集合的判斷。
+"""
+import cProfile
+import functools
+import io
+import os
+import pstats
+import re
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+import structlog
+
+from crawler.config import (
+    TASK_PROFILE_DIR,
+    TASK_PROFILE_INTERVAL_MS,
+    TASK_PROFILE_MODE,
+    TASK_PROFILE_NEXT_N,
+    TASK_PROFILE_PLATFORMS,
+    TASK_PROFILE_SIGNAL,
+    TASK_PROFILE_SIGNAL_COUNT,
+    TASK_PROFILE_TOP_N,
+)
+
+logger = structlog.get_logger(__name__)
+
+PROFILE_MODES = ("sample", "cprofile")
+
+_PLATFORM_PATTERN = re.compile(r"(?:^|\.)project_([A-Za-z0-9]+)\.")
+
+_armed_lock = threading.Lock()
+_armed = TASK_PROFILE_NEXT_N
+_active = threading.local()
+
+
+def task_platform(task_name: str) -> Optional[str]:
+    """由 task 名稱 (crawler.project_1111.task_urls_1111.xxx) 取出平台 (1111)。"""
+    match = _PLATFORM_PATTERN.search(task_name or "")
+    return match.group(1).lower() if match else None
+
+
+def arm(count: int) -> None:
+    """分析接下來的 count 個任務 (與尚未用完的次數累加)。"""
+    global _armed
+    with _armed_lock:
+        _armed += count
+
+
+def armed() -> int:
+    return _armed
+
+
+def should_profile(task_name: str) -> bool:
+    """判斷是否分析這個任務；預約的次數在此扣除。"""
+    global _armed
+    if not _armed and not TASK_PROFILE_PLATFORMS:
+        return False
+    if getattr(_active, "session", None) is not None:
+        return False
+    if TASK_PROFILE_PLATFORMS and task_platform(task_name) in TASK_PROFILE_PLATFORMS:
+        return True
+    with _armed_lock:
+        if _armed > 0:
+            _armed -= 1
+            return True
+    return False
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """背景執行緒定期記錄所有執行緒的堆疊；結果以 (執行緒名稱, 由外而內的 code 物件) 計數。"""
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self._thread_names: Dict[int, str] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="task-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _thread_name(self, thread_id: int) -> str:
+        name = self._thread_names.get(thread_id)
+        if name is None:
+            self._thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            name = self._thread_names.setdefault(thread_id, f"thread-{thread_id}")
+        return name
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval_seconds):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+                stack.reverse()
+                self.samples[(self._thread_name(thread_id), tuple(stack))] += 1
+            self.sample_count += 1
+
+    def folded(self) -> str:
+        """flamegraph.pl 的 folded stacks：每行「執行緒;外層函式;...;內層函式 次數」。"""
+        lines = []
+        for (thread_name, stack), count in self.samples.most_common():
+            frames = [thread_name] + [_frame_label(code) for code in stack]
+            lines.append(f"{';'.join(frame.replace(';', ':') for frame in frames)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self, top_n: int) -> str:
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        thread_counts: Counter = Counter()
+        for (thread_name, stack), count in self.samples.items():
+            thread_counts[thread_name] += count
+            if stack:
+                self_counts[_frame_label(stack[-1])] += count
+            for label in {_frame_label(code) for code in stack}:
+                total_counts[label] += count
+        total = sum(self.samples.values()) or 1
+
+        out = [f"samples: {self.sample_count} (interval {self.interval_seconds * 1000:g} ms), thread stacks: {total}", ""]
+        out.append("threads:")
+        out.extend(f"  {count:8d} {count / total:6.1%}  {name}" for name, count in thread_counts.most_common())
+        for title, counts in (("self", self_counts), ("inclusive", total_counts)):
+            out.append("")
+            out.append(f"top {top_n} functions by {title} samples:")
+            out.extend(f"  {count:8d} {count / total:6.1%}  {label}" for label, count in counts.most_common(top_n))
+        return "\n".join(out) + "\n"
+
+
+class ProfileSession:
+    """一個任務的分析；stop() 寫出結果並回傳輸出檔案的路徑 (不含副檔名)。"""
+
+    def __init__(self, label: str, mode: str = TASK_PROFILE_MODE, output_dir: str = TASK_PROFILE_DIR):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"TASK_PROFILE_MODE must be one of {PROFILE_MODES}, got {mode!r}.")
+        self.label = label
+        self.mode = mode
+        self.output_dir = output_dir
+        self._profiler: Optional[cProfile.Profile] = None
+        self._sampler: Optional[StackSampler] = None
+        self._started_at = 0.0
+
+    def start(self) -> "ProfileSession":
+        _active.session = self
+        self._started_at = time.perf_counter()
+        if self.mode == "cprofile":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            self._sampler = StackSampler(TASK_PROFILE_INTERVAL_MS / 1000)
+            self._sampler.start()
+        return self
+
+    def stop(self) -> Optional[str]:
+        if self._profiler is not None:
+            self._profiler.disable()
+        if self._sampler is not None:
+            self._sampler.stop()
+        elapsed = time.perf_counter() - self._started_at
+        _active.session = None
+        try:
+            return self._write(elapsed)
+        except Exception as e:
+            logger.warning("Failed to write task profile.", label=self.label, error=str(e))
+            return None
+
+    def _write(self, elapsed: float) -> str:
+        os.makedirs(self.output_dir, exist_ok=True)
+        safe_label = re.sub(r"[^A-Za-z0-9_.-]+", "_", self.label)
+        base = os.path.join(self.output_dir, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{safe_label}-{os.getpid()}")
+        header = f"{self.label}: {elapsed:.3f}s wall, mode={self.mode}\n"
+        if self._profiler is not None:
+            self._profiler.dump_stats(f"{base}.prof")
+            buffer = io.StringIO()
+            pstats.Stats(self._profiler, stream=buffer).sort_stats("cumulative").print_stats(TASK_PROFILE_TOP_N)
+            summary = buffer.getvalue()
+        else:
+            with open(f"{base}.folded", "w", encoding="utf-8") as f:
+                f.write(self._sampler.folded())
+            summary = self._sampler.summary(TASK_PROFILE_TOP_N)
+        with open(f"{base}.txt", "w", encoding="utf-8") as f:
+            f.write(header)
+            f.write(summary)
+        logger.info("Task profile written.", label=self.label, path=base, elapsed=round(elapsed, 3), mode=self.mode)
+        return base
+
+
+def start_task_profile(task_name: str, task_id: Optional[str] = None) -> Optional[ProfileSession]:
+    """task_prerun 使用：需要分析時開始並回傳 session，否則回傳 None。"""
+    if not should_profile(task_name):
+        return None
+    label = f"{task_name.rsplit('.', 1)[-1]}-{task_id[:8]}" if task_id else task_name.rsplit(".", 1)[-1]
+    return ProfileSession(label).start()
+
+
+def profiled(fn: Callable) -> Callable:
+    """
+    裝飾任務或其他入口函式：符合 should_profile 的呼叫會被分析。
+    在 worker 中任務已由 task_prerun 分析時不會重複分析。
+    """
+    task_name = f"{fn.__module__}.{fn.__name__}"
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        session = start_task_profile(task_name)
+        if session is None:
+            return fn(*args, **kwargs)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            session.stop()
+
+    return wrapper
+
+
+def install_signal_handler(signal_name: str = TASK_PROFILE_SIGNAL, count: int = TASK_PROFILE_SIGNAL_COUNT) -> bool:
+    """收到 signal_name 時預約分析接下來的 count 個任務；只能在主執行緒呼叫。回傳是否已安裝。"""
+    if not signal_name:
+        return False
+    signum = getattr(signal, signal_name.upper(), None)
+    if signum is None:
+        logger.warning("Unknown TASK_PROFILE_SIGNAL, profiler signal not installed.", signal=signal_name)
+        return False
+
+    def handle(received_signum, frame):
+        arm(count)
+
+    signal.signal(signum, handle)
+    return True
+
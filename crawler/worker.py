@@ -1,8 +1,16 @@
 import os # Import os module
+import time
 from celery import Celery
+from celery.signals import (
+    before_task_publish,
+    task_postrun,
+    task_prerun,
+    worker_init,
+    worker_process_init,
+    worker_process_shutdown,
+)
 import structlog
 import logging # Import logging module
-import sys # Import sys module
 
 from crawler.config import (
     RABBITMQ_HOST,
@@ -10,7 +18,14 @@ from crawler.config import (
     WORKER_ACCOUNT,
     WORKER_PASSWORD,
     LOG_LEVEL, # Import LOG_LEVEL
+    LOG_PROFILE,
+    METRICS_EXPORTER,
+    TASK_PROFILE_SIGNAL,
+    TASK_PROFILE_SIGNAL_COUNT,
 )
+from crawler.logging_config import configure_logging
+from crawler.utils import metrics, task_profiler
+from crawler.utils.http_record import install_http_recorder
 
 # configure_logging() # Removed direct call
 logger = structlog.get_logger(__name__)
@@ -23,8 +38,18 @@ logger.info(
     worker_password="***masked***",
 )
 
+# HTTP_RECORD_MODE=record / replay 時攔截所有 requests 請求 (見 crawler/utils/http_record.py)
+install_http_recorder()
+
 IS_CELERY_WORKER = os.environ.get("IS_CELERY_WORKER", "False").lower() == "true"
 
+
+# producer 與 worker 都會匯入此模組：派送時在訊息標頭記下時間，worker 開始執行時據此計算佇列等待時間
+@before_task_publish.connect
+def stamp_publish_time(sender=None, headers=None, **kwargs):
+    if headers is not None:
+        headers["crawler_published_at"] = time.time()
+
 app = Celery(
     "task",
     include=[
@@ -64,43 +89,68 @@ if IS_CELERY_WORKER:
     # Configure Celery's logging to use structlog
     @app.on_after_configure.connect
     def setup_logging(sender, **kwargs):
-        # 確保只配置一次
-        if not logging.getLogger().handlers:
-            # 配置 structlog 的處理器鏈
-            structlog.configure(
-                processors=[
-                    structlog.stdlib.add_logger_name,
-                    structlog.stdlib.add_log_level,
-                    structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
-                ],
-                logger_factory=structlog.stdlib.LoggerFactory(),
-                wrapper_class=structlog.stdlib.BoundLogger,
-                cache_logger_on_first_use=True,
-            )
-
-            # 配置標準 logging 的 formatter 和 handler
-            formatter = structlog.stdlib.ProcessorFormatter(
-                processor=structlog.dev.ConsoleRenderer(level=getattr(logging, LOG_LEVEL, logging.INFO)),
-                foreign_pre_chain=[
-                    structlog.stdlib.add_logger_name,
-                    structlog.stdlib.add_log_level,
-                ],
-            )
-
-            handler = logging.StreamHandler(sys.stdout)
-            handler.setFormatter(formatter)
-            handler.setLevel(getattr(logging, LOG_LEVEL, logging.INFO)) # Set handler level
-
-            # 配置 root logger
-            root_logger = logging.getLogger()
-            root_logger.addHandler(handler)
-            root_logger.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
-
-            # 確保 Celery 自己的日誌也通過 structlog 處理
-            logging.getLogger('celery').addHandler(handler)
-            logging.getLogger('celery').setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
-
-            logger.info("Celery 日誌系統配置完成", configured_level=LOG_LEVEL)
+        # 與 CLI / producer 共用 crawler/logging_config.py 的設定 (LOG_PROFILE)；已配置過時不會重複添加 handler。
+        # Celery 自己的日誌透過 propagate 交給 root logger 的 handler，不另外掛 handler，避免每筆輸出兩次
+        configure_logging()
+        logging.getLogger('celery').setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+        logger.info("Celery 日誌系統配置完成", configured_level=LOG_LEVEL, profile=LOG_PROFILE)
+
+    # 在主行程預先載入技能比對器 (優先 mmap 二進位檔)，prefork 子行程 fork 後直接共用同一份記憶體分頁；
+    # 與 inline 模式的爬取路徑 (extract_skills_for_crawl) 使用同一個比對器
+    @worker_init.connect
+    def preload_skill_matcher(sender=None, **kwargs):
+        from crawler.utils.run_skill_extraction import get_skill_matcher
+        matcher = get_skill_matcher(prefer_artifact=True)
+        logger.info("Skill matcher preloaded.", skills=len(matcher), backend=matcher.backend)
+
+    # 執行期指標 (crawler/utils/metrics.py)：主行程負責匯出，prefork 子行程定期寫出各自的快照
+    @worker_init.connect
+    def start_metrics_exporter(sender=None, **kwargs):
+        metrics.start_exporter(METRICS_EXPORTER)
+
+    @worker_process_init.connect
+    def start_metrics_snapshot_writer(sender=None, **kwargs):
+        if METRICS_EXPORTER != "off":
+            metrics.REGISTRY.reset()
+            metrics.start_snapshot_writer()
+
+    @worker_process_shutdown.connect
+    def flush_metrics_snapshot(sender=None, **kwargs):
+        if METRICS_EXPORTER != "off":
+            metrics.write_process_snapshot()
+
+    @task_prerun.connect
+    def observe_task_start(sender=None, task=None, **kwargs):
+        task.request.crawler_started_at = time.perf_counter()
+        published_at = getattr(task.request, "crawler_published_at", None)
+        if published_at:
+            metrics.TASK_QUEUE_WAIT.observe(max(0.0, time.time() - published_at), task=task.name)
+
+    @task_postrun.connect
+    def observe_task_end(sender=None, task=None, state=None, **kwargs):
+        started_at = getattr(task.request, "crawler_started_at", None)
+        if started_at is not None:
+            metrics.TASK_DURATION.observe(time.perf_counter() - started_at, task=task.name, state=state or "UNKNOWN")
+
+    # 任務取樣分析 (crawler/utils/task_profiler.py)：依 TASK_PROFILE_* 設定或收到 TASK_PROFILE_SIGNAL 後分析接下來的任務
+    def install_task_profiler_signal(sender=None, **kwargs):
+        if task_profiler.install_signal_handler():
+            logger.info("Task profiler signal installed.", pid=os.getpid(), signal=TASK_PROFILE_SIGNAL, count=TASK_PROFILE_SIGNAL_COUNT)
+
+    # 主行程 (solo / threads pool 在此執行任務) 與每個 prefork 子行程都要安裝
+    worker_init.connect(install_task_profiler_signal)
+    worker_process_init.connect(install_task_profiler_signal)
+
+    @task_prerun.connect
+    def start_task_profile(sender=None, task_id=None, task=None, **kwargs):
+        task.request.crawler_profile = task_profiler.start_task_profile(task.name, task_id)
+
+    @task_postrun.connect
+    def stop_task_profile(sender=None, task=None, **kwargs):
+        session = getattr(task.request, "crawler_profile", None)
+        if session is not None:
+            task.request.crawler_profile = None
+            session.stop()
 
     app.conf.task_routes = {
         "crawler.project_104.task_jobs_104.fetch_url_data_104": {"queue": "producer_jobs_104"},
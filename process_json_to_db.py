@@ -2,13 +2,14 @@ import json
 import sys
 import os
 import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Any, Dict, Iterator, List, Optional, TextIO
 
 # 為了能夠導入 crawler 模組，需要將專案根目錄添加到 Python 路徑
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
 
-from crawler.geocoding.client import geocode_address
 from crawler.database.connection import initialize_database
 from crawler.database.schemas import (
     SourcePlatform,
@@ -23,8 +24,8 @@ from crawler.database.repository import (
     upsert_jobs,
 )
 from crawler.utils.salary_parser import parse_salary_text
-from crawler.utils.run_skill_extraction import extract_skills_precise, preprocess_skills_for_extraction
-import pandas as pd
+from crawler.utils.run_skill_extraction import extract_skills_precise, get_skill_matcher
+from crawler.utils.json_stream import JsonStreamReader
 import structlog
 
 # 配置日誌
@@ -40,28 +41,6 @@ structlog.configure(
 )
 logger = structlog.get_logger(__name__)
 
-# --- Skill master data loading ---
-SKILL_MASTER_PATH = os.path.join(
-    os.path.dirname(os.path.abspath(__file__)),
-    'crawler', # Assuming this script is in the root, and skill_data is under crawler/utils
-    'utils',
-    'skill_data',
-    'generated_data',
-    'skill_master.json'
-)
-SKILL_MASTER_DF = pd.DataFrame()
-COMPILED_SKILL_PATTERNS = []
-
-try:
-    SKILL_MASTER_DF = pd.read_json(SKILL_MASTER_PATH)
-    logger.info(f"已載入技能主檔: {SKILL_MASTER_PATH}")
-    COMPILED_SKILL_PATTERNS = preprocess_skills_for_extraction(SKILL_MASTER_DF)
-    logger.info("已預處理技能模式。")
-except FileNotFoundError:
-    logger.warning(f"警告：找不到技能主檔。請先執行 `python3 -m skill_tool.run_skill_extraction --generate-kb` 來生成 {SKILL_MASTER_PATH}")
-except Exception as e:
-    logger.error(f"載入或預處理技能主檔失敗: {e}")
-
 
 def map_yes123_job_data_to_pydantic(job_data: dict) -> Optional[JobPydantic]:
     """
@@ -112,10 +91,8 @@ def map_yes123_job_data_to_pydantic(job_data: dict) -> Optional[JobPydantic]:
                 url=company_url,
             )
 
-        # 地點資訊 (從 location_text 獲取經緯度)
+        # 地點資訊：經緯度留空，匯入後由批次地理編碼 (process_geocoded.py) 補上
         location_text = job_data.get("location_text")
-        latitude = None
-        longitude = None
         region = None
         district = None
 
@@ -124,25 +101,16 @@ def map_yes123_job_data_to_pydantic(job_data: dict) -> Optional[JobPydantic]:
                 region = location_text[:3]
             district = location_text # 暫時將整個 location_text 作為 district
 
-            coordinates = geocode_address(location_text)
-            if coordinates:
-                latitude = str(coordinates["latitude"])
-                longitude = str(coordinates["longitude"])
-            else:
-                logger.warning(f"無法獲取 {location_text} 的經緯度。")
-
         location_pydantic = LocationPydantic(
             region=region,
             district=district,
             address_detail=location_text,
-            latitude=latitude,
-            longitude=longitude,
         )
 
         # 技能提取
         extracted_skills = []
-        if description and COMPILED_SKILL_PATTERNS: # Use COMPILED_SKILL_PATTERNS here
-            extracted_skills = extract_skills_precise(description, COMPILED_SKILL_PATTERNS)
+        if description:
+            extracted_skills = extract_skills_precise(description, get_skill_matcher())
         skills_pydantic = [SkillPydantic(name=skill_name) for skill_name in extracted_skills]
 
         # 職務類別 (假設 category_tags 存在於 job_data 中，或者需要從其他地方獲取)
@@ -177,74 +145,161 @@ def map_yes123_job_data_to_pydantic(job_data: dict) -> Optional[JobPydantic]:
         return None
 
 
-def process_json_file_to_db(input_filepath: str):
-    logger.info(f"開始處理檔案並寫入資料庫: {input_filepath}")
-    
-    try:
-        with open(input_filepath, 'r', encoding='utf-8') as f:
-            full_json_data = json.load(f)
-        
-        logger.debug(f"載入的 JSON 資料類型: {type(full_json_data)}")
-        if isinstance(full_json_data, list) and full_json_data:
-            logger.debug(f"載入的 JSON 資料第一個元素類型: {type(full_json_data[0])}")
-            if isinstance(full_json_data[0], dict):
-                logger.debug(f"載入的 JSON 資料第一個元素鍵: {full_json_data[0].keys()}")
-
-        jobs_data_raw = []
-        # 判斷 JSON 結構是直接的職位陣列還是包含 "table" 物件的陣列
-        if isinstance(full_json_data, list) and full_json_data and isinstance(full_json_data[0], dict) and ("source_job_id" in full_json_data[0] or "id" in full_json_data[0]):
-            jobs_data_raw = full_json_data
-            logger.info(f"偵測到直接的職位資料陣列，共 {len(jobs_data_raw)} 筆記錄。")
-        else:
-            # 尋找 type 為 "table" 的物件，並提取其 "data" 陣列
-            for item in full_json_data:
-                if item.get("type") == "table":
-                    # 假設表格名稱是 tb_jobs_yes123 或 tb_jobs_cakeresume
-                    table_name = item.get("name")
-                    if table_name and ("tb_jobs_yes123" in table_name.lower() or "tb_jobs_cakeresume" in table_name.lower()):
-                        jobs_data_raw = item.get("data", [])
-                        logger.info(f"找到表格 '{table_name}' 的資料，共 {len(jobs_data_raw)} 筆記錄。")
-                        break
-        
-        if not jobs_data_raw:
-            logger.error("在輸入 JSON 檔案中找不到任何職位表格的資料。")
+def _is_job_table(table_name: Optional[str]) -> bool:
+    # 假設表格名稱是 tb_jobs_yes123 或 tb_jobs_cakeresume
+    return bool(table_name) and ("tb_jobs_yes123" in table_name.lower() or "tb_jobs_cakeresume" in table_name.lower())
+
+
+def iter_job_records(fp: TextIO) -> Iterator[Dict[str, Any]]:
+    """
+    增量解析匯出檔，逐筆產生職位記錄。支援兩種結構：
+    直接的職位陣列 (第一個元素含 source_job_id 或 id)，
+    或 phpMyAdmin 匯出的陣列 (找第一個 type 為 "table" 且名稱符合的物件，串流其 "data" 陣列)。
+    """
+    reader = JsonStreamReader(fp)
+    direct_records = None
+    for _ in reader.iter_array():
+        if reader.peek() != "{":
+            reader.value()
+            continue
+
+        item: Dict[str, Any] = {}
+        for key in reader.iter_object():
+            if (
+                key == "data"
+                and not direct_records
+                and item.get("type") == "table"
+                and _is_job_table(item.get("name"))
+                and reader.peek() == "["
+            ):
+                logger.info(f"找到表格 '{item.get('name')}' 的資料，開始串流讀取。")
+                for _ in reader.iter_array():
+                    yield reader.value()
+                return
+            item[key] = reader.value()
+
+        if direct_records is None:
+            direct_records = "source_job_id" in item or "id" in item
+            if direct_records:
+                logger.info("偵測到直接的職位資料陣列。")
+        if direct_records:
+            yield item
+        elif item.get("type") == "table" and _is_job_table(item.get("name")):
+            # "data" 出現在 "type"/"name" 之前時無法串流，退回整個物件已解析的結果
+            logger.info(f"找到表格 '{item.get('name')}' 的資料，共 {len(item.get('data', []))} 筆記錄。")
+            yield from item.get("data", [])
             return
 
-        total_jobs = len(jobs_data_raw)
-        logger.info(f"總共有 {total_jobs} 筆職位記錄需要處理。")
 
-        # 初始化資料庫連接
-        initialize_database()
+def _init_import_worker() -> None:
+    # 每個 worker 行程只建立一次技能比對器
+    get_skill_matcher()
 
-        jobs_to_upsert = []
-        for i, job_raw in enumerate(jobs_data_raw):
-            logger.info(f"[{i+1}/{total_jobs}] 正在處理職位: {job_raw.get('title', 'N/A')} (ID: {job_raw.get('id', 'N/A')})")
-            
-            job_pydantic = map_yes123_job_data_to_pydantic(job_raw)
-            
-            if job_pydantic:
-                jobs_to_upsert.append(job_pydantic)
-            else:
-                logger.warning(f"跳過職位記錄，因為無法映射到 Pydantic: {job_raw.get('id', 'N/A')}")
 
-        if jobs_to_upsert:
-            logger.info(f"準備 upsert {len(jobs_to_upsert)} 筆職位資料到資料庫。")
-            upsert_jobs(jobs_to_upsert)
-            logger.info("所有職位資料及其關聯已成功 upsert 到資料庫。")
+def _map_records(records: List[Dict[str, Any]]) -> List[JobPydantic]:
+    jobs = []
+    for job_raw in records:
+        job_pydantic = map_yes123_job_data_to_pydantic(job_raw)
+        if job_pydantic:
+            jobs.append(job_pydantic)
         else:
-            logger.info("沒有職位資料需要 upsert。")
+            logger.warning(f"跳過職位記錄，因為無法映射到 Pydantic: {job_raw.get('id', 'N/A')}")
+    return jobs
+
+
+def _iter_chunks(records: Iterator[Dict[str, Any]], chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def process_json_file_to_db(
+    input_filepath: str,
+    workers: Optional[int] = None,
+    chunk_size: int = 500,
+    batch_size: int = 5000,
+    db_name: Optional[str] = None,
+):
+    """
+    串流匯入職位 JSON 匯出檔：邊讀邊把記錄分塊交給行程池轉換 (薪資解析、技能提取)，
+    再以每批 batch_size 筆、一個交易的方式寫入資料庫。進行中的分塊數有上限，記憶體用量與檔案大小無關。
+    地理編碼不在匯入時進行，匯入後請執行 `python process_geocoded.py` 補上經緯度。
+    """
+    logger.info(f"開始處理檔案並寫入資料庫: {input_filepath}")
+    workers = workers or os.cpu_count() or 1
+
+    # 初始化資料庫連接
+    initialize_database(db_name=db_name)
+
+    records_read = 0
+    jobs_written = 0
+    jobs_to_upsert: List[JobPydantic] = []
+
+    def write(jobs: List[JobPydantic]) -> None:
+        nonlocal jobs_written
+        upsert_jobs(jobs, db_name=db_name)
+        jobs_written += len(jobs)
+        logger.info(f"已 upsert {jobs_written} 筆職位資料 (已讀取 {records_read} 筆記錄)。")
+
+    def collect(jobs: List[JobPydantic]) -> None:
+        jobs_to_upsert.extend(jobs)
+        if len(jobs_to_upsert) >= batch_size:
+            write(jobs_to_upsert[:])
+            jobs_to_upsert.clear()
+
+    try:
+        with open(input_filepath, 'r', encoding='utf-8') as f, ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_import_worker
+        ) as pool:
+            pending = deque()
+            for chunk in _iter_chunks(iter_job_records(f), chunk_size):
+                records_read += len(chunk)
+                pending.append(pool.submit(_map_records, chunk))
+                # 限制進行中的分塊數，讀檔不會跑在轉換與寫入前面太多
+                if len(pending) >= workers * 2:
+                    collect(pending.popleft().result())
+            while pending:
+                collect(pending.popleft().result())
+
+        if jobs_to_upsert:
+            write(jobs_to_upsert)
+
+        if records_read == 0:
+            logger.error("在輸入 JSON 檔案中找不到任何職位表格的資料。")
+            return
+        logger.info(
+            "所有職位資料及其關聯已成功 upsert 到資料庫。",
+            records=records_read,
+            jobs=jobs_written,
+            skipped=records_read - jobs_written,
+        )
 
     except FileNotFoundError:
         logger.error(f"錯誤: 找不到檔案 {input_filepath}")
     except json.JSONDecodeError as e:
-        logger.error(f"錯誤: 無法解析 JSON 檔案 {input_filepath} - {e}")
+        logger.error(f"錯誤: 無法解析 JSON 檔案 {input_filepath} - {e}", records_read=records_read, jobs_written=jobs_written)
     except Exception as e:
         logger.error(f"處理過程中發生未知錯誤: {e}", exc_info=True)
 
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="處理 phpMyAdmin 匯出的 JSON 檔案，進行地理編碼並寫入資料庫。")
+    parser = argparse.ArgumentParser(description="處理 phpMyAdmin 匯出的 JSON 檔案並寫入資料庫 (地理編碼由 process_geocoded.py 批次處理)。")
     parser.add_argument("input_file", help="輸入的 JSON 檔案路徑 (例如: tb_jobs_yes123.json)")
-    
+    parser.add_argument("--workers", type=int, default=None, help="轉換記錄的行程數 (預設為 CPU 核心數)。")
+    parser.add_argument("--chunk-size", type=int, default=500, help="每個行程池任務的記錄數。")
+    parser.add_argument("--batch-size", type=int, default=5000, help="每個資料庫交易寫入的職位數。")
+    parser.add_argument("--db-name", type=str, default=None, help="資料庫名稱 (預設為 MYSQL_DATABASE)。")
+
     args = parser.parse_args()
-    
-    process_json_file_to_db(args.input_file)
\ No newline at end of file
+
+    process_json_file_to_db(
+        args.input_file,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        batch_size=args.batch_size,
+        db_name=args.db_name,
+    )
\ No newline at end of file